@@ -1,4 +1,4 @@
-from django.contrib import admin
+from django.contrib import admin, messages
 from django import forms
 from django.utils import timezone
 from django.utils.html import format_html
@@ -8,6 +8,7 @@ from .models import (
     Fertilizante, Labor, ProductoCosechado, Pedido, 
     DetallePedido, Pago, PaymentMethod
 )
+from . import autenticacion, transiciones, versiones
 
 # Register your models here.
 
@@ -16,6 +17,23 @@ admin.site.site_header = "🌱 Cooperativa Agrícola – Panel Administrativo"
 admin.site.site_title = "Cooperativa Admin"
 admin.site.index_title = "Inicio del Panel"
 
+
+def cambiar_estado(modeladmin, request, queryset, recurso, estado):
+    """Acciones marcar_como_*: transición masiva validada y registrada en bitácora"""
+    reporte = transiciones.aplicar_transicion(
+        recurso, estado, ids=list(queryset.values_list('pk', flat=True)), usuario=request.user,
+        cliente=autenticacion.datos_cliente(request), origen='admin'
+    )
+    omitidos = [r for r in reporte['rechazados'] if r['motivo'] != 'sin_cambio']
+    if omitidos:
+        modeladmin.message_user(
+            request,
+            f'{len(omitidos)} registro(s) omitido(s): {omitidos[0]["detalle"]}',
+            level=messages.WARNING
+        )
+    return reporte['actualizados']
+
+
 @admin.register(Rol)
 class RolAdmin(admin.ModelAdmin):
     list_display = ('id', 'nombre', 'descripcion', 'es_sistema', 'creado_en')
@@ -399,7 +417,7 @@ class SemillaAdmin(admin.ModelAdmin):
     dias_para_vencer.short_description = 'Días para Vencer'
 
     def marcar_como_disponible(self, request, queryset):
-        updated = queryset.update(estado='DISPONIBLE')
+        updated = cambiar_estado(self, request, queryset, 'semillas', 'DISPONIBLE')
         self.message_user(
             request,
             f'{updated} semilla(s) marcada(s) como disponible(s).'
@@ -407,7 +425,7 @@ class SemillaAdmin(admin.ModelAdmin):
     marcar_como_disponible.short_description = "Marcar como Disponible"
 
     def marcar_como_agotada(self, request, queryset):
-        updated = queryset.update(estado='AGOTADA')
+        updated = cambiar_estado(self, request, queryset, 'semillas', 'AGOTADA')
         self.message_user(
             request,
             f'{updated} semilla(s) marcada(s) como agotada(s).'
@@ -415,7 +433,7 @@ class SemillaAdmin(admin.ModelAdmin):
     marcar_como_agotada.short_description = "Marcar como Agotada"
 
     def marcar_como_vencida(self, request, queryset):
-        updated = queryset.update(estado='VENCIDA')
+        updated = cambiar_estado(self, request, queryset, 'semillas', 'VENCIDA')
         self.message_user(
             request,
             f'{updated} semilla(s) marcada(s) como vencida(s).'
@@ -423,7 +441,7 @@ class SemillaAdmin(admin.ModelAdmin):
     marcar_como_vencida.short_description = "Marcar como Vencida"
 
     def marcar_como_reservada(self, request, queryset):
-        updated = queryset.update(estado='RESERVADA')
+        updated = cambiar_estado(self, request, queryset, 'semillas', 'RESERVADA')
         self.message_user(
             request,
             f'{updated} semilla(s) marcada(s) como reservada(s).'
@@ -552,7 +570,7 @@ class PesticidaAdmin(admin.ModelAdmin):
     dias_para_vencer.short_description = 'Días para Vencer'
 
     def marcar_como_disponible(self, request, queryset):
-        updated = queryset.update(estado='DISPONIBLE')
+        updated = cambiar_estado(self, request, queryset, 'pesticidas', 'DISPONIBLE')
         self.message_user(
             request,
             f'{updated} pesticida(s) marcado(s) como disponible(s).'
@@ -560,7 +578,7 @@ class PesticidaAdmin(admin.ModelAdmin):
     marcar_como_disponible.short_description = "Marcar como Disponible"
 
     def marcar_como_agotado(self, request, queryset):
-        updated = queryset.update(estado='AGOTADO')
+        updated = cambiar_estado(self, request, queryset, 'pesticidas', 'AGOTADO')
         self.message_user(
             request,
             f'{updated} pesticida(s) marcado(s) como agotado(s).'
@@ -568,7 +586,7 @@ class PesticidaAdmin(admin.ModelAdmin):
     marcar_como_agotado.short_description = "Marcar como Agotado"
 
     def marcar_como_vencido(self, request, queryset):
-        updated = queryset.update(estado='VENCIDO')
+        updated = cambiar_estado(self, request, queryset, 'pesticidas', 'VENCIDO')
         self.message_user(
             request,
             f'{updated} pesticida(s) marcado(s) como vencido(s).'
@@ -576,7 +594,7 @@ class PesticidaAdmin(admin.ModelAdmin):
     marcar_como_vencido.short_description = "Marcar como Vencida"
 
     def marcar_como_en_cuarentena(self, request, queryset):
-        updated = queryset.update(estado='EN_CUARENTENA')
+        updated = cambiar_estado(self, request, queryset, 'pesticidas', 'EN_CUARENTENA')
         self.message_user(
             request,
             f'{updated} pesticida(s) marcado(s) en cuarentena.'
@@ -713,7 +731,7 @@ class FertilizanteAdmin(admin.ModelAdmin):
     npk_values.short_description = 'Valores NPK'
 
     def marcar_como_disponible(self, request, queryset):
-        updated = queryset.update(estado='DISPONIBLE')
+        updated = cambiar_estado(self, request, queryset, 'fertilizantes', 'DISPONIBLE')
         self.message_user(
             request,
             f'{updated} fertilizante(s) marcado(s) como disponible(s).'
@@ -721,7 +739,7 @@ class FertilizanteAdmin(admin.ModelAdmin):
     marcar_como_disponible.short_description = "Marcar como Disponible"
 
     def marcar_como_agotado(self, request, queryset):
-        updated = queryset.update(estado='AGOTADO')
+        updated = cambiar_estado(self, request, queryset, 'fertilizantes', 'AGOTADO')
         self.message_user(
             request,
             f'{updated} fertilizante(s) marcado(s) como agotado(s).'
@@ -729,7 +747,7 @@ class FertilizanteAdmin(admin.ModelAdmin):
     marcar_como_agotado.short_description = "Marcar como Agotado"
 
     def marcar_como_vencido(self, request, queryset):
-        updated = queryset.update(estado='VENCIDO')
+        updated = cambiar_estado(self, request, queryset, 'fertilizantes', 'VENCIDO')
         self.message_user(
             request,
             f'{updated} fertilizante(s) marcado(s) como vencido(s).'
@@ -737,7 +755,7 @@ class FertilizanteAdmin(admin.ModelAdmin):
     marcar_como_vencido.short_description = "Marcar como Vencido"
 
     def marcar_como_en_cuarentena(self, request, queryset):
-        updated = queryset.update(estado='EN_CUARENTENA')
+        updated = cambiar_estado(self, request, queryset, 'fertilizantes', 'EN_CUARENTENA')
         self.message_user(
             request,
             f'{updated} fertilizante(s) marcado(s) en cuarentena.'
@@ -926,7 +944,7 @@ class LaborAdmin(admin.ModelAdmin):
 
     def marcar_como_completada(self, request, queryset):
         """Acción para marcar labores como completadas"""
-        updated = queryset.update(estado='COMPLETADA')
+        updated = cambiar_estado(self, request, queryset, 'labores', 'COMPLETADA')
         self.message_user(
             request, 
             f'{updated} labor(es) marcada(s) como completada(s).'
@@ -935,7 +953,7 @@ class LaborAdmin(admin.ModelAdmin):
 
     def marcar_como_en_proceso(self, request, queryset):
         """Acción para marcar labores como en proceso"""
-        updated = queryset.update(estado='EN_PROCESO')
+        updated = cambiar_estado(self, request, queryset, 'labores', 'EN_PROCESO')
         self.message_user(
             request, 
             f'{updated} labor(es) marcada(s) como en proceso.'
@@ -944,7 +962,7 @@ class LaborAdmin(admin.ModelAdmin):
 
     def marcar_como_planificada(self, request, queryset):
         """Acción para marcar labores como planificadas"""
-        updated = queryset.update(estado='PLANIFICADA')
+        updated = cambiar_estado(self, request, queryset, 'labores', 'PLANIFICADA')
         self.message_user(
             request, 
             f'{updated} labor(es) marcada(s) como planificada(s).'
@@ -953,7 +971,7 @@ class LaborAdmin(admin.ModelAdmin):
 
     def marcar_como_cancelada(self, request, queryset):
         """Acción para marcar labores como canceladas"""
-        updated = queryset.update(estado='CANCELADA')
+        updated = cambiar_estado(self, request, queryset, 'labores', 'CANCELADA')
         self.message_user(
             request, 
             f'{updated} labor(es) marcada(s) como cancelada(s).'
@@ -1127,7 +1145,7 @@ class ProductoCosechadoAdmin(admin.ModelAdmin):
     
     def marcar_como_vendido(self, request, queryset):
         """Acción para marcar productos como vendidos"""
-        updated = queryset.update(estado='Vendido')
+        updated = cambiar_estado(self, request, queryset, 'productos-cosechados', 'Vendido')
         self.message_user(
             request, 
             f'{updated} productos marcados como vendidos.'
@@ -1136,7 +1154,7 @@ class ProductoCosechadoAdmin(admin.ModelAdmin):
     
     def marcar_como_procesado(self, request, queryset):
         """Acción para marcar productos como procesados"""
-        updated = queryset.update(estado='Procesado')
+        updated = cambiar_estado(self, request, queryset, 'productos-cosechados', 'Procesado')
         self.message_user(
             request, 
             f'{updated} productos marcados como procesados.'
@@ -1145,7 +1163,7 @@ class ProductoCosechadoAdmin(admin.ModelAdmin):
     
     def marcar_como_vencido(self, request, queryset):
         """Acción para marcar productos como vencidos"""
-        updated = queryset.update(estado='Vencido')
+        updated = cambiar_estado(self, request, queryset, 'productos-cosechados', 'Vencido')
         self.message_user(
             request, 
             f'{updated} productos marcados como vencidos.'
@@ -1684,6 +1702,8 @@ class PaymentMethodAdmin(admin.ModelAdmin):
     def activar_metodos(self, request, queryset):
         """Acción para activar métodos de pago seleccionados"""
         updated = queryset.update(activo=True)
+        # update() no dispara señales: renovar el ETag del catálogo
+        versiones.incrementar(PaymentMethod)
         self.message_user(
             request, 
             f'{updated} método(s) de pago activado(s).'
@@ -1693,6 +1713,8 @@ class PaymentMethodAdmin(admin.ModelAdmin):
     def desactivar_metodos(self, request, queryset):
         """Acción para desactivar métodos de pago seleccionados"""
         updated = queryset.update(activo=False)
+        # update() no dispara señales: renovar el ETag del catálogo
+        versiones.incrementar(PaymentMethod)
         self.message_user(
             request, 
             f'{updated} método(s) de pago desactivado(s).'
@@ -12,6 +12,7 @@ from django.urls import reverse, path
 from django.http import HttpResponse
 from .models import Campaign, CampaignPartner, CampaignPlot
 from .reports import CampaignReports
+from . import versiones
 
 
 class CampaignPartnerInline(admin.TabularInline):
@@ -410,6 +411,7 @@ class CampaignAdmin(admin.ModelAdmin):
     def marcar_en_curso(self, request, queryset):
         """Marcar campanias seleccionadas como EN_CURSO"""
         updated = queryset.update(estado='EN_CURSO')
+        versiones.incrementar(Campaign)  # update() no dispara señales
         self.message_user(
             request,
             f'{updated} campania(s) marcada(s) como EN CURSO.'
@@ -419,6 +421,7 @@ class CampaignAdmin(admin.ModelAdmin):
     def marcar_finalizada(self, request, queryset):
         """Marcar campanias seleccionadas como FINALIZADA"""
         updated = queryset.update(estado='FINALIZADA')
+        versiones.incrementar(Campaign)  # update() no dispara señales
         self.message_user(
             request,
             f'{updated} campania(s) marcada(s) como FINALIZADA.'
@@ -428,6 +431,7 @@ class CampaignAdmin(admin.ModelAdmin):
     def marcar_cancelada(self, request, queryset):
         """Marcar campanias seleccionadas como CANCELADA"""
         updated = queryset.update(estado='CANCELADA')
+        versiones.incrementar(Campaign)  # update() no dispara señales
         self.message_user(
             request,
             f'{updated} campania(s) marcada(s) como CANCELADA.'
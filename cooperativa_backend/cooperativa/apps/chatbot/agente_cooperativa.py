@@ -12,7 +12,9 @@ if not settings.configured:
     os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cooperativa_backend.settings')
     django.setup()
 
+from cooperativa import catalogo_insumos
 from cooperativa.models import Semilla, Pesticida, Fertilizante
+from cooperativa.busqueda import buscar
 
 # -------------------- Configuración del modelo IA --------------------
 # Usaremos el mismo modelo que ya está configurado en chatbot.py
@@ -530,12 +532,14 @@ def consultar_disponibilidad_semillas(especie=None, variedad=None):
     try:
         queryset = Semilla.objects.filter(estado='DISPONIBLE')
 
-        if especie:
-            queryset = queryset.filter(especie__icontains=especie)
         if variedad:
             queryset = queryset.filter(variedad__icontains=variedad)
 
-        semillas = queryset.order_by('especie', 'variedad')
+        if especie:
+            # Sin acentos y ordenado por relevancia ("maiz" encuentra "Maíz")
+            semillas = buscar(queryset, especie)
+        else:
+            semillas = queryset.order_by('especie', 'variedad')
 
         resultados = []
         for semilla in semillas[:10]:  # Limitar a 10 resultados
@@ -566,10 +570,11 @@ def consultar_disponibilidad_pesticidas(tipo=None, ingrediente=None):
 
         if tipo:
             queryset = queryset.filter(tipo_pesticida__icontains=tipo)
-        if ingrediente:
-            queryset = queryset.filter(ingrediente_activo__icontains=ingrediente)
 
-        pesticidas = queryset.order_by('tipo_pesticida', 'nombre_comercial')
+        if ingrediente:
+            pesticidas = buscar(queryset, ingrediente)
+        else:
+            pesticidas = queryset.order_by('tipo_pesticida', 'nombre_comercial')
 
         resultados = []
         for pesticida in pesticidas[:10]:  # Limitar a 10 resultados
@@ -810,9 +815,10 @@ def generar_respuesta_sin_ia(mensaje, historial, info_productos):
     if es_saludo:
         # Saludo personalizado con información de productos
         try:
-            num_semillas = Semilla.objects.filter(estado='DISPONIBLE').count()
-            num_pesticidas = Pesticida.objects.filter(estado='DISPONIBLE').count() 
-            num_fertilizantes = Fertilizante.objects.filter(estado='DISPONIBLE').count()
+            disponibles = catalogo_insumos.conteo_disponibles()
+            num_semillas = disponibles['SEMILLA']
+            num_pesticidas = disponibles['PESTICIDA']
+            num_fertilizantes = disponibles['FERTILIZANTE']
             
             nombre = historial.get("nombre", "")
             saludo_nombre = f"¡Hola {nombre}!" if nombre else "¡Hola!"
@@ -871,9 +877,10 @@ def generar_respuesta_sin_ia(mensaje, historial, info_productos):
     
     elif any(palabra in mensaje_lower for palabra in ["productos", "product", "ofrecen", "tienen", "disponible", "inventario", "catalogo", "catálogo"]):
         try:
-            num_semillas = Semilla.objects.filter(estado='DISPONIBLE').count()
-            num_pesticidas = Pesticida.objects.filter(estado='DISPONIBLE').count()
-            num_fertilizantes = Fertilizante.objects.filter(estado='DISPONIBLE').count()
+            disponibles = catalogo_insumos.conteo_disponibles()
+            num_semillas = disponibles['SEMILLA']
+            num_pesticidas = disponibles['PESTICIDA']
+            num_fertilizantes = disponibles['FERTILIZANTE']
             
             respuesta = "¡Claro! Tenemos estos productos disponibles:\n\n"
             respuesta += f"🌱 SEMILLAS: {num_semillas} variedades\n"
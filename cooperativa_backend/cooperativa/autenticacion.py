@@ -0,0 +1,209 @@
+"""
+CU1: Pipeline de login
+T011: Autenticación y gestión de sesiones
+T030: Bitácora extendida - intentos fallidos y bloqueo de cuenta
+
+Los intentos fallidos se cuentan en la caché compartida con incrementos
+atómicos; la base de datos solo se actualiza cuando el contador cambia y
+únicamente en las columnas afectadas.
+"""
+
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+from django.utils import timezone
+
+from .models import Usuario, BitacoraAuditoria
+
+
+logger = logging.getLogger('cooperativa.auth')
+
+MAX_INTENTOS_FALLIDOS = getattr(settings, 'LOGIN_MAX_INTENTOS_FALLIDOS', 5)
+VENTANA_INTENTOS_SEGUNDOS = getattr(settings, 'LOGIN_VENTANA_INTENTOS_SEGUNDOS', 15 * 60)
+
+_executor_bitacora = None
+
+
+def _identidad_cuenta(usuario_id, date_joined):
+    """
+    Identifica la cuenta en las claves de caché. Incluir date_joined evita que
+    un contador viejo se aplique a otra cuenta con el mismo nombre de usuario.
+    """
+    return f'{usuario_id}:{date_joined.timestamp():.6f}'
+
+
+def _clave_intentos(identidad):
+    return f'login:intentos:{identidad}'
+
+
+def _clave_bloqueo(username):
+    return f'login:bloqueo:{username.lower().strip()}'
+
+
+def esta_bloqueado(username):
+    """
+    Consulta rápida antes de autenticar: evita hashear la contraseña de una
+    cuenta bloqueada. Solo consulta la BD si hay una marca de bloqueo en caché.
+    """
+    clave = _clave_bloqueo(username)
+    identidad = cache.get(clave)
+    if not identidad:
+        return False
+
+    cuenta = Usuario.objects.filter(usuario=username.lower().strip()).values_list(
+        'id', 'date_joined', 'estado'
+    ).first()
+    if cuenta is None or cuenta[2] != 'BLOQUEADO' or _identidad_cuenta(cuenta[0], cuenta[1]) != identidad:
+        cache.delete(clave)
+        return False
+    return True
+
+
+def incrementar_intentos(identidad, valor_inicial=0):
+    """
+    Incrementa de forma atómica el contador de intentos fallidos.
+    Si la clave no existe se siembra con el valor persistido en la BD.
+    """
+    clave = _clave_intentos(identidad)
+    cache.add(clave, valor_inicial, VENTANA_INTENTOS_SEGUNDOS)
+    try:
+        return cache.incr(clave)
+    except ValueError:
+        # La clave expiró entre add() e incr()
+        cache.set(clave, valor_inicial + 1, VENTANA_INTENTOS_SEGUNDOS)
+        return valor_inicial + 1
+
+
+def limpiar_intentos(usuario):
+    """Elimina contador y bloqueo en caché (p. ej. al reactivar un usuario)"""
+    cache.delete_many([
+        _clave_intentos(_identidad_cuenta(usuario.id, usuario.date_joined)),
+        _clave_bloqueo(usuario.usuario),
+    ])
+
+
+def limpiar_intentos_masivo(cuentas):
+    """Igual que limpiar_intentos para varias cuentas (id, date_joined, usuario) en una llamada"""
+    claves = []
+    for usuario_id, date_joined, username in cuentas:
+        claves.append(_clave_intentos(_identidad_cuenta(usuario_id, date_joined)))
+        claves.append(_clave_bloqueo(username))
+    if claves:
+        cache.delete_many(claves)
+
+
+def datos_cliente(request):
+    return {
+        'ip': request.META.get('REMOTE_ADDR'),
+        'user_agent': request.META.get('HTTP_USER_AGENT') or 'Unknown',
+    }
+
+
+def registrar_bitacora(usuario, accion, detalles, cliente):
+    """
+    Registra el evento de autenticación en la bitácora.
+    Con LOGIN_BITACORA_ASINCRONA=True el INSERT se hace fuera del request.
+    """
+    kwargs = {
+        'usuario_id': usuario.id if usuario else None,
+        'accion': accion,
+        'tabla_afectada': 'usuario',
+        'registro_id': usuario.id if usuario else 0,
+        'detalles': detalles,
+        'ip_address': cliente['ip'],
+        'user_agent': cliente['user_agent'],
+    }
+
+    if not getattr(settings, 'LOGIN_BITACORA_ASINCRONA', False):
+        BitacoraAuditoria.objects.create(**kwargs)
+        return
+
+    global _executor_bitacora
+    if _executor_bitacora is None:
+        _executor_bitacora = ThreadPoolExecutor(max_workers=2, thread_name_prefix='bitacora')
+    _executor_bitacora.submit(_crear_bitacora_en_hilo, kwargs)
+
+
+def _crear_bitacora_en_hilo(kwargs):
+    try:
+        BitacoraAuditoria.objects.create(**kwargs)
+    except Exception:
+        logger.exception('bitacora_error', extra={'accion': kwargs['accion']})
+    finally:
+        close_old_connections()
+
+
+def registrar_login_exitoso(request, user):
+    """Resetea el contador solo si había intentos fallidos y registra el LOGIN"""
+    cliente = datos_cliente(request)
+    ahora = timezone.now()
+
+    campos = ['ultimo_intento']
+    user.ultimo_intento = ahora
+    if user.intentos_fallidos:
+        user.intentos_fallidos = 0
+        campos.append('intentos_fallidos')
+        cache.delete(_clave_intentos(_identidad_cuenta(user.id, user.date_joined)))
+    user.save(update_fields=campos)
+
+    registrar_bitacora(user, 'LOGIN', {
+        'ip': cliente['ip'],
+        'user_agent': cliente['user_agent'],
+        'metodo_autenticacion': 'credenciales',
+        'estado_usuario': user.estado
+    }, cliente)
+
+    logger.info('login_exitoso', extra={'usuario': user.usuario, 'ip': cliente['ip']})
+
+
+def registrar_login_fallido(request, username):
+    """
+    Cuenta el intento fallido y bloquea la cuenta al superar el máximo.
+
+    Returns:
+        bool: True si la cuenta quedó bloqueada con este intento
+    """
+    cliente = datos_cliente(request)
+    user = Usuario.objects.filter(usuario=username.lower().strip()).only(
+        'id', 'usuario', 'estado', 'intentos_fallidos', 'date_joined'
+    ).first()
+
+    if user is None:
+        logger.info('login_fallido', extra={'usuario': username, 'ip': cliente['ip'], 'existe': False})
+        return False
+
+    identidad = _identidad_cuenta(user.id, user.date_joined)
+    intentos = incrementar_intentos(identidad, valor_inicial=user.intentos_fallidos)
+    ahora = timezone.now()
+    bloqueado = intentos >= MAX_INTENTOS_FALLIDOS and user.estado != 'BLOQUEADO'
+
+    user.intentos_fallidos = intentos
+    user.ultimo_intento = ahora
+    campos = ['intentos_fallidos', 'ultimo_intento']
+    if bloqueado:
+        user.estado = 'BLOQUEADO'
+        user.fecha_bloqueo = ahora
+        campos += ['estado', 'fecha_bloqueo']
+        cache.set(_clave_bloqueo(user.usuario), identidad, VENTANA_INTENTOS_SEGUNDOS)
+    user.save(update_fields=campos)
+
+    registrar_bitacora(user, 'LOGIN_FALLIDO', {
+        'ip': cliente['ip'],
+        'user_agent': cliente['user_agent'],
+        'intentos_fallidos': intentos
+    }, cliente)
+
+    if bloqueado:
+        registrar_bitacora(user, 'BLOQUEO_CUENTA', {
+            'ip': cliente['ip'],
+            'intentos_fallidos': intentos,
+            'razon': 'Máximo de intentos fallidos superado'
+        }, cliente)
+        logger.warning('cuenta_bloqueada', extra={'usuario': user.usuario, 'ip': cliente['ip'], 'intentos': intentos})
+    else:
+        logger.info('login_fallido', extra={'usuario': user.usuario, 'ip': cliente['ip'], 'intentos': intentos})
+
+    return bloqueado
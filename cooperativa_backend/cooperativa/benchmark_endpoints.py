@@ -0,0 +1,271 @@
+"""
+Benchmark de endpoints y regresión de número de consultas
+
+Recorre todas las rutas GET de cooperativa/urls.py (vistas explícitas,
+ViewSets del router y sus @action), resuelve los parámetros de la URL con
+registros existentes y mide por endpoint:
+- número exacto de consultas SQL (CaptureQueriesContext),
+- tiempo de respuesta p50/p95/máx sobre N repeticiones,
+- código de estado y tamaño de la respuesta.
+
+El resultado se guarda como baseline JSON y las corridas siguientes se
+comparan contra él: un endpoint regresa si ejecuta más consultas que el
+baseline (p. ej. un N+1 en un serializer), si su p50 empeora más allá del
+umbral relativo y absoluto configurado o si responde 5xx. Un baseline con
+respuestas 5xx no se guarda: mediría el costo de un error, no del endpoint.
+"""
+
+import json
+import re
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from django.conf import settings
+from django.db import DatabaseError, connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+
+from .models import (
+    Usuario, Socio, Parcela, TransferenciaParcela, PaymentMethod, Campaign
+)
+
+
+BASELINE_POR_DEFECTO = Path(settings.BASE_DIR) / 'benchmarks' / 'endpoints_baseline.json'
+
+# Parámetros de URL de vistas explícitas -> modelo del que se toma una pk
+MODELOS_PARAMETRO = {
+    'socio_id': Socio,
+    'usuario_id': Usuario,
+    'user_id': Usuario,
+    'transferencia_id': TransferenciaParcela,
+}
+MODELOS_POR_RUTA = {
+    'validar-eliminacion-metodo-pago': PaymentMethod,
+    'activar-desactivar-metodo-pago': PaymentMethod,
+}
+
+
+def _primera(modelo):
+    return modelo.objects.order_by('pk').values_list('pk', flat=True).first()
+
+
+def _parametros_cercanas():
+    parcela = Parcela.objects.filter(latitud__isnull=False).values('latitud', 'longitud').first()
+    if parcela is None:
+        return None
+    return {'lat': parcela['latitud'], 'lng': parcela['longitud'], 'radio_km': 10}
+
+
+def _con_campania():
+    campania = _primera(Campaign)
+    return {'campaign_id': campania} if campania else None
+
+
+def _con_parcela():
+    parcela = _primera(Parcela)
+    return {'plot_id': parcela} if parcela else None
+
+
+# Endpoints que exigen parámetros de consulta
+CONSULTA_POR_RUTA = {
+    'parcela-cercanas': _parametros_cercanas,
+    'report-labors-by-campaign': _con_campania,
+    'report-production-by-campaign': _con_campania,
+    'report-production-by-plot': _con_parcela,
+    'buscar-socios-por-cultivo': lambda: {'especie': 'Soya'},
+    'labor-reporte-labores-por-periodo': lambda: {'fecha_desde': '2024-01-01', 'fecha_hasta': '2024-12-31'},
+}
+
+
+@dataclass
+class Endpoint:
+    nombre: str
+    url: str
+    consulta: dict = None
+    omitido: str = ''
+
+
+@dataclass
+class ResultadoEndpoint:
+    nombre: str
+    url: str
+    estado: int
+    consultas: int
+    p50_ms: float
+    p95_ms: float
+    max_ms: float
+    bytes: int
+
+
+def _recorrer(patrones, prefijo=''):
+    for patron in patrones:
+        if isinstance(patron, URLResolver):
+            yield from _recorrer(patron.url_patterns, prefijo + str(patron.pattern))
+        elif isinstance(patron, URLPattern):
+            yield prefijo + str(patron.pattern), patron
+
+
+def _admite_get(callback):
+    acciones = getattr(callback, 'actions', None)
+    if acciones is not None:
+        return 'get' in acciones
+    clase = getattr(callback, 'cls', None) or getattr(callback, 'view_class', None)
+    return clase is not None and hasattr(clase, 'get')
+
+
+def _modelo_de(patron, parametro):
+    if patron.name in MODELOS_POR_RUTA:
+        return MODELOS_POR_RUTA[patron.name]
+    if parametro in MODELOS_PARAMETRO:
+        return MODELOS_PARAMETRO[parametro]
+    clase = getattr(patron.callback, 'cls', None)
+    queryset = getattr(clase, 'queryset', None)
+    if parametro == 'pk' and queryset is not None:
+        return queryset.model
+    return None
+
+
+def descubrir_endpoints(urlconf=None, filtro=None):
+    """
+    Lista las rutas GET bajo api/ con sus parámetros resueltos.
+    Las que no se pueden resolver se devuelven con `omitido` = motivo.
+    """
+    endpoints, vistos = [], set()
+    for ruta, patron in _recorrer(get_resolver(urlconf).url_patterns):
+        if not ruta.startswith('api/') or not patron.name or patron.name in vistos:
+            continue
+        if 'format' in patron.pattern.regex.groupindex:
+            continue
+        if filtro and not re.search(filtro, patron.name):
+            continue
+        vistos.add(patron.name)
+        if not _admite_get(patron.callback):
+            continue
+
+        kwargs, motivo = {}, ''
+        for parametro in patron.pattern.regex.groupindex:
+            modelo = _modelo_de(patron, parametro)
+            try:
+                pk = _primera(modelo) if modelo else None
+            except DatabaseError:
+                # Tabla ausente en esta base (p. ej. migración pendiente)
+                pk = None
+            if pk is None:
+                motivo = f'sin datos para {parametro}'
+                break
+            kwargs[parametro] = pk
+
+        consulta = None
+        if not motivo and patron.name in CONSULTA_POR_RUTA:
+            consulta = CONSULTA_POR_RUTA[patron.name]()
+            if consulta is None:
+                motivo = 'sin datos para los parámetros de consulta'
+
+        url = ruta if motivo else reverse(patron.name, kwargs=kwargs, urlconf=urlconf)
+        endpoints.append(Endpoint(patron.name, url, consulta, motivo))
+    return endpoints
+
+
+def _percentil(valores, p):
+    return valores[min(len(valores) - 1, int(len(valores) * p / 100))]
+
+
+def medir(endpoint, cliente, repeticiones=5):
+    """Una llamada de calentamiento y `repeticiones` medidas"""
+    cliente.get(endpoint.url, endpoint.consulta)
+    tiempos, consultas, respuesta = [], 0, None
+    for _ in range(repeticiones):
+        with CaptureQueriesContext(connection) as capturadas:
+            inicio = time.perf_counter()
+            respuesta = cliente.get(endpoint.url, endpoint.consulta)
+            tiempos.append((time.perf_counter() - inicio) * 1000)
+        # Se reporta el máximo: una consulta extra en cualquier repetición también cuenta
+        consultas = max(consultas, len(capturadas))
+    tiempos.sort()
+    return ResultadoEndpoint(
+        nombre=endpoint.nombre,
+        url=endpoint.url,
+        estado=respuesta.status_code,
+        consultas=consultas,
+        p50_ms=round(_percentil(tiempos, 50), 2),
+        p95_ms=round(_percentil(tiempos, 95), 2),
+        max_ms=round(tiempos[-1], 2),
+        bytes=len(getattr(respuesta, 'content', b'') or b''),
+    )
+
+
+def ejecutar(usuario, endpoints, repeticiones=5, al_medir=None):
+    cliente = Client(raise_request_exception=False)
+    cliente.force_login(usuario)
+    resultados = []
+    for endpoint in endpoints:
+        if endpoint.omitido:
+            continue
+        resultado = medir(endpoint, cliente, repeticiones)
+        resultados.append(resultado)
+        if al_medir:
+            al_medir(resultado)
+    return resultados
+
+
+def errores_servidor(resultados):
+    return sorted(r.nombre for r in resultados if r.estado >= 500)
+
+
+def guardar_baseline(resultados, ruta=BASELINE_POR_DEFECTO, metadatos=None):
+    errores = errores_servidor(resultados)
+    if errores:
+        raise ValueError(f"{len(errores)} endpoints responden 5xx: {', '.join(errores)}")
+    ruta = Path(ruta)
+    ruta.parent.mkdir(parents=True, exist_ok=True)
+    datos = {
+        'metadatos': metadatos or {},
+        'endpoints': {r.nombre: asdict(r) for r in sorted(resultados, key=lambda r: r.nombre)},
+    }
+    ruta.write_text(json.dumps(datos, indent=2, ensure_ascii=False) + '\n', encoding='utf-8')
+    return ruta
+
+
+def cargar_baseline(ruta=BASELINE_POR_DEFECTO):
+    return json.loads(Path(ruta).read_text(encoding='utf-8'))
+
+
+def comparar(resultados, baseline, umbral_consultas=0, umbral_tiempo=0.5, minimo_ms=5.0):
+    """
+    Con umbral_tiempo=None solo se comparan consultas y estado (tiempos
+    medidos en otra máquina no son comparables).
+
+    Returns:
+        dict: regresiones [{nombre, motivo}], mejoras [nombre], nuevos [nombre]
+    """
+    base = baseline.get('endpoints', {})
+    regresiones, mejoras, nuevos = [], [], []
+    for resultado in resultados:
+        anterior = base.get(resultado.nombre)
+        # Un 5xx es regresión aunque el endpoint sea nuevo o ya fallara antes
+        if resultado.estado >= 500:
+            regresiones.append({
+                'nombre': resultado.nombre,
+                'motivo': f"estado {anterior['estado'] if anterior else '-'} -> {resultado.estado}",
+            })
+        if anterior is None:
+            nuevos.append(resultado.nombre)
+            continue
+        if resultado.consultas > anterior['consultas'] + umbral_consultas:
+            regresiones.append({
+                'nombre': resultado.nombre,
+                'motivo': f"consultas {anterior['consultas']} -> {resultado.consultas}",
+            })
+        elif resultado.consultas < anterior['consultas']:
+            mejoras.append(resultado.nombre)
+        if umbral_tiempo is None:
+            continue
+        limite = max(anterior['p50_ms'] * (1 + umbral_tiempo), anterior['p50_ms'] + minimo_ms)
+        if resultado.p50_ms > limite:
+            regresiones.append({
+                'nombre': resultado.nombre,
+                'motivo': f"p50 {anterior['p50_ms']:.1f}ms -> {resultado.p50_ms:.1f}ms",
+            })
+    return {'regresiones': regresiones, 'mejoras': mejoras, 'nuevos': nuevos}
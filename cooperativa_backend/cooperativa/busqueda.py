@@ -0,0 +1,273 @@
+"""
+Búsqueda de texto para socios, parcelas, cultivos e insumos
+
+Un único parámetro ?q= busca en varios campos a la vez, sin distinguir
+mayúsculas ni acentos, y ordena los resultados por relevancia:
+
+- PostgreSQL: índices GIN pg_trgm sobre f_unaccent(lower(campo)); el filtro
+  LIKE '%termino%' usa esos índices y la relevancia combina similarity()
+  con ts_rank.
+- SQLite: tablas FTS5 (tokenizer unicode61 sin diacríticos) mantenidas por
+  triggers; la relevancia es bm25().
+- Si los índices no están instalados se usa icontains como respaldo.
+
+Los índices se instalan con la migración 0005 o con el comando
+`python manage.py instalar_busqueda`.
+"""
+
+import re
+import unicodedata
+
+from django.db import connections
+from django.db.models import CharField, F, FloatField, Func, Q, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Lower
+from rest_framework.filters import OrderingFilter
+
+
+PARAMETRO_BUSQUEDA = 'q'
+CAMPO_RANGO = 'rango_busqueda'
+
+
+# Configuración por modelo: campos ORM a buscar (PostgreSQL / respaldo) y la
+# consulta SQLite que arma el texto indexado con alias `b` para la tabla base.
+INDICES_BUSQUEDA = {
+    'socio': {
+        'campos': ['usuario__nombres', 'usuario__apellidos', 'usuario__ci_nit', 'codigo_interno'],
+        'columnas_trgm': {'usuario': ['nombres', 'apellidos', 'ci_nit'], 'socio': ['codigo_interno']},
+        'sqlite_texto': ['u.nombres', 'u.apellidos', 'u.ci_nit', 'b.codigo_interno'],
+        'sqlite_from': 'socio b JOIN usuario u ON u.id = b.usuario_id',
+        'sqlite_dependencias': {'usuario': 'u.id'},
+    },
+    'parcela': {
+        'campos': ['nombre', 'ubicacion', 'tipo_suelo', 'socio__usuario__nombres', 'socio__usuario__apellidos'],
+        'columnas_trgm': {'parcela': ['nombre', 'ubicacion']},
+        'sqlite_texto': ['b.nombre', 'b.ubicacion', 'b.tipo_suelo', 'u.nombres', 'u.apellidos'],
+        'sqlite_from': 'parcela b JOIN socio s ON s.id = b.socio_id JOIN usuario u ON u.id = s.usuario_id',
+        'sqlite_dependencias': {'usuario': 'u.id'},
+    },
+    'cultivo': {
+        'campos': ['especie', 'variedad', 'tipo_semilla'],
+        'columnas_trgm': {'cultivo': ['especie', 'variedad']},
+        'sqlite_texto': ['b.especie', 'b.variedad', 'b.tipo_semilla'],
+        'sqlite_from': 'cultivo b',
+    },
+    'semilla': {
+        'campos': ['especie', 'variedad', 'proveedor', 'lote'],
+        'columnas_trgm': {'semilla': ['especie', 'variedad', 'proveedor', 'lote']},
+        'sqlite_texto': ['b.especie', 'b.variedad', 'b.proveedor', 'b.lote'],
+        'sqlite_from': 'semilla b',
+    },
+    'pesticida': {
+        'campos': ['nombre_comercial', 'ingrediente_activo', 'tipo_pesticida', 'proveedor', 'lote'],
+        'columnas_trgm': {'pesticida': ['nombre_comercial', 'ingrediente_activo', 'proveedor', 'lote']},
+        'sqlite_texto': ['b.nombre_comercial', 'b.ingrediente_activo', 'b.tipo_pesticida', 'b.proveedor', 'b.lote'],
+        'sqlite_from': 'pesticida b',
+    },
+    'fertilizante': {
+        'campos': ['nombre_comercial', 'tipo_fertilizante', 'composicion_npk', 'proveedor', 'lote'],
+        'columnas_trgm': {'fertilizante': ['nombre_comercial', 'composicion_npk', 'proveedor', 'lote']},
+        'sqlite_texto': ['b.nombre_comercial', 'b.tipo_fertilizante', 'b.composicion_npk', 'b.proveedor', 'b.lote'],
+        'sqlite_from': 'fertilizante b',
+    },
+}
+
+
+def normalizar(texto):
+    """Minúsculas y sin acentos: 'Maíz Ñandú' -> 'maiz nandu'"""
+    descompuesto = unicodedata.normalize('NFKD', str(texto).lower())
+    return ''.join(c for c in descompuesto if not unicodedata.combining(c)).strip()
+
+
+def buscar(queryset, termino):
+    """
+    Filtra el queryset por el término y anota `rango_busqueda` (mayor es mejor).
+    El queryset resultante queda ordenado por relevancia.
+    """
+    termino = (termino or '').strip()
+    if not termino:
+        return queryset
+
+    clave = queryset.model._meta.model_name
+    config = INDICES_BUSQUEDA[clave]
+    connection = connections[queryset.db]
+
+    if connection.vendor == 'postgresql':
+        queryset = _buscar_postgres(queryset, termino, config)
+    elif connection.vendor == 'sqlite' and _tabla_fts_existe(connection, clave):
+        queryset = _buscar_fts5(queryset, termino, clave)
+    else:
+        queryset = _buscar_basico(queryset, termino, config)
+
+    return queryset.order_by(f'-{CAMPO_RANGO}', '-pk')
+
+
+def _sin_acentos(campo):
+    return Func(Lower(F(campo)), function='f_unaccent', output_field=CharField())
+
+
+def _buscar_postgres(queryset, termino, config):
+    from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector, TrigramSimilarity
+    from django.db.models.functions import Coalesce, Greatest
+
+    normalizado = normalizar(termino)
+    alias = {f'busq_{i}': _sin_acentos(campo) for i, campo in enumerate(config['campos'])}
+    condicion = Q()
+    for nombre in alias:
+        condicion |= Q(**{f'{nombre}__contains': normalizado})
+
+    similitudes = [Coalesce(TrigramSimilarity(F(nombre), normalizado), 0.0) for nombre in alias]
+    similitud = Greatest(*similitudes) if len(similitudes) > 1 else similitudes[0]
+    rango_texto = SearchRank(
+        SearchVector(*[F(nombre) for nombre in alias], config='simple'),
+        SearchQuery(normalizado, config='simple', search_type='websearch'),
+    )
+
+    return queryset.alias(**alias).filter(condicion).annotate(
+        **{CAMPO_RANGO: similitud + rango_texto}
+    )
+
+
+def _tabla_fts(clave):
+    return f'busqueda_{clave}_fts'
+
+
+def _tabla_fts_existe(connection, clave):
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = %s",
+            [_tabla_fts(clave)]
+        )
+        return cursor.fetchone() is not None
+
+
+def _expresion_match(termino):
+    """Cada palabra como prefijo obligatorio: 'maiz ama' -> '"maiz"* "ama"*'"""
+    palabras = re.findall(r'\w+', normalizar(termino))
+    return ' '.join(f'"{palabra}"*' for palabra in palabras)
+
+
+def _buscar_fts5(queryset, termino, clave):
+    expresion = _expresion_match(termino)
+    if not expresion:
+        return queryset.none()
+
+    tabla = _tabla_fts(clave)
+    tabla_base = queryset.model._meta.db_table
+    coincidencias = RawSQL(f'SELECT rowid FROM {tabla} WHERE {tabla} MATCH %s', (expresion,))
+    rango = RawSQL(
+        f'SELECT -bm25({tabla}) FROM {tabla} WHERE {tabla} MATCH %s AND rowid = "{tabla_base}"."id"',
+        (expresion,),
+        output_field=FloatField()
+    )
+    return queryset.filter(pk__in=coincidencias).annotate(**{CAMPO_RANGO: rango})
+
+
+def _buscar_basico(queryset, termino, config):
+    condicion = Q()
+    for campo in config['campos']:
+        condicion |= Q(**{f'{campo}__icontains': termino})
+    return queryset.filter(condicion).annotate(**{CAMPO_RANGO: Value(0.0, output_field=FloatField())})
+
+
+class BusquedaOrderingFilter(OrderingFilter):
+    """
+    OrderingFilter que respeta el orden por relevancia cuando hay ?q=
+    y el cliente no pidió un orden explícito.
+    """
+
+    def get_ordering(self, request, queryset, view):
+        if request.query_params.get(PARAMETRO_BUSQUEDA) and not request.query_params.get(self.ordering_param):
+            return None
+        return super().get_ordering(request, queryset, view)
+
+
+# ---------------------------------------------------------------------------
+# Instalación de índices
+# ---------------------------------------------------------------------------
+
+def _sql_postgres():
+    sentencias = [
+        'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+        'CREATE EXTENSION IF NOT EXISTS unaccent',
+        # unaccent() no es IMMUTABLE; el envoltorio permite usarlo en índices
+        "CREATE OR REPLACE FUNCTION f_unaccent(text) RETURNS text "
+        "LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT AS "
+        "$$ SELECT public.unaccent('public.unaccent'::regdictionary, $1) $$",
+    ]
+    tablas = {}
+    for config in INDICES_BUSQUEDA.values():
+        for tabla, columnas in config['columnas_trgm'].items():
+            tablas.setdefault(tabla, [])
+            tablas[tabla] += [c for c in columnas if c not in tablas[tabla]]
+    for tabla, columnas in tablas.items():
+        for columna in columnas:
+            sentencias.append(
+                f'CREATE INDEX IF NOT EXISTS busq_{tabla}_{columna}_trgm ON {tabla} '
+                f'USING gin (f_unaccent(lower({columna})) gin_trgm_ops)'
+            )
+    return sentencias, tablas
+
+
+def _sql_sqlite(clave, config):
+    tabla = _tabla_fts(clave)
+    base = clave
+    texto = " || ' ' || ".join(f"coalesce({col}, '')" for col in config['sqlite_texto'])
+    seleccion = f'SELECT b.id, {texto} FROM {config["sqlite_from"]}'
+
+    sentencias = [
+        f"CREATE VIRTUAL TABLE IF NOT EXISTS {tabla} USING fts5(texto, tokenize = 'unicode61 remove_diacritics 2')",
+        f'DELETE FROM {tabla}',
+        f'INSERT INTO {tabla}(rowid, texto) {seleccion}',
+        f'CREATE TRIGGER IF NOT EXISTS {tabla}_ai AFTER INSERT ON {base} BEGIN '
+        f'INSERT INTO {tabla}(rowid, texto) {seleccion} WHERE b.id = NEW.id; END',
+        f'CREATE TRIGGER IF NOT EXISTS {tabla}_au AFTER UPDATE ON {base} BEGIN '
+        f'DELETE FROM {tabla} WHERE rowid = OLD.id; '
+        f'INSERT INTO {tabla}(rowid, texto) {seleccion} WHERE b.id = NEW.id; END',
+        f'CREATE TRIGGER IF NOT EXISTS {tabla}_ad AFTER DELETE ON {base} BEGIN '
+        f'DELETE FROM {tabla} WHERE rowid = OLD.id; END',
+    ]
+    for dependencia, columna in config.get('sqlite_dependencias', {}).items():
+        sentencias.append(
+            f'CREATE TRIGGER IF NOT EXISTS {tabla}_{dependencia}_au AFTER UPDATE ON {dependencia} BEGIN '
+            f'DELETE FROM {tabla} WHERE rowid IN (SELECT b.id FROM {config["sqlite_from"]} WHERE {columna} = NEW.id); '
+            f'INSERT INTO {tabla}(rowid, texto) {seleccion} WHERE {columna} = NEW.id; END'
+        )
+    return sentencias
+
+
+def instalar_indices(connection):
+    """Crea (o reconstruye) los índices de búsqueda para el motor de la conexión"""
+    if connection.vendor == 'postgresql':
+        sentencias, _ = _sql_postgres()
+    elif connection.vendor == 'sqlite':
+        sentencias = []
+        for clave, config in INDICES_BUSQUEDA.items():
+            sentencias += _sql_sqlite(clave, config)
+    else:
+        return []
+
+    with connection.cursor() as cursor:
+        for sentencia in sentencias:
+            cursor.execute(sentencia)
+    return sentencias
+
+
+def desinstalar_indices(connection):
+    """Elimina los índices de búsqueda (reverso de la migración)"""
+    sentencias = []
+    if connection.vendor == 'postgresql':
+        _, tablas = _sql_postgres()
+        for tabla, columnas in tablas.items():
+            sentencias += [f'DROP INDEX IF EXISTS busq_{tabla}_{columna}_trgm' for columna in columnas]
+    elif connection.vendor == 'sqlite':
+        for clave, config in INDICES_BUSQUEDA.items():
+            tabla = _tabla_fts(clave)
+            triggers = ['ai', 'au', 'ad'] + [f'{dep}_au' for dep in config.get('sqlite_dependencias', {})]
+            sentencias += [f'DROP TRIGGER IF EXISTS {tabla}_{sufijo}' for sufijo in triggers]
+            sentencias.append(f'DROP TABLE IF EXISTS {tabla}')
+
+    with connection.cursor() as cursor:
+        for sentencia in sentencias:
+            cursor.execute(sentencia)
+    return sentencias
@@ -0,0 +1,132 @@
+"""
+Caché de reportes del dashboard con invalidación por versión de tabla
+
+@reporte_cacheado guarda en la caché de Django los datos de la respuesta
+de un reporte, con clave reporte + parámetros (query string y kwargs de la
+URL), junto con las versiones de las tablas de las que depende
+(versiones.py, renovadas por señales al confirmar cada escritura).
+
+- Versiones iguales y antigüedad < ttl: se sirve desde la caché.
+- Versiones distintas o ttl vencido, pero antigüedad < ttl + obsoleto: se
+  sirve el dato anterior y se recalcula en segundo plano
+  (stale-while-revalidate), un solo recálculo a la vez por clave.
+- Sin dato o más antiguo: se calcula en el request.
+
+Dentro de una transacción (p. ej. ATOMIC_REQUESTS) no se usa la caché.
+Los reportes se calculan siempre en la primaria (replica.py): las
+versiones se renuevan al confirmar en la primaria, y un cálculo con datos
+atrasados de la réplica quedaría guardado con la versión nueva hasta la
+siguiente escritura.
+
+El header X-Reporte-Cache indica HIT, STALE o MISS.
+"""
+
+import hashlib
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections, connection
+from rest_framework.response import Response
+
+from .replica import en_primaria
+from .versiones import versiones
+
+
+logger = logging.getLogger('cooperativa.reportes')
+
+PREFIJO = 'reporte'
+
+_executor_reportes = None
+
+
+def _clave(nombre, request, kwargs):
+    parametros = repr((sorted(request.GET.lists()), sorted(kwargs.items())))
+    return f'{PREFIJO}:{nombre}:{hashlib.sha1(parametros.encode()).hexdigest()[:20]}'
+
+
+def _calcular(vista, args, kwargs, clave, version_tablas, ttl, obsoleto):
+    """Ejecuta la vista y guarda sus datos si respondió 200"""
+    with en_primaria():
+        respuesta = vista(*args, **kwargs)
+    if respuesta.status_code == 200 and isinstance(respuesta, Response):
+        cache.set(clave, {
+            'versiones': version_tablas,
+            'datos': respuesta.data,
+            'creado': time.time(),
+        }, ttl + obsoleto)
+    return respuesta
+
+
+def _refrescar_en_hilo(vista, args, kwargs, clave, version_tablas, ttl, obsoleto):
+    try:
+        _calcular(vista, args, kwargs, clave, version_tablas, ttl, obsoleto)
+    except Exception:
+        logger.exception('reporte_refresco_error', extra={'clave': clave})
+    finally:
+        cache.delete(f'{clave}:refrescando')
+        close_old_connections()
+
+
+def _programar_refresco(*argumentos):
+    clave = argumentos[3]
+    # Un solo recálculo en curso por clave (el lock expira por si el hilo muere)
+    if not cache.add(f'{clave}:refrescando', 1, 120):
+        return
+    if not getattr(settings, 'REPORTES_REFRESCO_ASINCRONO', True):
+        _refrescar_en_hilo(*argumentos)
+        return
+
+    global _executor_reportes
+    if _executor_reportes is None:
+        _executor_reportes = ThreadPoolExecutor(max_workers=2, thread_name_prefix='reportes')
+    _executor_reportes.submit(_refrescar_en_hilo, *argumentos)
+
+
+def reporte_cacheado(*modelos, ttl=300, obsoleto=120, solo_staff=False):
+    """
+    Args:
+        modelos: tablas cuyas escrituras invalidan el reporte
+        ttl: segundos que un resultado se considera fresco
+        obsoleto: segundos adicionales en que se sirve el dato anterior
+            mientras se recalcula en segundo plano
+        solo_staff: la vista valida is_staff en su cuerpo; para el resto de
+            usuarios se ejecuta sin caché y responde su propio 401/403
+    """
+    def decorador(vista):
+        nombre = f'{vista.__module__}.{vista.__qualname__}'
+
+        @wraps(vista)
+        def envoltura(*args, **kwargs):
+            request = args[1] if len(args) > 1 and hasattr(args[1], 'META') else args[0]
+            if solo_staff and not request.user.is_staff:
+                return vista(*args, **kwargs)
+            # Dentro de una transacción el resultado puede incluir escrituras
+            # sin confirmar, cuya versión todavía no se renovó
+            if connection.in_atomic_block:
+                return vista(*args, **kwargs)
+
+            clave = _clave(nombre, request, kwargs)
+            version_tablas = versiones(*modelos)
+            registro = cache.get(clave)
+            estado = 'MISS'
+            if registro is not None:
+                antiguedad = time.time() - registro['creado']
+                if registro['versiones'] == version_tablas and antiguedad < ttl:
+                    estado = 'HIT'
+                elif antiguedad < ttl + obsoleto:
+                    estado = 'STALE'
+                    _programar_refresco(vista, args, kwargs, clave, version_tablas, ttl, obsoleto)
+
+            if estado == 'MISS':
+                respuesta = _calcular(vista, args, kwargs, clave, version_tablas, ttl, obsoleto)
+            else:
+                respuesta = Response(registro['datos'])
+            respuesta['X-Reporte-Cache'] = estado
+            return respuesta
+
+        return envoltura
+    return decorador
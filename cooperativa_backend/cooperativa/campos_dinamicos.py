@@ -0,0 +1,268 @@
+"""
+Campos dinámicos en los endpoints REST (?fields= / ?expand=)
+
+Un desplegable que solo necesita `id` y `nombre` recibe hoy el socio con
+su usuario, roles, comunidad y campos calculados. Con este módulo:
+
+- ?fields=id,nombre devuelve solo esos campos: el resto (incluidos los
+  SerializerMethodField) ni se calcula;
+- ?expand=socio reemplaza un campo por su versión anidada, declarada en
+  `Meta.expandibles` del serializer con las precargas que necesita;
+- el queryset del ViewSet se recorta a lo que leen los campos pedidos:
+  only() sobre las columnas del modelo, select_related y prefetch_related
+  solo de las relaciones usadas.
+
+Lo que lee cada campo se deduce de su `source` recorriendo el modelo. Los
+SerializerMethodField (y lo que agregue un to_representation propio)
+declaran lo suyo en `Meta.dependencias` ({campo: [rutas]}); uno sin
+declarar obliga a cargar el objeto completo, así que nunca se difiere una
+columna que el serializer vaya a tocar.
+
+Sin los parámetros la respuesta y las consultas son las de siempre.
+"""
+
+import sys
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework import serializers
+
+
+def _lista(valor):
+    return {parte.strip() for parte in valor.split(',') if parte.strip()} if valor else set()
+
+
+class Expansion:
+    """
+    Campo expandible: serializer anidado (clase o nombre en el módulo del
+    serializer que lo declara), lookups a precargar y kwargs del campo
+    (source, many...).
+    """
+
+    def __init__(self, serializer, *precargar, **kwargs):
+        self.serializer = serializer
+        self.precargar = precargar
+        self.kwargs = kwargs
+
+    def campo(self, serializer_padre):
+        clase = self.serializer
+        if isinstance(clase, str):
+            clase = getattr(sys.modules[type(serializer_padre).__module__], clase)
+        return clase(read_only=True, **self.kwargs)
+
+
+class CamposDinamicosSerializerMixin:
+    """
+    Aplica la selección de campos que el ViewSet deja en
+    context['campos_dinamicos'] = (campos | None, expandir).
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        seleccion = self.context.get('campos_dinamicos')
+        if seleccion:
+            self._seleccionar(*seleccion)
+
+    def _seleccionar(self, campos, expandir):
+        expandibles = getattr(self.Meta, 'expandibles', {})
+        expandidos = expandir & expandibles.keys()
+        for nombre in expandidos:
+            self.fields[nombre] = expandibles[nombre].campo(self)
+        if campos is not None:
+            for nombre in list(self.fields):
+                if nombre not in campos and nombre not in expandidos:
+                    self.fields.pop(nombre)
+
+
+class _Lecturas:
+    """Columnas y relaciones que leen los campos de un serializer"""
+
+    def __init__(self, modelo):
+        self.modelo = modelo
+        self.columnas = {modelo._meta.pk.name}
+        self.seleccionadas = set()   # cadenas de FK/OneToOne (select_related)
+        self.precargadas = set()     # cadenas que cruzan una relación múltiple
+        self.completas = set()       # objetos que se leen enteros ('' = raíz)
+
+    def serializer(self, serializer, prefijo=()):
+        dependencias = getattr(getattr(serializer, 'Meta', None), 'dependencias', {})
+        for nombre, campo in serializer.fields.items():
+            if nombre in dependencias:
+                for ruta in dependencias[nombre]:
+                    self.ruta(prefijo + tuple(ruta.split('__')))
+            elif campo.write_only:
+                continue
+            elif isinstance(campo, serializers.SerializerMethodField) or campo.source == '*':
+                self._completa(prefijo)
+            else:
+                anidado = campo.child if isinstance(campo, serializers.ListSerializer) else campo
+                if not isinstance(anidado, serializers.BaseSerializer):
+                    anidado = None
+                self.ruta(prefijo + tuple(campo.source_attrs), anidado)
+
+    def ruta(self, partes, anidado=None):
+        modelo, recorrido, anterior = self.modelo, [], None
+        for parte in partes:
+            try:
+                campo = modelo._meta.get_field(parte)
+            except FieldDoesNotExist:
+                # Método o propiedad: el objeto al que pertenece se lee entero
+                return self._completa(tuple(recorrido))
+            if not campo.is_relation:
+                return self._relacion(recorrido) if recorrido else self.columnas.add(campo.name)
+            if anterior is not None and campo.remote_field is anterior:
+                # socio.usuario.socio o pedido.pagos[i].pedido: vuelta al objeto
+                # anterior, que Django deja en caché al cargar la relación
+                recorrido.pop()
+                modelo, anterior = campo.related_model, None
+                continue
+            recorrido.append(parte)
+            modelo, anterior = campo.related_model, campo
+
+        if not recorrido:
+            return
+        if anidado is not None:
+            self._relacion(recorrido)
+            return self.serializer(anidado, tuple(recorrido))
+        if anterior is None or not anterior.concrete or len(self._tramo_directo(recorrido)) < len(recorrido):
+            self._relacion(recorrido)
+        elif len(recorrido) > 1:
+            # Columna FK de un objeto relacionado (que se carga entero)
+            self._relacion(recorrido[:-1])
+        else:
+            self.columnas.add(recorrido[0])
+
+    def _relacion(self, recorrido):
+        cadena = '__'.join(recorrido)
+        directas = self._tramo_directo(recorrido)
+        if len(directas) < len(recorrido):
+            self.precargadas.add(cadena)
+            # Las FK previas a la relación múltiple siguen yendo por JOIN
+            if directas:
+                self.seleccionadas.add('__'.join(directas))
+        else:
+            self.seleccionadas.add(cadena)
+
+    def _completa(self, recorrido):
+        if recorrido:
+            self._relacion(list(recorrido))
+        self.completas.add('__'.join(recorrido))
+
+    def _tramo_directo(self, recorrido):
+        modelo, directas = self.modelo, []
+        for parte in recorrido:
+            campo = modelo._meta.get_field(parte)
+            if campo.one_to_many or campo.many_to_many:
+                break
+            directas.append(parte)
+            modelo = campo.related_model
+        return directas
+
+    def _necesaria(self, cadena):
+        """¿Alguna lectura pasa por (o está bajo un objeto completo en) `cadena`?"""
+        for completa in self.completas:
+            if completa and (cadena == completa or cadena.startswith(completa + '__')):
+                return True
+        return any(
+            n == cadena or n.startswith(cadena + '__')
+            for n in self.seleccionadas | self.precargadas
+        )
+
+    def podar(self, queryset):
+        if '' in self.completas:
+            return queryset
+
+        seleccion = queryset.query.select_related
+        if isinstance(seleccion, dict):
+            caminos = set()
+            for hoja in _hojas(seleccion):
+                necesarias = [hoja[:i] for i in range(1, len(hoja) + 1) if self._necesaria('__'.join(hoja[:i]))]
+                if necesarias:
+                    caminos.add('__'.join(necesarias[-1]))
+            queryset = queryset.select_related(None)
+            if caminos:
+                queryset = queryset.select_related(*sorted(caminos))
+
+        lookups = queryset._prefetch_related_lookups
+        if lookups:
+            conservados = []
+            for lookup in lookups:
+                partes = (lookup.prefetch_through if isinstance(lookup, Prefetch) else lookup).split('__')
+                necesarias = [i for i in range(1, len(partes) + 1) if self._necesaria('__'.join(partes[:i]))]
+                if necesarias and necesarias[-1] == len(partes):
+                    conservados.append(lookup)
+                elif necesarias:
+                    # Más profundo de lo que se lee: solo el tramo usado
+                    conservados.append('__'.join(partes[:necesarias[-1]]))
+            queryset = queryset.prefetch_related(None).prefetch_related(*dict.fromkeys(conservados))
+
+        # Las relaciones seleccionadas se cargan enteras; las no seleccionadas
+        # se siguen resolviendo por su FK, como antes
+        directas = set()
+        for cadena in self.seleccionadas | self.precargadas | (self.completas - {''}):
+            primera = cadena.split('__')[0]
+            campo = self.modelo._meta.get_field(primera)
+            if campo.concrete:
+                directas.add(primera)
+        return queryset.only(*sorted(self.columnas | directas))
+
+
+def _hojas(arbol, prefijo=()):
+    if not arbol:
+        yield prefijo
+    for nombre, subarbol in arbol.items():
+        yield from _hojas(subarbol, prefijo + (nombre,))
+
+
+class CamposDinamicosMixin:
+    """
+    ViewSet con ?fields= y ?expand= en list/retrieve. El serializer debe
+    incluir CamposDinamicosSerializerMixin.
+    """
+    acciones_campos_dinamicos = ('list', 'retrieve')
+
+    def seleccion_campos(self):
+        if not hasattr(self, '_seleccion_campos'):
+            self._seleccion_campos = None
+            request = getattr(self, 'request', None)
+            if request is not None and self.action in self.acciones_campos_dinamicos:
+                campos = _lista(request.query_params.get('fields'))
+                expandir = _lista(request.query_params.get('expand'))
+                if campos or expandir:
+                    self._seleccion_campos = (campos or None, expandir)
+        return self._seleccion_campos
+
+    def get_serializer_context(self):
+        contexto = super().get_serializer_context()
+        if self.seleccion_campos():
+            contexto['campos_dinamicos'] = self.seleccion_campos()
+        return contexto
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        if not self.seleccion_campos():
+            return queryset
+
+        serializer = self.get_serializer_class()(context=self.get_serializer_context())
+        lecturas = _Lecturas(queryset.model)
+        lecturas.serializer(serializer)
+        queryset = lecturas.podar(queryset)
+
+        # Precargas de los campos expandidos
+        expandibles = getattr(serializer.Meta, 'expandibles', {})
+        for nombre in self.seleccion_campos()[1] & expandibles.keys():
+            for lookup in expandibles[nombre].precargar:
+                if isinstance(lookup, str) and self._directa(queryset.model, lookup):
+                    queryset = queryset.select_related(lookup)
+                else:
+                    queryset = queryset.prefetch_related(lookup)
+        return queryset
+
+    @staticmethod
+    def _directa(modelo, cadena):
+        for parte in cadena.split('__'):
+            campo = modelo._meta.get_field(parte)
+            if not (campo.many_to_one or campo.one_to_one):
+                return False
+            modelo = campo.related_model
+        return True
@@ -0,0 +1,481 @@
+"""
+CU10: Labores agrícolas / CU15: Productos cosechados / CU4: Cosechas
+Carga por lotes del trabajo registrado sin conexión en la app móvil
+
+Los técnicos de campo acumulan registros sin señal y hoy los reenvían con
+un POST por registro (full_clean, consultas de validación y bitácora cada
+uno). POST /api/carga-offline/ recibe el envío completo y:
+
+- valida los campos de cada registro en memoria (clean_fields, sin las FK),
+- lee una sola vez las campañas, parcelas, ciclos, cultivos y labores que
+  referencia el envío y aplica contra ellas las reglas de cada endpoint
+  (rango de la campaña, parcela activa, labor de la misma campaña/parcela),
+- inserta con bulk_create por lotes, cada lote en su propia transacción
+  junto con su bitácora.
+
+Cada registro trae `id_cliente` (generado en el dispositivo): reenviar un
+envío devuelve como duplicados los registros ya creados en lugar de
+crearlos otra vez. Un producto cosechado puede usar `labor_cliente` (el
+id_cliente de una labor anterior del envío o de un envío previo) en lugar
+de `labor`.
+
+El resultado se informa por registro, en el orden del envío.
+"""
+
+from dataclasses import dataclass, field
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from . import productividad, versiones
+from .models import (
+    Campaign, Parcela, CicloCultivo, Cultivo, Labor, Cosecha, ProductoCosechado,
+    BitacoraAuditoria, CargaOffline
+)
+
+
+TAMANO_LOTE = 200
+LONGITUD_ID_CLIENTE = 64
+
+MODELOS = {'labor': Labor, 'cosecha': Cosecha, 'producto_cosechado': ProductoCosechado}
+
+# Campos aceptados por tipo (los de los serializers de creación); las
+# relaciones se envían como id
+CAMPOS = {
+    'labor': ('fecha_labor', 'labor', 'estado', 'observaciones'),
+    'cosecha': (
+        'fecha_cosecha', 'cantidad_cosechada', 'unidad_medida', 'calidad', 'estado',
+        'precio_venta', 'observaciones',
+    ),
+    'producto_cosechado': (
+        'fecha_cosecha', 'cantidad', 'unidad_medida', 'calidad', 'estado', 'lote',
+        'ubicacion_almacen', 'observaciones',
+    ),
+}
+RELACIONES = {
+    'labor': ('campania', 'parcela'),
+    'cosecha': ('ciclo_cultivo',),
+    'producto_cosechado': ('cultivo', 'labor', 'campania', 'parcela'),
+}
+
+
+class CargaInvalida(ValueError):
+    """El cuerpo del envío no es una lista de registros"""
+
+
+@dataclass
+class RegistroCarga:
+    indice: int
+    id_cliente: str = ''
+    tipo: str = ''
+    objeto: object = None
+    labor_cliente: str = ''
+    labor_envio: 'RegistroCarga' = None
+    estado: str = 'pendiente'   # pendiente | creado | duplicado | error
+    objeto_id: int = None
+    errores: dict = field(default_factory=dict)
+
+    def agregar_error(self, campo, mensaje):
+        self.errores.setdefault(campo, []).append(mensaje)
+        self.estado = 'error'
+
+    def resultado(self):
+        resultado = {'indice': self.indice, 'id_cliente': self.id_cliente, 'tipo': self.tipo, 'estado': self.estado}
+        if self.objeto_id is not None:
+            resultado['id'] = self.objeto_id
+        if self.errores:
+            resultado['errores'] = self.errores
+        return resultado
+
+
+@dataclass
+class _Referencias:
+    """Filas referenciadas por el envío, leídas una vez"""
+    campanias: dict = field(default_factory=dict)    # id -> (nombre, fecha_inicio, fecha_fin)
+    parcelas: dict = field(default_factory=dict)     # id -> (nombre, estado)
+    ciclos: dict = field(default_factory=dict)       # id -> (fecha_inicio, parcela_id)
+    cultivos: dict = field(default_factory=dict)     # id -> especie
+    labores: dict = field(default_factory=dict)      # id -> (campania_id, parcela_id)
+    labores_con_producto: set = field(default_factory=set)
+
+
+def leer_registros(datos):
+    """Lista de registros del cuerpo: [...] o {"registros": [...]}"""
+    if isinstance(datos, dict):
+        datos = datos.get('registros')
+    if not isinstance(datos, list) or not all(isinstance(registro, dict) for registro in datos):
+        raise CargaInvalida('Envíe una lista de registros en "registros"')
+    return datos
+
+
+def _mensajes(error):
+    if hasattr(error, 'message_dict'):
+        return error.message_dict
+    return {'__all__': error.messages}
+
+
+def _construir(indice, datos):
+    registro = RegistroCarga(
+        indice=indice,
+        id_cliente=str(datos.get('id_cliente') or '').strip(),
+        tipo=str(datos.get('tipo') or ''),
+    )
+    if not registro.id_cliente:
+        registro.agregar_error('id_cliente', 'Este campo es requerido')
+    elif len(registro.id_cliente) > LONGITUD_ID_CLIENTE:
+        registro.agregar_error('id_cliente', f'Máximo {LONGITUD_ID_CLIENTE} caracteres')
+    if registro.tipo not in MODELOS:
+        registro.agregar_error('tipo', f'Tipo no soportado. Opciones: {", ".join(MODELOS)}')
+        return registro
+    valores = datos.get('datos')
+    if not isinstance(valores, dict):
+        registro.agregar_error('datos', 'Debe ser un objeto con los campos del registro')
+        return registro
+
+    objeto = MODELOS[registro.tipo](**{campo: valores[campo] for campo in CAMPOS[registro.tipo] if campo in valores})
+    for relacion in RELACIONES[registro.tipo]:
+        valor = valores.get(relacion)
+        if valor in (None, ''):
+            continue
+        try:
+            setattr(objeto, f'{relacion}_id', int(valor))
+        except (TypeError, ValueError):
+            registro.agregar_error(relacion, 'Debe ser un id numérico')
+    if registro.tipo == 'producto_cosechado':
+        registro.labor_cliente = str(valores.get('labor_cliente') or '').strip()
+
+    try:
+        # Las relaciones se validan en bloque (_validar): excluirlas evita una consulta por registro
+        objeto.clean_fields(exclude=RELACIONES[registro.tipo])
+    except ValidationError as e:
+        for campo, mensajes in _mensajes(e).items():
+            for mensaje in mensajes:
+                registro.agregar_error(campo, mensaje)
+    except (TypeError, ValueError):
+        # Valores que to_python no sabe convertir (p. ej. una fecha numérica)
+        registro.agregar_error(_campo_invalido(objeto, registro.tipo), 'Tipo de dato inválido')
+    registro.objeto = objeto
+    return registro
+
+
+def _campo_invalido(objeto, tipo):
+    """Campo que hizo fallar clean_fields con un error que no es de validación"""
+    for campo in CAMPOS[tipo]:
+        campo_modelo = objeto._meta.get_field(campo)
+        try:
+            campo_modelo.to_python(getattr(objeto, campo_modelo.attname))
+        except (TypeError, ValueError):
+            return campo
+        except ValidationError:
+            continue
+    return 'datos'
+
+
+def _marcar_duplicados(registros, usuario):
+    """Ids de cliente repetidos en el envío o ya registrados (reenvío)"""
+    vistos = {}
+    for registro in registros:
+        if not registro.id_cliente:
+            continue
+        if registro.id_cliente in vistos:
+            registro.agregar_error('id_cliente', f'Duplicado en el envío (registro {vistos[registro.id_cliente]})')
+        else:
+            vistos[registro.id_cliente] = registro.indice
+
+    claves = set(vistos) | {registro.labor_cliente for registro in registros if registro.labor_cliente}
+    registrados = {
+        id_cliente: (tipo, objeto_id)
+        for id_cliente, tipo, objeto_id in CargaOffline.objects.filter(
+            usuario=usuario, id_cliente__in=claves
+        ).values_list('id_cliente', 'tipo', 'objeto_id')
+    }
+    for registro in registros:
+        if registro.id_cliente in registrados and vistos.get(registro.id_cliente) == registro.indice:
+            registro.estado, registro.errores = 'duplicado', {}
+            registro.objeto_id = registrados[registro.id_cliente][1]
+    return registrados
+
+
+def _cargar_referencias(pendientes, registrados):
+    def ids(tipo, relacion):
+        return {
+            getattr(registro.objeto, f'{relacion}_id') for registro in pendientes
+            if registro.tipo == tipo and getattr(registro.objeto, f'{relacion}_id', None)
+        }
+
+    # labor_cliente de envíos anteriores: se usa el id que se registró entonces
+    for registro in pendientes:
+        anterior = registrados.get(registro.labor_cliente)
+        if registro.labor_cliente and anterior and anterior[0] == 'labor':
+            registro.objeto.labor_id = anterior[1]
+
+    referencias = _Referencias()
+    campanias = ids('labor', 'campania') | ids('producto_cosechado', 'campania')
+    referencias.campanias = {
+        campania_id: (nombre, inicio, fin)
+        for campania_id, nombre, inicio, fin in Campaign.objects.filter(id__in=campanias).values_list(
+            'id', 'nombre', 'fecha_inicio', 'fecha_fin'
+        )
+    }
+    parcelas = ids('labor', 'parcela') | ids('producto_cosechado', 'parcela')
+    referencias.parcelas = {
+        parcela_id: (nombre, estado)
+        for parcela_id, nombre, estado in Parcela.objects.filter(id__in=parcelas).values_list('id', 'nombre', 'estado')
+    }
+    referencias.ciclos = {
+        ciclo_id: (inicio, parcela_id)
+        for ciclo_id, inicio, parcela_id in CicloCultivo.objects.filter(
+            id__in=ids('cosecha', 'ciclo_cultivo')
+        ).values_list('id', 'fecha_inicio', 'cultivo__parcela_id')
+    }
+    referencias.cultivos = dict(
+        Cultivo.objects.filter(id__in=ids('producto_cosechado', 'cultivo')).values_list('id', 'especie')
+    )
+    labores = ids('producto_cosechado', 'labor')
+    referencias.labores = {
+        labor_id: (campania_id, parcela_id)
+        for labor_id, campania_id, parcela_id in Labor.objects.filter(id__in=labores).values_list(
+            'id', 'campania_id', 'parcela_id'
+        )
+    }
+    referencias.labores_con_producto = set(
+        ProductoCosechado.objects.filter(labor_id__in=labores).values_list('labor_id', flat=True)
+    )
+    return referencias
+
+
+def _validar_labor(registro, referencias, hoy):
+    labor = registro.objeto
+    if labor.fecha_labor > hoy:
+        registro.agregar_error('fecha_labor', 'La fecha de la labor no puede ser en el futuro.')
+    if not labor.campania_id and not labor.parcela_id:
+        registro.agregar_error('campania', 'Debe especificar campaña o parcela.')
+        registro.agregar_error('parcela', 'Debe especificar campaña o parcela.')
+    if labor.parcela_id:
+        parcela = referencias.parcelas.get(labor.parcela_id)
+        if parcela is None:
+            registro.agregar_error('parcela', 'Parcela no encontrada')
+        elif parcela[1] != 'ACTIVA':
+            registro.agregar_error('parcela', 'Solo se pueden asignar labores a parcelas activas.')
+    if labor.campania_id:
+        campania = referencias.campanias.get(labor.campania_id)
+        if campania is None:
+            registro.agregar_error('campania', 'Campaña no encontrada')
+        elif campania[1] and labor.fecha_labor < campania[1]:
+            registro.agregar_error('fecha_labor', f'No puede ser anterior al inicio de la campaña ({campania[1]}).')
+        elif campania[2] and labor.fecha_labor > campania[2]:
+            registro.agregar_error('fecha_labor', f'No puede ser posterior al fin de la campaña ({campania[2]}).')
+
+
+def _validar_cosecha(registro, referencias, hoy):
+    cosecha = registro.objeto
+    if cosecha.cantidad_cosechada <= 0:
+        registro.agregar_error('cantidad_cosechada', 'La cantidad cosechada debe ser mayor a 0')
+    if cosecha.fecha_cosecha > hoy:
+        registro.agregar_error('fecha_cosecha', 'La fecha de cosecha no puede ser en el futuro')
+    ciclo = referencias.ciclos.get(cosecha.ciclo_cultivo_id)
+    if ciclo is None:
+        registro.agregar_error('ciclo_cultivo', 'Ciclo de cultivo no encontrado')
+    elif cosecha.fecha_cosecha < ciclo[0]:
+        registro.agregar_error('fecha_cosecha', 'La fecha de cosecha no puede ser anterior al inicio del ciclo')
+
+
+def _validar_producto(registro, referencias, hoy, labores_envio, labores_usadas):
+    producto = registro.objeto
+    if producto.fecha_cosecha > hoy:
+        registro.agregar_error('fecha_cosecha', 'La fecha de cosecha no puede ser en el futuro')
+    if producto.cantidad <= 0:
+        registro.agregar_error('cantidad', 'La cantidad debe ser mayor a 0')
+    if producto.lote <= 0:
+        registro.agregar_error('lote', 'El número de lote debe ser mayor a 0')
+    if producto.cultivo_id not in referencias.cultivos:
+        registro.agregar_error('cultivo', 'Cultivo no encontrado')
+
+    if not producto.campania_id and not producto.parcela_id:
+        registro.agregar_error('campania', 'Debe especificar al menos una campania o una parcela.')
+        registro.agregar_error('parcela', 'Debe especificar al menos una campania o una parcela.')
+    elif producto.campania_id and producto.parcela_id:
+        registro.agregar_error('campania', 'Solo puede especificar campania O parcela, no ambas.')
+        registro.agregar_error('parcela', 'Solo puede especificar campania O parcela, no ambas.')
+    elif producto.campania_id and producto.campania_id not in referencias.campanias:
+        registro.agregar_error('campania', 'Campaña no encontrada')
+    elif producto.parcela_id and producto.parcela_id not in referencias.parcelas:
+        registro.agregar_error('parcela', 'Parcela no encontrada')
+
+    # Labor: del envío (aún sin id), de un envío anterior o por id
+    if producto.labor_id:
+        ubicacion = referencias.labores.get(producto.labor_id)
+        clave = producto.labor_id
+        if ubicacion is None:
+            registro.agregar_error('labor', 'Labor no encontrada')
+        elif producto.labor_id in referencias.labores_con_producto:
+            registro.agregar_error('labor', 'La labor ya tiene un producto cosechado registrado')
+    elif registro.labor_cliente:
+        labor = labores_envio.get(registro.labor_cliente)
+        clave = registro.labor_cliente
+        if labor is None or labor.indice > registro.indice:
+            registro.agregar_error('labor_cliente', 'Labor no encontrada antes en el envío ni en envíos anteriores')
+            return
+        if labor.estado == 'error':
+            registro.agregar_error('labor_cliente', 'La labor del envío tiene errores')
+            return
+        registro.labor_envio = labor
+        ubicacion = (labor.objeto.campania_id, labor.objeto.parcela_id)
+    else:
+        registro.agregar_error('labor', 'Especifique labor o labor_cliente')
+        return
+
+    if ubicacion is None:
+        return
+    if clave in labores_usadas:
+        registro.agregar_error('labor', f'La labor ya se usa en el registro {labores_usadas[clave]} del envío')
+    else:
+        labores_usadas[clave] = registro.indice
+    if producto.campania_id and ubicacion[0] != producto.campania_id:
+        registro.agregar_error('labor', 'La labor seleccionada no pertenece a la campania indicada.')
+    if producto.parcela_id and ubicacion[1] != producto.parcela_id:
+        registro.agregar_error('labor', 'La labor seleccionada no pertenece a la parcela indicada.')
+
+
+def _validar(registros, usuario):
+    registrados = _marcar_duplicados(registros, usuario)
+    pendientes = [registro for registro in registros if registro.estado == 'pendiente']
+    referencias = _cargar_referencias(pendientes, registrados)
+
+    hoy = timezone.localdate()
+    labores_envio = {registro.id_cliente: registro for registro in pendientes if registro.tipo == 'labor'}
+    labores_usadas = {}
+    # Labores primero: los productos del envío dependen de ellas
+    for registro in sorted(pendientes, key=lambda r: r.tipo != 'labor'):
+        if registro.tipo == 'labor':
+            _validar_labor(registro, referencias, hoy)
+        elif registro.tipo == 'cosecha':
+            _validar_cosecha(registro, referencias, hoy)
+        else:
+            _validar_producto(registro, referencias, hoy, labores_envio, labores_usadas)
+    return referencias
+
+
+def _bitacora(registro, usuario, cliente, referencias):
+    objeto = registro.objeto
+    base = {
+        'usuario': usuario,
+        'registro_id': objeto.pk,
+        'ip_address': cliente.get('ip'),
+        'user_agent': cliente.get('user_agent') or 'Unknown',
+    }
+    if registro.tipo == 'labor':
+        return BitacoraAuditoria(
+            accion='CREAR', tabla_afectada='labor',
+            detalles={
+                'labor_tipo': objeto.labor,
+                'fecha_labor': objeto.fecha_labor.isoformat(),
+                'campania': referencias.campanias[objeto.campania_id][0] if objeto.campania_id else None,
+                'parcela': referencias.parcelas[objeto.parcela_id][0] if objeto.parcela_id else None,
+                'creado_por': usuario.usuario,
+                'origen': 'carga_offline',
+                'id_cliente': registro.id_cliente,
+            },
+            **base
+        )
+    if registro.tipo == 'cosecha':
+        return BitacoraAuditoria(
+            accion='CREAR_COSECHA', tabla_afectada='Cosecha',
+            detalles=f'Cosecha registrada para ciclo {objeto.ciclo_cultivo_id} (carga offline {registro.id_cliente})',
+            **base
+        )
+    if objeto.campania_id:
+        origen = f'campania: {referencias.campanias[objeto.campania_id][0]}'
+    else:
+        origen = f'Parcela: {referencias.parcelas[objeto.parcela_id][0]}'
+    return BitacoraAuditoria(
+        accion='CREAR', tabla_afectada='producto_cosechado',
+        detalles={
+            'cultivo': referencias.cultivos[objeto.cultivo_id],
+            'cantidad': float(objeto.cantidad),
+            'unidad_medida': objeto.unidad_medida,
+            'origen': origen,
+            'creado_por': usuario.usuario,
+            'id_cliente': registro.id_cliente,
+        },
+        **base
+    )
+
+
+def _insertar_lote(lote, usuario, cliente, referencias):
+    labores = [registro for registro in lote if registro.tipo == 'labor']
+    cosechas = [registro for registro in lote if registro.tipo == 'cosecha']
+    productos = [registro for registro in lote if registro.tipo == 'producto_cosechado']
+
+    with transaction.atomic():
+        Labor.objects.bulk_create([registro.objeto for registro in labores])
+        for registro in productos:
+            if registro.labor_envio is not None:
+                registro.objeto.labor_id = registro.labor_envio.objeto.pk
+        Cosecha.objects.bulk_create([registro.objeto for registro in cosechas])
+        ProductoCosechado.asignar_socios([registro.objeto for registro in productos])
+        ProductoCosechado.objects.bulk_create([registro.objeto for registro in productos])
+
+        CargaOffline.objects.bulk_create([
+            CargaOffline(usuario=usuario, id_cliente=registro.id_cliente, tipo=registro.tipo, objeto_id=registro.objeto.pk)
+            for registro in lote
+        ])
+        BitacoraAuditoria.objects.bulk_create([
+            _bitacora(registro, usuario, cliente, referencias) for registro in lote
+        ])
+
+        # bulk_create no emite post_save: lo que harían las señales
+        if productos:
+            versiones.incrementar(ProductoCosechado)
+        parcelas = sorted({referencias.ciclos[registro.objeto.ciclo_cultivo_id][1] for registro in cosechas})
+        if parcelas:
+            transaction.on_commit(lambda: productividad.recalcular_parcelas(parcelas))
+
+    for registro in lote:
+        registro.estado = 'creado'
+        registro.objeto_id = registro.objeto.pk
+
+
+def cargar(registros, usuario, cliente=None, tamano_lote=TAMANO_LOTE):
+    """
+    Valida e inserta los registros de un envío de la app móvil.
+
+    Args:
+        registros: lista de {id_cliente, tipo, datos}
+        usuario: quien envía (dueño de los id_cliente y autor en la bitácora)
+        cliente: ip / user_agent para la bitácora
+
+    Returns:
+        dict: total, creados, duplicados, errores y el resultado por registro
+    """
+    registros = [_construir(indice, datos) for indice, datos in enumerate(registros)]
+    referencias = _validar(registros, usuario)
+
+    validos = [registro for registro in registros if registro.estado == 'pendiente']
+    for inicio in range(0, len(validos), tamano_lote):
+        lote = validos[inicio:inicio + tamano_lote]
+        # Labor de un lote anterior que la base de datos rechazó
+        for registro in lote:
+            if registro.labor_envio is not None and registro.labor_envio.estado == 'error':
+                registro.agregar_error('labor_cliente', 'La labor del envío no se pudo registrar')
+        lote = [registro for registro in lote if registro.estado == 'pendiente']
+        if not lote:
+            continue
+        try:
+            _insertar_lote(lote, usuario, cliente or {}, referencias)
+        except IntegrityError as e:
+            # Otro proceso usó la misma labor o el mismo id_cliente entre la validación y el lote
+            for registro in lote:
+                registro.errores = {'__all__': [f'Lote rechazado por la base de datos: {e}']}
+                registro.estado = 'error'
+
+    conteo = {estado: sum(1 for registro in registros if registro.estado == estado)
+              for estado in ('creado', 'duplicado', 'error')}
+    return {
+        'total': len(registros),
+        'creados': conteo['creado'],
+        'duplicados': conteo['duplicado'],
+        'errores': conteo['error'],
+        'resultados': [registro.resultado() for registro in registros],
+    }
@@ -0,0 +1,125 @@
+"""
+CU7/CU8: Catálogo unificado de insumos
+
+Semillas, pesticidas y fertilizantes viven en tres tablas; InsumoCatalogo
+guarda una fila por insumo con las columnas comunes (nombre para mostrar,
+texto de búsqueda normalizado, stock, precio, vencimiento, estado) para
+buscar y paginar en una sola consulta (/api/insumos/catalogo/).
+
+La tabla se actualiza por insumo desde cooperativa.signals al confirmar la
+transacción; las escrituras masivas sin señales (transiciones, vencimiento
+masivo, datos sintéticos) llaman a programar()/reconstruir(). El comando
+`python manage.py reconstruir_catalogo_insumos` la regenera completa.
+"""
+
+from django.db import transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from . import versiones
+from .busqueda import INDICES_BUSQUEDA, normalizar
+from .models import Semilla, Pesticida, Fertilizante, InsumoCatalogo
+
+
+FUENTES = {
+    'SEMILLA': Semilla,
+    'PESTICIDA': Pesticida,
+    'FERTILIZANTE': Fertilizante,
+}
+TIPO_POR_MODELO = {modelo: tipo for tipo, modelo in FUENTES.items()}
+
+# Columnas que _fila() recalcula (el resto es la clave)
+CAMPOS_FILA = [
+    'nombre', 'texto_busqueda', 'cantidad', 'unidad_medida', 'precio_unitario',
+    'fecha_vencimiento', 'estado', 'lote', 'proveedor', 'actualizado_en',
+]
+
+# Partes del nombre para mostrar por tipo (las vacías se omiten)
+NOMBRES = {
+    'SEMILLA': ('especie', 'variedad'),
+    'PESTICIDA': ('nombre_comercial', 'ingrediente_activo'),
+    'FERTILIZANTE': ('nombre_comercial', 'composicion_npk'),
+}
+
+
+def _fila(tipo, insumo, ahora):
+    # Mismos campos que la búsqueda ?q= de cada ViewSet (busqueda.py)
+    campos_busqueda = INDICES_BUSQUEDA[FUENTES[tipo]._meta.model_name]['campos']
+    return InsumoCatalogo(
+        tipo_insumo=tipo,
+        insumo_id=insumo.pk,
+        nombre=' - '.join(str(valor) for valor in (getattr(insumo, c) for c in NOMBRES[tipo]) if valor),
+        texto_busqueda=normalizar(' '.join(str(getattr(insumo, c) or '') for c in campos_busqueda)),
+        cantidad=insumo.cantidad,
+        unidad_medida=insumo.unidad_medida,
+        precio_unitario=insumo.precio_unitario,
+        fecha_vencimiento=insumo.fecha_vencimiento,
+        estado=insumo.estado,
+        lote=insumo.lote,
+        proveedor=insumo.proveedor,
+        actualizado_en=ahora,
+    )
+
+
+def recalcular(modelo, ids=None):
+    """
+    Regenera las filas del catálogo de un tipo de insumo (solo `ids` si se
+    indican; los ids que ya no existen en el origen se eliminan).
+
+    Returns:
+        int: filas escritas
+    """
+    tipo = TIPO_POR_MODELO[modelo]
+    origen = modelo.objects.order_by()
+    existentes = InsumoCatalogo.objects.filter(tipo_insumo=tipo)
+    if ids is not None:
+        origen = origen.filter(pk__in=ids)
+        existentes = existentes.filter(insumo_id__in=ids)
+
+    ahora = timezone.now()
+    filas = [_fila(tipo, insumo, ahora) for insumo in origen.iterator(chunk_size=2000)]
+
+    with transaction.atomic():
+        # Upsert sobre (tipo_insumo, insumo_id): dos recálculos concurrentes del
+        # mismo insumo no chocan con unique_together después del commit
+        InsumoCatalogo.objects.bulk_create(
+            filas, batch_size=1000, update_conflicts=True,
+            unique_fields=['tipo_insumo', 'insumo_id'], update_fields=CAMPOS_FILA,
+        )
+        # Lo que no se reescribió ya no existe en el origen
+        existentes.filter(actualizado_en__lt=ahora).delete()
+        versiones.incrementar(InsumoCatalogo)
+    return len(filas)
+
+
+def reconstruir():
+    """Reconstrucción completa de los tres tipos"""
+    return {tipo: recalcular(modelo) for tipo, modelo in FUENTES.items()}
+
+
+def asegurar_inicializado():
+    """Primera carga si el catálogo está vacío y ya hay insumos"""
+    if not InsumoCatalogo.objects.exists() and any(m.objects.exists() for m in FUENTES.values()):
+        reconstruir()
+
+
+def programar(modelo, ids=None):
+    """Recalcula los insumos indicados (todo el tipo si ids es None) al confirmar la transacción"""
+    ids = list(ids) if ids is not None else None
+    transaction.on_commit(lambda: recalcular(modelo, ids))
+
+
+def programar_todo():
+    """Reconstruye el catálogo completo al confirmar la transacción (cargas masivas)"""
+    transaction.on_commit(reconstruir)
+
+
+def conteo_disponibles():
+    """Insumos DISPONIBLE por tipo en una sola consulta: {'SEMILLA': n, ...}"""
+    asegurar_inicializado()
+    conteos = dict.fromkeys(FUENTES, 0)
+    conteos.update(
+        InsumoCatalogo.objects.filter(estado='DISPONIBLE').order_by()
+        .values_list('tipo_insumo').annotate(total=Count('id'))
+    )
+    return conteos
@@ -0,0 +1,213 @@
+"""
+Detector de consultas N+1 (desarrollo y tests)
+
+ConsultasN1Middleware (middleware.py) instala DetectorN1 como
+execute_wrapper durante el request. Cada consulta se agrupa por su huella:
+SQL normalizado (literales, listas IN y espacios) + sitio de llamada (el
+primer frame del proyecto fuera de la instrumentación) + campo de serializer que
+la disparó, si lo hay (SerializerMethodField, relación anidada, source con
+puntos). Una huella que se repite más de CONSULTAS_N1_UMBRAL veces en el
+mismo request es un N+1.
+
+CONSULTAS_N1_MODO:
+- 'off': sin instrumentar (producción).
+- 'log': aviso en el log 'cooperativa.n1' (por defecto con DEBUG).
+- 'estricto': ConsultasN1Error, que el cliente de tests re-lanza y hace
+  fallar el test nombrando el campo. Los N+1 ya conocidos, listados en
+  CONSULTAS_N1_CONOCIDOS, solo se registran en el log.
+- 'registrar': acumula las detecciones para regenerar ese listado.
+
+EjecutorPruebasN1 (TEST_RUNNER) corre la suite en modo estricto:
+    python manage.py test test                     # falla ante un N+1 nuevo
+    python manage.py test test --n1-modo registrar  # regenera los conocidos
+"""
+
+import json
+import logging
+import os
+import re
+import sys
+from contextlib import contextmanager
+from functools import lru_cache
+
+from django.conf import settings
+from django.db import connection
+from django.test.runner import DiscoverRunner
+
+from . import metricas
+
+
+logger = logging.getLogger('cooperativa.n1')
+
+MODOS = ('off', 'log', 'estricto', 'registrar')
+
+# Control de transacciones: se repiten por diseño
+_IGNORADAS = ('SAVEPOINT', 'RELEASE SAVEPOINT', 'ROLLBACK TO SAVEPOINT', 'BEGIN', 'COMMIT')
+
+_CADENAS = re.compile(r"'(?:[^']|'')*'")
+_NUMEROS = re.compile(r'\b\d+(?:\.\d+)?\b')
+_LISTAS_IN = re.compile(r'\bIN\s*\((?:\s*(?:%s|\?|\d+|NULL)\s*,?)+\)', re.IGNORECASE)
+_ESPACIOS = re.compile(r'\s+')
+_LINEA = re.compile(r':\d+')
+
+# execute_wrappers de este módulo y de metricas.py: no son el sitio de la consulta
+_INSTRUMENTACION = {os.path.abspath(__file__), os.path.abspath(metricas.__file__)}
+
+# Detecciones acumuladas en modo 'registrar' (clave -> ejemplo)
+_registradas = {}
+
+
+class ConsultasN1Error(AssertionError):
+    """N+1 detectado en modo estricto"""
+
+
+def normalizar_sql(sql):
+    """SQL sin valores concretos: dos filas distintas dan la misma huella"""
+    sql = _CADENAS.sub('?', sql)
+    sql = _LISTAS_IN.sub('IN (...)', sql)
+    sql = _NUMEROS.sub('?', sql)
+    return _ESPACIOS.sub(' ', sql).strip()
+
+
+def _nombre_campo(campo):
+    return f'{type(campo.parent).__name__}.{campo.field_name}'
+
+
+def _origen(frame):
+    """
+    (sitio, campo) de la consulta: primer frame del proyecto y el campo de
+    serializer más interno en ejecución.
+    """
+    from rest_framework.fields import Field
+
+    raiz = str(settings.BASE_DIR)
+    sitio = campo = None
+    while frame is not None and (sitio is None or campo is None):
+        codigo = frame.f_code
+        archivo = codigo.co_filename
+        if (sitio is None and archivo.startswith(raiz) and archivo not in _INSTRUMENTACION
+                and 'site-packages' not in archivo):
+            sitio = f'{os.path.relpath(archivo, raiz)}:{frame.f_lineno} {codigo.co_name}'
+        if campo is None and codigo.co_name in ('to_representation', 'get_attribute'):
+            instancia = frame.f_locals.get('self')
+            if isinstance(instancia, Field) and instancia.field_name and instancia.parent is not None:
+                campo = _nombre_campo(instancia)
+        frame = frame.f_back
+    return sitio or '?', campo
+
+
+class DetectorN1:
+    """execute_wrapper que agrupa las consultas por huella"""
+
+    def __init__(self, umbral=None):
+        self.umbral = umbral if umbral is not None else getattr(settings, 'CONSULTAS_N1_UMBRAL', 2)
+        self.consultas = 0
+        self.huellas = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        self.consultas += 1
+        if not sql.lstrip().upper().startswith(_IGNORADAS):
+            sitio, campo = _origen(sys._getframe(1))
+            huella = (normalizar_sql(sql), sitio, campo)
+            self.huellas[huella] = self.huellas.get(huella, 0) + 1
+        return execute(sql, params, many, context)
+
+    def repetidas(self):
+        """Huellas por encima del umbral, de la más repetida a la menos"""
+        detecciones = [
+            {'sql': sql, 'sitio': sitio, 'campo': campo, 'veces': veces}
+            for (sql, sitio, campo), veces in self.huellas.items()
+            if veces > self.umbral
+        ]
+        return sorted(detecciones, key=lambda d: -d['veces'])
+
+
+def clave(deteccion):
+    """Identificador estable de un N+1 (sin número de línea)"""
+    return deteccion['campo'] or _LINEA.sub('', deteccion['sitio'])
+
+
+@lru_cache(maxsize=1)
+def conocidos():
+    ruta = getattr(settings, 'CONSULTAS_N1_CONOCIDOS', None)
+    if not ruta or not os.path.exists(ruta):
+        return frozenset()
+    with open(ruta, encoding='utf-8') as archivo:
+        return frozenset(json.load(archivo)['conocidos'])
+
+
+def modo_actual():
+    return getattr(settings, 'CONSULTAS_N1_MODO', 'off')
+
+
+def informar(detector, vista, modo=None):
+    """Aplica el modo configurado a las detecciones de un request o bloque"""
+    modo = modo or modo_actual()
+    nuevas = []
+    for deteccion in detector.repetidas():
+        if modo == 'registrar':
+            _registradas.setdefault(clave(deteccion), {'vista': vista, 'sql': deteccion['sql'][:300]})
+            continue
+        conocido = clave(deteccion) in conocidos()
+        nivel = logging.INFO if conocido else logging.WARNING
+        logger.log(nivel, 'consultas_n1', extra={'vista': vista, **deteccion, 'sql': deteccion['sql'][:300]})
+        if not conocido:
+            nuevas.append(deteccion)
+
+    if nuevas and modo == 'estricto':
+        detalle = '\n'.join(
+            f"  {d['veces']}x {d['campo'] or 'sin campo de serializer'} en {d['sitio']}\n    {d['sql'][:200]}"
+            for d in nuevas
+        )
+        raise ConsultasN1Error(f'Consultas N+1 en {vista}:\n{detalle}')
+
+
+@contextmanager
+def detectar_n1(vista='bloque', umbral=None, modo='estricto'):
+    """Para tests de código fuera de un request (serializers, servicios)"""
+    detector = DetectorN1(umbral)
+    with connection.execute_wrapper(detector):
+        yield detector
+    informar(detector, vista, modo)
+
+
+def guardar_registradas(ruta=None):
+    ruta = ruta or settings.CONSULTAS_N1_CONOCIDOS
+    with open(ruta, 'w', encoding='utf-8') as archivo:
+        json.dump({'conocidos': dict(sorted(_registradas.items()))}, archivo, indent=2, ensure_ascii=False)
+        archivo.write('\n')
+    return len(_registradas)
+
+
+class EjecutorPruebasN1(DiscoverRunner):
+    """DiscoverRunner que activa el detector en modo estricto"""
+
+    def __init__(self, n1_modo='estricto', **kwargs):
+        super().__init__(**kwargs)
+        self.n1_modo = n1_modo
+
+    @classmethod
+    def add_arguments(cls, parser):
+        super().add_arguments(parser)
+        parser.add_argument(
+            '--n1-modo', choices=MODOS, default=os.getenv('CONSULTAS_N1_MODO_TESTS', 'estricto'),
+            help='Detector de consultas N+1 durante los tests (por defecto estricto)'
+        )
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self._modo_anterior = modo_actual()
+        settings.CONSULTAS_N1_MODO = self.n1_modo
+        _registradas.clear()
+        # En los tests la réplica es un espejo de default (TEST MIRROR) y los
+        # TestCase no la declaran en `databases`: todo se lee de default
+        self._replica_anterior = getattr(settings, 'REPLICA_ALIAS', None)
+        settings.REPLICA_ALIAS = None
+
+    def teardown_test_environment(self, **kwargs):
+        if self.n1_modo == 'registrar':
+            total = guardar_registradas()
+            print(f'{total} N+1 conocidos guardados en {settings.CONSULTAS_N1_CONOCIDOS}', file=sys.stderr)
+        settings.CONSULTAS_N1_MODO = self._modo_anterior
+        settings.REPLICA_ALIAS = self._replica_anterior
+        super().teardown_test_environment(**kwargs)
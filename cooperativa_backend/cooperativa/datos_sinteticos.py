@@ -0,0 +1,626 @@
+"""
+Generador de datos sintéticos a escala de producción
+
+Crea datos referencialmente consistentes para todos los modelos de negocio
+(comunidades, socios, parcelas, cultivos, ciclos, cosechas, tratamientos,
+análisis de suelo, insumos y precios por temporada, campañas y labores,
+productos cosechados, ventas, pedidos de insumos, pagos y bitácora) para
+reproducir planes de consulta reales en local.
+
+- bulk_create por lotes de socios, cada lote en su propia transacción;
+  no se ejecutan save()/full_clean() ni señales por fila.
+- Determinista: cada socio usa su propio Random(semilla:indice), por lo que
+  el resultado no depende del tamaño de lote. Las fechas se calculan
+  respecto a `hasta`; misma semilla + misma fecha = mismos datos.
+- Distribuciones: tamaño de comunidades tipo Zipf, superficie log-normal,
+  especies y calidades ponderadas, rendimiento por especie con ruido
+  log-normal y eventos (tratamientos, pedidos) con Poisson.
+- Todo lo generado lleva el prefijo en claves naturales (usuario, lote,
+  número de pedido...) para poder eliminarlo con limpiar().
+"""
+
+import math
+import random
+import zlib
+from collections import Counter
+from itertools import accumulate
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+
+from django.contrib.auth.hashers import make_password
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import catalogo_insumos, versiones
+from .geoespacial import codificar_geohash
+from .models import (
+    Usuario, UsuarioRol, Comunidad, Socio, Parcela, Cultivo, CicloCultivo, Cosecha, Tratamiento,
+    AnalisisSuelo, ProductividadParcela, TransferenciaParcela, BitacoraAuditoria, Semilla, Pesticida,
+    Fertilizante, PrecioTemporada, Campaign, CampaignPartner, CampaignPlot, Labor, ProductoCosechado,
+    Pedido, DetallePedido, Pago, PedidoInsumo, DetallePedidoInsumo, PagoInsumo
+)
+
+
+PASSWORD_SINTETICO = 'Sintetico123'
+
+NOMBRES = [
+    'Juan', 'María', 'Luis', 'Ana', 'Carlos', 'Rosa', 'José', 'Carmen', 'Pedro', 'Elena',
+    'Miguel', 'Lucía', 'Jorge', 'Sofía', 'Mario', 'Julia', 'Hugo', 'Teresa', 'Raúl', 'Patricia',
+    'Víctor', 'Gabriela', 'Fernando', 'Silvia', 'Ricardo', 'Verónica', 'Oscar', 'Daniela', 'Freddy', 'Marcela',
+]
+APELLIDOS = [
+    'Quispe', 'Mamani', 'Flores', 'Rodríguez', 'Vargas', 'Gutiérrez', 'Choque', 'Rojas', 'Fernández',
+    'López', 'Condori', 'Pérez', 'Justiniano', 'Suárez', 'Añez', 'Ribera', 'Roca', 'Vaca', 'Paz',
+    'Salvatierra', 'Cuéllar', 'Méndez', 'Torrez', 'Gonzales', 'Chávez',
+]
+MUNICIPIOS = [
+    'Montero', 'Warnes', 'Cotoca', 'Portachuelo', 'Okinawa Uno', 'San Julián', 'Cuatro Cañadas',
+    'Pailón', 'Mineros', 'Yapacaní', 'Saavedra', 'Fernández Alonso',
+]
+TIPOS_SUELO = (['Franco', 'Franco arcilloso', 'Arcilloso', 'Franco arenoso', 'Arenoso', 'Limoso'],
+               [30, 22, 18, 16, 8, 6])
+
+# especie: (peso, rendimiento kg/ha, precio Bs/kg, semestre de siembra, variedades)
+ESPECIES = {
+    'Soya': (30, 2800, Decimal('3.20'), 2, ['Munasqa', 'Celeste', 'Sumaj']),
+    'Maíz': (22, 5200, Decimal('1.60'), 1, ['Chiriguano', 'Cubano Amarillo', 'Duro']),
+    'Trigo': (12, 2100, Decimal('2.40'), 1, ['Motacú', 'Urubó']),
+    'Arroz': (10, 3500, Decimal('2.90'), 2, ['Saavedra', 'Jasayé']),
+    'Girasol': (8, 1600, Decimal('3.50'), 1, ['Aguará', 'Paraíso']),
+    'Sorgo': (7, 3800, Decimal('1.30'), 1, ['Granífero', 'Forrajero']),
+    'Papa': (6, 12000, Decimal('2.10'), 2, ['Huaycha', 'Desiree']),
+    'Quinua': (5, 900, Decimal('12.00'), 2, ['Real', 'Jacha Grano']),
+}
+CALIDADES = (['EXCELENTE', 'BUENA', 'REGULAR', 'MALA'], [15, 50, 28, 7])
+TRATAMIENTOS = {
+    'FERTILIZANTE': (30, ['Urea 46%', 'Fosfato diamónico', 'Triple 15'], 'kg/ha'),
+    'PESTICIDA': (20, ['Clorpirifos', 'Cipermetrina', 'Imidacloprid'], 'L/ha'),
+    'HERBICIDA': (20, ['Glifosato', 'Atrazina', 'Paraquat'], 'L/ha'),
+    'RIEGO': (15, ['Agua de pozo'], 'mm'),
+    'LABOR': (8, ['Carpida mecánica'], 'ha'),
+    'REGULADOR': (4, ['Ácido giberélico'], 'L/ha'),
+    'OTRO': (3, ['Inoculante'], 'kg/ha'),
+}
+TIPOS_PESTICIDA = ['INSECTICIDA', 'FUNGICIDA', 'HERBICIDA', 'NEMATICIDA', 'ACARICIDA']
+INGREDIENTES = ['Glifosato', 'Cipermetrina', 'Mancozeb', 'Imidacloprid', 'Abamectina', 'Tebuconazol']
+TIPOS_FERTILIZANTE = ['QUIMICO', 'ORGANICO', 'FOLIARES', 'RAIZ', 'MICRONUTRIENTES']
+NPK = ['15-15-15', '46-0-0', '18-46-0', '0-0-60', '20-20-20', '10-30-10']
+PROVEEDORES = ['AgroSanta Cruz', 'Semillas del Oriente', 'AgroQuímica', 'Fertisur', 'Campo Verde']
+# Temporadas del hemisferio sur: (nombre, mes inicio, día inicio, mes fin, día fin, factor de precio)
+TEMPORADAS = [
+    ('VERANO', 1, 1, 3, 20, Decimal('1.10')),
+    ('OTOÑO', 3, 21, 6, 20, Decimal('0.95')),
+    ('INVIERNO', 6, 21, 9, 22, Decimal('1.00')),
+    ('PRIMAVERA', 9, 23, 12, 31, Decimal('1.15')),
+]
+ROLES_CAMPANIA = (['PRODUCTOR', 'TECNICO', 'SUPERVISOR', 'COORDINADOR'], [85, 7, 5, 3])
+ESTADOS_PRODUCTO = (['En Almacén', 'Vendido', 'Procesado', 'Vencido'], [40, 45, 10, 5])
+METODOS_PAGO = (['EFECTIVO', 'TRANSFERENCIA', 'QR', 'STRIPE'], [45, 30, 20, 5])
+METODOS_PAGO_INSUMO = (['EFECTIVO', 'TRANSFERENCIA', 'DESCUENTO_PRODUCCION', 'CREDITO'], [35, 25, 30, 10])
+
+
+@dataclass
+class ParametrosGeneracion:
+    socios: int = 1000
+    parcelas_por_socio: float = 3
+    anios: int = 5
+    comunidades: int = None
+    insumos: int = 100
+    participacion_campanias: float = 0.15
+    pedidos_por_socio: float = 0.8
+    pedidos_insumo_por_socio: float = 1.2
+    logins_por_usuario: float = 3
+    semilla: int = 42
+    prefijo: str = 'sint'
+    hasta: date = None
+    lote: int = 1000
+    tamano_insert: int = 2000
+
+    def __post_init__(self):
+        self.hasta = self.hasta or timezone.localdate()
+        if self.comunidades is None:
+            self.comunidades = max(5, self.socios // 400)
+
+
+def _dinero(valor):
+    return Decimal(valor).quantize(Decimal('0.01'))
+
+
+def _momento(fecha, rng):
+    return timezone.make_aware(datetime.combine(fecha, time(rng.randint(7, 18), rng.randint(0, 59))))
+
+
+def _poisson(rng, media):
+    """Knuth: suficiente para medias pequeñas (eventos por socio y año)"""
+    limite, k, p = math.exp(-media), 0, 1.0
+    while True:
+        p *= rng.random()
+        if p <= limite:
+            return k
+        k += 1
+
+
+def _elegir(rng, opciones):
+    return rng.choices(opciones[0], weights=opciones[1])[0]
+
+
+class GeneradorDatos:
+    """
+    Uso:
+        GeneradorDatos(ParametrosGeneracion(socios=50000, anios=5)).generar()
+    """
+
+    def __init__(self, parametros, progreso=None):
+        self.p = parametros
+        self.prefijo = parametros.prefijo.lower()
+        self.codigo = parametros.prefijo.upper()
+        # Distingue los CI de distintos prefijos (CI: solo dígitos y guiones)
+        self.sufijo_ci = f'{zlib.crc32(self.codigo.encode()) % 1000:03d}'
+        self.progreso = progreso or (lambda mensaje: None)
+        self.conteos = Counter()
+        self.anios = list(range(parametros.hasta.year - parametros.anios + 1, parametros.hasta.year + 1))
+        self.especies = list(ESPECIES)
+        self.pesos_especies = [ESPECIES[e][0] for e in self.especies]
+
+    def _rng(self, *clave):
+        return random.Random(':'.join(str(c) for c in (self.p.semilla, *clave)))
+
+    def _guardar(self, modelo, objetos):
+        if objetos:
+            modelo.objects.bulk_create(objetos, batch_size=self.p.tamano_insert)
+            self.conteos[modelo.__name__] += len(objetos)
+        return objetos
+
+    # Catálogos globales
+    # ------------------
+
+    def _crear_comunidades(self):
+        rng = self._rng('comunidades')
+        comunidades = [
+            Comunidad(
+                nombre=f'{self.codigo} {MUNICIPIOS[i % len(MUNICIPIOS)]} {i:04d}',
+                municipio=MUNICIPIOS[i % len(MUNICIPIOS)],
+                departamento='Santa Cruz',
+            )
+            for i in range(self.p.comunidades)
+        ]
+        self._guardar(Comunidad, comunidades)
+        # Centro de cada comunidad en la llanura cruceña
+        self.centros = [(rng.uniform(-18.3, -16.3), rng.uniform(-64.0, -62.0)) for _ in comunidades]
+        # Pocas comunidades grandes y muchas pequeñas (Zipf)
+        self.pesos_comunidades = list(accumulate(1 / (i + 1) ** 1.07 for i in range(len(comunidades))))
+        return comunidades
+
+    def _crear_insumos(self):
+        rng = self._rng('insumos')
+        hasta = self.p.hasta
+        semillas, pesticidas, fertilizantes = [], [], []
+        for i in range(self.p.insumos):
+            especie = rng.choices(self.especies, weights=self.pesos_especies)[0]
+            vencimiento = hasta + timedelta(days=rng.randint(-180, 720))
+            cantidad = Decimal('0.00') if rng.random() < 0.1 else _dinero(rng.uniform(50, 5000))
+            semillas.append(Semilla(
+                especie=especie, variedad=rng.choice(ESPECIES[especie][4]), cantidad=cantidad,
+                fecha_vencimiento=vencimiento, porcentaje_germinacion=_dinero(rng.uniform(70, 98)),
+                lote=f'{self.codigo}-S{i:05d}', proveedor=rng.choice(PROVEEDORES),
+                precio_unitario=_dinero(ESPECIES[especie][2] * Decimal(rng.uniform(2.5, 4))),
+                ubicacion_almacen=f'Almacén {i % 4 + 1}',
+                estado='VENCIDA' if vencimiento < hasta else ('AGOTADA' if not cantidad else 'DISPONIBLE'),
+            ))
+
+            vencimiento = hasta + timedelta(days=rng.randint(-120, 900))
+            cantidad = Decimal('0.00') if rng.random() < 0.08 else _dinero(rng.uniform(10, 800))
+            pesticidas.append(Pesticida(
+                nombre_comercial=f'{rng.choice(INGREDIENTES)} {rng.choice(["Plus", "Max", "Pro"])} {i}',
+                ingrediente_activo=rng.choice(INGREDIENTES), tipo_pesticida=rng.choice(TIPOS_PESTICIDA),
+                concentracion=f'{rng.choice([24, 36, 48, 60])}% EC', cantidad=cantidad,
+                fecha_vencimiento=vencimiento, lote=f'{self.codigo}-P{i:05d}',
+                proveedor=rng.choice(PROVEEDORES), precio_unitario=_dinero(rng.uniform(40, 400)),
+                ubicacion_almacen=f'Depósito {i % 3 + 1}', registro_sanitario=f'SENASAG-{i:05d}',
+                dosis_recomendada=f'{rng.choice([0.5, 1, 1.5, 2])} L/ha',
+                estado='VENCIDO' if vencimiento < hasta else ('AGOTADO' if not cantidad else 'DISPONIBLE'),
+            ))
+
+            tipo = rng.choice(TIPOS_FERTILIZANTE)
+            vencimiento = hasta + timedelta(days=rng.randint(-90, 1000))
+            cantidad = Decimal('0.00') if rng.random() < 0.08 else _dinero(rng.uniform(100, 10000))
+            fertilizantes.append(Fertilizante(
+                nombre_comercial=f'Fertil {tipo.title()} {i}', tipo_fertilizante=tipo,
+                composicion_npk=rng.choice(NPK), cantidad=cantidad, fecha_vencimiento=vencimiento,
+                lote=f'{self.codigo}-F{i:05d}', proveedor=rng.choice(PROVEEDORES),
+                precio_unitario=_dinero(rng.uniform(3, 25)), ubicacion_almacen=f'Galpón {i % 2 + 1}',
+                dosis_recomendada=f'{rng.choice([50, 100, 150, 200])} kg/ha',
+                materia_orgánica=_dinero(rng.uniform(20, 60)) if tipo == 'ORGANICO' else None,
+                estado='VENCIDO' if vencimiento < hasta else ('AGOTADO' if not cantidad else 'DISPONIBLE'),
+            ))
+
+        self.catalogo = (
+            [('SEMILLA', s) for s in self._guardar(Semilla, semillas)]
+            + [('PESTICIDA', p) for p in self._guardar(Pesticida, pesticidas)]
+            + [('FERTILIZANTE', f) for f in self._guardar(Fertilizante, fertilizantes)]
+        )
+
+        precios = []
+        for anio in self.anios:
+            for nombre, mes_inicio, dia_inicio, mes_fin, dia_fin, factor in TEMPORADAS:
+                inicio, fin = date(anio, mes_inicio, dia_inicio), date(anio, mes_fin, dia_fin)
+                for tipo, insumo in self.catalogo:
+                    precio = _dinero(insumo.precio_unitario * factor * Decimal(rng.uniform(0.97, 1.03)))
+                    precios.append(PrecioTemporada(
+                        tipo_insumo=tipo, **{tipo.lower(): insumo}, temporada=nombre,
+                        fecha_inicio=inicio, fecha_fin=fin, precio_venta=precio,
+                        precio_mayoreo=_dinero(precio * Decimal('0.90')),
+                        cantidad_minima_mayoreo=Decimal('50.00'),
+                        activo=inicio <= self.p.hasta <= fin,
+                    ))
+        self._guardar(PrecioTemporada, precios)
+        # bulk_create no dispara señales: el índice de precios_temporada se reconstruye con la versión
+        versiones.incrementar(PrecioTemporada)
+
+    def _crear_campanias(self):
+        rng = self._rng('campanias')
+        campanias = []
+        for anio in self.anios:
+            for semestre, (inicio, fin) in enumerate(
+                [(date(anio, 1, 1), date(anio, 6, 30)), (date(anio, 7, 1), date(anio, 12, 31))], start=1
+            ):
+                if inicio > self.p.hasta:
+                    continue
+                campanias.append(Campaign(
+                    nombre=f'{self.codigo} Campaña {anio}-{"I" if semestre == 1 else "II"}',
+                    fecha_inicio=inicio, fecha_fin=fin,
+                    meta_produccion=_dinero(self.p.socios * self.p.participacion_campanias * rng.uniform(8000, 12000)),
+                    unidad_meta='kg',
+                    estado='FINALIZADA' if fin < self.p.hasta else 'EN_CURSO',
+                    presupuesto=_dinero(self.p.socios * rng.uniform(300, 600)),
+                ))
+        self.campanias = self._guardar(Campaign, campanias)
+
+    # Árbol de cada socio
+    # -------------------
+
+    def _socio(self, indice, lote):
+        """Construye (sin guardar) todos los objetos de un socio en `lote`"""
+        rng = self._rng('socio', indice)
+        hasta = self.p.hasta
+        primer_anio = date(self.anios[0], 1, 1)
+
+        comunidad_idx = rng.choices(range(len(self.comunidades)), cum_weights=self.pesos_comunidades)[0]
+        alta = primer_anio - timedelta(days=rng.randint(0, 3 * 365))
+        activo = rng.random() > 0.07
+        nombre = f'{rng.choice(NOMBRES)} {rng.choice(NOMBRES)}' if rng.random() < 0.3 else rng.choice(NOMBRES)
+        usuario = Usuario(
+            ci_nit=f'{indice:08d}-{self.sufijo_ci}', nombres=nombre,
+            apellidos=f'{rng.choice(APELLIDOS)} {rng.choice(APELLIDOS)}',
+            email=f'{self.prefijo}_{indice}@example.com', telefono=f'+591 7{rng.randint(0, 9999999):07d}',
+            usuario=f'{self.prefijo}_{indice}', password=self.password,
+            estado='ACTIVO' if activo else 'INACTIVO', date_joined=_momento(alta, rng),
+        )
+        usuario.creado_en = usuario.date_joined
+        socio = Socio(
+            usuario=usuario, codigo_interno=f'{self.codigo}-{indice:07d}',
+            fecha_nacimiento=date(hasta.year - int(rng.triangular(20, 75, 42)), rng.randint(1, 12), rng.randint(1, 28)),
+            sexo='M' if rng.random() < 0.55 else 'F', direccion=f'Calle {rng.randint(1, 99)} #{rng.randint(1, 999)}',
+            comunidad=self.comunidades[comunidad_idx], estado='ACTIVO' if activo else 'INACTIVO',
+            creado_en=usuario.date_joined,
+        )
+        lote[Usuario].append(usuario)
+        lote[Socio].append(socio)
+
+        for _ in range(_poisson(rng, self.p.logins_por_usuario)):
+            dia = hasta - timedelta(days=rng.randint(0, 90))
+            lote[BitacoraAuditoria].append(BitacoraAuditoria(
+                usuario=usuario, accion='LOGIN', tabla_afectada='usuario',
+                detalles={'origen': 'datos_sinteticos'}, fecha=_momento(dia, rng),
+                ip_address=f'10.{rng.randint(0, 255)}.{rng.randint(0, 255)}.{rng.randint(1, 254)}',
+                user_agent='Mozilla/5.0 (Android 13; Mobile)',
+            ))
+
+        lat0, lng0 = self.centros[comunidad_idx]
+        cultivos_socio = []
+        n_parcelas = 1 + _poisson(rng, max(self.p.parcelas_por_socio - 1, 0))
+        for k in range(n_parcelas):
+            superficie = min(max(rng.lognormvariate(math.log(3.5), 0.8), 0.1), 500)
+            lat, lng = round(rng.gauss(lat0, 0.03), 6), round(rng.gauss(lng0, 0.03), 6)
+            parcela = Parcela(
+                socio=socio, nombre=f'Parcela {k + 1}', superficie_hectareas=_dinero(superficie),
+                tipo_suelo=_elegir(rng, TIPOS_SUELO), ubicacion=f'{MUNICIPIOS[comunidad_idx % len(MUNICIPIOS)]} km {rng.randint(1, 60)}',
+                latitud=Decimal(str(lat)), longitud=Decimal(str(lng)), geohash=codificar_geohash(lat, lng),
+                estado='ACTIVA' if activo or rng.random() < 0.5 else 'INACTIVA', creado_en=socio.creado_en,
+            )
+            lote[Parcela].append(parcela)
+
+            for anio in self.anios:
+                if rng.random() < 0.3:
+                    lote[AnalisisSuelo].append(AnalisisSuelo(
+                        parcela=parcela, fecha_analisis=date(anio, rng.randint(1, 12), rng.randint(1, 28)),
+                        tipo_analisis=rng.choice(['QUIMICO', 'FISICO', 'COMPLETO']),
+                        ph=_dinero(rng.gauss(6.5, 0.6)), materia_organica=_dinero(rng.uniform(1, 6)),
+                        nitrogeno=_dinero(rng.uniform(0.05, 0.4)), fosforo=_dinero(rng.uniform(5, 40)),
+                        potasio=_dinero(rng.uniform(0.1, 1.5)), laboratorio='CIAT Santa Cruz',
+                        costo_analisis=_dinero(rng.uniform(150, 450)),
+                    ))
+
+            n_cultivos = 2 if rng.random() < 0.35 else 1
+            for especie in dict.fromkeys(rng.choices(self.especies, weights=self.pesos_especies, k=n_cultivos)):
+                hectareas = superficie * rng.uniform(0.6, 1.0) / n_cultivos
+                cultivo = Cultivo(
+                    parcela=parcela, especie=especie, variedad=rng.choice(ESPECIES[especie][4]),
+                    tipo_semilla='Certificada' if rng.random() < 0.6 else 'Propia',
+                    hectareas_sembradas=_dinero(hectareas),
+                    estado='ACTIVO' if parcela.estado == 'ACTIVA' else 'INACTIVO',
+                )
+                lote[Cultivo].append(cultivo)
+                cultivos_socio.append((parcela, cultivo))
+                self._ciclos(rng, cultivo, especie, hectareas, lote)
+
+        productos = self._campanias_socio(rng, socio, cultivos_socio, lote)
+        self._pedidos_socio(rng, indice, socio, usuario, productos, lote)
+
+    def _ciclos(self, rng, cultivo, especie, hectareas, lote):
+        hasta = self.p.hasta
+        _, rendimiento, precio, semestre, _ = ESPECIES[especie]
+        for anio in self.anios:
+            inicio = date(anio, 1 if semestre == 1 else 7, 1) + timedelta(days=rng.randint(0, 75))
+            if inicio > hasta:
+                continue
+            fin = inicio + timedelta(days=rng.randint(110, 150))
+            esperado = rendimiento * rng.uniform(0.9, 1.1)
+            if fin < hasta:
+                estado = 'CANCELADO' if rng.random() < 0.04 else 'FINALIZADO'
+            else:
+                estado = 'CRECIMIENTO' if inicio + timedelta(days=30) < hasta else 'SIEMBRA'
+            real = esperado * rng.lognormvariate(0, 0.25) if estado == 'FINALIZADO' else None
+            costo = hectareas * rng.uniform(1800, 3200)
+            ciclo = CicloCultivo(
+                cultivo=cultivo, fecha_inicio=inicio, fecha_estimada_fin=fin,
+                fecha_fin_real=fin + timedelta(days=rng.randint(-7, 14)) if estado == 'FINALIZADO' else None,
+                estado=estado, costo_estimado=_dinero(costo),
+                costo_real=_dinero(costo * rng.uniform(0.85, 1.25)) if estado == 'FINALIZADO' else None,
+                rendimiento_esperado=_dinero(esperado), rendimiento_real=_dinero(real) if real else None,
+            )
+            lote[CicloCultivo].append(ciclo)
+
+            hoy_o_fin = min(fin, hasta)
+            for _ in range(_poisson(rng, 4)):
+                tipo = rng.choices(list(TRATAMIENTOS), weights=[t[0] for t in TRATAMIENTOS.values()])[0]
+                lote[Tratamiento].append(Tratamiento(
+                    ciclo_cultivo=ciclo, tipo_tratamiento=tipo, nombre_producto=rng.choice(TRATAMIENTOS[tipo][1]),
+                    dosis=_dinero(rng.uniform(0.5, 150)), unidad_dosis=TRATAMIENTOS[tipo][2],
+                    fecha_aplicacion=inicio + timedelta(days=rng.randint(0, max((hoy_o_fin - inicio).days, 0))),
+                    costo=_dinero(hectareas * rng.uniform(50, 400)), aplicado_por='Productor',
+                ))
+
+            if estado != 'FINALIZADO':
+                continue
+            total = real * hectareas
+            partes = 2 if rng.random() < 0.3 else 1
+            for parte in range(partes):
+                lote[Cosecha].append(Cosecha(
+                    ciclo_cultivo=ciclo, fecha_cosecha=fin - timedelta(days=rng.randint(0, 10) + 12 * (partes - 1 - parte)),
+                    cantidad_cosechada=_dinero(total / partes), calidad=_elegir(rng, CALIDADES),
+                    estado=rng.choices(['COMPLETADA', 'PENDIENTE', 'CANCELADA'], weights=[90, 8, 2])[0],
+                    precio_venta=_dinero(precio * Decimal(rng.uniform(0.85, 1.15))),
+                ))
+
+    def _campanias_socio(self, rng, socio, cultivos_socio, lote):
+        productos = []
+        if not cultivos_socio:
+            return productos
+        for campania in self.campanias:
+            if rng.random() >= self.p.participacion_campanias:
+                continue
+            asignacion = campania.fecha_inicio + timedelta(days=rng.randint(0, 20))
+            lote[CampaignPartner].append(CampaignPartner(
+                campaign=campania, socio=socio, rol=_elegir(rng, ROLES_CAMPANIA), fecha_asignacion=asignacion,
+            ))
+            parcela, cultivo = rng.choice(cultivos_socio)
+            comprometida = parcela.superficie_hectareas * Decimal(rng.uniform(0.5, 1.0))
+            rendimiento = ESPECIES[cultivo.especie][1]
+            lote[CampaignPlot].append(CampaignPlot(
+                campaign=campania, parcela=parcela, fecha_asignacion=asignacion,
+                superficie_comprometida=_dinero(comprometida), cultivo_planificado=cultivo.especie,
+                meta_produccion_parcela=_dinero(comprometida * rendimiento),
+            ))
+
+            duracion = (campania.fecha_fin - campania.fecha_inicio).days
+            for orden, tipo in enumerate(['SIEMBRA', 'FERTILIZACION', 'FUMIGACION', 'COSECHA']):
+                if tipo == 'FUMIGACION' and rng.random() < 0.5:
+                    continue
+                fecha = campania.fecha_inicio + timedelta(days=int(duracion * (orden + rng.random()) / 4))
+                if fecha > self.p.hasta:
+                    estado = 'PLANIFICADA'
+                else:
+                    estado = 'CANCELADA' if rng.random() < 0.03 else 'COMPLETADA'
+                labor = Labor(fecha_labor=fecha, labor=tipo, estado=estado, campania=campania, parcela=parcela)
+                lote[Labor].append(labor)
+                if tipo == 'COSECHA' and estado == 'COMPLETADA':
+                    producto = ProductoCosechado(
+                        fecha_cosecha=fecha, cantidad=_dinero(comprometida * rendimiento * Decimal(rng.uniform(0.7, 1.2))),
+                        unidad_medida='kg', calidad=rng.choice(['Premium', 'Estándar', 'Segunda']),
+                        cultivo=cultivo, labor=labor, estado=_elegir(rng, ESTADOS_PRODUCTO),
+                        lote=float(rng.randint(1000, 9999)), ubicacion_almacen=f'Silo {rng.randint(1, 8)}',
+                        campania=campania, parcela=parcela,
+                        socio=socio, socio_nombre=socio.usuario.get_full_name(),
+                    )
+                    lote[ProductoCosechado].append(producto)
+                    productos.append(producto)
+        return productos
+
+    def _pedidos_socio(self, rng, indice, socio, usuario, productos, lote):
+        hasta = self.p.hasta
+        numero = 0
+        for anio in self.anios:
+            for _ in range(_poisson(rng, self.p.pedidos_por_socio)):
+                numero += 1
+                fecha = date(anio, rng.randint(1, 12), rng.randint(1, 28))
+                if fecha > hasta:
+                    continue
+                pedido = Pedido(
+                    socio=socio, cliente_nombre=f'{rng.choice(NOMBRES)} {rng.choice(APELLIDOS)}',
+                    cliente_telefono=f'7{rng.randint(0, 9999999):07d}',
+                    numero_pedido=f'{self.codigo}-PV-{indice:07d}-{numero:03d}', fecha_pedido=_momento(fecha, rng),
+                    fecha_entrega_estimada=fecha + timedelta(days=rng.randint(2, 15)),
+                    estado=rng.choices(['COMPLETADO', 'CONFIRMADO', 'PENDIENTE', 'CANCELADO'], weights=[70, 10, 12, 8])[0],
+                    creado_por=usuario,
+                )
+                subtotal = Decimal('0.00')
+                for _ in range(rng.randint(1, 3)):
+                    producto = rng.choice(productos) if productos and rng.random() < 0.5 else None
+                    especie = producto.cultivo.especie if producto else rng.choice(self.especies)
+                    cantidad = _dinero(rng.uniform(50, 2000))
+                    precio = _dinero(ESPECIES[especie][2] * Decimal(rng.uniform(0.9, 1.2)))
+                    lote[DetallePedido].append(DetallePedido(
+                        pedido=pedido, producto_cosechado=producto, producto_nombre=especie,
+                        cantidad=cantidad, unidad_medida='kg', precio_unitario=precio, subtotal=_dinero(cantidad * precio),
+                    ))
+                    subtotal += _dinero(cantidad * precio)
+                pedido.subtotal = subtotal
+                pedido.impuestos = _dinero(subtotal * Decimal('0.13'))
+                pedido.total = pedido.subtotal + pedido.impuestos
+                lote[Pedido].append(pedido)
+                if pedido.estado == 'COMPLETADO':
+                    pedido.fecha_entrega_real = pedido.fecha_entrega_estimada
+                    lote[Pago].append(Pago(
+                        pedido=pedido, numero_recibo=f'{self.codigo}-RV-{indice:07d}-{numero:03d}',
+                        fecha_pago=pedido.fecha_pedido + timedelta(days=rng.randint(0, 10)), monto=pedido.total,
+                        metodo_pago=_elegir(rng, METODOS_PAGO), estado='COMPLETADO',
+                    ))
+
+            for _ in range(_poisson(rng, self.p.pedidos_insumo_por_socio)):
+                numero += 1
+                fecha = date(anio, rng.randint(1, 12), rng.randint(1, 28))
+                if fecha > hasta or not self.catalogo:
+                    continue
+                estado = rng.choices(['ENTREGADO', 'APROBADO', 'SOLICITADO', 'CANCELADO'], weights=[75, 8, 10, 7])[0]
+                pedido = PedidoInsumo(
+                    socio=socio, numero_pedido=f'{self.codigo}-PI-{indice:07d}-{numero:03d}',
+                    fecha_pedido=_momento(fecha, rng), fecha_entrega_solicitada=fecha + timedelta(days=7),
+                    fecha_entrega_real=fecha + timedelta(days=rng.randint(3, 12)) if estado == 'ENTREGADO' else None,
+                    estado=estado, motivo_solicitud='Campaña agrícola',
+                )
+                subtotal = Decimal('0.00')
+                for tipo, insumo in rng.sample(self.catalogo, k=min(rng.randint(1, 3), len(self.catalogo))):
+                    cantidad = _dinero(rng.uniform(1, 200))
+                    nombre_insumo = insumo.especie if tipo == 'SEMILLA' else insumo.nombre_comercial
+                    lote[DetallePedidoInsumo].append(DetallePedidoInsumo(
+                        pedido_insumo=pedido, tipo_insumo=tipo, **{tipo.lower(): insumo},
+                        insumo_nombre=nombre_insumo, cantidad=cantidad, unidad_medida=insumo.unidad_medida,
+                        precio_unitario=insumo.precio_unitario, subtotal=_dinero(cantidad * insumo.precio_unitario),
+                    ))
+                    subtotal += _dinero(cantidad * insumo.precio_unitario)
+                pedido.subtotal = subtotal
+                pedido.total = subtotal
+                lote[PedidoInsumo].append(pedido)
+                if estado == 'ENTREGADO':
+                    lote[PagoInsumo].append(PagoInsumo(
+                        pedido_insumo=pedido, numero_recibo=f'{self.codigo}-RI-{indice:07d}-{numero:03d}',
+                        fecha_pago=pedido.fecha_pedido + timedelta(days=rng.randint(0, 30)), monto=pedido.total,
+                        metodo_pago=_elegir(rng, METODOS_PAGO_INSUMO), estado='COMPLETADO',
+                    ))
+
+    # Orden de inserción: padres antes que hijos
+    ORDEN = [
+        Usuario, Socio, BitacoraAuditoria, Parcela, AnalisisSuelo, Cultivo, CicloCultivo, Tratamiento, Cosecha,
+        CampaignPartner, CampaignPlot, Labor, ProductoCosechado, Pedido, DetallePedido, Pago,
+        PedidoInsumo, DetallePedidoInsumo, PagoInsumo,
+    ]
+
+    def _guardar_lote(self, inicio, fin):
+        lote = {modelo: [] for modelo in self.ORDEN}
+        for indice in range(inicio, fin):
+            self._socio(indice, lote)
+        with transaction.atomic():
+            for modelo in self.ORDEN:
+                if modelo is BitacoraAuditoria:
+                    for evento in lote[modelo]:
+                        evento.registro_id = evento.usuario.pk
+                # bulk_create copia la pk de los padres recién insertados a las FK de los hijos
+                self._guardar(modelo, lote[modelo])
+
+    def generar(self):
+        """
+        Returns:
+            dict: filas creadas por modelo
+        """
+        self.password = make_password(PASSWORD_SINTETICO)
+        with transaction.atomic():
+            self.comunidades = self._crear_comunidades()
+            self._crear_insumos()
+            self._crear_campanias()
+            # bulk_create no dispara las señales del catálogo de insumos
+            catalogo_insumos.programar_todo()
+        self.progreso(f'Catálogos: {self.p.comunidades} comunidades, {len(self.catalogo)} insumos, '
+                      f'{len(self.campanias)} campañas')
+
+        for inicio in range(0, self.p.socios, self.p.lote):
+            fin = min(inicio + self.p.lote, self.p.socios)
+            self._guardar_lote(inicio, fin)
+            self.progreso(f'Socios {fin}/{self.p.socios}')
+        return dict(self.conteos)
+
+
+def limpiar(prefijo):
+    """
+    Elimina los datos generados con `prefijo`. Usa _raw_delete (DELETE directo,
+    hijos antes que padres) para no cargar millones de filas en el Collector ni
+    disparar las señales por fila.
+
+    Returns:
+        dict: filas eliminadas por modelo
+    """
+    codigo = prefijo.upper()
+    usuarios = Usuario.objects.filter(usuario__startswith=f'{prefijo.lower()}_')
+    socios = Socio.objects.filter(usuario__in=usuarios)
+    parcelas = Parcela.objects.filter(socio__in=socios)
+    cultivos = Cultivo.objects.filter(parcela__in=parcelas)
+    ciclos = CicloCultivo.objects.filter(cultivo__in=cultivos)
+    campanias = Campaign.objects.filter(nombre__startswith=f'{codigo} Campaña ')
+    pedidos = Pedido.objects.filter(socio__in=socios)
+    pedidos_insumo = PedidoInsumo.objects.filter(socio__in=socios)
+    insumos = {
+        'semilla': Semilla.objects.filter(lote__startswith=f'{codigo}-S'),
+        'pesticida': Pesticida.objects.filter(lote__startswith=f'{codigo}-P'),
+        'fertilizante': Fertilizante.objects.filter(lote__startswith=f'{codigo}-F'),
+    }
+
+    pasos = [
+        PagoInsumo.objects.filter(pedido_insumo__in=pedidos_insumo),
+        DetallePedidoInsumo.objects.filter(pedido_insumo__in=pedidos_insumo),
+        pedidos_insumo,
+        Pago.objects.filter(pedido__in=pedidos),
+        DetallePedido.objects.filter(pedido__in=pedidos),
+        pedidos,
+        ProductoCosechado.objects.filter(labor__campania__in=campanias),
+        Labor.objects.filter(campania__in=campanias),
+        CampaignPlot.objects.filter(campaign__in=campanias),
+        CampaignPartner.objects.filter(campaign__in=campanias),
+        campanias,
+        Cosecha.objects.filter(ciclo_cultivo__in=ciclos),
+        Tratamiento.objects.filter(ciclo_cultivo__in=ciclos),
+        ciclos,
+        cultivos,
+        AnalisisSuelo.objects.filter(parcela__in=parcelas),
+        ProductividadParcela.objects.filter(parcela__in=parcelas),
+        TransferenciaParcela.objects.filter(parcela__in=parcelas),
+        parcelas,
+        socios,
+        UsuarioRol.objects.filter(usuario__in=usuarios),
+        BitacoraAuditoria.objects.filter(usuario__in=usuarios),
+        usuarios,
+        Comunidad.objects.filter(nombre__startswith=f'{codigo} ', socio__isnull=True),
+    ]
+    pasos.insert(0, PrecioTemporada.objects.filter(
+        Q(semilla__in=insumos['semilla']) | Q(pesticida__in=insumos['pesticida'])
+        | Q(fertilizante__in=insumos['fertilizante'])
+    ))
+    pasos += list(insumos.values())
+
+    eliminados = Counter()
+    with transaction.atomic():
+        for queryset in pasos:
+            eliminados[queryset.model.__name__] += queryset._raw_delete(queryset.db)
+        catalogo_insumos.programar_todo()
+    return {modelo: n for modelo, n in eliminados.items() if n}
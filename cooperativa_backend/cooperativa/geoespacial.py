@@ -0,0 +1,130 @@
+"""
+CU4: Consultas geoespaciales sobre parcelas
+
+Cada parcela guarda el geohash de sus coordenadas en una columna indexada.
+Una búsqueda por radio elige la precisión cuya celda cubre el radio y
+consulta la celda del centro y sus 8 vecinas como rangos del índice
+(geohash >= prefijo AND geohash < prefijo~), de modo que solo se leen las
+parcelas candidatas y no toda la tabla. La distancia exacta se calcula con
+haversine sobre esos candidatos.
+"""
+
+import math
+
+from django.db.models import Q
+
+
+BASE32 = '0123456789bcdefghjkmnpqrstuvwxyz'
+PRECISION_GEOHASH = 9  # ~4.8 m x 4.8 m
+RADIO_TIERRA_KM = 6371.0088
+KM_POR_GRADO = 111.32
+
+
+def codificar_geohash(latitud, longitud, precision=PRECISION_GEOHASH):
+    """Geohash estándar (base32) de un punto en grados decimales"""
+    if latitud is None or longitud is None:
+        return None
+
+    rango_lat = [-90.0, 90.0]
+    rango_lng = [-180.0, 180.0]
+    latitud, longitud = float(latitud), float(longitud)
+    resultado = []
+    bits = 0
+    valor = 0
+    par = True  # los bits pares corresponden a la longitud
+
+    while len(resultado) < precision:
+        rango, coordenada = (rango_lng, longitud) if par else (rango_lat, latitud)
+        medio = (rango[0] + rango[1]) / 2
+        if coordenada >= medio:
+            valor = (valor << 1) | 1
+            rango[0] = medio
+        else:
+            valor <<= 1
+            rango[1] = medio
+        par = not par
+        bits += 1
+        if bits == 5:
+            resultado.append(BASE32[valor])
+            bits = 0
+            valor = 0
+
+    return ''.join(resultado)
+
+
+def dimensiones_celda(precision):
+    """Alto y ancho en grados de una celda geohash"""
+    bits_lat = (5 * precision) // 2
+    bits_lng = 5 * precision - bits_lat
+    return 180.0 / (2 ** bits_lat), 360.0 / (2 ** bits_lng)
+
+
+def precision_para_radio(latitud, radio_km):
+    """Mayor precisión cuya celda mide al menos radio_km en ambos ejes"""
+    coseno = max(math.cos(math.radians(latitud)), 0.01)
+    for precision in range(PRECISION_GEOHASH, 0, -1):
+        alto, ancho = dimensiones_celda(precision)
+        if alto * KM_POR_GRADO >= radio_km and ancho * KM_POR_GRADO * coseno >= radio_km:
+            return precision
+    return 1
+
+
+def celdas_vecinas(latitud, longitud, precision):
+    """Celda que contiene el punto y sus 8 vecinas"""
+    alto, ancho = dimensiones_celda(precision)
+    celdas = set()
+    for dy in (-1, 0, 1):
+        lat = min(max(latitud + dy * alto, -90.0), 90.0)
+        for dx in (-1, 0, 1):
+            lng = (longitud + dx * ancho + 180.0) % 360.0 - 180.0
+            celdas.add(codificar_geohash(lat, lng, precision))
+    return celdas
+
+
+def distancia_km(lat1, lng1, lat2, lng2):
+    """Distancia haversine en kilómetros"""
+    lat1, lng1, lat2, lng2 = map(math.radians, (float(lat1), float(lng1), float(lat2), float(lng2)))
+    a = (math.sin((lat2 - lat1) / 2) ** 2
+         + math.cos(lat1) * math.cos(lat2) * math.sin((lng2 - lng1) / 2) ** 2)
+    return 2 * RADIO_TIERRA_KM * math.asin(math.sqrt(a))
+
+
+def filtro_celdas(latitud, longitud, radio_km, campo='geohash'):
+    """
+    Q con un prefijo por cada celda candidata. startswith (LIKE 'celda%')
+    no depende de la collation, a diferencia de un rango celda..celda+'~';
+    en PostgreSQL usa el índice varchar_pattern_ops (_like) que Django crea
+    para geohash (db_index).
+    """
+    precision = precision_para_radio(latitud, radio_km)
+    condicion = Q()
+    for celda in sorted(celdas_vecinas(latitud, longitud, precision)):
+        condicion |= Q(**{f'{campo}__startswith': celda})
+    return condicion
+
+
+def parcelas_cercanas(queryset, latitud, longitud, radio_km, limite=None):
+    """
+    Parcelas a menos de radio_km del punto, ordenadas por distancia.
+
+    Returns:
+        list: tuplas (parcela, distancia_km)
+    """
+    candidatas = queryset.filter(filtro_celdas(latitud, longitud, radio_km))
+
+    resultados = []
+    for parcela in candidatas:
+        distancia = distancia_km(latitud, longitud, parcela.latitud, parcela.longitud)
+        if distancia <= radio_km:
+            resultados.append((parcela, distancia))
+
+    resultados.sort(key=lambda item: item[1])
+    return resultados[:limite] if limite else resultados
+
+
+def filtro_rectangulo(sur, oeste, norte, este):
+    """Q para un rectángulo de mapa; soporta cruzar el antimeridiano"""
+    condicion = Q(latitud__gte=sur, latitud__lte=norte)
+    if oeste <= este:
+        return condicion & Q(longitud__gte=oeste, longitud__lte=este)
+    return condicion & (Q(longitud__gte=oeste) | Q(longitud__lte=este))
@@ -0,0 +1,124 @@
+"""
+Contexto de identidad por request
+
+Resuelve una sola vez por request el Socio del usuario autenticado, sus roles
+y sus permisos consolidados. Las vistas lo consultan con obtener_identidad()
+en lugar de repetir Socio.objects.get(usuario=request.user).
+"""
+
+from django.utils.functional import cached_property
+
+from .models import Socio, UsuarioRol
+
+
+ACCIONES_PERMISO = ['ver', 'crear', 'editar', 'eliminar', 'aprobar']
+
+ATRIBUTO_REQUEST = '_identidad_cooperativa'
+
+
+class ContextoIdentidad:
+    """
+    Identidad del usuario de un request, calculada de forma perezosa.
+
+    Cada propiedad ejecuta como máximo una consulta y el resultado queda
+    memorizado durante la vida del request.
+    """
+
+    def __init__(self, usuario):
+        self.usuario = usuario
+
+    @property
+    def autenticado(self):
+        return bool(self.usuario and self.usuario.is_authenticated)
+
+    @property
+    def es_staff(self):
+        return self.autenticado and self.usuario.is_staff
+
+    @property
+    def es_administrador(self):
+        return self.autenticado and (self.usuario.is_staff or self.usuario.is_superuser)
+
+    @cached_property
+    def socio(self):
+        """Socio asociado al usuario o None si no tiene"""
+        if not self.autenticado:
+            return None
+        return Socio.objects.select_related('comunidad').filter(usuario=self.usuario).first()
+
+    @cached_property
+    def roles(self):
+        """Roles asignados al usuario"""
+        if not self.autenticado:
+            return []
+        return [
+            usuario_rol.rol
+            for usuario_rol in UsuarioRol.objects.filter(usuario=self.usuario).select_related('rol')
+        ]
+
+    @cached_property
+    def permisos(self):
+        """
+        Permisos consolidados de todos los roles: {modulo: {accion: bool}}
+        Los administradores tienen todos los permisos de los módulos conocidos.
+        """
+        permisos = {}
+        for rol in self.roles:
+            for modulo, acciones in (rol.permisos or {}).items():
+                permisos_modulo = permisos.setdefault(
+                    modulo, {accion: False for accion in ACCIONES_PERMISO}
+                )
+                for accion, permitido in acciones.items():
+                    if permitido:
+                        permisos_modulo[accion] = True
+
+        if self.es_administrador:
+            for modulo in permisos:
+                permisos[modulo] = {accion: True for accion in ACCIONES_PERMISO}
+
+        return permisos
+
+    def tiene_permiso(self, modulo, accion):
+        """Verifica un permiso sobre los roles ya cargados"""
+        if self.es_administrador:
+            return True
+        return self.permisos.get(modulo, {}).get(accion, False)
+
+
+def _request_base(request):
+    """Devuelve el HttpRequest de Django detrás de un Request de DRF"""
+    return getattr(request, '_request', request)
+
+
+def obtener_identidad(request):
+    """
+    Obtiene el contexto de identidad memorizado en el request.
+
+    Acepta tanto el HttpRequest de Django como el Request de DRF; ambos
+    comparten el mismo contexto. Si el usuario autenticado cambia (p. ej.
+    DRF autentica por token después del middleware) se vuelve a construir.
+    """
+    base = _request_base(request)
+    usuario = getattr(request, 'user', None)
+    contexto = base.__dict__.get(ATRIBUTO_REQUEST)
+
+    if contexto is None or contexto.usuario is not usuario:
+        contexto = ContextoIdentidad(usuario)
+        base.__dict__[ATRIBUTO_REQUEST] = contexto
+
+    return contexto
+
+
+def filtrar_por_socio(queryset, request, campo='socio'):
+    """
+    Restringe un queryset a los registros del socio del request.
+
+    Los administradores ven todo; un usuario sin socio no ve nada.
+    `campo` es la ruta ORM hacia el socio (p. ej. 'pedido__socio').
+    """
+    identidad = obtener_identidad(request)
+    if identidad.es_staff:
+        return queryset
+    if identidad.socio is None:
+        return queryset.none()
+    return queryset.filter(**{campo: identidad.socio})
@@ -0,0 +1,300 @@
+"""
+CU3: Alta masiva de socios (CSV/JSON)
+T014: CRUD de socios con validaciones
+T027: Validación de duplicados
+
+Valida el archivo completo antes de escribir:
+- validaciones de campo por fila en memoria (full_clean sin unicidad),
+- unicidad contra la BD con una consulta IN por clave (ci_nit, usuario,
+  email, codigo_interno) y detección de duplicados dentro del archivo,
+- hash de contraseñas en un pool de hilos (PBKDF2 libera el GIL),
+- inserción con bulk_create por lotes, cada lote en su propia transacción.
+
+Las filas con errores se omiten y se reportan con su número de fila.
+"""
+
+import csv
+import io
+import json
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+from django.contrib.auth.hashers import make_password
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.db.models import Q
+from django.db.models.functions import Lower
+
+from . import versiones
+from .geoespacial import codificar_geohash
+from .models import Usuario, Socio, Parcela, Comunidad, BitacoraAuditoria
+
+
+TAMANO_LOTE = 500
+HILOS_HASH = 4
+LONGITUD_MINIMA_PASSWORD = 8
+
+CAMPOS_USUARIO = ['ci_nit', 'nombres', 'apellidos', 'email', 'telefono', 'usuario']
+CAMPOS_SOCIO = ['codigo_interno', 'fecha_nacimiento', 'sexo', 'direccion']
+CAMPOS_PARCELA = {
+    'parcela_nombre': 'nombre',
+    'parcela_superficie': 'superficie_hectareas',
+    'parcela_tipo_suelo': 'tipo_suelo',
+    'parcela_ubicacion': 'ubicacion',
+    'parcela_latitud': 'latitud',
+    'parcela_longitud': 'longitud',
+}
+
+
+class ArchivoInvalido(ValueError):
+    """El archivo no se puede leer como CSV o JSON"""
+
+
+@dataclass
+class FilaImportacion:
+    numero: int
+    usuario: Usuario = None
+    socio: Socio = None
+    parcela: Parcela = None
+    password: str = ''
+    errores: dict = field(default_factory=dict)
+
+    def agregar_error(self, campo, mensaje):
+        self.errores.setdefault(campo, []).append(mensaje)
+
+
+def leer_archivo(contenido, formato=None):
+    """
+    Convierte el contenido (bytes o str) en una lista de diccionarios.
+    JSON: lista de objetos o {"socios": [...]}. CSV: primera fila = encabezados.
+    """
+    if isinstance(contenido, bytes):
+        contenido = contenido.decode('utf-8-sig')
+    formato = (formato or ('json' if contenido.lstrip()[:1] in ('[', '{') else 'csv')).lower()
+
+    if formato == 'json':
+        try:
+            datos = json.loads(contenido)
+        except ValueError as e:
+            raise ArchivoInvalido(f'JSON inválido: {e}')
+        if isinstance(datos, dict):
+            datos = datos.get('socios')
+        if not isinstance(datos, list) or not all(isinstance(fila, dict) for fila in datos):
+            raise ArchivoInvalido('El JSON debe ser una lista de socios o {"socios": [...]}')
+        return datos
+
+    if formato == 'csv':
+        lector = csv.DictReader(io.StringIO(contenido))
+        if not lector.fieldnames:
+            raise ArchivoInvalido('El CSV no tiene encabezados')
+        return [{clave.strip(): valor for clave, valor in fila.items() if clave} for fila in lector]
+
+    raise ArchivoInvalido(f'Formato no soportado: {formato}')
+
+
+def _texto(fila, campo):
+    valor = fila.get(campo)
+    if valor is None:
+        return None
+    valor = str(valor).strip()
+    return valor or None
+
+
+def _mensajes(error):
+    if hasattr(error, 'message_dict'):
+        return error.message_dict
+    return {'__all__': error.messages}
+
+
+def _validar(objeto, exclude, limpiar=True):
+    """
+    full_clean sin unicidad ni constraints, pero sin clean() si los campos
+    ya fallaron: los clean() de los modelos leen los valores crudos (la
+    fecha de nacimiento, la superficie o el CI del usuario) y fallarían con
+    TypeError en lugar de reportar el error de la fila.
+
+    Returns:
+        dict: {campo: [mensajes]}
+    """
+    try:
+        objeto.clean_fields(exclude=exclude)
+        if limpiar:
+            objeto.clean()
+    except ValidationError as e:
+        return _mensajes(e)
+    return {}
+
+
+def _construir_fila(numero, datos, comunidades):
+    fila = FilaImportacion(numero=numero)
+
+    usuario = Usuario(**{campo: _texto(datos, campo) for campo in CAMPOS_USUARIO})
+    if usuario.email:
+        usuario.email = Usuario.objects.normalize_email(usuario.email)
+    if usuario.ci_nit:
+        usuario.ci_nit = usuario.ci_nit.upper()
+    for campo, mensajes in _validar(usuario, exclude=['password']).items():
+        for mensaje in mensajes:
+            fila.agregar_error(campo, mensaje)
+    usuario_valido = not fila.errores
+
+    fila.password = _texto(datos, 'password') or ''
+    if fila.password and len(fila.password) < LONGITUD_MINIMA_PASSWORD:
+        fila.agregar_error('password', f'La contraseña debe tener al menos {LONGITUD_MINIMA_PASSWORD} caracteres')
+
+    socio = Socio(usuario=usuario, **{campo: _texto(datos, campo) for campo in CAMPOS_SOCIO})
+    comunidad = _texto(datos, 'comunidad')
+    if comunidad:
+        comunidad_id = comunidades.get(comunidad.lower())
+        if comunidad_id is None:
+            fila.agregar_error('comunidad', f'Comunidad no encontrada: {comunidad}')
+        socio.comunidad_id = comunidad_id
+    # La comunidad ya se resolvió en bloque; excluirla evita una consulta por
+    # fila. Socio.clean() genera el código interno con el CI del usuario.
+    for campo, mensajes in _validar(socio, exclude=['usuario', 'comunidad'], limpiar=usuario_valido).items():
+        for mensaje in mensajes:
+            fila.agregar_error(campo, mensaje)
+
+    datos_parcela = {destino: _texto(datos, origen) for origen, destino in CAMPOS_PARCELA.items()}
+    if any(datos_parcela.values()):
+        parcela = Parcela(socio=socio, **datos_parcela)
+        errores = _validar(parcela, exclude=['socio'])
+        for campo, mensajes in errores.items():
+            for mensaje in mensajes:
+                fila.agregar_error(f'parcela_{campo}' if campo != '__all__' else 'parcela', mensaje)
+        if not errores:
+            parcela.geohash = codificar_geohash(parcela.latitud, parcela.longitud)
+        fila.parcela = parcela
+
+    fila.usuario = usuario
+    fila.socio = socio
+    return fila
+
+
+def _cargar_comunidades(registros):
+    """Resuelve comunidades por id o nombre con una sola consulta"""
+    nombres = {str(r.get('comunidad')).strip() for r in registros if _texto(r, 'comunidad')}
+    if not nombres:
+        return {}
+    ids = [int(n) for n in nombres if n.isdigit()]
+    comunidades = {}
+    # Nombres sin distinguir mayúsculas, como la búsqueda en _construir_fila
+    for comunidad_id, nombre in Comunidad.objects.annotate(nombre_minusculas=Lower('nombre')).filter(
+        Q(id__in=ids) | Q(nombre_minusculas__in={n.lower() for n in nombres})
+    ).values_list('id', 'nombre'):
+        comunidades[str(comunidad_id)] = comunidad_id
+        comunidades[nombre.lower()] = comunidad_id
+    return comunidades
+
+
+def _validar_unicidad(filas):
+    """Una consulta IN por clave única + duplicados dentro del archivo"""
+    claves = [
+        ('ci_nit', lambda f: f.usuario.ci_nit, Usuario, 'ci_nit', 'Ya existe un usuario con este CI/NIT'),
+        ('usuario', lambda f: f.usuario.usuario, Usuario, 'usuario', 'Ya existe un usuario con este nombre de usuario'),
+        ('email', lambda f: f.usuario.email, Usuario, 'email', 'Ya existe un usuario con este email'),
+        ('codigo_interno', lambda f: f.socio.codigo_interno, Socio, 'codigo_interno', 'Ya existe un socio con este código interno'),
+    ]
+    for campo, obtener, modelo, columna, mensaje in claves:
+        vistos = {}
+        for fila in filas:
+            valor = obtener(fila)
+            if not valor:
+                continue
+            if valor in vistos:
+                fila.agregar_error(campo, f'Duplicado en el archivo (fila {vistos[valor]})')
+            else:
+                vistos[valor] = fila.numero
+        if not vistos:
+            continue
+        existentes = set(modelo.objects.filter(**{f'{columna}__in': list(vistos)}).values_list(columna, flat=True))
+        for fila in filas:
+            if obtener(fila) in existentes:
+                fila.agregar_error(campo, mensaje)
+
+
+def _hashear_passwords(filas, hilos):
+    passwords = [fila.password or None for fila in filas]
+    if hilos > 1 and len(passwords) > 1:
+        with ThreadPoolExecutor(max_workers=hilos, thread_name_prefix='hash') as executor:
+            hashes = list(executor.map(make_password, passwords))
+    else:
+        hashes = [make_password(password) for password in passwords]
+    for fila, hash_password in zip(filas, hashes):
+        fila.usuario.password = hash_password
+
+
+def _insertar_lote(filas, creado_por, cliente):
+    with transaction.atomic():
+        usuarios = Usuario.objects.bulk_create([fila.usuario for fila in filas])
+        for fila, usuario in zip(filas, usuarios):
+            fila.socio.usuario = usuario
+        socios = Socio.objects.bulk_create([fila.socio for fila in filas])
+
+        parcelas = []
+        for fila, socio in zip(filas, socios):
+            if fila.parcela is not None:
+                fila.parcela.socio = socio
+                parcelas.append(fila.parcela)
+        Parcela.objects.bulk_create(parcelas)
+        for modelo in (Usuario, Socio, Parcela):
+            versiones.incrementar(modelo)
+
+        BitacoraAuditoria.objects.bulk_create([
+            BitacoraAuditoria(
+                usuario=creado_por,
+                accion='CREAR',
+                tabla_afectada='socio',
+                registro_id=socio.id,
+                detalles={
+                    'usuario_creado': socio.usuario.usuario,
+                    'creado_por': creado_por.usuario if creado_por else None,
+                    'origen': 'importacion_masiva'
+                },
+                ip_address=cliente.get('ip'),
+                user_agent=cliente.get('user_agent') or 'Unknown'
+            )
+            for socio in socios
+        ])
+    return socios
+
+
+def importar_socios(registros, creado_por=None, validar_solo=False,
+                    tamano_lote=TAMANO_LOTE, hilos=HILOS_HASH, cliente=None):
+    """
+    Importa socios (con usuario y parcela opcional) desde una lista de diccionarios.
+
+    Returns:
+        dict: total, validos, creados, errores [{fila, errores}] y socios creados
+    """
+    comunidades = _cargar_comunidades(registros)
+    # Las filas se numeran como en el archivo (la fila 1 es el encabezado)
+    filas = [_construir_fila(i, datos, comunidades) for i, datos in enumerate(registros, start=2)]
+    _validar_unicidad(filas)
+
+    validas = [fila for fila in filas if not fila.errores]
+    errores = {fila.numero: fila.errores for fila in filas if fila.errores}
+    creados = []
+
+    if not validar_solo and validas:
+        _hashear_passwords(validas, hilos)
+        for inicio in range(0, len(validas), tamano_lote):
+            lote = validas[inicio:inicio + tamano_lote]
+            try:
+                creados += _insertar_lote(lote, creado_por, cliente or {})
+            except IntegrityError as e:
+                # Otro proceso insertó la misma clave entre la validación y el lote
+                for fila in lote:
+                    errores[fila.numero] = {'__all__': [f'Lote rechazado por la base de datos: {e}']}
+
+    return {
+        'total': len(filas),
+        'validos': len(validas),
+        'creados': len(creados),
+        'validar_solo': validar_solo,
+        'errores': [{'fila': numero, 'errores': errores[numero]} for numero in sorted(errores)],
+        'socios': [
+            {'id': socio.id, 'usuario': socio.usuario.usuario, 'codigo_interno': socio.codigo_interno}
+            for socio in creados
+        ],
+    }
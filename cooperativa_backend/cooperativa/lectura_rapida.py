@@ -0,0 +1,272 @@
+"""
+Lectura rápida de listados (?rapido=1)
+
+Los listados grandes (insumos, labores, productos cosechados) instancian un
+modelo y recorren los campos DRF por fila, y los SerializerMethodField de
+los insumos (valor_total, dias_para_vencer, esta_vencida...) se calculan en
+Python fila por fila. LecturaRapida produce la misma salida que el
+serializer a partir de .values():
+
+- los campos calculados son anotaciones SQL (o funciones de la fila ya
+  leída cuando no tienen equivalente en SQL, p. ej. npk_values);
+- el plan campo -> columna -> formateador se compila una vez por
+  serializer: cada columna se formatea con el to_representation del campo
+  DRF ya construido, sin bind ni get_attribute por fila;
+- los campos con source a través de una relación nula se omiten, igual
+  que hace DRF (SkipField).
+
+ListadoRapidoMixin lo expone en ViewSet.list() solo cuando el cliente lo
+pide con ?rapido=1; sin el parámetro la respuesta es la de siempre.
+`python manage.py benchmark_lectura_rapida` compara ambos caminos.
+"""
+
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.core.exceptions import FieldDoesNotExist, ImproperlyConfigured
+from django.db.models import BooleanField, Case, CharField, DecimalField, ExpressionWrapper, F, Value, When
+from django.db.models.functions import Coalesce, Concat
+from django.utils import timezone
+from rest_framework import ISO_8601, fields
+from rest_framework.fields import SerializerMethodField
+from rest_framework.settings import api_settings
+from rest_framework.response import Response
+
+from .models import Fertilizante, Labor
+from .serializers import (
+    SemillaSerializer, PesticidaSerializer, FertilizanteSerializer,
+    LaborListSerializer, ProductoCosechadoListSerializer
+)
+
+
+VALORES_VERDADEROS = ('1', 'true', 'si')
+
+
+def _dias(duracion):
+    return duracion.days if duracion is not None else None
+
+
+def valor_total(opcional=False):
+    """cantidad * precio_unitario (0 sin precio si `opcional`, como Semilla)"""
+    producto = F('cantidad') * F('precio_unitario')
+    if opcional:
+        producto = Coalesce(producto, Value(0))
+    return ExpressionWrapper(producto, output_field=DecimalField(max_digits=20, decimal_places=4))
+
+
+def dias_para_vencer(hoy):
+    return F('fecha_vencimiento') - Value(hoy)
+
+
+def proximo_a_vencer(hoy, dias=30):
+    return Case(
+        When(fecha_vencimiento__gte=hoy, fecha_vencimiento__lte=hoy + timedelta(days=dias), then=Value(True)),
+        default=Value(False), output_field=BooleanField(),
+    )
+
+
+def vencido(hoy):
+    # None sin fecha de vencimiento, como el método del modelo
+    return Case(
+        When(fecha_vencimiento__isnull=True, then=Value(None)),
+        When(fecha_vencimiento__lt=hoy, then=Value(True)),
+        default=Value(False), output_field=BooleanField(),
+    )
+
+
+# Marcador: fecha y hora en la zona activa, resuelta una vez por serializar()
+_FECHA_HORA = object()
+
+
+def _fecha_hora(zona):
+    def formatear(valor):
+        texto = valor.astimezone(zona).isoformat()
+        return texto[:-6] + 'Z' if texto.endswith('+00:00') else texto
+    return formatear
+
+
+def _formateador(campo):
+    """
+    Formateador precompilado de una columna con el mismo resultado que
+    campo.to_representation (None: el valor de la BD ya es el del JSON).
+    """
+    if isinstance(campo, (fields.ChoiceField, fields.CharField, fields.IntegerField,
+                          fields.FloatField, fields.BooleanField)):
+        if isinstance(campo, fields.ChoiceField) and any(not isinstance(c, str) for c in campo.choices):
+            return campo.to_representation
+        return None
+    if isinstance(campo, fields.DecimalField):
+        # La columna ya viene con los decimales del modelo (mismos que el campo)
+        try:
+            columna = campo.parent.Meta.model._meta.get_field(campo.source)
+        except (AttributeError, FieldDoesNotExist):
+            columna = None
+        if (getattr(campo, 'coerce_to_string', api_settings.COERCE_DECIMAL_TO_STRING)
+                and not campo.localize and not campo.normalize_output
+                and getattr(columna, 'decimal_places', None) == campo.decimal_places):
+            return lambda valor: format(valor, 'f')
+        return campo.to_representation
+    if isinstance(campo, fields.DateTimeField):
+        formato = getattr(campo, 'format', api_settings.DATETIME_FORMAT)
+        if formato is None or formato.lower() != ISO_8601 or hasattr(campo, 'timezone') or not settings.USE_TZ:
+            return campo.to_representation
+        return _FECHA_HORA
+    if isinstance(campo, fields.DateField):
+        formato = getattr(campo, 'format', api_settings.DATE_FORMAT)
+        if formato is None or formato.lower() != ISO_8601:
+            return campo.to_representation
+        return date.isoformat
+    return campo.to_representation
+
+
+class LecturaRapida:
+    """
+    Plan de lectura por .values() equivalente a un serializer.
+
+    Args:
+        serializer_class: serializer cuya salida se reproduce
+        anotaciones: callable(hoy) -> {campo: expresión} para los campos
+            calculados en SQL
+        conversiones: {campo: función(valor)} aplicada al valor anotado
+        derivados: {campo: función(fila)} para campos calculados en Python
+            a partir de columnas leídas (se declaran en `columnas`)
+        columnas: columnas extra que necesitan los derivados
+    """
+
+    def __init__(self, serializer_class, anotaciones=None, conversiones=None, derivados=None, columnas=()):
+        self.serializer_class = serializer_class
+        self.anotaciones = anotaciones or (lambda hoy: {})
+        self.conversiones = conversiones or {}
+        self.derivados = derivados or {}
+        self.columnas_extra = tuple(columnas)
+        self._plan = None
+
+    def _compilar(self, anotados):
+        campos = self.serializer_class().fields
+        plan, columnas = [], list(self.columnas_extra)
+        for nombre, campo in campos.items():
+            if campo.write_only:
+                continue
+            if nombre in self.derivados:
+                plan.append((nombre, None, self.derivados[nombre], ()))
+            elif nombre in anotados:
+                plan.append((nombre, nombre, self.conversiones.get(nombre), ()))
+                columnas.append(nombre)
+            elif isinstance(campo, SerializerMethodField):
+                raise ImproperlyConfigured(
+                    f'{self.serializer_class.__name__}.{nombre} no tiene equivalente en la lectura rápida'
+                )
+            else:
+                ruta = campo.source_attrs
+                columna = '__'.join(ruta)
+                # Relaciones intermedias: si alguna es nula DRF omite el campo
+                intermedias = tuple('__'.join(ruta[:i]) for i in range(1, len(ruta)))
+                plan.append((nombre, columna, _formateador(campo), intermedias))
+                columnas.append(columna)
+                columnas.extend(intermedias)
+        return plan, list(dict.fromkeys(columnas))
+
+    def consulta(self, queryset, hoy=None):
+        """Queryset de dicts con las columnas y anotaciones del plan"""
+        anotaciones = self.anotaciones(hoy or date.today())
+        if self._plan is None:
+            self._plan = self._compilar(anotaciones)
+        return queryset.annotate(**anotaciones).values(*self._plan[1])
+
+    def serializar(self, filas):
+        """Filas de consulta() -> lista de dicts como serializer(many=True).data"""
+        fecha_hora = _fecha_hora(timezone.get_current_timezone())
+        plan = [
+            (nombre, columna, fecha_hora if formatear is _FECHA_HORA else formatear, intermedias)
+            for nombre, columna, formatear, intermedias in self._plan[0]
+        ]
+        resultado = []
+        for fila in filas:
+            salida = {}
+            for nombre, columna, formatear, intermedias in plan:
+                if columna is None:
+                    salida[nombre] = formatear(fila)
+                    continue
+                if intermedias and any(fila[i] is None for i in intermedias):
+                    continue
+                valor = fila[columna]
+                salida[nombre] = formatear(valor) if valor is not None and formatear else valor
+            resultado.append(salida)
+        return resultado
+
+
+def pide_lectura_rapida(request):
+    return request.query_params.get('rapido', '').lower() in VALORES_VERDADEROS
+
+
+class ListadoRapidoMixin:
+    """
+    list() con ?rapido=1 a través de `plan_rapido` (LecturaRapida del
+    serializer de listado). Filtros, orden y paginación no cambian.
+    """
+    plan_rapido = None
+
+    def list(self, request, *args, **kwargs):
+        if self.plan_rapido is None or not pide_lectura_rapida(request):
+            return super().list(request, *args, **kwargs)
+
+        queryset = self.plan_rapido.consulta(self.filter_queryset(self.get_queryset()))
+        pagina = self.paginate_queryset(queryset)
+        if pagina is not None:
+            return self.get_paginated_response(self.plan_rapido.serializar(pagina))
+        return Response(self.plan_rapido.serializar(queryset))
+
+
+# Planes por listado
+# ------------------
+
+def _insumo(serializer_class, proximo, vencido_campo, opcional=False, **extra):
+    return LecturaRapida(
+        serializer_class,
+        anotaciones=lambda hoy: {
+            'valor_total': valor_total(opcional),
+            'dias_para_vencer': dias_para_vencer(hoy),
+            proximo: proximo_a_vencer(hoy),
+            vencido_campo: vencido(hoy),
+        },
+        # float: lo que el renderer JSON hace con el Decimal del método
+        conversiones={'valor_total': float, 'dias_para_vencer': _dias},
+        **extra
+    )
+
+
+SEMILLAS = _insumo(SemillaSerializer, 'esta_proxima_vencer', 'esta_vencida', opcional=True)
+PESTICIDAS = _insumo(PesticidaSerializer, 'esta_proximo_vencer', 'esta_vencido')
+FERTILIZANTES = _insumo(
+    FertilizanteSerializer, 'esta_proximo_vencer', 'esta_vencido',
+    derivados={'npk_values': lambda fila: Fertilizante.valores_npk(fila['composicion_npk'])},
+    columnas=('composicion_npk',),
+)
+
+_TIPOS_LABOR = dict(Labor.TIPOS_LABOR)
+
+LABORES = LecturaRapida(
+    LaborListSerializer,
+    anotaciones=lambda hoy: {
+        'socio_nombre': Case(
+            When(parcela__isnull=True, then=Value(None)),
+            default=Concat('parcela__socio__usuario__nombres', Value(' '), 'parcela__socio__usuario__apellidos'),
+            output_field=CharField(),
+        ),
+    },
+    derivados={'tipo_labor_display': lambda fila: _TIPOS_LABOR.get(fila['labor'], fila['labor'])},
+    columnas=('labor',),
+)
+
+PRODUCTOS_COSECHADOS = LecturaRapida(
+    ProductoCosechadoListSerializer,
+    anotaciones=lambda hoy: {
+        'origen_display': Case(
+            When(campania__isnull=False, then=Concat(Value('campania: '), 'campania__nombre')),
+            When(parcela__isnull=False, then=Concat(Value('Parcela: '), 'parcela__nombre')),
+            default=Value('Origen no especificado'), output_field=CharField(),
+        ),
+    },
+    derivados={'socio_nombre': lambda fila: fila['socio_nombre'] or 'No asignado'},
+    columnas=('socio_nombre',),
+)
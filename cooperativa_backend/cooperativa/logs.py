@@ -0,0 +1,20 @@
+import logging
+
+
+_ATRIBUTOS_ESTANDAR = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+
+class FormatoClaveValor(logging.Formatter):
+    """
+    Formatter de logs estructurados: agrega los campos pasados en `extra`
+    como pares clave=valor después del mensaje.
+    """
+
+    def format(self, record):
+        base = super().format(record)
+        extras = [
+            f'{clave}={valor}'
+            for clave, valor in record.__dict__.items()
+            if clave not in _ATRIBUTOS_ESTANDAR and not clave.startswith('_')
+        ]
+        return ' '.join([base] + extras) if extras else base
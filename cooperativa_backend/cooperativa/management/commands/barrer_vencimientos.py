@@ -0,0 +1,32 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from ...vencimientos import barrer_vencidos
+
+
+class Command(BaseCommand):
+    help = (
+        'Marca como vencidos semillas, pesticidas, fertilizantes y productos cosechados '
+        'cuya fecha ya pasó (un UPDATE por tabla). Programar una vez por día '
+        '(cron / Heroku Scheduler) o dejarlo corriendo con --cada.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--vida-util-productos', type=int, default=None,
+                            help='Días en almacén tras los que vence un producto cosechado '
+                                 '(por defecto PRODUCTOS_COSECHADOS_VIDA_UTIL_DIAS)')
+        parser.add_argument('--cada', type=int, default=0,
+                            help='Repetir el barrido cada N minutos sin terminar el proceso')
+
+    def handle(self, *args, **options):
+        while True:
+            inicio = time.perf_counter()
+            resultado = barrer_vencidos(vida_util_productos=options['vida_util_productos'])
+            detalle = ', '.join(f'{tabla}: {filas}' for tabla, filas in resultado.items())
+            self.stdout.write(self.style.SUCCESS(
+                f'Vencimientos aplicados ({detalle}) en {time.perf_counter() - inicio:.2f}s'
+            ))
+            if not options['cada']:
+                return
+            time.sleep(options['cada'] * 60)
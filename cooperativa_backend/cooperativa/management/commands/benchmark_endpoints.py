@@ -0,0 +1,129 @@
+import time
+import warnings
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings, setup_test_environment, teardown_test_environment
+
+from ...benchmark_endpoints import (
+    BASELINE_POR_DEFECTO, descubrir_endpoints, ejecutar, guardar_baseline, cargar_baseline, comparar,
+    errores_servidor,
+)
+from ...datos_sinteticos import GeneradorDatos, ParametrosGeneracion
+from ...models import Usuario
+
+# Fecha fija: el mismo dataset (y el mismo número de consultas) en cada corrida
+FECHA_DATASET = date(2025, 6, 30)
+
+
+class Command(BaseCommand):
+    help = (
+        'Mide tiempo y número de consultas SQL de cada endpoint GET de la API sobre un dataset '
+        'sintético y falla si alguno empeora respecto al baseline'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--repeticiones', type=int, default=5)
+        parser.add_argument('--filtro', help='Regex sobre el nombre de la ruta (ej: "pedido|campaign")')
+        parser.add_argument('--baseline', default=str(BASELINE_POR_DEFECTO), help='Ruta del baseline JSON')
+        parser.add_argument('--guardar-baseline', action='store_true', help='Guarda los resultados como nuevo baseline')
+        parser.add_argument('--umbral-consultas', type=int, default=0, help='Consultas extra toleradas por endpoint')
+        parser.add_argument('--umbral-tiempo', type=float, default=0.5, help='Aumento relativo tolerado del p50 (0.5 = 50%%)')
+        parser.add_argument('--minimo-ms', type=float, default=5.0, help='Aumento absoluto mínimo del p50 para contar')
+        parser.add_argument('--solo-consultas', action='store_true',
+                            help='Ignora los tiempos y compara solo número de consultas y estado')
+        parser.add_argument('--socios', type=int, default=200, help='Tamaño del dataset sintético')
+        parser.add_argument('--semilla', type=int, default=42)
+        parser.add_argument('--bd-actual', action='store_true',
+                            help='Usa la base configurada en lugar de una base de prueba temporal')
+        parser.add_argument('--usuario', help='Usuario staff con el que autenticar (con --bd-actual)')
+
+    def handle(self, *args, **options):
+        # Paginación sin orden y similares: ruido que no afecta la medición
+        warnings.simplefilter('ignore')
+        if options['bd_actual']:
+            return self._benchmark(options, self._usuario(options['usuario']))
+
+        setup_test_environment()
+        nombre_original = connection.settings_dict['NAME']
+        # El esquema temporal se crea desde los modelos, como en los tests: el
+        # historial de migraciones no se puede aplicar sobre una base vacía
+        # (0002_alter_paymentmethod_tipo altera PaymentMethod sin que ninguna
+        # migración lo cree). Quedan fuera los índices RunSQL de PostgreSQL
+        # (0005), que no cambian el número de consultas; para medir tiempos
+        # con ellos use --bd-actual sobre una base migrada.
+        with override_settings(MIGRATION_MODULES={'cooperativa': None}):
+            connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            inicio = time.perf_counter()
+            GeneradorDatos(ParametrosGeneracion(
+                socios=options['socios'], anios=2, insumos=30, semilla=options['semilla'],
+                prefijo='bench', hasta=FECHA_DATASET,
+            )).generar()
+            self.stdout.write(f"Dataset: {options['socios']} socios en {time.perf_counter() - inicio:.1f}s")
+            usuario = Usuario.objects.create_superuser(
+                ci_nit='99999999', nombres='Benchmark', apellidos='Endpoints',
+                email='benchmark@example.com', usuario='benchmark', password='Benchmark123'
+            )
+            # Dataset recién generado: sin margen el feed de sincronización ve
+            # todas las filas y hace las mismas consultas en cada corrida
+            with override_settings(SINCRONIZACION_MARGEN_SEGUNDOS=0):
+                return self._benchmark(options, usuario)
+        finally:
+            connection.creation.destroy_test_db(nombre_original, verbosity=0)
+            teardown_test_environment()
+
+    def _usuario(self, nombre):
+        usuarios = Usuario.objects.filter(is_staff=True)
+        usuario = (usuarios.filter(usuario=nombre.lower()) if nombre else usuarios).order_by('id').first()
+        if usuario is None:
+            raise CommandError('Se requiere un usuario staff (--usuario)')
+        return usuario
+
+    def _benchmark(self, options, usuario):
+        endpoints = descubrir_endpoints(filtro=options['filtro'])
+        for endpoint in endpoints:
+            if endpoint.omitido:
+                self.stdout.write(self.style.WARNING(f'  omitido {endpoint.nombre}: {endpoint.omitido}'))
+
+        def mostrar(r):
+            self.stdout.write(
+                f'  {r.nombre:<48} {r.estado:>3} {r.consultas:>4}q  '
+                f'p50={r.p50_ms:>7.1f}ms p95={r.p95_ms:>7.1f}ms  {r.bytes:>8}B'
+            )
+
+        resultados = ejecutar(usuario, endpoints, options['repeticiones'], al_medir=mostrar)
+        self.stdout.write(f'{len(resultados)} endpoints medidos')
+
+        if options['guardar_baseline']:
+            errores = errores_servidor(resultados)
+            if errores:
+                raise CommandError(
+                    f"No se guarda un baseline con {len(errores)} endpoints en 5xx: {', '.join(errores)}"
+                )
+            ruta = guardar_baseline(resultados, options['baseline'], metadatos={
+                'socios': options['socios'], 'semilla': options['semilla'],
+                'repeticiones': options['repeticiones'], 'motor': connection.vendor,
+            })
+            self.stdout.write(self.style.SUCCESS(f'Baseline guardado en {ruta}'))
+            return
+
+        try:
+            baseline = cargar_baseline(options['baseline'])
+        except FileNotFoundError:
+            raise CommandError(f"No existe el baseline {options['baseline']}; ejecute con --guardar-baseline")
+
+        umbral_tiempo = None if options['solo_consultas'] else options['umbral_tiempo']
+        reporte = comparar(
+            resultados, baseline, options['umbral_consultas'], umbral_tiempo, options['minimo_ms']
+        )
+        for nombre in reporte['nuevos']:
+            self.stdout.write(f'  nuevo (sin baseline): {nombre}')
+        for nombre in reporte['mejoras']:
+            self.stdout.write(self.style.SUCCESS(f'  menos consultas: {nombre}'))
+        for regresion in reporte['regresiones']:
+            self.stdout.write(self.style.ERROR(f"  REGRESIÓN {regresion['nombre']}: {regresion['motivo']}"))
+        if reporte['regresiones']:
+            raise CommandError(f"{len(reporte['regresiones'])} regresiones respecto al baseline")
+        self.stdout.write(self.style.SUCCESS('Sin regresiones respecto al baseline'))
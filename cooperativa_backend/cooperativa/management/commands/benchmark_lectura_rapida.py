@@ -0,0 +1,113 @@
+import json
+import time
+import warnings
+from copy import copy
+from datetime import date
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+from rest_framework.renderers import JSONRenderer
+
+from ... import lectura_rapida
+from ...datos_sinteticos import GeneradorDatos, ParametrosGeneracion
+from ...models import Semilla, Pesticida, Fertilizante, Labor, ProductoCosechado
+
+FECHA_DATASET = date(2025, 6, 30)
+
+# (nombre, plan, queryset del ViewSet)
+LISTADOS = [
+    ('semillas', lectura_rapida.SEMILLAS, lambda: Semilla.objects.all()),
+    ('pesticidas', lectura_rapida.PESTICIDAS, lambda: Pesticida.objects.all()),
+    ('fertilizantes', lectura_rapida.FERTILIZANTES, lambda: Fertilizante.objects.all()),
+    ('labores', lectura_rapida.LABORES,
+     lambda: Labor.objects.select_related('campania', 'parcela__socio__usuario')),
+    ('productos-cosechados', lectura_rapida.PRODUCTOS_COSECHADOS,
+     lambda: ProductoCosechado.objects.select_related('cultivo', 'labor', 'campania', 'parcela')),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara el serializer de los listados grandes con la lectura rápida (?rapido=1) '
+        'sobre páginas de N filas de un dataset sintético y verifica que la salida sea idéntica'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--filas', type=int, default=10000, help='Filas por página medida')
+        parser.add_argument('--repeticiones', type=int, default=3)
+        parser.add_argument('--socios', type=int, default=300, help='Tamaño del dataset sintético base')
+
+    def handle(self, *args, **options):
+        warnings.simplefilter('ignore')
+        setup_test_environment()
+        nombre_original = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            self._dataset(options)
+            for nombre, plan, queryset in LISTADOS:
+                self._medir(nombre, plan, queryset().order_by('pk')[:options['filas']], options['repeticiones'])
+        finally:
+            connection.creation.destroy_test_db(nombre_original, verbosity=0)
+            teardown_test_environment()
+
+    def _dataset(self, options):
+        inicio = time.perf_counter()
+        GeneradorDatos(ParametrosGeneracion(
+            socios=options['socios'], anios=1, insumos=options['filas'], prefijo='bench', hasta=FECHA_DATASET,
+        )).generar()
+        # Labores y productos se replican hasta llegar a las filas pedidas
+        self._replicar_productos(options['filas'])
+        self._replicar(Labor, options['filas'])
+        self.stdout.write(f'Dataset en {time.perf_counter() - inicio:.1f}s')
+
+    def _replicar(self, modelo, filas):
+        base = list(modelo.objects.all()[:1000])
+        while base and modelo.objects.count() < filas:
+            faltan = filas - modelo.objects.count()
+            copias = [copy(obj) for obj in base[:faltan]]
+            for obj in copias:
+                obj.pk = None
+            modelo.objects.bulk_create(copias, batch_size=1000)
+
+    def _replicar_productos(self, filas):
+        base = list(ProductoCosechado.objects.select_related('labor')[:1000])
+        while base and ProductoCosechado.objects.count() < filas:
+            lote = base[:filas - ProductoCosechado.objects.count()]
+            labores = [copy(p.labor) for p in lote]
+            for labor in labores:
+                labor.pk = None
+            Labor.objects.bulk_create(labores, batch_size=1000)
+            productos = [copy(p) for p in lote]
+            for producto, labor in zip(productos, labores):
+                producto.pk, producto.labor = None, labor
+            ProductoCosechado.objects.bulk_create(productos, batch_size=1000)
+
+    def _medir(self, nombre, plan, queryset, repeticiones):
+        renderer = JSONRenderer()
+
+        def serializer():
+            return renderer.render(plan.serializer_class(list(queryset), many=True).data)
+
+        def rapido():
+            return renderer.render(plan.serializar(plan.consulta(queryset)))
+
+        tiempos = {}
+        for camino, funcion in (('serializer', serializer), ('rapido', rapido)):
+            muestras = []
+            for _ in range(repeticiones):
+                inicio = time.perf_counter()
+                salida = funcion()
+                muestras.append(time.perf_counter() - inicio)
+            tiempos[camino] = (min(muestras) * 1000, salida)
+
+        identica = json.loads(tiempos['serializer'][1]) == json.loads(tiempos['rapido'][1])
+        filas = len(json.loads(tiempos['rapido'][1]))
+        linea = (
+            f"  {nombre:<22} {filas:>6} filas  serializer={tiempos['serializer'][0]:8.1f}ms  "
+            f"rapido={tiempos['rapido'][0]:8.1f}ms  x{tiempos['serializer'][0] / tiempos['rapido'][0]:.1f}"
+        )
+        if identica:
+            self.stdout.write(linea)
+        else:
+            self.stdout.write(self.style.ERROR(f'{linea}  SALIDA DISTINTA'))
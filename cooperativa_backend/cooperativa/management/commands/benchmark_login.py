@@ -0,0 +1,95 @@
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+
+from ...models import Usuario, BitacoraAuditoria
+
+
+class Command(BaseCommand):
+    help = 'Mide el throughput de /api/auth/login/ con N logins concurrentes'
+
+    PREFIJO = 'benchlogin'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--logins', type=int, default=200, help='Total de logins a ejecutar')
+        parser.add_argument('--concurrencia', type=int, default=8, help='Hilos concurrentes')
+        parser.add_argument('--usuarios', type=int, default=50, help='Usuarios de prueba a crear')
+        parser.add_argument(
+            '--fallidos', type=float, default=0.2,
+            help='Proporción de logins con contraseña incorrecta (0-1)'
+        )
+
+    def handle(self, *args, **options):
+        total = options['logins']
+        concurrencia = options['concurrencia']
+        n_usuarios = options['usuarios']
+        cada_fallido = int(1 / options['fallidos']) if options['fallidos'] > 0 else 0
+
+        password = 'BenchLogin123'
+        usuarios = self._crear_usuarios(n_usuarios, make_password(password))
+        self.stdout.write(f'Usuarios de prueba: {len(usuarios)}')
+
+        def login(indice):
+            usuario = usuarios[indice % len(usuarios)]
+            fallido = cada_fallido and indice % cada_fallido == 0
+            client = Client()
+            inicio = time.perf_counter()
+            response = client.post(
+                '/api/auth/login/',
+                {'username': usuario, 'password': 'incorrecta' if fallido else password},
+                content_type='application/json'
+            )
+            duracion = time.perf_counter() - inicio
+            connection.close()
+            return duracion, response.status_code
+
+        try:
+            inicio = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=concurrencia) as executor:
+                resultados = list(executor.map(login, range(total)))
+            transcurrido = time.perf_counter() - inicio
+        finally:
+            self._limpiar()
+
+        latencias = sorted(r[0] * 1000 for r in resultados)
+        codigos = {}
+        for _, codigo in resultados:
+            codigos[codigo] = codigos.get(codigo, 0) + 1
+
+        def percentil(p):
+            return latencias[min(len(latencias) - 1, int(len(latencias) * p / 100))]
+
+        self.stdout.write(self.style.SUCCESS(
+            f'{total} logins en {transcurrido:.2f}s con {concurrencia} hilos '
+            f'-> {total / transcurrido:.1f} logins/s'
+        ))
+        self.stdout.write(
+            f'Latencia ms: media={statistics.mean(latencias):.1f} p50={percentil(50):.1f} '
+            f'p95={percentil(95):.1f} p99={percentil(99):.1f} max={latencias[-1]:.1f}'
+        )
+        self.stdout.write(f'Códigos de respuesta: {codigos}')
+
+    def _crear_usuarios(self, cantidad, password_hash):
+        self._limpiar()
+        Usuario.objects.bulk_create([
+            Usuario(
+                ci_nit=f'{90000000 + i}',
+                nombres='Bench',
+                apellidos='Login',
+                email=f'{self.PREFIJO}{i}@bench.local',
+                usuario=f'{self.PREFIJO}{i}',
+                password=password_hash,
+            )
+            for i in range(cantidad)
+        ])
+        return [f'{self.PREFIJO}{i}' for i in range(cantidad)]
+
+    def _limpiar(self):
+        usuarios = Usuario.objects.filter(usuario__startswith=self.PREFIJO)
+        BitacoraAuditoria.objects.filter(usuario__in=usuarios).delete()
+        usuarios.delete()
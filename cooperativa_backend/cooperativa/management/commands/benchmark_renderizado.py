@@ -0,0 +1,95 @@
+import gzip
+import json
+import time
+import warnings
+from datetime import date
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client
+from django.test.utils import setup_test_environment, teardown_test_environment
+from rest_framework.renderers import JSONRenderer
+
+from ...benchmark_endpoints import descubrir_endpoints
+from ...datos_sinteticos import GeneradorDatos, ParametrosGeneracion
+from ...middleware import brotli
+from ...models import Usuario
+from ...renderizado import ORJSONRenderer
+
+FECHA_DATASET = date(2025, 6, 30)
+
+
+class Command(BaseCommand):
+    help = (
+        'Compara el tiempo de render de JSONRenderer y ORJSONRenderer y los bytes enviados '
+        '(sin comprimir, gzip y brotli) de los endpoints GET con respuestas más grandes'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--endpoints', type=int, default=10, help='Cantidad de endpoints (los más grandes)')
+        parser.add_argument('--repeticiones', type=int, default=5)
+        parser.add_argument('--socios', type=int, default=200, help='Tamaño del dataset sintético')
+        parser.add_argument('--page-size', type=int, default=100, help='page_size pedido a los listados')
+        parser.add_argument('--filtro', help='Regex sobre el nombre de la ruta')
+
+    def handle(self, *args, **options):
+        warnings.simplefilter('ignore')
+        setup_test_environment()
+        nombre_original = connection.settings_dict['NAME']
+        connection.creation.create_test_db(verbosity=0, autoclobber=True, serialize=False)
+        try:
+            GeneradorDatos(ParametrosGeneracion(
+                socios=options['socios'], anios=2, insumos=30, prefijo='bench', hasta=FECHA_DATASET,
+            )).generar()
+            usuario = Usuario.objects.create_superuser(
+                ci_nit='99999999', nombres='Benchmark', apellidos='Renderizado',
+                email='benchmark@example.com', usuario='benchmark', password='Benchmark123'
+            )
+            self._benchmark(options, usuario)
+        finally:
+            connection.creation.destroy_test_db(nombre_original, verbosity=0)
+            teardown_test_environment()
+
+    def _benchmark(self, options, usuario):
+        cliente = Client(raise_request_exception=False)
+        cliente.force_login(usuario)
+
+        # Los datos de cada respuesta se renderizan aparte: solo se mide el renderer
+        respuestas = []
+        for endpoint in descubrir_endpoints(filtro=options['filtro']):
+            if endpoint.omitido:
+                continue
+            consulta = dict(endpoint.consulta or {}, page_size=options['page_size'])
+            respuesta = cliente.get(endpoint.url, consulta)
+            if respuesta.status_code == 200 and getattr(respuesta, 'data', None) is not None:
+                respuestas.append((endpoint.nombre, respuesta.data, len(respuesta.content)))
+        respuestas.sort(key=lambda r: r[2], reverse=True)
+
+        nivel = getattr(settings, 'COMPRESION_GZIP_NIVEL', 6)
+        calidad = getattr(settings, 'COMPRESION_BROTLI_CALIDAD', 5)
+        if brotli is None:
+            self.stdout.write(self.style.WARNING('brotli no está instalado: se omite la columna br'))
+        for nombre, datos, _ in respuestas[:options['endpoints']]:
+            estandar, t_estandar = self._medir(JSONRenderer(), datos, options['repeticiones'])
+            rapido, t_rapido = self._medir(ORJSONRenderer(), datos, options['repeticiones'])
+            linea = (
+                f'  {nombre:<44} json={t_estandar:7.2f}ms  orjson={t_rapido:7.2f}ms  '
+                f'x{t_estandar / t_rapido:4.1f}  {len(rapido):>8}B  '
+                f'gzip={len(gzip.compress(rapido, compresslevel=nivel, mtime=0)):>7}B'
+            )
+            if brotli is not None:
+                linea += f'  br={len(brotli.compress(rapido, quality=calidad)):>7}B'
+            if json.loads(estandar) != json.loads(rapido):
+                self.stdout.write(self.style.ERROR(f'{linea}  SALIDA DISTINTA'))
+            else:
+                self.stdout.write(linea)
+
+    @staticmethod
+    def _medir(renderer, datos, repeticiones):
+        muestras = []
+        for _ in range(repeticiones):
+            inicio = time.perf_counter()
+            salida = renderer.render(datos)
+            muestras.append(time.perf_counter() - inicio)
+        return salida, min(muestras) * 1000
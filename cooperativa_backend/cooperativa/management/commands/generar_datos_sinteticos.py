@@ -0,0 +1,91 @@
+import re
+import time
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...datos_sinteticos import GeneradorDatos, ParametrosGeneracion, PASSWORD_SINTETICO, limpiar
+from ...productividad import refrescar_todo
+
+
+class Command(BaseCommand):
+    help = (
+        'Genera datos sintéticos consistentes a escala de producción con bulk_create '
+        '(ej: --socios 50000 --parcelas-por-socio 3 --anios 5)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--socios', type=int, default=1000)
+        parser.add_argument('--parcelas-por-socio', '--parcelas-per-socio', dest='parcelas_por_socio',
+                            type=float, default=3, help='Promedio de parcelas por socio')
+        parser.add_argument('--anios', '--years', dest='anios', type=int, default=5,
+                            help='Años de historia (ciclos, cosechas, campañas, pedidos)')
+        parser.add_argument('--comunidades', type=int, help='Por defecto: 1 cada 400 socios (mínimo 5)')
+        parser.add_argument('--insumos', type=int, default=100, help='Semillas, pesticidas y fertilizantes (de cada uno)')
+        parser.add_argument('--participacion', type=float, default=0.15,
+                            help='Probabilidad de que un socio participe en cada campaña')
+        parser.add_argument('--pedidos', type=float, default=0.8, help='Pedidos de venta por socio y año (media)')
+        parser.add_argument('--pedidos-insumo', type=float, default=1.2, help='Pedidos de insumos por socio y año (media)')
+        parser.add_argument('--semilla', type=int, default=42, help='Semilla del generador aleatorio')
+        parser.add_argument('--prefijo', default='sint', help='Prefijo de las claves generadas (alfanumérico)')
+        parser.add_argument('--hasta', help='Fecha de referencia AAAA-MM-DD (por defecto hoy)')
+        parser.add_argument('--lote', type=int, default=1000, help='Socios por transacción')
+        parser.add_argument('--limpiar', action='store_true', help='Elimina antes los datos con el mismo prefijo')
+        parser.add_argument('--solo-limpiar', action='store_true', help='Solo elimina los datos del prefijo')
+        parser.add_argument('--sin-agregados', action='store_true',
+                            help='No reconstruye las tablas de productividad al terminar')
+
+    def handle(self, *args, **options):
+        prefijo = options['prefijo']
+        if not re.match(r'^[a-zA-Z0-9]+$', prefijo):
+            raise CommandError('El prefijo solo puede contener letras y números')
+
+        if options['limpiar'] or options['solo_limpiar']:
+            inicio = time.perf_counter()
+            eliminados = limpiar(prefijo)
+            self.stdout.write(
+                f'Eliminadas {sum(eliminados.values())} filas con prefijo "{prefijo}" '
+                f'en {time.perf_counter() - inicio:.2f}s'
+            )
+            if options['solo_limpiar']:
+                return
+
+        try:
+            hasta = date.fromisoformat(options['hasta']) if options['hasta'] else None
+        except ValueError:
+            raise CommandError('--hasta debe tener formato AAAA-MM-DD')
+
+        parametros = ParametrosGeneracion(
+            socios=options['socios'],
+            parcelas_por_socio=options['parcelas_por_socio'],
+            anios=options['anios'],
+            comunidades=options['comunidades'],
+            insumos=options['insumos'],
+            participacion_campanias=options['participacion'],
+            pedidos_por_socio=options['pedidos'],
+            pedidos_insumo_por_socio=options['pedidos_insumo'],
+            semilla=options['semilla'],
+            prefijo=prefijo,
+            hasta=hasta,
+            lote=options['lote'],
+        )
+
+        inicio = time.perf_counter()
+        conteos = GeneradorDatos(parametros, progreso=self.stdout.write).generar()
+        transcurrido = time.perf_counter() - inicio
+
+        for modelo, cantidad in conteos.items():
+            self.stdout.write(f'  {modelo}: {cantidad}')
+        total = sum(conteos.values())
+        self.stdout.write(self.style.SUCCESS(
+            f'{total} filas generadas en {transcurrido:.1f}s ({total / max(transcurrido, 0.001):.0f} filas/s). '
+            f'Contraseña de los usuarios: {PASSWORD_SINTETICO}'
+        ))
+
+        if not options['sin_agregados']:
+            inicio = time.perf_counter()
+            resultado = refrescar_todo()
+            self.stdout.write(
+                f"Productividad: {resultado['productividad']} filas, tratamientos: {resultado['tratamientos']} filas "
+                f'({time.perf_counter() - inicio:.1f}s)'
+            )
@@ -0,0 +1,58 @@
+import json
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from ...importacion_socios import ArchivoInvalido, leer_archivo, importar_socios, TAMANO_LOTE, HILOS_HASH
+from ...models import Usuario
+
+
+class Command(BaseCommand):
+    help = 'Importa socios (usuario + socio + parcela opcional) desde un archivo CSV o JSON'
+
+    def add_arguments(self, parser):
+        parser.add_argument('archivo', help='Ruta del archivo .csv o .json')
+        parser.add_argument('--validar-solo', action='store_true', help='Solo valida, no inserta')
+        parser.add_argument('--lote', type=int, default=TAMANO_LOTE, help='Filas por transacción')
+        parser.add_argument('--hilos', type=int, default=HILOS_HASH, help='Hilos para el hash de contraseñas')
+        parser.add_argument('--creado-por', help='Usuario que figura en la bitácora')
+        parser.add_argument('--reporte', help='Guarda el reporte JSON en esta ruta')
+
+    def handle(self, *args, **options):
+        creado_por = None
+        if options['creado_por']:
+            creado_por = Usuario.objects.filter(usuario=options['creado_por'].lower()).first()
+            if creado_por is None:
+                raise CommandError(f"Usuario no encontrado: {options['creado_por']}")
+
+        formato = 'json' if options['archivo'].lower().endswith('.json') else 'csv'
+        try:
+            with open(options['archivo'], 'rb') as archivo:
+                registros = leer_archivo(archivo.read(), formato)
+        except (OSError, ArchivoInvalido, UnicodeDecodeError) as e:
+            raise CommandError(str(e))
+
+        inicio = time.perf_counter()
+        reporte = importar_socios(
+            registros,
+            creado_por=creado_por,
+            validar_solo=options['validar_solo'],
+            tamano_lote=options['lote'],
+            hilos=options['hilos'],
+            cliente={'ip': None, 'user_agent': 'manage.py importar_socios'}
+        )
+        transcurrido = time.perf_counter() - inicio
+
+        for error in reporte['errores'][:50]:
+            self.stdout.write(self.style.WARNING(f"Fila {error['fila']}: {error['errores']}"))
+        if len(reporte['errores']) > 50:
+            self.stdout.write(f"... y {len(reporte['errores']) - 50} filas con errores más")
+
+        if options['reporte']:
+            with open(options['reporte'], 'w', encoding='utf-8') as salida:
+                json.dump(reporte, salida, ensure_ascii=False, indent=2)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"{reporte['total']} filas, {reporte['validos']} válidas, {reporte['creados']} socios creados, "
+            f"{len(reporte['errores'])} con errores en {transcurrido:.2f}s"
+        ))
@@ -0,0 +1,29 @@
+from django.core.management.base import BaseCommand
+from django.db import connections
+
+from ...busqueda import instalar_indices, desinstalar_indices
+
+
+class Command(BaseCommand):
+    help = 'Instala o reconstruye los índices de búsqueda de texto (?q=)'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default', help='Alias de la base de datos')
+        parser.add_argument('--eliminar', action='store_true', help='Elimina los índices en lugar de crearlos')
+
+    def handle(self, *args, **options):
+        connection = connections[options['database']]
+        if options['eliminar']:
+            sentencias = desinstalar_indices(connection)
+            self.stdout.write(self.style.SUCCESS(f'Índices de búsqueda eliminados ({len(sentencias)} sentencias)'))
+            return
+
+        sentencias = instalar_indices(connection)
+        if not sentencias:
+            self.stdout.write(self.style.WARNING(
+                f'El motor {connection.vendor} no tiene índices de búsqueda; se usará icontains'
+            ))
+            return
+        self.stdout.write(self.style.SUCCESS(
+            f'Índices de búsqueda instalados en {connection.vendor} ({len(sentencias)} sentencias)'
+        ))
@@ -0,0 +1,18 @@
+from django.core.management.base import BaseCommand
+
+from ...sincronizacion import purgar
+
+
+class Command(BaseCommand):
+    help = (
+        'Elimina los registros de borrado de la sincronización móvil más antiguos que '
+        'SINCRONIZACION_RETENCION_DIAS. Programar una vez por día (cron / Heroku Scheduler).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dias', type=int, default=None,
+                            help='Días a conservar (por defecto SINCRONIZACION_RETENCION_DIAS)')
+
+    def handle(self, *args, **options):
+        borrados = purgar(options['dias'])
+        self.stdout.write(self.style.SUCCESS(f'Registros eliminados purgados: {borrados}'))
@@ -0,0 +1,25 @@
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+
+from ...pagos_stripe import reconciliar_pendientes
+
+
+class Command(BaseCommand):
+    help = (
+        'Resuelve pagos Stripe que siguen en PROCESANDO (worker caído o webhook perdido): '
+        'consulta el PaymentIntent o reintenta el cobro con la misma idempotency key. '
+        'Programar cada pocos minutos (cron / Heroku Scheduler).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--antiguedad', type=int, default=15,
+                            help='Minutos sin cambios para considerar un pago pendiente')
+
+    def handle(self, *args, **options):
+        resultado = reconciliar_pendientes(options['antiguedad'])
+        resumen = Counter(resultado.values())
+        detalle = ', '.join(f'{estado}: {cantidad}' for estado, cantidad in sorted(resumen.items(), key=str))
+        self.stdout.write(self.style.SUCCESS(
+            f'{len(resultado)} pagos revisados' + (f' ({detalle})' if detalle else '')
+        ))
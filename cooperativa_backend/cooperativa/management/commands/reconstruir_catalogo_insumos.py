@@ -0,0 +1,21 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from ...catalogo_insumos import reconstruir
+
+
+class Command(BaseCommand):
+    help = (
+        'Reconstruye el catálogo unificado de insumos (/api/insumos/catalogo/) '
+        'desde semillas, pesticidas y fertilizantes. Programar una vez por noche '
+        '(cron / Heroku Scheduler) para corregir cualquier desvío.'
+    )
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        resultado = reconstruir()
+        detalle = ', '.join(f'{tipo}: {filas}' for tipo, filas in resultado.items())
+        self.stdout.write(self.style.SUCCESS(
+            f'Catálogo de insumos actualizado ({detalle}) en {time.perf_counter() - inicio:.2f}s'
+        ))
@@ -0,0 +1,30 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from ...productividad import refrescar_todo, recalcular_parcelas
+
+
+class Command(BaseCommand):
+    help = (
+        'Reconstruye las tablas de productividad del reporte de parcelas. '
+        'Programar una vez por noche (cron / Heroku Scheduler).'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--parcela', type=int, action='append', help='Recalcular solo estas parcelas')
+
+    def handle(self, *args, **options):
+        inicio = time.perf_counter()
+        if options['parcela']:
+            filas = recalcular_parcelas(options['parcela'])
+            resumen = f'{filas} filas de productividad'
+        else:
+            resultado = refrescar_todo()
+            resumen = (
+                f"{resultado['productividad']} filas de productividad, "
+                f"{resultado['tratamientos']} filas de tratamientos"
+            )
+        self.stdout.write(self.style.SUCCESS(
+            f'Productividad actualizada: {resumen} en {time.perf_counter() - inicio:.2f}s'
+        ))
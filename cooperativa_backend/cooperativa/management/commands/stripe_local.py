@@ -0,0 +1,42 @@
+import json
+import urllib.request
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from ...stripe_local import ServidorStripeLocal, firmar
+
+
+class Command(BaseCommand):
+    help = (
+        'Levanta un servidor local que imita la API de Stripe y envía los eventos firmados '
+        'al webhook (usar con STRIPE_API_BASE=http://127.0.0.1:<puerto>)'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--puerto', type=int, default=12111)
+        parser.add_argument('--webhook', default='http://127.0.0.1:8000/api/pagos/stripe/webhook/',
+                            help='URL del webhook que recibe los eventos')
+
+    def handle(self, *args, **options):
+        secreto = settings.STRIPE_WEBHOOK_SECRET
+        if not secreto:
+            raise CommandError('Configure STRIPE_WEBHOOK_SECRET para firmar los eventos')
+
+        def enviar(evento):
+            payload = json.dumps(evento).encode()
+            solicitud = urllib.request.Request(options['webhook'], data=payload, headers={
+                'Content-Type': 'application/json', 'Stripe-Signature': firmar(payload, secreto),
+            })
+            try:
+                with urllib.request.urlopen(solicitud, timeout=10) as respuesta:
+                    self.stdout.write(f"  {evento['type']} -> {respuesta.status}")
+            except OSError as e:
+                self.stdout.write(self.style.WARNING(f"  {evento['type']} no entregado: {e}"))
+
+        servidor = ServidorStripeLocal(options['puerto'], al_evento=enviar)
+        self.stdout.write(self.style.SUCCESS(f'Stripe local en {servidor.url} (Ctrl+C para terminar)'))
+        try:
+            servidor.servir()
+        except KeyboardInterrupt:
+            pass
@@ -0,0 +1,169 @@
+"""
+Métricas de rendimiento por request (formato de exposición de Prometheus)
+
+MetricasMiddleware (middleware.py) registra por ruta (nombre de la URL,
+no el path, para acotar la cardinalidad) y método:
+- histograma de latencia total,
+- histograma de número de consultas SQL y de tiempo total en SQL,
+- histograma de tamaño de respuesta,
+- contador de requests por código de estado (siempre, sin muestreo).
+
+Los histogramas solo se alimentan con la fracción METRICAS_MUESTREO de los
+requests: en los no muestreados no se instala el wrapper de consultas y el
+costo es un random() por request. Las consultas más lentas que
+METRICAS_CONSULTA_LENTA_MS se registran en el log 'cooperativa.metricas'
+junto con la vista que las originó.
+
+El registro vive en memoria de cada proceso: con varios workers cada uno
+expone sus propias series y Prometheus las agrega por instancia.
+"""
+
+import logging
+import threading
+import time
+from bisect import bisect_left
+
+
+logger = logging.getLogger('cooperativa.metricas')
+
+BUCKETS_SEGUNDOS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+BUCKETS_CONSULTAS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+BUCKETS_BYTES = (1_000, 10_000, 100_000, 1_000_000, 10_000_000)
+
+# Rutas que no se miden (el propio endpoint de métricas)
+RUTAS_EXCLUIDAS = {'metricas'}
+
+
+class Histograma:
+    """Histograma acumulativo por combinación de etiquetas"""
+
+    def __init__(self, nombre, ayuda, buckets):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.buckets = buckets
+        self.series = {}
+
+    def observar(self, etiquetas, valor):
+        serie = self.series.get(etiquetas)
+        if serie is None:
+            # conteos por bucket (+Inf al final), suma
+            serie = self.series[etiquetas] = [[0] * (len(self.buckets) + 1), 0.0]
+        serie[0][bisect_left(self.buckets, valor)] += 1
+        serie[1] += valor
+
+    def exponer(self):
+        lineas = [f'# HELP {self.nombre} {self.ayuda}', f'# TYPE {self.nombre} histogram']
+        for etiquetas, (conteos, suma) in sorted(self.series.items()):
+            base = _etiquetas(etiquetas)
+            acumulado = 0
+            for limite, conteo in zip((*self.buckets, '+Inf'), conteos):
+                acumulado += conteo
+                lineas.append(f'{self.nombre}_bucket{{{base},le="{limite}"}} {acumulado}')
+            lineas.append(f'{self.nombre}_sum{{{base}}} {round(suma, 6)}')
+            lineas.append(f'{self.nombre}_count{{{base}}} {acumulado}')
+        return lineas
+
+
+class Contador:
+
+    def __init__(self, nombre, ayuda):
+        self.nombre = nombre
+        self.ayuda = ayuda
+        self.series = {}
+
+    def incrementar(self, etiquetas, valor=1):
+        self.series[etiquetas] = self.series.get(etiquetas, 0) + valor
+
+    def exponer(self):
+        lineas = [f'# HELP {self.nombre} {self.ayuda}', f'# TYPE {self.nombre} counter']
+        for etiquetas, valor in sorted(self.series.items()):
+            lineas.append(f'{self.nombre}{{{_etiquetas(etiquetas)}}} {valor}')
+        return lineas
+
+
+def _escapar(valor):
+    return str(valor).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _etiquetas(etiquetas):
+    return ','.join(f'{clave}="{_escapar(valor)}"' for clave, valor in etiquetas)
+
+
+class RegistroMetricas:
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reiniciar()
+
+    def reiniciar(self):
+        with self._lock:
+            self.requests = Contador(
+                'cooperativa_http_requests_total', 'Requests atendidos por ruta, método y estado'
+            )
+            self.latencia = Histograma(
+                'cooperativa_http_latencia_segundos', 'Latencia del request (muestreado)', BUCKETS_SEGUNDOS
+            )
+            self.consultas = Histograma(
+                'cooperativa_sql_consultas', 'Consultas SQL por request (muestreado)', BUCKETS_CONSULTAS
+            )
+            self.tiempo_sql = Histograma(
+                'cooperativa_sql_tiempo_segundos', 'Tiempo total en SQL por request (muestreado)', BUCKETS_SEGUNDOS
+            )
+            self.bytes = Histograma(
+                'cooperativa_http_respuesta_bytes', 'Tamaño de la respuesta (muestreado)', BUCKETS_BYTES
+            )
+
+    def registrar(self, ruta, metodo, estado, medicion=None):
+        etiquetas = (('ruta', ruta), ('metodo', metodo))
+        with self._lock:
+            self.requests.incrementar(etiquetas + (('estado', estado),))
+            if medicion is not None:
+                self.latencia.observar(etiquetas, medicion['latencia'])
+                self.consultas.observar(etiquetas, medicion['consultas'])
+                self.tiempo_sql.observar(etiquetas, medicion['tiempo_sql'])
+                if medicion['bytes'] is not None:
+                    self.bytes.observar(etiquetas, medicion['bytes'])
+
+    def exponer(self):
+        with self._lock:
+            lineas = []
+            for metrica in (self.requests, self.latencia, self.consultas, self.tiempo_sql, self.bytes):
+                lineas.extend(metrica.exponer())
+        return '\n'.join(lineas) + '\n'
+
+
+registro = RegistroMetricas()
+
+
+def nombre_ruta(request):
+    coincidencia = getattr(request, 'resolver_match', None)
+    if coincidencia is None:
+        # 404 y similares: una sola serie para no disparar la cardinalidad
+        return 'sin_ruta'
+    return coincidencia.view_name or coincidencia.route or 'sin_nombre'
+
+
+class MedidorConsultas:
+    """execute_wrapper que cuenta y cronometra las consultas de un request"""
+
+    def __init__(self, request, umbral_lenta):
+        self.request = request
+        self.umbral_lenta = umbral_lenta
+        self.consultas = 0
+        self.tiempo = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        inicio = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duracion = time.perf_counter() - inicio
+            self.consultas += 1
+            self.tiempo += duracion
+            if duracion >= self.umbral_lenta:
+                logger.warning('consulta_lenta', extra={
+                    'vista': nombre_ruta(self.request),
+                    'metodo': self.request.method,
+                    'duracion_ms': round(duracion * 1000, 1),
+                    'sql': sql[:500].replace('\n', ' '),
+                })
@@ -0,0 +1,168 @@
+import gzip
+import random
+import re
+import time
+from contextlib import ExitStack, contextmanager
+
+from django.conf import settings
+from django.db import connections
+from django.utils.cache import patch_vary_headers
+from django.utils.functional import SimpleLazyObject
+
+from . import consultas_n1
+from .identidad import obtener_identidad
+from .metricas import registro, nombre_ruta, MedidorConsultas, RUTAS_EXCLUIDAS
+
+try:
+    import brotli
+except ImportError:  # brotli es opcional: sin él solo se usa gzip
+    brotli = None
+
+
+@contextmanager
+def _en_todas_las_conexiones(envoltura):
+    """execute_wrapper en la primaria y en la réplica (replica.py)"""
+    with ExitStack() as pila:
+        for conexion in connections.all():
+            pila.enter_context(conexion.execute_wrapper(envoltura))
+        yield
+
+
+class IdentidadMiddleware:
+    """
+    Expone request.identidad: Socio, roles y permisos del usuario,
+    resueltos de forma perezosa y como máximo una vez por request.
+    Debe ir después de AuthenticationMiddleware.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        request.identidad = SimpleLazyObject(lambda: obtener_identidad(request))
+        return self.get_response(request)
+
+
+class MetricasMiddleware:
+    """
+    Instrumenta cada request con las métricas de este módulo.
+    Conviene ubicarlo al principio de MIDDLEWARE para incluir en la medición
+    las consultas de sesión y autenticación.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.muestreo = getattr(settings, 'METRICAS_MUESTREO', 1.0)
+        self.umbral_lenta = getattr(settings, 'METRICAS_CONSULTA_LENTA_MS', 200) / 1000
+
+    def __call__(self, request):
+        if self.muestreo <= 0 or random.random() >= self.muestreo:
+            respuesta = self.get_response(request)
+            self._registrar(request, respuesta)
+            return respuesta
+
+        medidor = MedidorConsultas(request, self.umbral_lenta)
+        inicio = time.perf_counter()
+        with _en_todas_las_conexiones(medidor):
+            respuesta = self.get_response(request)
+        latencia = time.perf_counter() - inicio
+        self._registrar(request, respuesta, {
+            'latencia': latencia,
+            'consultas': medidor.consultas,
+            'tiempo_sql': medidor.tiempo,
+            'bytes': None if respuesta.streaming else len(respuesta.content),
+        })
+        return respuesta
+
+    def _registrar(self, request, respuesta, medicion=None):
+        ruta = nombre_ruta(request)
+        if ruta in RUTAS_EXCLUIDAS:
+            return
+        registro.registrar(ruta, request.method, respuesta.status_code, medicion)
+
+
+class ConsultasN1Middleware:
+    """
+    Detector de consultas N+1 por request (consultas_n1.py). Con
+    CONSULTAS_N1_MODO='off' solo cuesta leer el setting.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        modo = consultas_n1.modo_actual()
+        if modo == 'off':
+            return self.get_response(request)
+
+        detector = consultas_n1.DetectorN1()
+        with _en_todas_las_conexiones(detector):
+            respuesta = self.get_response(request)
+        consultas_n1.informar(detector, f'{request.method} {nombre_ruta(request)}', modo)
+        return respuesta
+
+
+class CompresionMiddleware:
+    """
+    Comprime las respuestas con brotli (si está instalado y el cliente lo
+    acepta) o gzip. Solo se comprimen las respuestas JSON de la API de al
+    menos COMPRESION_MIN_BYTES: por debajo el encabezado y el costo de CPU
+    no compensan. Debe ir después de MetricasMiddleware para que las
+    métricas registren los bytes efectivamente enviados.
+
+    Las páginas HTML (admin, formularios con token CSRF) no se comprimen:
+    sin el relleno aleatorio de GZipMiddleware quedarían expuestas a BREACH.
+    """
+
+    TIPOS_COMPRIMIBLES = ('application/json',)
+    PREFIJO_API = '/api/'
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.minimo = getattr(settings, 'COMPRESION_MIN_BYTES', 1024)
+        self.nivel_gzip = getattr(settings, 'COMPRESION_GZIP_NIVEL', 6)
+        self.calidad_brotli = getattr(settings, 'COMPRESION_BROTLI_CALIDAD', 5)
+
+    def __call__(self, request):
+        respuesta = self.get_response(request)
+        if (respuesta.streaming or respuesta.has_header('Content-Encoding')
+                or not request.path.startswith(self.PREFIJO_API)
+                or not respuesta.get('Content-Type', '').startswith(self.TIPOS_COMPRIMIBLES)):
+            return respuesta
+        # Varía según Accept-Encoding aunque esta respuesta no se comprima
+        patch_vary_headers(respuesta, ('Accept-Encoding',))
+        if len(respuesta.content) < self.minimo:
+            return respuesta
+
+        codificacion = self._codificacion(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if codificacion == 'br':
+            comprimido = brotli.compress(respuesta.content, quality=self.calidad_brotli)
+        elif codificacion == 'gzip':
+            comprimido = gzip.compress(respuesta.content, compresslevel=self.nivel_gzip, mtime=0)
+        else:
+            return respuesta
+        if len(comprimido) >= len(respuesta.content):
+            return respuesta
+
+        respuesta.content = comprimido
+        respuesta['Content-Length'] = str(len(comprimido))
+        respuesta['Content-Encoding'] = codificacion
+        # El cuerpo ya no es el mismo byte a byte: ETag débil, como GZipMiddleware
+        etag = respuesta.get('ETag')
+        if etag and etag.startswith('"'):
+            respuesta['ETag'] = 'W/' + etag
+        return respuesta
+
+    @staticmethod
+    def _codificacion(aceptadas):
+        """'br', 'gzip' o None según Accept-Encoding (q=0 excluye)"""
+        ofrecidas = {}
+        for parte in aceptadas.lower().split(','):
+            nombre, _, parametros = parte.strip().partition(';')
+            calidad = re.search(r'q=([0-9.]+)', parametros)
+            ofrecidas[nombre.strip()] = float(calidad.group(1)) if calidad else 1.0
+        if brotli is not None and ofrecidas.get('br', 0) > 0:
+            return 'br'
+        if ofrecidas.get('gzip', ofrecidas.get('*', 0)) > 0:
+            return 'gzip'
+        return None
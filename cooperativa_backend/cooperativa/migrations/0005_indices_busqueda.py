@@ -0,0 +1,25 @@
+# Índices de búsqueda de texto (pg_trgm en PostgreSQL, FTS5 en SQLite)
+
+from django.db import migrations
+
+
+def instalar(apps, schema_editor):
+    from cooperativa.busqueda import instalar_indices
+    instalar_indices(schema_editor.connection)
+
+
+def desinstalar(apps, schema_editor):
+    from cooperativa.busqueda import desinstalar_indices
+    desinstalar_indices(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cooperativa', '0002_alter_paymentmethod_tipo'),
+        ('cooperativa', '0004_pedidoinsumo_pagoinsumo_detallepedidoinsumo_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(instalar, desinstalar),
+    ]
@@ -0,0 +1,39 @@
+# Geohash indexado en Parcela para consultas por cercanía
+
+from django.db import migrations, models
+
+
+def calcular_geohash(apps, schema_editor):
+    from cooperativa.geoespacial import codificar_geohash
+
+    Parcela = apps.get_model('cooperativa', 'Parcela')
+    parcelas = Parcela.objects.filter(latitud__isnull=False, longitud__isnull=False).only('id', 'latitud', 'longitud')
+    pendientes = []
+    for parcela in parcelas.iterator(chunk_size=2000):
+        parcela.geohash = codificar_geohash(parcela.latitud, parcela.longitud)
+        pendientes.append(parcela)
+        if len(pendientes) >= 2000:
+            Parcela.objects.bulk_update(pendientes, ['geohash'])
+            pendientes = []
+    if pendientes:
+        Parcela.objects.bulk_update(pendientes, ['geohash'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cooperativa', '0005_indices_busqueda'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='parcela',
+            name='geohash',
+            field=models.CharField(blank=True, db_index=True, editable=False, help_text='Geohash de latitud/longitud para búsquedas por cercanía', max_length=12, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='parcela',
+            index=models.Index(fields=['latitud', 'longitud'], name='parcela_latitud_131772_idx'),
+        ),
+        migrations.RunPython(calcular_geohash, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,59 @@
+# Tablas de hechos para el reporte de productividad de parcelas
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cooperativa', '0006_parcela_geohash'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ProductividadParcela',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('especie', models.CharField(max_length=100)),
+                ('temporada', models.CharField(help_text='Gestión agrícola, p. ej. 2024-I o 2024-II', max_length=10)),
+                ('superficie_hectareas', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('total_cosechado', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('num_ciclos', models.PositiveIntegerField(default=0)),
+                ('num_cosechas', models.PositiveIntegerField(default=0)),
+                ('num_cosechas_completadas', models.PositiveIntegerField(default=0)),
+                ('num_cosechas_pendientes', models.PositiveIntegerField(default=0)),
+                ('rendimiento_por_hectarea', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('actualizado_en', models.DateTimeField(default=django.utils.timezone.now)),
+                ('parcela', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='productividad', to='cooperativa.parcela')),
+            ],
+            options={
+                'verbose_name': 'Productividad de Parcela',
+                'verbose_name_plural': 'Productividad de Parcelas',
+                'db_table': 'productividad_parcela',
+                'indexes': [
+                    models.Index(fields=['especie', 'temporada'], name='productivid_especie_66d3d1_idx'),
+                    models.Index(fields=['-rendimiento_por_hectarea'], name='productivid_rendimi_f17ad0_idx'),
+                ],
+                'unique_together': {('parcela', 'especie', 'temporada')},
+            },
+        ),
+        migrations.CreateModel(
+            name='ResumenTratamientoMensual',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('mes', models.DateField(help_text='Primer día del mes')),
+                ('tipo_tratamiento', models.CharField(choices=[('FERTILIZANTE', 'Fertilizante'), ('PESTICIDA', 'Pesticida'), ('HERBICIDA', 'Fungicida'), ('REGULADOR', 'Regulador de Crecimiento'), ('RIEGO', 'Riego'), ('LABOR', 'Labor Cultural'), ('OTRO', 'Otro')], max_length=20)),
+                ('cantidad', models.PositiveIntegerField(default=0)),
+                ('actualizado_en', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Resumen Mensual de Tratamientos',
+                'verbose_name_plural': 'Resúmenes Mensuales de Tratamientos',
+                'db_table': 'resumen_tratamiento_mensual',
+                'ordering': ['mes', 'tipo_tratamiento'],
+                'unique_together': {('mes', 'tipo_tratamiento')},
+            },
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Método de pago de Stripe guardado para reintentar el cobro fuera del request
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cooperativa', '0007_productividadparcela_resumentratamientomensual'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='pago',
+            name='stripe_payment_method_id',
+            field=models.CharField(blank=True, help_text='Método de pago de Stripe (para reintentar el cobro)', max_length=200, null=True),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Índices estado + fecha para el vencimiento masivo (vencimientos.py)
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cooperativa', '0008_pago_stripe_payment_method_id'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='semilla',
+            index=models.Index(fields=['estado', 'fecha_vencimiento'], name='semilla_estado_vencim_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pesticida',
+            index=models.Index(fields=['estado', 'fecha_vencimiento'], name='pesticida_estado_vencim_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fertilizante',
+            index=models.Index(fields=['estado', 'fecha_vencimiento'], name='fertiliz_estado_vencim_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='productocosechado',
+            index=models.Index(fields=['estado', 'fecha_cosecha'], name='producto_estado_cosecha_idx'),
+        ),
+    ]
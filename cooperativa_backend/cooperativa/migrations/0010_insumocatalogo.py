@@ -0,0 +1,45 @@
+# Catálogo unificado de insumos (catalogo_insumos.py). Se llena en 0014 o con
+# `python manage.py reconstruir_catalogo_insumos`.
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cooperativa', '0009_indices_vencimiento'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='InsumoCatalogo',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tipo_insumo', models.CharField(choices=[('SEMILLA', 'Semilla'), ('PESTICIDA', 'Pesticida'), ('FERTILIZANTE', 'Fertilizante')], max_length=20)),
+                ('insumo_id', models.PositiveIntegerField(help_text='id en la tabla del tipo de insumo')),
+                ('nombre', models.CharField(help_text='Nombre para mostrar', max_length=255)),
+                ('texto_busqueda', models.TextField(help_text='Campos buscables en minúsculas y sin acentos')),
+                ('cantidad', models.DecimalField(decimal_places=2, max_digits=10)),
+                ('unidad_medida', models.CharField(max_length=20)),
+                ('precio_unitario', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('fecha_vencimiento', models.DateField(blank=True, null=True)),
+                ('estado', models.CharField(max_length=20)),
+                ('lote', models.CharField(blank=True, max_length=50, null=True)),
+                ('proveedor', models.CharField(blank=True, max_length=100, null=True)),
+                ('actualizado_en', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+            options={
+                'verbose_name': 'Insumo (catálogo)',
+                'verbose_name_plural': 'Catálogo de Insumos',
+                'db_table': 'insumo_catalogo',
+                'ordering': ['nombre', 'tipo_insumo', 'insumo_id'],
+                'indexes': [
+                    models.Index(fields=['estado', 'tipo_insumo'], name='insumo_cat_estado_tipo_idx'),
+                    models.Index(fields=['nombre'], name='insumo_cat_nombre_idx'),
+                    models.Index(fields=['fecha_vencimiento'], name='insumo_cat_vencim_idx'),
+                ],
+                'unique_together': {('tipo_insumo', 'insumo_id')},
+            },
+        ),
+    ]
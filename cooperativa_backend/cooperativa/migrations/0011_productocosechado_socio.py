@@ -0,0 +1,67 @@
+# Socio propietario desnormalizado en ProductoCosechado (ver
+# ProductoCosechado.propietario) con su nombre, e índice socio + fecha.
+# Los datos existentes se completan con las mismas reglas.
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def completar_socio(apps, schema_editor):
+    ProductoCosechado = apps.get_model('cooperativa', 'ProductoCosechado')
+    CampaignPartner = apps.get_model('cooperativa', 'CampaignPartner')
+
+    # Socio asignado más reciente por campania (el primero en este orden)
+    socio_por_campania = {}
+    asignaciones = CampaignPartner.objects.select_related('socio__usuario').order_by(
+        'campaign_id', '-fecha_asignacion'
+    )
+    for asignacion in asignaciones:
+        socio_por_campania.setdefault(asignacion.campaign_id, asignacion.socio)
+
+    lote = []
+    productos = ProductoCosechado.objects.select_related(
+        'parcela__socio__usuario', 'cultivo__parcela__socio__usuario'
+    )
+    for producto in productos.iterator(chunk_size=2000):
+        socio = None
+        if producto.parcela_id:
+            socio = producto.parcela.socio
+        elif producto.campania_id:
+            socio = socio_por_campania.get(producto.campania_id)
+        if socio is None and not producto.parcela_id and producto.cultivo_id:
+            socio = producto.cultivo.parcela.socio
+        if socio is None:
+            continue
+        producto.socio = socio
+        producto.socio_nombre = f"{socio.usuario.nombres} {socio.usuario.apellidos}"
+        lote.append(producto)
+        if len(lote) >= 1000:
+            ProductoCosechado.objects.bulk_update(lote, ['socio', 'socio_nombre'])
+            lote = []
+    if lote:
+        ProductoCosechado.objects.bulk_update(lote, ['socio', 'socio_nombre'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cooperativa', '0010_insumocatalogo'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='productocosechado',
+            name='socio',
+            field=models.ForeignKey(blank=True, editable=False, help_text='Socio propietario (derivado de parcela, campania o cultivo)', null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='productos_cosechados', to='cooperativa.socio'),
+        ),
+        migrations.AddField(
+            model_name='productocosechado',
+            name='socio_nombre',
+            field=models.CharField(blank=True, default='', editable=False, help_text='Nombre completo del socio propietario', max_length=255),
+        ),
+        migrations.AddIndex(
+            model_name='productocosechado',
+            index=models.Index(fields=['socio', '-fecha_cosecha'], name='producto_socio_cosecha_idx'),
+        ),
+        migrations.RunPython(completar_socio, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,80 @@
+# Sincronización incremental (sincronizacion.py): actualizado_en en socio,
+# parcela y cultivo, índices (actualizado_en, id) en las tablas del feed y
+# lápidas de registros eliminados. Las filas existentes quedan con la fecha
+# de la migración: la primera sincronización las trae completas igualmente.
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cooperativa', '0011_productocosechado_socio'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='socio',
+            name='actualizado_en',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='parcela',
+            name='actualizado_en',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddField(
+            model_name='cultivo',
+            name='actualizado_en',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+        migrations.AddIndex(
+            model_name='socio',
+            index=models.Index(fields=['actualizado_en', 'id'], name='socio_actualizado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='parcela',
+            index=models.Index(fields=['actualizado_en', 'id'], name='parcela_actualizado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='cultivo',
+            index=models.Index(fields=['actualizado_en', 'id'], name='cultivo_actualizado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='semilla',
+            index=models.Index(fields=['actualizado_en', 'id'], name='semilla_actualizado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='pesticida',
+            index=models.Index(fields=['actualizado_en', 'id'], name='pesticida_actualizado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='fertilizante',
+            index=models.Index(fields=['actualizado_en', 'id'], name='fertiliz_actualizado_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='labor',
+            index=models.Index(fields=['actualizado_en', 'id'], name='labor_actualizado_idx'),
+        ),
+        migrations.CreateModel(
+            name='RegistroEliminado',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('tabla', models.CharField(help_text='Nombre de la tabla en el feed (socios, parcelas...)', max_length=30)),
+                ('objeto_id', models.PositiveIntegerField()),
+                ('eliminado_en', models.DateTimeField(default=django.utils.timezone.now)),
+                ('socio', models.ForeignKey(blank=True, help_text='Solo para los dispositivos de este socio (vacío: para todos)', null=True, on_delete=django.db.models.deletion.CASCADE, to='cooperativa.socio')),
+            ],
+            options={
+                'verbose_name': 'Registro eliminado',
+                'verbose_name_plural': 'Registros eliminados',
+                'db_table': 'registro_eliminado',
+                'indexes': [models.Index(fields=['eliminado_en', 'id'], name='registro_elim_fecha_idx')],
+            },
+        ),
+    ]
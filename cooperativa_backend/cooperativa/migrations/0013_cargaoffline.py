@@ -0,0 +1,35 @@
+# Carga por lotes de la app móvil (carga_offline.py): ids de cliente ya
+# registrados para que reenviar un lote no duplique labores ni cosechas.
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cooperativa', '0012_sincronizacion'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CargaOffline',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('id_cliente', models.CharField(help_text='Identificador generado en el dispositivo', max_length=64)),
+                ('tipo', models.CharField(choices=[('labor', 'Labor'), ('cosecha', 'Cosecha'), ('producto_cosechado', 'Producto cosechado')], max_length=20)),
+                ('objeto_id', models.PositiveIntegerField()),
+                ('creado_en', models.DateTimeField(default=django.utils.timezone.now)),
+                ('usuario', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cargas_offline', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name': 'Carga offline',
+                'verbose_name_plural': 'Cargas offline',
+                'db_table': 'carga_offline',
+                'constraints': [models.UniqueConstraint(fields=('usuario', 'id_cliente'), name='carga_offline_cliente_unico')],
+            },
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Llena el catálogo unificado de insumos (0010) con los insumos existentes.
+# asegurar_inicializado() solo reconstruye con la tabla vacía: sin este paso,
+# el primer insumo guardado después del despliegue dejaba el catálogo con
+# esa única fila.
+
+from django.db import migrations
+
+
+def reconstruir_catalogo(apps, schema_editor):
+    # Usa los modelos actuales: _fila() depende de los índices de búsqueda
+    # y del nombre para mostrar definidos en el código
+    from cooperativa import catalogo_insumos
+    catalogo_insumos.reconstruir()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cooperativa', '0013_cargaoffline'),
+    ]
+
+    operations = [
+        migrations.RunPython(reconstruir_catalogo, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Usuario.actualizado_en pasa a auto_now: las transiciones masivas lo usan
+# como versión para el control optimista y con default=timezone.now los
+# guardados normales nunca lo cambiaban.
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('cooperativa', '0014_reconstruir_catalogo_insumos'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='usuario',
+            name='actualizado_en',
+            field=models.DateTimeField(auto_now=True),
+        ),
+    ]
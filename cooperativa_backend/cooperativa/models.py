@@ -8,6 +8,7 @@ from django.conf import settings
 from decimal import Decimal
 import re
 import json
+from .geoespacial import codificar_geohash
 
 
 def validate_ci_nit(value):
@@ -345,7 +346,7 @@ class Usuario(AbstractBaseUser, PermissionsMixin):
     fecha_bloqueo = models.DateTimeField(blank=True, null=True)
     token_actual = models.TextField(blank=True, null=True)
     creado_en = models.DateTimeField(default=timezone.now)
-    actualizado_en = models.DateTimeField(default=timezone.now)
+    actualizado_en = models.DateTimeField(auto_now=True)
 
     # Django auth fields
     is_active = models.BooleanField(default=True)
@@ -357,6 +358,8 @@ class Usuario(AbstractBaseUser, PermissionsMixin):
     USERNAME_FIELD = 'usuario'
     REQUIRED_FIELDS = ['ci_nit', 'nombres', 'apellidos', 'email']
 
+    CAMPOS_SESION = {'last_login', 'intentos_fallidos', 'ultimo_intento', 'estado', 'fecha_bloqueo'}
+
     class Meta:
         db_table = 'usuario'
         verbose_name = 'Usuario'
@@ -381,7 +384,11 @@ class Usuario(AbstractBaseUser, PermissionsMixin):
             self.usuario = self.usuario.lower().strip()
 
     def save(self, *args, **kwargs):
-        self.full_clean()  # Ejecutar validaciones antes de guardar
+        # Los campos de control de sesión no tienen validaciones; actualizarlos
+        # (login, intentos fallidos) no debe pagar las consultas de unicidad
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or not set(update_fields) <= self.CAMPOS_SESION:
+            self.full_clean()  # Ejecutar validaciones antes de guardar
         super().save(*args, **kwargs)
 
 
@@ -494,11 +501,16 @@ class Socio(models.Model):
     )
     estado = models.CharField(max_length=20, choices=ESTADOS, default='ACTIVO')
     creado_en = models.DateTimeField(default=timezone.now)
+    actualizado_en = models.DateTimeField(auto_now=True)
 
     class Meta:
         db_table = 'socio'
         verbose_name = 'Socio'
         verbose_name_plural = 'Socios'
+        indexes = [
+            # Cambios desde un token de sincronización (sincronizacion.py)
+            models.Index(fields=['actualizado_en', 'id'], name='socio_actualizado_idx'),
+        ]
 
     def __str__(self):
         return f"{self.usuario.nombres} {self.usuario.apellidos}"
@@ -586,13 +598,26 @@ class Parcela(models.Model):
         ],
         help_text='Longitud en grados decimales'
     )
+    geohash = models.CharField(
+        max_length=12,
+        blank=True,
+        null=True,
+        editable=False,
+        db_index=True,
+        help_text='Geohash de latitud/longitud para búsquedas por cercanía'
+    )
     estado = models.CharField(max_length=20, choices=ESTADOS, default='ACTIVA')
     creado_en = models.DateTimeField(default=timezone.now)
+    actualizado_en = models.DateTimeField(auto_now=True)
 
     class Meta:
         db_table = 'parcela'
         verbose_name = 'Parcela'
         verbose_name_plural = 'Parcelas'
+        indexes = [
+            models.Index(fields=['latitud', 'longitud']),
+            models.Index(fields=['actualizado_en', 'id'], name='parcela_actualizado_idx'),
+        ]
 
     def __str__(self):
         return f"{self.nombre or 'Parcela'} - {self.socio}"
@@ -609,6 +634,10 @@ class Parcela(models.Model):
 
     def save(self, *args, **kwargs):
         self.full_clean()  # Ejecutar validaciones antes de guardar
+        self.geohash = codificar_geohash(self.latitud, self.longitud)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'latitud', 'longitud'} & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'geohash'}
         super().save(*args, **kwargs)
 
 
@@ -655,11 +684,15 @@ class Cultivo(models.Model):
     )
     estado = models.CharField(max_length=20, choices=ESTADOS, default='ACTIVO')
     creado_en = models.DateTimeField(default=timezone.now)
+    actualizado_en = models.DateTimeField(auto_now=True)
 
     class Meta:
         db_table = 'cultivo'
         verbose_name = 'Cultivo'
         verbose_name_plural = 'Cultivos'
+        indexes = [
+            models.Index(fields=['actualizado_en', 'id'], name='cultivo_actualizado_idx'),
+        ]
 
     def __str__(self):
         return f"{self.especie} - {self.parcela}"
@@ -998,6 +1031,55 @@ class AnalisisSuelo(models.Model):
         return recomendaciones
 
 
+class ProductividadParcela(models.Model):
+    """
+    CU4/T046: Tabla de hechos de productividad por parcela × especie × temporada.
+    Se mantiene desde cooperativa.productividad (señales + refresco programado).
+    """
+    parcela = models.ForeignKey(Parcela, on_delete=models.CASCADE, related_name='productividad')
+    especie = models.CharField(max_length=100)
+    temporada = models.CharField(max_length=10, help_text='Gestión agrícola, p. ej. 2024-I o 2024-II')
+    superficie_hectareas = models.DecimalField(max_digits=10, decimal_places=2)
+    total_cosechado = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    num_ciclos = models.PositiveIntegerField(default=0)
+    num_cosechas = models.PositiveIntegerField(default=0)
+    num_cosechas_completadas = models.PositiveIntegerField(default=0)
+    num_cosechas_pendientes = models.PositiveIntegerField(default=0)
+    rendimiento_por_hectarea = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    actualizado_en = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'productividad_parcela'
+        verbose_name = 'Productividad de Parcela'
+        verbose_name_plural = 'Productividad de Parcelas'
+        unique_together = ['parcela', 'especie', 'temporada']
+        indexes = [
+            models.Index(fields=['especie', 'temporada']),
+            models.Index(fields=['-rendimiento_por_hectarea']),
+        ]
+
+    def __str__(self):
+        return f"{self.parcela_id} - {self.especie} - {self.temporada}"
+
+
+class ResumenTratamientoMensual(models.Model):
+    """CU4/T046: Conteo precalculado de tratamientos por mes y tipo"""
+    mes = models.DateField(help_text='Primer día del mes')
+    tipo_tratamiento = models.CharField(max_length=20, choices=Tratamiento.TIPOS_TRATAMIENTO)
+    cantidad = models.PositiveIntegerField(default=0)
+    actualizado_en = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'resumen_tratamiento_mensual'
+        verbose_name = 'Resumen Mensual de Tratamientos'
+        verbose_name_plural = 'Resúmenes Mensuales de Tratamientos'
+        unique_together = ['mes', 'tipo_tratamiento']
+        ordering = ['mes', 'tipo_tratamiento']
+
+    def __str__(self):
+        return f"{self.mes:%Y-%m} - {self.tipo_tratamiento}: {self.cantidad}"
+
+
 class TransferenciaParcela(models.Model):
     """CU4: Modelo para transferencias de parcelas entre socios"""
     ESTADOS = [
@@ -1063,7 +1145,8 @@ class TransferenciaParcela(models.Model):
             raise ValidationError('El socio anterior no es el propietario actual de la parcela')
 
     def save(self, *args, **kwargs):
-        # Actualizar el propietario de la parcela
+        # Actualizar el propietario de la parcela; las señales de Parcela
+        # reasignan sus productos cosechados y registran las lápidas
         self.parcela.socio = self.socio_nuevo
         self.parcela.save()
         super().save(*args, **kwargs)
@@ -1224,6 +1307,11 @@ class Semilla(models.Model):
         verbose_name_plural = 'Semillas'
         ordering = ['-creado_en']
         unique_together = ('especie', 'variedad', 'lote')
+        indexes = [
+            # Vencimiento masivo y próximas a vencer
+            models.Index(fields=['estado', 'fecha_vencimiento'], name='semilla_estado_vencim_idx'),
+            models.Index(fields=['actualizado_en', 'id'], name='semilla_actualizado_idx'),
+        ]
 
     def __str__(self):
         variedad_str = f" - {self.variedad}" if self.variedad else ""
@@ -1413,6 +1501,10 @@ class Pesticida(models.Model):
         verbose_name = 'Pesticida'
         verbose_name_plural = 'Pesticidas'
         ordering = ['-creado_en']
+        indexes = [
+            models.Index(fields=['estado', 'fecha_vencimiento'], name='pesticida_estado_vencim_idx'),
+            models.Index(fields=['actualizado_en', 'id'], name='pesticida_actualizado_idx'),
+        ]
 
     def __str__(self):
         return f"{self.nombre_comercial} - {self.ingrediente_activo} (Lote: {self.lote})"
@@ -1591,6 +1683,10 @@ class Fertilizante(models.Model):
         verbose_name = 'Fertilizante'
         verbose_name_plural = 'Fertilizantes'
         ordering = ['-creado_en']
+        indexes = [
+            models.Index(fields=['estado', 'fecha_vencimiento'], name='fertiliz_estado_vencim_idx'),
+            models.Index(fields=['actualizado_en', 'id'], name='fertiliz_actualizado_idx'),
+        ]
 
     def __str__(self):
         return f"{self.nombre_comercial} - {self.composicion_npk} (Lote: {self.lote})"
@@ -1650,8 +1746,13 @@ class Fertilizante(models.Model):
 
     def get_npk_values(self):
         """Extrae valores N, P, K de la composición"""
+        return self.valores_npk(self.composicion_npk)
+
+    @staticmethod
+    def valores_npk(composicion_npk):
+        """{'N', 'P', 'K'} de una composición 'N-P-K' (None si no se puede leer)"""
         try:
-            partes = self.composicion_npk.split('-')
+            partes = composicion_npk.split('-')
             n = int(partes[0]) if partes[0] != '' else 0
             p = int(partes[1]) if partes[1] != '' else 0
             k = int(partes[2].split('+')[0]) if partes[2] != '' else 0
@@ -1660,6 +1761,47 @@ class Fertilizante(models.Model):
             return None
 
 
+class InsumoCatalogo(models.Model):
+    """
+    CU7/CU8: Catálogo unificado de insumos (semillas, pesticidas y fertilizantes)
+    Una fila por insumo, mantenida desde cooperativa.catalogo_insumos
+    (señales + reconstrucción con `python manage.py reconstruir_catalogo_insumos`).
+    """
+    TIPOS_INSUMO = [
+        ('SEMILLA', 'Semilla'),
+        ('PESTICIDA', 'Pesticida'),
+        ('FERTILIZANTE', 'Fertilizante'),
+    ]
+
+    tipo_insumo = models.CharField(max_length=20, choices=TIPOS_INSUMO)
+    insumo_id = models.PositiveIntegerField(help_text='id en la tabla del tipo de insumo')
+    nombre = models.CharField(max_length=255, help_text='Nombre para mostrar')
+    texto_busqueda = models.TextField(help_text='Campos buscables en minúsculas y sin acentos')
+    cantidad = models.DecimalField(max_digits=10, decimal_places=2)
+    unidad_medida = models.CharField(max_length=20)
+    precio_unitario = models.DecimalField(max_digits=10, decimal_places=2, blank=True, null=True)
+    fecha_vencimiento = models.DateField(blank=True, null=True)
+    estado = models.CharField(max_length=20)
+    lote = models.CharField(max_length=50, blank=True, null=True)
+    proveedor = models.CharField(max_length=100, blank=True, null=True)
+    actualizado_en = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'insumo_catalogo'
+        verbose_name = 'Insumo (catálogo)'
+        verbose_name_plural = 'Catálogo de Insumos'
+        ordering = ['nombre', 'tipo_insumo', 'insumo_id']
+        unique_together = ['tipo_insumo', 'insumo_id']
+        indexes = [
+            models.Index(fields=['estado', 'tipo_insumo'], name='insumo_cat_estado_tipo_idx'),
+            models.Index(fields=['nombre'], name='insumo_cat_nombre_idx'),
+            models.Index(fields=['fecha_vencimiento'], name='insumo_cat_vencim_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.get_tipo_insumo_display()}: {self.nombre}"
+
+
 # ============================================================================
 # CU9: GESTIÓN DE campaniaS AGRÍCOLAS
 # T036: Gestión de campanias (crear, editar, eliminar)
@@ -2048,6 +2190,9 @@ class Labor(models.Model):
         verbose_name = 'Labor Agrícola'
         verbose_name_plural = 'Labores Agrícolas'
         ordering = ['-fecha_labor']
+        indexes = [
+            models.Index(fields=['actualizado_en', 'id'], name='labor_actualizado_idx'),
+        ]
 
     def __str__(self):
         return f"{self.labor} - {self.fecha_labor}"
@@ -2173,6 +2318,25 @@ class ProductoCosechado(models.Model):
         related_name='productos_cosechados',
         help_text='Parcela de donde proviene el producto (opcional)'
     )
+
+    # Socio propietario desnormalizado (ver asignar_socio); evita recorrer
+    # parcela/campania/cultivo al listar y filtrar por socio
+    socio = models.ForeignKey(
+        Socio,
+        on_delete=models.SET_NULL,
+        blank=True,
+        null=True,
+        editable=False,
+        related_name='productos_cosechados',
+        help_text='Socio propietario (derivado de parcela, campania o cultivo)'
+    )
+    socio_nombre = models.CharField(
+        max_length=255,
+        blank=True,
+        default='',
+        editable=False,
+        help_text='Nombre completo del socio propietario'
+    )
     
     # Campos de auditoría
     observaciones = models.TextField(
@@ -2193,6 +2357,10 @@ class ProductoCosechado(models.Model):
             models.Index(fields=['fecha_cosecha']),
             models.Index(fields=['estado']),
             models.Index(fields=['lote']),
+            # Productos por vencer / vencimiento masivo
+            models.Index(fields=['estado', 'fecha_cosecha'], name='producto_estado_cosecha_idx'),
+            # Productos de un socio en el orden del listado
+            models.Index(fields=['socio', '-fecha_cosecha'], name='producto_socio_cosecha_idx'),
         ]
 
     def __str__(self):
@@ -2257,8 +2425,87 @@ class ProductoCosechado(models.Model):
     def save(self, *args, **kwargs):
         """Método save personalizado con validaciones"""
         self.full_clean()  # Ejecutar validaciones antes de guardar
+        self.asignar_socio()
+        if kwargs.get('update_fields') is not None:
+            kwargs['update_fields'] = {*kwargs['update_fields'], 'socio', 'socio_nombre'}
         super().save(*args, **kwargs)
 
+    def propietario(self):
+        """
+        Socio propietario: el de la parcela; si es de una campania, su socio
+        asignado más reciente; si la campania no tiene socios, el del cultivo.
+        """
+        if self.parcela_id:
+            return self.parcela.socio
+        if self.campania_id:
+            asignacion = self.campania.socios_asignados.select_related('socio').first()
+            if asignacion:
+                return asignacion.socio
+        if self.cultivo_id:
+            return self.cultivo.parcela.socio
+        return None
+
+    def asignar_socio(self):
+        """Actualiza socio y socio_nombre (sin guardar)"""
+        socio = self.propietario()
+        self.socio = socio
+        self.socio_nombre = socio.usuario.get_full_name() if socio else ''
+
+    @classmethod
+    def asignar_socios(cls, productos):
+        """
+        asignar_socio() para muchos productos (sin guardar) con una consulta
+        por origen en lugar de recorrer las relaciones de cada uno.
+        """
+        parcelas = {p.parcela_id for p in productos if p.parcela_id}
+        campanias = {p.campania_id for p in productos if not p.parcela_id and p.campania_id}
+        cultivos = {p.cultivo_id for p in productos if not p.parcela_id and p.cultivo_id}
+
+        socio_por_parcela = {
+            parcela.id: parcela.socio
+            for parcela in Parcela.objects.filter(id__in=parcelas).select_related('socio__usuario')
+        }
+        # Socio asignado más reciente por campania (el primero en este orden)
+        socio_por_campania = {}
+        for asignacion in CampaignPartner.objects.filter(campaign_id__in=campanias).select_related(
+            'socio__usuario'
+        ).order_by('campaign_id', '-fecha_asignacion'):
+            socio_por_campania.setdefault(asignacion.campaign_id, asignacion.socio)
+        socio_por_cultivo = {
+            cultivo.id: cultivo.parcela.socio
+            for cultivo in Cultivo.objects.filter(id__in=cultivos).select_related('parcela__socio__usuario')
+        }
+
+        for producto in productos:
+            if producto.parcela_id:
+                socio = socio_por_parcela.get(producto.parcela_id)
+            else:
+                socio = socio_por_campania.get(producto.campania_id) or socio_por_cultivo.get(producto.cultivo_id)
+            producto.socio = socio
+            producto.socio_nombre = socio.usuario.get_full_name() if socio else ''
+
+    @classmethod
+    def reasignar_socio(cls, queryset):
+        """
+        Recalcula el propietario de los productos del queryset (transferencia
+        de parcela, cambios en los socios de una campania).
+
+        Returns:
+            int: productos cuyo propietario cambió
+        """
+        productos = list(queryset)
+        anteriores = [(producto.socio_id, producto.socio_nombre) for producto in productos]
+        cls.asignar_socios(productos)
+        cambiados = [
+            producto for producto, anterior in zip(productos, anteriores)
+            if (producto.socio_id, producto.socio_nombre) != anterior
+        ]
+        if cambiados:
+            from . import versiones
+            cls.objects.bulk_update(cambiados, ['socio', 'socio_nombre'], batch_size=500)
+            versiones.incrementar(cls)
+        return len(cambiados)
+
     # Propiedades calculadas
     @property
     def origen_display(self):
@@ -2700,6 +2947,12 @@ class Pago(models.Model):
         null=True,
         help_text='ID del Cliente en Stripe'
     )
+    stripe_payment_method_id = models.CharField(
+        max_length=200,
+        blank=True,
+        null=True,
+        help_text='Método de pago de Stripe (para reintentar el cobro)'
+    )
 
     # Información adicional
     referencia_bancaria = models.CharField(
@@ -2775,49 +3028,13 @@ class Pago(models.Model):
 
     def procesar_pago_stripe(self, payment_method_id):
         """
-        Procesar pago con Stripe
-        Nota: Requiere configuración de Stripe en settings.py
+        Agenda el cobro con Stripe fuera del request (ver pagos_stripe).
+        El pago debe estar guardado en PROCESANDO; el estado final llega
+        por el worker o por el webhook.
         """
-        try:
-            import stripe
-            from django.conf import settings
-            
-            stripe.api_key = settings.STRIPE_SECRET_KEY
-
-            # Crear Payment Intent
-            payment_intent = stripe.PaymentIntent.create(
-                amount=int(self.monto * 100),  # Stripe usa centavos
-                currency='bob',  # Bolivianos
-                payment_method=payment_method_id,
-                confirm=True,
-                description=f'Pedido {self.pedido.numero_pedido}',
-                metadata={
-                    'pedido_id': str(self.pedido.id),
-                    'pedido_numero': self.pedido.numero_pedido,
-                }
-            )
+        from .pagos_stripe import encolar_pago
 
-            # Guardar información de Stripe
-            self.stripe_payment_intent_id = payment_intent.id
-            if payment_intent.charges.data:
-                self.stripe_charge_id = payment_intent.charges.data[0].id
-            
-            # Actualizar estado según respuesta
-            if payment_intent.status == 'succeeded':
-                self.estado = 'COMPLETADO'
-            elif payment_intent.status == 'processing':
-                self.estado = 'PROCESANDO'
-            else:
-                self.estado = 'FALLIDO'
-
-            self.save()
-            return True, payment_intent
-
-        except Exception as e:
-            self.estado = 'FALLIDO'
-            self.observaciones = f"Error al procesar pago: {str(e)}"
-            self.save()
-            return False, str(e)
+        encolar_pago(self, payment_method_id)
 
     def reembolsar(self, razon=None):
         """
@@ -3321,6 +3538,15 @@ class DetallePedidoInsumo(models.Model):
     
     def save(self, *args, **kwargs):
         """Calcular subtotal y guardar snapshot del insumo"""
+        self.completar_snapshot()
+        
+        super().save(*args, **kwargs)
+        
+        # Actualizar totales del pedido
+        self.pedido_insumo.calcular_totales()
+    
+    def completar_snapshot(self):
+        """Subtotal y snapshot del insumo (también para bulk_create, que no llama a save)"""
         # Calcular subtotal
         self.subtotal = self.cantidad * self.precio_unitario
         
@@ -3338,11 +3564,6 @@ class DetallePedidoInsumo(models.Model):
                 self.insumo_nombre = self.fertilizante.nombre_comercial
                 self.insumo_descripcion = f"NPK: {self.fertilizante.composicion_npk or 'N/A'}"
                 self.unidad_medida = self.fertilizante.unidad_medida
-        
-        super().save(*args, **kwargs)
-        
-        # Actualizar totales del pedido
-        self.pedido_insumo.calcular_totales()
 
 
 class PagoInsumo(models.Model):
@@ -3612,4 +3833,75 @@ class PaymentMethod(models.Model):
     @classmethod
     def obtener_por_tipo(cls, tipo):
         """Método de clase para obtener métodos por tipo"""
-        return cls.objects.filter(tipo=tipo, activo=True).order_by('orden', 'nombre')
\ No newline at end of file
+        return cls.objects.filter(tipo=tipo, activo=True).order_by('orden', 'nombre')
+
+
+# ============================================================================
+# CU1: SINCRONIZACIÓN INCREMENTAL (web/móvil)
+# ============================================================================
+
+class RegistroEliminado(models.Model):
+    """
+    Lápida de un registro sincronizable (sincronizacion.py) eliminado o que
+    dejó de ser visible para un socio (p. ej. parcela transferida). Los
+    dispositivos la reciben en el feed de cambios y borran su copia local.
+    """
+    tabla = models.CharField(max_length=30, help_text='Nombre de la tabla en el feed (socios, parcelas...)')
+    objeto_id = models.PositiveIntegerField()
+    socio = models.ForeignKey(
+        Socio,
+        on_delete=models.CASCADE,
+        blank=True,
+        null=True,
+        help_text='Solo para los dispositivos de este socio (vacío: para todos)'
+    )
+    eliminado_en = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'registro_eliminado'
+        verbose_name = 'Registro eliminado'
+        verbose_name_plural = 'Registros eliminados'
+        indexes = [
+            models.Index(fields=['eliminado_en', 'id'], name='registro_elim_fecha_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.tabla}#{self.objeto_id} ({self.eliminado_en:%Y-%m-%d %H:%M})"
+
+
+# ============================================================================
+# CU10/CU15: CARGA OFFLINE (app móvil)
+# ============================================================================
+
+class CargaOffline(models.Model):
+    """
+    Registro creado desde la carga por lotes de la app móvil (carga_offline.py).
+    El id generado en el dispositivo hace idempotente el reenvío de un lote.
+    """
+    TIPOS = [
+        ('labor', 'Labor'),
+        ('cosecha', 'Cosecha'),
+        ('producto_cosechado', 'Producto cosechado'),
+    ]
+
+    usuario = models.ForeignKey(Usuario, on_delete=models.CASCADE, related_name='cargas_offline')
+    id_cliente = models.CharField(max_length=64, help_text='Identificador generado en el dispositivo')
+    tipo = models.CharField(max_length=20, choices=TIPOS)
+    objeto_id = models.PositiveIntegerField()
+    creado_en = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        db_table = 'carga_offline'
+        verbose_name = 'Carga offline'
+        verbose_name_plural = 'Cargas offline'
+        constraints = [
+            models.UniqueConstraint(fields=['usuario', 'id_cliente'], name='carga_offline_cliente_unico'),
+        ]
+
+    def __str__(self):
+        return f"{self.tipo}#{self.objeto_id} ({self.id_cliente})"
+
+
+# Las señales se registran aquí porque el paquete cooperativa/apps/ oculta
+# cooperativa/apps.py y CooperativaConfig.ready() nunca se ejecuta.
+from . import signals  # noqa: E402,F401
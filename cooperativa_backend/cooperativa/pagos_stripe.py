@@ -0,0 +1,243 @@
+"""
+Pagos con Stripe fuera del request
+
+Flujo:
+1. La vista crea el Pago en PROCESANDO y llama a encolar_pago(); la llamada
+   a Stripe se agenda con transaction.on_commit en un pool de hilos
+   (STRIPE_PAGOS_ASINCRONOS=False la ejecuta en el mismo hilo, p. ej. tests).
+2. procesar_pago() crea el PaymentIntent con una idempotency key derivada
+   del pago: reintentos (de red, del worker o de reconciliar_pagos_stripe)
+   nunca generan un segundo cobro.
+3. El resultado final llega por el webhook firmado (/api/pagos/stripe/webhook/)
+   y se aplica con aplicar_estado_intent(); si Stripe ya responde con un
+   estado final al crear el intent se aplica igual. Ambos caminos son
+   idempotentes, el orden en que lleguen no importa.
+
+STRIPE_API_BASE permite apuntar el SDK a un servidor local
+(cooperativa.stripe_local) en desarrollo y tests.
+"""
+
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from .models import Pago, BitacoraAuditoria
+
+
+logger = logging.getLogger('cooperativa.pagos')
+
+_executor_pagos = None
+
+# Estado del PaymentIntent -> estado del Pago
+ESTADOS_INTENT = {
+    'succeeded': 'COMPLETADO',
+    'processing': 'PROCESANDO',
+    'requires_action': 'PROCESANDO',
+    'requires_confirmation': 'PROCESANDO',
+    'requires_capture': 'PROCESANDO',
+    'requires_payment_method': 'FALLIDO',
+    'canceled': 'CANCELADO',
+}
+# Estados del Pago que la reconciliación puede sobrescribir. FALLIDO solo
+# pasa a COMPLETADO: un error de red puede marcar fallido un cobro que sí se hizo.
+ESTADOS_RECONCILIABLES = ('PROCESANDO', 'FALLIDO')
+
+REINTENTOS_RED = 3
+
+
+def cliente_stripe():
+    import stripe
+
+    stripe.api_key = settings.STRIPE_SECRET_KEY
+    stripe.api_base = getattr(settings, 'STRIPE_API_BASE', '') or stripe.DEFAULT_API_BASE
+    return stripe
+
+
+def clave_idempotencia(pago):
+    return f"pago-{pago.pk}-{pago.creado_en.strftime('%Y%m%d%H%M%S%f')}"
+
+
+def encolar_pago(pago, payment_method_id):
+    """Agenda el cobro del pago (ya guardado en PROCESANDO) al confirmar la transacción"""
+    Pago.objects.filter(pk=pago.pk).update(stripe_payment_method_id=payment_method_id)
+    pago.stripe_payment_method_id = payment_method_id
+    transaction.on_commit(lambda: _despachar(pago.pk))
+
+
+def _despachar(pago_id):
+    if not getattr(settings, 'STRIPE_PAGOS_ASINCRONOS', True):
+        procesar_pago(pago_id)
+        return
+
+    global _executor_pagos
+    if _executor_pagos is None:
+        _executor_pagos = ThreadPoolExecutor(
+            max_workers=getattr(settings, 'STRIPE_HILOS', 4), thread_name_prefix='stripe'
+        )
+    _executor_pagos.submit(_procesar_en_hilo, pago_id)
+
+
+def _procesar_en_hilo(pago_id):
+    try:
+        procesar_pago(pago_id)
+    except Exception:
+        logger.exception('pago_stripe_error', extra={'pago': pago_id})
+    finally:
+        close_old_connections()
+
+
+def procesar_pago(pago_id):
+    """
+    Crea y confirma el PaymentIntent del pago. Solo actúa sobre pagos en
+    PROCESANDO sin intent registrado, por lo que puede repetirse sin riesgo.
+
+    Returns:
+        str: estado del pago al terminar, o None si no había nada que hacer
+    """
+    pago = Pago.objects.select_related('pedido').filter(
+        pk=pago_id, estado='PROCESANDO', stripe_payment_intent_id__isnull=True
+    ).first()
+    if pago is None:
+        return None
+
+    stripe = cliente_stripe()
+    for intento in range(1, REINTENTOS_RED + 1):
+        try:
+            intent = stripe.PaymentIntent.create(
+                amount=int(pago.monto * 100),  # Stripe usa centavos
+                currency='bob',
+                payment_method=pago.stripe_payment_method_id,
+                confirm=True,
+                automatic_payment_methods={'enabled': True, 'allow_redirects': 'never'},
+                description=f'Pedido {pago.pedido.numero_pedido}',
+                metadata={
+                    'pago_id': str(pago.pk),
+                    'pedido_id': str(pago.pedido_id),
+                    'pedido_numero': pago.pedido.numero_pedido,
+                },
+                idempotency_key=clave_idempotencia(pago),
+            )
+            break
+        except stripe.error.CardError as e:
+            intent_error = getattr(e.error, 'payment_intent', None)
+            if intent_error and intent_error.get('id'):
+                Pago.objects.filter(pk=pago.pk).update(stripe_payment_intent_id=intent_error['id'])
+            return _finalizar(pago.pk, 'FALLIDO', observaciones=f'Tarjeta rechazada: {e.user_message or e}')
+        except (stripe.error.APIConnectionError, stripe.error.RateLimitError) as e:
+            if intento == REINTENTOS_RED:
+                # Queda en PROCESANDO: el webhook o reconciliar_pagos_stripe lo resuelven
+                logger.warning('pago_stripe_sin_respuesta', extra={'pago': pago.pk, 'error': str(e)})
+                return 'PROCESANDO'
+            time.sleep(0.5 * 2 ** (intento - 1))
+        except stripe.error.StripeError as e:
+            return _finalizar(pago.pk, 'FALLIDO', observaciones=f'Error al procesar pago: {e.user_message or e}')
+
+    Pago.objects.filter(pk=pago.pk).update(stripe_payment_intent_id=intent.id, actualizado_en=timezone.now())
+    return aplicar_estado_intent(intent, origen='api')
+
+
+def aplicar_estado_intent(intent, origen='webhook'):
+    """
+    Lleva el Pago al estado que corresponde al PaymentIntent. Idempotente:
+    si el pago ya está en ese estado o en uno terminal no reconciliable
+    (COMPLETADO, REEMBOLSADO, CANCELADO) no hace nada.
+
+    Returns:
+        str: estado del pago, o None si el intent no corresponde a ningún pago
+    """
+    metadata = intent.get('metadata') or {}
+    filtro = {'pk': metadata['pago_id']} if metadata.get('pago_id') else {'stripe_payment_intent_id': intent['id']}
+
+    with transaction.atomic():
+        pago = Pago.objects.select_for_update().filter(**filtro).first()
+        if pago is None:
+            logger.warning('pago_stripe_desconocido', extra={'intent': intent['id'], 'origen': origen})
+            return None
+
+        nuevo_estado = ESTADOS_INTENT.get(intent['status'], 'PROCESANDO')
+        if pago.estado == nuevo_estado or pago.estado not in ESTADOS_RECONCILIABLES:
+            return pago.estado
+        if pago.estado == 'FALLIDO' and nuevo_estado != 'COMPLETADO':
+            return pago.estado
+
+        estado_anterior = pago.estado
+        pago.estado = nuevo_estado
+        pago.stripe_payment_intent_id = intent['id']
+        if intent.get('latest_charge'):
+            pago.stripe_charge_id = intent['latest_charge']
+        if nuevo_estado == 'FALLIDO':
+            error = intent.get('last_payment_error') or {}
+            pago.observaciones = f"Error al procesar pago: {error.get('message', intent['status'])}"
+        # save() completa el pedido si el pago cubre el total
+        pago.save()
+        _registrar(pago, estado_anterior, origen)
+    return pago.estado
+
+
+def _finalizar(pago_id, estado, observaciones):
+    with transaction.atomic():
+        pago = Pago.objects.select_for_update().get(pk=pago_id)
+        if pago.estado not in ESTADOS_RECONCILIABLES or pago.estado == estado:
+            return pago.estado
+        estado_anterior = pago.estado
+        pago.estado = estado
+        pago.observaciones = observaciones
+        pago.save()
+        _registrar(pago, estado_anterior, 'api')
+    return estado
+
+
+def _registrar(pago, estado_anterior, origen):
+    BitacoraAuditoria.objects.create(
+        usuario=None,
+        accion='PAGO_STRIPE_' + pago.estado,
+        tabla_afectada='Pago',
+        registro_id=pago.pk,
+        detalles={
+            'estado_anterior': estado_anterior,
+            'nuevo_estado': pago.estado,
+            'payment_intent': pago.stripe_payment_intent_id,
+            'origen': origen,
+        },
+        ip_address=None,
+        user_agent='stripe',
+    )
+
+
+def procesar_evento(evento):
+    """
+    Aplica un evento del webhook ya verificado.
+
+    Returns:
+        bool: True si el evento se procesó, False si se ignora
+    """
+    if not evento['type'].startswith('payment_intent.'):
+        return False
+    return aplicar_estado_intent(evento['data']['object'], origen=f"webhook:{evento['type']}") is not None
+
+
+def reconciliar_pendientes(antiguedad_minutos=15):
+    """
+    Pagos que siguen en PROCESANDO después de `antiguedad_minutos`: con intent
+    se consulta su estado en Stripe; sin intent se reintenta el cobro (misma
+    idempotency key, sin doble cobro).
+    """
+    limite = timezone.now() - timedelta(minutes=antiguedad_minutos)
+    pendientes = Pago.objects.filter(
+        metodo_pago='STRIPE', estado='PROCESANDO', actualizado_en__lt=limite
+    ).values_list('pk', 'stripe_payment_intent_id')
+
+    stripe = cliente_stripe()
+    resultado = {}
+    for pago_id, intent_id in pendientes:
+        if intent_id:
+            estado = aplicar_estado_intent(stripe.PaymentIntent.retrieve(intent_id), origen='reconciliacion')
+        else:
+            estado = procesar_pago(pago_id)
+        resultado[pago_id] = estado
+    return resultado
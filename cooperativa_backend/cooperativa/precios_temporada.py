@@ -0,0 +1,168 @@
+"""
+CU8: Precios de insumos por temporada
+
+El precio de un insumo en una fecha sale del PrecioTemporada activo del
+insumo cuyo rango [fecha_inicio, fecha_fin] contiene la fecha (si se
+solapan, el que empieza más tarde, como el orden del modelo), con precio de
+mayoreo según la cantidad (obtener_precio). Sin precio de temporada se usa
+el precio_unitario del insumo.
+
+Los precios activos se cargan en un índice en memoria, una lista de
+intervalos ordenada por fecha_inicio por insumo, y se buscan por bisección:
+cotizar un carrito de N líneas no hace consultas de precios, solo una por
+tipo de insumo para los insumos. El índice se reconstruye (una consulta)
+cuando cambia la versión de la tabla PrecioTemporada (versiones.py), que
+renuevan las señales al confirmar y las escrituras masivas; con varios
+procesos cada uno reconstruye el suyo al ver la versión nueva en la caché
+compartida.
+"""
+
+import threading
+from bisect import bisect_right
+from collections import defaultdict
+from dataclasses import dataclass
+from decimal import Decimal
+
+from django.utils import timezone
+
+from . import versiones
+from .catalogo_insumos import FUENTES, NOMBRES
+from .models import PrecioTemporada
+
+
+CAMPOS_INDICE = (
+    'tipo_insumo', 'semilla', 'pesticida', 'fertilizante', 'temporada', 'fecha_inicio', 'fecha_fin',
+    'precio_venta', 'precio_mayoreo', 'cantidad_minima_mayoreo', 'activo',
+)
+
+
+class Intervalos:
+    """Precios de un insumo ordenados por fecha_inicio"""
+
+    def __init__(self, precios):
+        self.precios = precios
+        self.inicios = [precio.fecha_inicio for precio in precios]
+        # fecha_fin máxima hasta cada posición: corta la búsqueda hacia atrás
+        self.fines = []
+        for precio in precios:
+            self.fines.append(max(precio.fecha_fin, self.fines[-1]) if self.fines else precio.fecha_fin)
+
+    def buscar(self, fecha):
+        """Precio vigente en la fecha o None"""
+        i = bisect_right(self.inicios, fecha)
+        while i and self.fines[i - 1] >= fecha:
+            i -= 1
+            if self.precios[i].fecha_fin >= fecha:
+                return self.precios[i]
+        return None
+
+
+class IndicePrecios:
+    """Intervalos de precios activos por (tipo_insumo, insumo_id)"""
+
+    def __init__(self, version):
+        self.version = version
+        por_insumo = defaultdict(list)
+        precios = PrecioTemporada.objects.filter(activo=True).only(*CAMPOS_INDICE).order_by('fecha_inicio', 'id')
+        for precio in precios.iterator():
+            insumo_id = getattr(precio, f'{precio.tipo_insumo.lower()}_id', None)
+            if insumo_id is not None:
+                por_insumo[(precio.tipo_insumo, insumo_id)].append(precio)
+        self.intervalos = {clave: Intervalos(lista) for clave, lista in por_insumo.items()}
+
+    def buscar(self, tipo_insumo, insumo_id, fecha):
+        intervalos = self.intervalos.get((tipo_insumo, insumo_id))
+        return intervalos.buscar(fecha) if intervalos else None
+
+
+_indice = None
+_bloqueo = threading.Lock()
+
+
+def indice():
+    """Índice de precios al día con la versión de la tabla"""
+    global _indice
+    # La versión se lee antes de consultar: un cambio que confirme durante la
+    # reconstrucción deja otra versión y el siguiente llamado reconstruye
+    version, = versiones.versiones(PrecioTemporada)
+    actual = _indice
+    if actual is None or actual.version != version:
+        with _bloqueo:
+            actual = _indice
+            if actual is None or actual.version != version:
+                actual = _indice = IndicePrecios(version)
+    return actual
+
+
+@dataclass
+class LineaCotizada:
+    tipo_insumo: str
+    insumo: object
+    cantidad: Decimal
+    precio_unitario: Decimal
+    precio_temporada: PrecioTemporada = None
+
+    @property
+    def temporada(self):
+        return self.precio_temporada.temporada if self.precio_temporada else None
+
+    @property
+    def subtotal(self):
+        return self.cantidad * self.precio_unitario
+
+    @property
+    def nombre(self):
+        # Mismo nombre para mostrar que el catálogo unificado
+        partes = (getattr(self.insumo, campo) for campo in NOMBRES[self.tipo_insumo])
+        return ' - '.join(str(valor) for valor in partes if valor)
+
+    def como_dict(self):
+        return {
+            'tipo_insumo': self.tipo_insumo,
+            'insumo_id': self.insumo.pk,
+            'insumo_nombre': self.nombre,
+            'cantidad': self.cantidad,
+            'precio_unitario': self.precio_unitario,
+            'subtotal': self.subtotal,
+            'temporada_aplicada': self.temporada,
+            'precio_temporada_id': self.precio_temporada.pk if self.precio_temporada else None,
+            'mayoreo': bool(self.precio_temporada) and self.precio_unitario != self.precio_temporada.precio_venta,
+        }
+
+
+def cargar_insumos(claves):
+    """{(tipo_insumo, id): insumo} con una consulta por tipo de insumo"""
+    ids = defaultdict(set)
+    for tipo_insumo, insumo_id in claves:
+        ids[tipo_insumo].add(insumo_id)
+    return {
+        (tipo_insumo, insumo.pk): insumo
+        for tipo_insumo, pendientes in ids.items()
+        for insumo in FUENTES[tipo_insumo].objects.filter(pk__in=pendientes)
+    }
+
+
+def cotizar(lineas, fecha=None):
+    """
+    Cotiza líneas (tipo_insumo, insumo_id, cantidad) en la fecha (hoy por
+    defecto). Devuelve una LineaCotizada por línea (precio_unitario None si
+    el insumo no tiene precio) o None si el insumo no existe.
+    """
+    lineas = list(lineas)
+    fecha = fecha or timezone.localdate()
+    insumos = cargar_insumos((tipo_insumo, insumo_id) for tipo_insumo, insumo_id, _ in lineas)
+    precios = indice()
+
+    cotizadas = []
+    for tipo_insumo, insumo_id, cantidad in lineas:
+        insumo = insumos.get((tipo_insumo, insumo_id))
+        if insumo is None:
+            cotizadas.append(None)
+            continue
+        precio_temporada = precios.buscar(tipo_insumo, insumo_id, fecha)
+        if precio_temporada is not None:
+            precio_unitario = precio_temporada.obtener_precio(cantidad)
+        else:
+            precio_unitario = insumo.precio_unitario
+        cotizadas.append(LineaCotizada(tipo_insumo, insumo, cantidad, precio_unitario, precio_temporada))
+    return cotizadas
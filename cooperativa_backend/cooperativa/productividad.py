@@ -0,0 +1,179 @@
+"""
+CU4: Agregados de productividad para reportes
+T046: Reportes de productividad
+
+Los reportes leen de ProductividadParcela y ResumenTratamientoMensual en
+lugar de recorrer cosechas y tratamientos en cada request. Las tablas se
+actualizan de forma incremental (solo la parcela o el mes afectado) desde
+cooperativa.signals y se reconstruyen completas con el comando programado
+`python manage.py refrescar_productividad`, que corrige cualquier desvío.
+"""
+
+from django.db import transaction
+from django.db.models import Case, Count, IntegerField, Max, Q, Sum, Value, When
+from django.db.models.functions import ExtractYear, TruncMonth
+from django.utils import timezone
+
+from . import versiones
+from .models import Cosecha, Tratamiento, ProductividadParcela, ResumenTratamientoMensual
+
+
+CAMPOS_PRODUCTIVIDAD = [
+    'superficie_hectareas', 'total_cosechado', 'num_ciclos', 'num_cosechas',
+    'num_cosechas_completadas', 'num_cosechas_pendientes', 'rendimiento_por_hectarea', 'actualizado_en',
+]
+
+
+def temporada_de(fecha):
+    """Gestión agrícola semestral: enero-junio = 'AAAA-I', julio-diciembre = 'AAAA-II'"""
+    return f"{fecha.year}-{'I' if fecha.month <= 6 else 'II'}"
+
+
+def _temporada(anio, semestre):
+    return f"{anio}-{'I' if semestre == 1 else 'II'}"
+
+
+def recalcular_parcelas(parcela_ids=None):
+    """
+    Recalcula las filas de productividad de las parcelas indicadas
+    (todas si parcela_ids es None) con una sola consulta agregada.
+
+    Returns:
+        int: filas escritas
+    """
+    cosechas = Cosecha.objects.all()
+    existentes = ProductividadParcela.objects.all()
+    if parcela_ids is not None:
+        parcela_ids = list(parcela_ids)
+        cosechas = cosechas.filter(ciclo_cultivo__cultivo__parcela_id__in=parcela_ids)
+        existentes = existentes.filter(parcela_id__in=parcela_ids)
+
+    agregados = cosechas.annotate(
+        anio=ExtractYear('fecha_cosecha'),
+        semestre=Case(
+            When(fecha_cosecha__month__lte=6, then=Value(1)),
+            default=Value(2),
+            output_field=IntegerField()
+        ),
+    ).values(
+        'ciclo_cultivo__cultivo__parcela_id', 'ciclo_cultivo__cultivo__especie', 'anio', 'semestre'
+    ).annotate(
+        total=Sum('cantidad_cosechada'),
+        ciclos=Count('ciclo_cultivo', distinct=True),
+        cosechas=Count('id'),
+        completadas=Count('id', filter=Q(estado='COMPLETADA')),
+        pendientes=Count('id', filter=Q(estado='PENDIENTE')),
+        superficie=Max('ciclo_cultivo__cultivo__parcela__superficie_hectareas'),
+    ).order_by()
+
+    ahora = timezone.now()
+    filas = []
+    for fila in agregados:
+        superficie = fila['superficie'] or 0
+        total = fila['total'] or 0
+        filas.append(ProductividadParcela(
+            parcela_id=fila['ciclo_cultivo__cultivo__parcela_id'],
+            especie=fila['ciclo_cultivo__cultivo__especie'],
+            temporada=_temporada(fila['anio'], fila['semestre']),
+            superficie_hectareas=superficie,
+            total_cosechado=total,
+            num_ciclos=fila['ciclos'],
+            num_cosechas=fila['cosechas'],
+            num_cosechas_completadas=fila['completadas'],
+            num_cosechas_pendientes=fila['pendientes'],
+            rendimiento_por_hectarea=round(total / superficie, 2) if superficie > 0 else 0,
+            actualizado_en=ahora,
+        ))
+
+    with transaction.atomic():
+        # Upsert: dos recálculos concurrentes de la misma parcela no chocan
+        # con unique_together como al borrar e insertar
+        ProductividadParcela.objects.bulk_create(
+            filas, batch_size=1000, update_conflicts=True,
+            unique_fields=['parcela', 'especie', 'temporada'], update_fields=CAMPOS_PRODUCTIVIDAD,
+        )
+        # Lo que no se reescribió ya no tiene cosechas
+        existentes.filter(actualizado_en__lt=ahora).delete()
+        versiones.incrementar(ProductividadParcela)
+    return len(filas)
+
+
+def recalcular_tratamientos(meses=None):
+    """
+    Recalcula el conteo mensual de tratamientos para los meses indicados
+    (fechas de cualquier día del mes; todos si meses es None).
+
+    Returns:
+        int: filas escritas
+    """
+    tratamientos = Tratamiento.objects.all()
+    existentes = ResumenTratamientoMensual.objects.all()
+    if meses is not None:
+        meses = {fecha.replace(day=1) for fecha in meses if fecha}
+        condicion = Q()
+        for mes in meses:
+            condicion |= Q(fecha_aplicacion__year=mes.year, fecha_aplicacion__month=mes.month)
+        tratamientos = tratamientos.filter(condicion) if meses else tratamientos.none()
+        existentes = existentes.filter(mes__in=meses)
+
+    agregados = tratamientos.annotate(
+        mes=TruncMonth('fecha_aplicacion')
+    ).values('mes', 'tipo_tratamiento').annotate(total=Count('id')).order_by()
+
+    ahora = timezone.now()
+    filas = [
+        ResumenTratamientoMensual(
+            mes=fila['mes'], tipo_tratamiento=fila['tipo_tratamiento'],
+            cantidad=fila['total'], actualizado_en=ahora
+        )
+        for fila in agregados
+    ]
+
+    with transaction.atomic():
+        ResumenTratamientoMensual.objects.bulk_create(
+            filas, batch_size=1000, update_conflicts=True,
+            unique_fields=['mes', 'tipo_tratamiento'], update_fields=['cantidad', 'actualizado_en'],
+        )
+        existentes.filter(actualizado_en__lt=ahora).delete()
+        versiones.incrementar(ResumenTratamientoMensual)
+    return len(filas)
+
+
+def refrescar_todo():
+    """Reconstrucción completa (job nocturno)"""
+    return {
+        'productividad': recalcular_parcelas(),
+        'tratamientos': recalcular_tratamientos(),
+    }
+
+
+def asegurar_inicializado():
+    """Primera carga si el job aún no corrió y ya hay datos de origen"""
+    if not ProductividadParcela.objects.exists() and Cosecha.objects.exists():
+        recalcular_parcelas()
+    if not ResumenTratamientoMensual.objects.exists() and Tratamiento.objects.exists():
+        recalcular_tratamientos()
+
+
+def fecha_actualizacion():
+    """Momento del último cálculo reflejado en las tablas (as_of del reporte)"""
+    fechas = [
+        ProductividadParcela.objects.aggregate(m=Max('actualizado_en'))['m'],
+        ResumenTratamientoMensual.objects.aggregate(m=Max('actualizado_en'))['m'],
+    ]
+    fechas = [fecha for fecha in fechas if fecha]
+    return max(fechas) if fechas else None
+
+
+def programar_parcelas(*parcela_ids):
+    """Recalcula las parcelas cuando la transacción actual se confirme"""
+    parcela_ids = {parcela_id for parcela_id in parcela_ids if parcela_id}
+    if parcela_ids:
+        transaction.on_commit(lambda: recalcular_parcelas(parcela_ids))
+
+
+def programar_meses(*fechas):
+    """Recalcula los meses afectados cuando la transacción actual se confirme"""
+    fechas = [fecha for fecha in fechas if fecha]
+    if fechas:
+        transaction.on_commit(lambda: recalcular_tratamientos(fechas))
@@ -0,0 +1,114 @@
+"""
+Renderizado y parseo JSON con orjson
+
+ORJSONRenderer produce el mismo JSON que el JSONRenderer de DRF (mismo
+formato de fechas, Decimal, UUID, escape de U+2028/U+2029), pero
+serializa en Rust: en los listados grandes el tiempo de render baja a una
+fracción. Los tipos que orjson no conoce pasan por `por_defecto`, que
+replica el JSONEncoder de DRF:
+
+- datetime: isoformat con "Z" para UTC (orjson no lo trunca ni lo
+  redondea: se usa PASSTHROUGH_DATETIME para conservar el formato DRF);
+- Decimal: float, como DRF cuando COERCE_DECIMAL_TO_STRING está apagado
+  (con el valor por defecto los serializers ya entregan strings);
+- timedelta: segundos totales como string.
+
+Si orjson no está instalado, o no puede con los datos (enteros de más de
+64 bits, claves no soportadas), se recurre al JSONRenderer estándar.
+ORJSONParser es el parser equivalente para los cuerpos JSON.
+`python manage.py benchmark_renderizado` compara ambos renderers.
+"""
+
+import datetime
+import decimal
+import uuid
+
+from django.db.models.query import QuerySet
+from django.utils.encoding import force_str
+from django.utils.functional import Promise
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - dependencia opcional
+    orjson = None
+
+
+def por_defecto(obj):
+    """Tipos no nativos de orjson, con el mismo resultado que el JSONEncoder de DRF"""
+    if isinstance(obj, Promise):
+        return force_str(obj)
+    if isinstance(obj, datetime.datetime):
+        texto = obj.isoformat()
+        return texto[:-6] + 'Z' if texto.endswith('+00:00') else texto
+    if isinstance(obj, datetime.time):
+        if obj.utcoffset() is not None:
+            raise ValueError("JSON can't represent timezone-aware times.")
+        return obj.isoformat()
+    if isinstance(obj, datetime.date):
+        return obj.isoformat()
+    if isinstance(obj, datetime.timedelta):
+        return str(obj.total_seconds())
+    if isinstance(obj, decimal.Decimal):
+        return float(obj)
+    if isinstance(obj, uuid.UUID):
+        return str(obj)
+    if isinstance(obj, QuerySet):
+        return tuple(obj)
+    if isinstance(obj, bytes):
+        return obj.decode()
+    if hasattr(obj, 'tolist'):
+        return obj.tolist()
+    if hasattr(obj, '__getitem__'):
+        try:
+            return dict(obj)
+        except (TypeError, ValueError):
+            pass
+    if hasattr(obj, '__iter__'):
+        return tuple(obj)
+    raise TypeError(f'Type is not JSON serializable: {type(obj).__name__}')
+
+
+class ORJSONRenderer(JSONRenderer):
+    """JSONRenderer de DRF sobre orjson (mismo media type y formato)"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        # ensure_ascii y allow_nan no existen en orjson: se usa el camino estándar
+        if orjson is None or self.ensure_ascii or not self.strict:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        opciones = orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        if self.get_indent(accepted_media_type, renderer_context or {}) is not None:
+            # orjson solo indenta con 2 espacios
+            opciones |= orjson.OPT_INDENT_2
+        try:
+            contenido = orjson.dumps(data, default=por_defecto, option=opciones)
+        except orjson.JSONEncodeError:
+            return super().render(data, accepted_media_type, renderer_context)
+
+        # Igual que DRF: JSON que también sea un subconjunto estricto de JavaScript
+        if b'\xe2\x80\xa8' in contenido or b'\xe2\x80\xa9' in contenido:
+            contenido = contenido.replace(b'\xe2\x80\xa8', b'\\u2028').replace(b'\xe2\x80\xa9', b'\\u2029')
+        return contenido
+
+
+class ORJSONParser(JSONParser):
+    """JSONParser de DRF sobre orjson"""
+    renderer_class = ORJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        if orjson is None:
+            return super().parse(stream, media_type, parser_context)
+
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', 'utf-8').lower()
+        if encoding.replace('-', '') != 'utf8':
+            return super().parse(stream, media_type, parser_context)
+        try:
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError(f'JSON parse error - {exc}')
@@ -0,0 +1,155 @@
+"""
+Lecturas en una réplica de la base de datos
+
+Con DATABASE_REPLICA_URL configurada settings agrega el alias 'replica'
+(REPLICA_ALIAS) y RouterReplica envía allí las lecturas de:
+
+- los requests GET/HEAD/OPTIONS (ReplicaMiddleware),
+- cualquier bloque `with en_replica():`.
+
+Las vistas cuyo resultado se guarda con la versión de tabla (ETag de
+@condicional, caché de @reporte_cacheado) leen de la primaria: la versión
+se renueva al confirmar en la primaria, y un resultado leído de la réplica
+atrasada quedaría guardado con la versión nueva.
+
+Las escrituras van siempre a la primaria y, desde la primera escritura, el
+resto del contexto (request, bloque) también lee de la primaria. Un request
+que escribió deja además la cookie REPLICA_COOKIE durante
+REPLICA_FIJAR_SEGUNDOS: los requests siguientes del mismo cliente leen de
+la primaria hasta que la réplica alcanza sus escrituras. Dentro de una
+transacción no se lee de la réplica, y las vistas que no toleran retraso
+(p. ej. el feed de sincronización, cuyo token depende del reloj) se marcan
+con @leer_de_primaria.
+
+Sin réplica configurada el router no interviene.
+
+Para probarlo en local con dos SQLite: copiar db.sqlite3 a replica.sqlite3
+y arrancar con DATABASE_REPLICA_URL=sqlite:///replica.sqlite3. Los GET leen
+la copia (no ve lo que se escriba después) salvo durante los segundos que
+siguen a una escritura del mismo navegador. Con Postgres, cualquier réplica
+por streaming o una segunda base restaurada de un volcado.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+REPLICA_COOKIE = 'leer_primaria'
+METODOS_LECTURA = ('GET', 'HEAD', 'OPTIONS')
+
+
+@dataclass
+class ContextoLectura:
+    replica: bool = False
+    escribio: bool = False
+
+
+_contexto = ContextVar('contexto_replica', default=None)
+
+
+def alias_replica():
+    """Alias de la réplica o None si no hay una configurada"""
+    return getattr(settings, 'REPLICA_ALIAS', None)
+
+
+def _en_transaccion():
+    # Los atomic con los que TestCase envuelve cada test no cuentan
+    return any(
+        not bloque._from_testcase for bloque in connections[DEFAULT_DB_ALIAS].atomic_blocks
+    )
+
+
+@contextmanager
+def _usar(replica):
+    anterior = _contexto.get()
+    contexto = ContextoLectura(replica=replica, escribio=bool(anterior and anterior.escribio))
+    token = _contexto.set(contexto)
+    try:
+        yield contexto
+    finally:
+        _contexto.reset(token)
+        # Lo escrito en el bloque también fija el contexto exterior
+        if anterior is not None and contexto.escribio:
+            anterior.escribio = True
+
+
+def en_replica():
+    """Las lecturas del bloque van a la réplica (hasta que escriba)"""
+    return _usar(True)
+
+
+def en_primaria():
+    """Las lecturas del bloque van a la primaria"""
+    return _usar(False)
+
+
+def leer_de_primaria(vista):
+    """Decorador para vistas GET que no toleran el retraso de la réplica"""
+    @wraps(vista)
+    def envoltura(*args, **kwargs):
+        with en_primaria():
+            return vista(*args, **kwargs)
+    return envoltura
+
+
+class RouterReplica:
+    """DATABASE_ROUTERS: lecturas a la réplica según el contexto actual"""
+
+    def db_for_read(self, model, **hints):
+        alias = alias_replica()
+        if alias is None:
+            return None
+        contexto = _contexto.get()
+        if contexto is None or not contexto.replica or contexto.escribio or _en_transaccion():
+            # Explícito: si no, Django usaría la base de la instancia de las
+            # hints (una leída antes de la réplica)
+            return DEFAULT_DB_ALIAS
+        return alias
+
+    def db_for_write(self, model, **hints):
+        contexto = _contexto.get()
+        if contexto is not None:
+            contexto.escribio = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # Primaria y réplica tienen los mismos datos
+        return True
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # La réplica recibe el esquema por replicación
+        if db == alias_replica():
+            return False
+        return None
+
+
+class ReplicaMiddleware:
+    """
+    Lecturas de los requests GET/HEAD/OPTIONS en la réplica; fija al cliente
+    en la primaria durante REPLICA_FIJAR_SEGUNDOS después de escribir.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if alias_replica() is None:
+            return self.get_response(request)
+
+        lectura = request.method in METODOS_LECTURA and REPLICA_COOKIE not in request.COOKIES
+        with _usar(lectura) as contexto:
+            respuesta = self.get_response(request)
+        if contexto.escribio:
+            respuesta.set_cookie(
+                REPLICA_COOKIE, '1',
+                max_age=getattr(settings, 'REPLICA_FIJAR_SEGUNDOS', 10),
+                httponly=True,
+                secure=settings.SESSION_COOKIE_SECURE,
+                samesite=settings.SESSION_COOKIE_SAMESITE,
+            )
+        return respuesta
@@ -6,7 +6,7 @@ T052: Reporte de producción por parcela
 """
 
 from django.db.models import Sum, Avg, Count, Q, F, DecimalField, ExpressionWrapper
-from django.db.models.functions import Coalesce
+from django.db.models.functions import Coalesce, TruncMonth
 from decimal import Decimal
 from datetime import datetime, date
 from .models import (
@@ -114,8 +114,8 @@ class CampaignReports:
         )['total'] or 0
 
         # Labores por mes
-        labors_by_month = tratamientos_query.extra(
-            select={'mes': "DATE_TRUNC('month', fecha_aplicacion)"}
+        labors_by_month = tratamientos_query.annotate(
+            mes=TruncMonth('fecha_aplicacion')
         ).values('mes').annotate(
             count=Count('id')
         ).order_by('mes')
@@ -1,5 +1,8 @@
+from decimal import Decimal
+
 from rest_framework import serializers
 from django.core.exceptions import ValidationError
+from django.db.models import Prefetch
 from django.utils import timezone
 from django.core.validators import MinValueValidator
 from .models import (
@@ -9,8 +12,11 @@ from .models import (
     Semilla, Pesticida, Fertilizante,
     Campaign, CampaignPartner, CampaignPlot, Labor, ProductoCosechado,
     Pedido, DetallePedido, Pago,
-    PrecioTemporada, PedidoInsumo, DetallePedidoInsumo, PagoInsumo, PaymentMethod
+    PrecioTemporada, PedidoInsumo, DetallePedidoInsumo, PagoInsumo, PaymentMethod,
+    InsumoCatalogo
 )
+from .campos_dinamicos import CamposDinamicosSerializerMixin, Expansion
+from . import precios_temporada
 
 
 class RolSerializer(serializers.ModelSerializer):
@@ -31,6 +37,9 @@ class RolSerializer(serializers.ModelSerializer):
 
     def get_usuarios_count(self, obj):
         """Retorna el número de usuarios con este rol"""
+        # Anotado en los listados (RolViewSet, buscar_roles_avanzado)
+        if hasattr(obj, 'usuarios_count'):
+            return obj.usuarios_count
         return UsuarioRol.objects.filter(rol=obj).count()
 
     def validate_permisos(self, value):
@@ -99,9 +108,19 @@ class UsuarioSerializer(serializers.ModelSerializer):
             'contrasena_hash': {'write_only': True},
             'token_actual': {'write_only': True},
         }
+        # Lo que leen los campos calculados (campos_dinamicos.py)
+        dependencias = {
+            'roles': ['usuariorol_set'],
+            'nombre_completo': ['nombres', 'apellidos'],
+            'edad': ['socio__fecha_nacimiento'],
+        }
 
     def get_roles(self, obj):
-        roles = UsuarioRol.objects.filter(usuario=obj).select_related('rol')
+        # Precargados en los listados (UsuarioViewSet, SocioViewSet)
+        if 'usuariorol_set' in getattr(obj, '_prefetched_objects_cache', {}):
+            roles = obj.usuariorol_set.all()
+        else:
+            roles = UsuarioRol.objects.filter(usuario=obj).select_related('rol')
         return [usuario_rol.rol.nombre for usuario_rol in roles]
 
     def get_nombre_completo(self, obj):
@@ -110,7 +129,8 @@ class UsuarioSerializer(serializers.ModelSerializer):
     def get_edad(self, obj):
         # Calcular edad si hay fecha de nacimiento en socio relacionado
         try:
-            socio = Socio.objects.get(usuario=obj)
+            # obj.socio usa el select_related de los listados si lo hay
+            socio = obj.socio
             if socio.fecha_nacimiento:
                 from datetime import date
                 today = date.today()
@@ -252,7 +272,7 @@ class ComunidadSerializer(serializers.ModelSerializer):
         return value
 
 
-class SocioSerializer(serializers.ModelSerializer):
+class SocioSerializer(CamposDinamicosSerializerMixin, serializers.ModelSerializer):
     usuario = UsuarioSerializer(read_only=True)
     comunidad = ComunidadSerializer(read_only=True)
     edad = serializers.SerializerMethodField()
@@ -264,6 +284,10 @@ class SocioSerializer(serializers.ModelSerializer):
             'fecha_nacimiento', 'sexo', 'direccion', 'comunidad',
             'estado', 'creado_en', 'edad'
         ]
+        dependencias = {'edad': ['fecha_nacimiento']}
+        expandibles = {
+            'parcelas': Expansion('ParcelaSerializer', 'parcela_set', source='parcela_set', many=True),
+        }
 
     def get_edad(self, obj):
         """Calcular edad del socio"""
@@ -407,7 +431,7 @@ class SocioUpdateSerializer(serializers.ModelSerializer):
         return value
 
 
-class ParcelaSerializer(serializers.ModelSerializer):
+class ParcelaSerializer(CamposDinamicosSerializerMixin, serializers.ModelSerializer):
     socio_nombre = serializers.CharField(source='socio.usuario.get_full_name', read_only=True)
     # Campos adicionales para compatibilidad con frontend
     superficie = serializers.DecimalField(
@@ -424,7 +448,7 @@ class ParcelaSerializer(serializers.ModelSerializer):
         model = Parcela
         fields = [
             'id', 'socio', 'socio_nombre', 'nombre', 'superficie_hectareas',
-            'tipo_suelo', 'ubicacion', 'latitud', 'longitud', 'estado', 'creado_en',
+            'tipo_suelo', 'ubicacion', 'latitud', 'longitud', 'geohash', 'estado', 'creado_en',
             # Campos adicionales para compatibilidad
             'superficie', 'coordenadas', 'descripcion'
         ]
@@ -433,6 +457,18 @@ class ParcelaSerializer(serializers.ModelSerializer):
             'latitud': {'required': False},
             'longitud': {'required': False},
         }
+        # Los campos de compatibilidad se agregan en to_representation
+        dependencias = {
+            'superficie': ['superficie_hectareas'],
+            'coordenadas': ['latitud', 'longitud'],
+            'descripcion': ['ubicacion', 'nombre'],
+        }
+        expandibles = {
+            'socio': Expansion(
+                SocioSerializer, 'socio__usuario', 'socio__comunidad',
+                Prefetch('socio__usuario__usuariorol_set', queryset=UsuarioRol.objects.select_related('rol')),
+            ),
+        }
 
     def validate_superficie(self, value):
         """T021: Validación de superficie"""
@@ -515,17 +551,20 @@ class ParcelaSerializer(serializers.ModelSerializer):
     def to_representation(self, instance):
         """Convertir campos del modelo a formato del frontend"""
         data = super().to_representation(instance)
+        # Con ?fields= solo los campos de compatibilidad pedidos
+        campos = self.fields
 
         # Agregar campo 'superficie' para compatibilidad
-        if instance.superficie_hectareas:
+        if 'superficie' in campos and instance.superficie_hectareas:
             data['superficie'] = instance.superficie_hectareas
 
         # Agregar campo 'coordenadas' para compatibilidad
-        if instance.latitud and instance.longitud:
+        if 'coordenadas' in campos and instance.latitud and instance.longitud:
             data['coordenadas'] = f"{instance.latitud}, {instance.longitud}"
 
         # Agregar campo 'descripcion' para compatibilidad
-        data['descripcion'] = instance.ubicacion or instance.nombre or ''
+        if 'descripcion' in campos:
+            data['descripcion'] = instance.ubicacion or instance.nombre or ''
 
         return data
 
@@ -680,8 +719,9 @@ class CicloCultivoSerializer(serializers.ModelSerializer):
         model = CicloCultivo
         fields = [
             'id', 'cultivo', 'cultivo_especie', 'parcela_nombre', 'socio_nombre',
-            'fecha_inicio', 'fecha_fin_estimada', 'fecha_fin_real',
-            'estado', 'observaciones', 'creado_en'
+            'fecha_inicio', 'fecha_estimada_fin', 'fecha_fin_real',
+            'estado', 'observaciones', 'costo_estimado', 'costo_real',
+            'rendimiento_esperado', 'rendimiento_real', 'unidad_rendimiento', 'creado_en'
         ]
 
     def validate_fecha_inicio(self, value):
@@ -694,11 +734,11 @@ class CicloCultivoSerializer(serializers.ModelSerializer):
     def validate(self, data):
         """Validaciones entre campos"""
         fecha_inicio = data.get('fecha_inicio')
-        fecha_fin_estimada = data.get('fecha_fin_estimada')
+        fecha_estimada_fin = data.get('fecha_estimada_fin')
 
-        if fecha_inicio and fecha_fin_estimada and fecha_fin_estimada <= fecha_inicio:
+        if fecha_inicio and fecha_estimada_fin and fecha_estimada_fin <= fecha_inicio:
             raise serializers.ValidationError({
-                'fecha_fin_estimada': 'La fecha de fin estimada debe ser posterior a la fecha de inicio'
+                'fecha_estimada_fin': 'La fecha de fin estimada debe ser posterior a la fecha de inicio'
             })
 
         return data
@@ -742,15 +782,15 @@ class TratamientoSerializer(serializers.ModelSerializer):
         model = Tratamiento
         fields = [
             'id', 'ciclo_cultivo', 'ciclo_cultivo_especie', 'parcela_nombre', 'socio_nombre',
-            'tipo_tratamiento', 'producto_utilizado', 'cantidad_aplicada',
-            'unidad_medida', 'fecha_aplicacion', 'responsable_aplicacion',
+            'tipo_tratamiento', 'nombre_producto', 'dosis',
+            'unidad_dosis', 'fecha_aplicacion', 'costo', 'aplicado_por',
             'observaciones', 'creado_en'
         ]
 
-    def validate_cantidad_aplicada(self, value):
-        """Validación de cantidad aplicada"""
+    def validate_dosis(self, value):
+        """Validación de dosis aplicada"""
         if value <= 0:
-            raise serializers.ValidationError('La cantidad aplicada debe ser mayor a 0')
+            raise serializers.ValidationError('La dosis debe ser mayor a 0')
         return value
 
     def validate_fecha_aplicacion(self, value):
@@ -772,7 +812,7 @@ class AnalisisSueloSerializer(serializers.ModelSerializer):
             'id', 'parcela', 'parcela_nombre', 'socio_nombre',
             'fecha_analisis', 'tipo_analisis', 'ph', 'materia_organica',
             'nitrogeno', 'fosforo', 'potasio', 'laboratorio',
-            'responsable_analisis', 'observaciones', 'creado_en'
+            'recomendaciones', 'costo_analisis', 'creado_en'
         ]
 
     def validate_ph(self, value):
@@ -1077,7 +1117,7 @@ class CampaignPlotSerializer(serializers.ModelSerializer):
         return data
 
 
-class CampaignSerializer(serializers.ModelSerializer):
+class CampaignSerializer(CamposDinamicosSerializerMixin, serializers.ModelSerializer):
     """
     CU9: Serializer principal para Campaign
     T036: Gestión de campanias (crear, editar, eliminar)
@@ -1115,6 +1155,15 @@ class CampaignSerializer(serializers.ModelSerializer):
             'total_socios', 'total_parcelas', 'total_superficie'
         ]
         read_only_fields = ['creado_en', 'actualizado_en']
+        dependencias = {
+            'duracion_dias': ['fecha_inicio', 'fecha_fin'],
+            'dias_restantes': ['estado', 'fecha_fin'],
+            'progreso_temporal': ['estado', 'fecha_inicio', 'fecha_fin'],
+            'puede_eliminar': [],
+            'total_socios': ['socios_asignados'],
+            'total_parcelas': ['parcelas'],
+            'total_superficie': [],
+        }
 
     def get_duracion_dias(self, obj):
         return obj.duracion_dias()
@@ -1212,7 +1261,7 @@ class CampaignSerializer(serializers.ModelSerializer):
             })
 
 
-class CampaignListSerializer(serializers.ModelSerializer):
+class CampaignListSerializer(CamposDinamicosSerializerMixin, serializers.ModelSerializer):
     """
     CU9: Serializer simplificado para listados de campanias (sin relaciones anidadas)
     T036: Optimización de consultas para listados
@@ -1229,6 +1278,15 @@ class CampaignListSerializer(serializers.ModelSerializer):
             'unidad_meta', 'estado', 'responsable_nombre', 'duracion_dias',
             'total_socios', 'total_parcelas', 'creado_en'
         ]
+        dependencias = {
+            'duracion_dias': ['fecha_inicio', 'fecha_fin'],
+            'total_socios': ['socios_asignados'],
+            'total_parcelas': ['parcelas'],
+        }
+        expandibles = {
+            'socios_asignados': Expansion(CampaignPartnerSerializer, 'socios_asignados__socio__usuario', many=True),
+            'parcelas': Expansion(CampaignPlotSerializer, 'parcelas__parcela__socio__usuario', many=True),
+        }
 
     def get_duracion_dias(self, obj):
         return obj.duracion_dias()
@@ -1390,24 +1448,16 @@ class ProductoCosechadoSerializer(serializers.ModelSerializer):
             'cultivo', 'cultivo_especie', 'cultivo_variedad',
             'labor', 'labor_nombre',
             'estado', 'lote', 'ubicacion_almacen',
-            'campania', 'campania_nombre', 'parcela', 'parcela_nombre', 'socio_nombre',
+            'campania', 'campania_nombre', 'parcela', 'parcela_nombre', 'socio', 'socio_nombre',
             'observaciones', 'creado_en', 'actualizado_en',
             # Campos calculados
             'origen_display', 'dias_en_almacen', 'esta_proximo_vencer', 'puede_vender'
         ]
-        read_only_fields = ['creado_en', 'actualizado_en']
+        read_only_fields = ['socio', 'creado_en', 'actualizado_en']
 
     def get_socio_nombre(self, obj):
-        """Obtener el nombre del socio desde cultivo o parcela"""
-        if obj.parcela:
-            return obj.parcela.socio.usuario.get_full_name()
-        elif obj.campania and obj.campania.socios_asignados.exists():
-            # Intentar obtener el socio de la campania
-            socio_campania = obj.campania.socios_asignados.first()
-            return socio_campania.socio.usuario.get_full_name()
-        elif obj.cultivo:
-            return obj.cultivo.parcela.socio.usuario.get_full_name()
-        return "No asignado"
+        """Nombre del socio propietario (desnormalizado, ver ProductoCosechado.asignar_socio)"""
+        return obj.socio_nombre or "No asignado"
 
     def get_origen_display(self, obj):
         return obj.origen_display
@@ -1555,15 +1605,8 @@ class ProductoCosechadoListSerializer(serializers.ModelSerializer):
         return obj.origen_display
 
     def get_socio_nombre(self, obj):
-        """Obtener el nombre del socio desde cultivo o parcela"""
-        if obj.parcela:
-            return obj.parcela.socio.usuario.get_full_name()
-        elif obj.campania and obj.campania.socios_asignados.exists():
-            socio_campania = obj.campania.socios_asignados.first()
-            return socio_campania.socio.usuario.get_full_name()
-        elif obj.cultivo:
-            return obj.cultivo.parcela.socio.usuario.get_full_name()
-        return "No asignado"
+        """Nombre del socio propietario (desnormalizado, ver ProductoCosechado.asignar_socio)"""
+        return obj.socio_nombre or "No asignado"
 
 
 class ProductoCosechadoVenderSerializer(serializers.Serializer):
@@ -1658,7 +1701,7 @@ class DetallePedidoSerializer(serializers.ModelSerializer):
         return value
 
 
-class PedidoSerializer(serializers.ModelSerializer):
+class PedidoSerializer(CamposDinamicosSerializerMixin, serializers.ModelSerializer):
     """Serializer principal para Pedido"""
     items = DetallePedidoSerializer(many=True, read_only=True)
     socio_nombre = serializers.CharField(
@@ -1688,6 +1731,17 @@ class PedidoSerializer(serializers.ModelSerializer):
             'numero_pedido', 'total', 'creado_en', 'actualizado_en',
             'total_pagado', 'saldo_pendiente', 'estado_pago'
         ]
+        dependencias = {
+            'total_pagado': [],
+            'saldo_pendiente': ['total'],
+            'estado_pago': ['total'],
+        }
+        expandibles = {
+            'pagos': Expansion(
+                'PagoSerializer', Prefetch('pagos', queryset=Pago.objects.select_related('procesado_por')),
+                many=True,
+            ),
+        }
 
     def get_total_pagado(self, obj):
         """Calcula el total pagado del pedido"""
@@ -1908,6 +1962,20 @@ class HistorialVentasSerializer(serializers.Serializer):
 # SISTEMA DE VENTAS DE INSUMOS - SERIALIZERS
 # ============================================================
 
+class InsumoCatalogoSerializer(serializers.ModelSerializer):
+    """Serializer para el catálogo unificado de insumos (solo lectura)"""
+    tipo_insumo_display = serializers.CharField(source='get_tipo_insumo_display', read_only=True)
+
+    class Meta:
+        model = InsumoCatalogo
+        fields = [
+            'tipo_insumo', 'tipo_insumo_display', 'insumo_id', 'nombre',
+            'cantidad', 'unidad_medida', 'precio_unitario', 'fecha_vencimiento',
+            'estado', 'lote', 'proveedor', 'actualizado_en'
+        ]
+        read_only_fields = fields
+
+
 class PrecioTemporadaSerializer(serializers.ModelSerializer):
     """Serializer para PrecioTemporada"""
     semilla_detalle = serializers.SerializerMethodField()
@@ -1970,7 +2038,7 @@ class DetallePedidoInsumoSerializer(serializers.ModelSerializer):
             'semilla', 'pesticida', 'fertilizante',
             'insumo_nombre', 'insumo_descripcion',
             'cantidad', 'unidad_medida', 'precio_unitario', 'subtotal',
-            'temporada_aplicada', 'creado_en', 'actualizado_en'
+            'temporada_aplicada', 'creado_en'
         ]
         read_only_fields = ['insumo_nombre', 'insumo_descripcion', 'subtotal']
 
@@ -2036,9 +2104,86 @@ class PedidoInsumoSerializer(serializers.ModelSerializer):
         return None
 
 
+class LineaCotizacionSerializer(serializers.Serializer):
+    """Línea de un carrito de insumos a cotizar"""
+    tipo_insumo = serializers.ChoiceField(choices=PrecioTemporada.TIPO_INSUMO)
+    insumo_id = serializers.IntegerField(min_value=1)
+    cantidad = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=Decimal('0.01'))
+
+
+def _cotizar_items(items, fecha=None):
+    """
+    Precios de las líneas (dicts con tipo_insumo, insumo_id y cantidad) con
+    el índice de precios_temporada: una consulta por tipo de insumo, ninguna
+    por línea. Los errores se devuelven por línea, como los de many=True.
+    """
+    lineas = precios_temporada.cotizar(
+        ((item['tipo_insumo'], item['insumo_id'], item['cantidad']) for item in items), fecha
+    )
+    errores = []
+    for linea in lineas:
+        if linea is None:
+            errores.append({'insumo_id': ['El insumo no existe']})
+        elif linea.precio_unitario is None:
+            errores.append({'insumo_id': ['El insumo no tiene precio de venta ni precio de temporada vigente']})
+        else:
+            errores.append({})
+    if any(errores):
+        raise serializers.ValidationError(errores)
+    return lineas
+
+
+class CotizacionInsumosSerializer(serializers.Serializer):
+    """CU8: Cotización de un carrito de insumos con los precios por temporada"""
+    fecha = serializers.DateField(required=False, help_text='Fecha de los precios (hoy por defecto)')
+    items = LineaCotizacionSerializer(many=True, allow_empty=False)
+
+    def validate(self, data):
+        try:
+            data['lineas'] = _cotizar_items(data['items'], data.get('fecha'))
+        except serializers.ValidationError as error:
+            raise serializers.ValidationError({'items': error.detail})
+        return data
+
+
+class DetallePedidoInsumoCreateSerializer(serializers.Serializer):
+    """
+    Item de un pedido nuevo: el precio unitario y la temporada aplicada los
+    resuelve el servidor (PedidoInsumoCreateSerializer), no el cliente.
+    """
+    tipo_insumo = serializers.ChoiceField(choices=DetallePedidoInsumo.TIPO_INSUMO)
+    semilla = serializers.IntegerField(required=False, allow_null=True)
+    pesticida = serializers.IntegerField(required=False, allow_null=True)
+    fertilizante = serializers.IntegerField(required=False, allow_null=True)
+    cantidad = serializers.DecimalField(max_digits=10, decimal_places=2, min_value=Decimal('0.01'))
+
+    FALTA_INSUMO = {
+        'semilla': 'Debe especificar una semilla',
+        'pesticida': 'Debe especificar un pesticida',
+        'fertilizante': 'Debe especificar un fertilizante',
+    }
+
+    def validate(self, data):
+        """Validar que solo se especifique un insumo y que coincida con el tipo"""
+        insumos = [campo for campo in ('semilla', 'pesticida', 'fertilizante') if data.get(campo)]
+        if len(insumos) != 1:
+            raise serializers.ValidationError(
+                'Debe especificar exactamente un insumo (semilla, pesticida o fertilizante)'
+            )
+        campo = data['tipo_insumo'].lower()
+        if insumos[0] != campo:
+            raise serializers.ValidationError(self.FALTA_INSUMO[campo])
+        data['insumo_id'] = data[campo]
+        return data
+
+
 class PedidoInsumoCreateSerializer(serializers.ModelSerializer):
-    """Serializer para crear PedidoInsumo con items"""
-    items = DetallePedidoInsumoSerializer(many=True)
+    """
+    Serializer para crear PedidoInsumo con items. El precio de cada item es
+    el de temporada vigente (o el del insumo), resuelto para todo el pedido
+    con una consulta por tipo de insumo.
+    """
+    items = DetallePedidoInsumoCreateSerializer(many=True)
 
     class Meta:
         model = PedidoInsumo
@@ -2049,20 +2194,35 @@ class PedidoInsumoCreateSerializer(serializers.ModelSerializer):
 
     def create(self, validated_data):
         """Crear pedido con sus items"""
-        items_data = validated_data.pop('items')
+        lineas = validated_data.pop('items')
         pedido = PedidoInsumo.objects.create(**validated_data)
 
-        for item_data in items_data:
-            DetallePedidoInsumo.objects.create(pedido_insumo=pedido, **item_data)
+        detalles = []
+        for linea in lineas:
+            detalle = DetallePedidoInsumo(
+                pedido_insumo=pedido,
+                tipo_insumo=linea.tipo_insumo,
+                cantidad=linea.cantidad,
+                precio_unitario=linea.precio_unitario,
+                temporada_aplicada=linea.temporada,
+                **{linea.tipo_insumo.lower(): linea.insumo},
+            )
+            detalle.completar_snapshot()
+            detalles.append(detalle)
+        DetallePedidoInsumo.objects.bulk_create(detalles)
 
         pedido.calcular_totales()
         return pedido
 
+    def to_representation(self, instance):
+        # La respuesta incluye los precios que resolvió el servidor
+        return PedidoInsumoSerializer(instance, context=self.context).data
+
     def validate_items(self, value):
-        """Validar que haya al menos un item"""
+        """Validar que haya al menos un item y fijar sus precios"""
         if not value or len(value) == 0:
             raise serializers.ValidationError('Debe agregar al menos un item')
-        return value
+        return _cotizar_items(value)
 
 
 class PagoInsumoSerializer(serializers.ModelSerializer):
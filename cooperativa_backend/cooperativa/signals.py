@@ -0,0 +1,191 @@
+"""
+Señales del módulo cooperativa
+
+Se importan al final de models.py (ver comentario allí).
+"""
+
+from django.db.models import Q
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from . import catalogo_insumos, productividad, sincronizacion, versiones
+from .models import (
+    Parcela, Cultivo, CicloCultivo, Cosecha, Tratamiento,
+    PaymentMethod, PrecioTemporada, Semilla, Pesticida, Fertilizante,
+    Usuario, Socio, Comunidad, Rol, UsuarioRol, AnalisisSuelo, Campaign, ProductoCosechado,
+    CampaignPartner, Labor
+)
+
+
+# CU4/T046: mantenimiento incremental de las tablas de productividad
+# ------------------------------------------------------------------
+
+# Camino a la parcela de cada modelo: mover una cosecha, un ciclo o un
+# cultivo cambia la productividad de la parcela anterior y de la nueva
+RUTA_PARCELA = {
+    Cosecha: 'ciclo_cultivo__cultivo__parcela_id',
+    CicloCultivo: 'cultivo__parcela_id',
+    Cultivo: 'parcela_id',
+}
+
+
+def _parcela_de(modelo, pk):
+    return modelo.objects.filter(pk=pk).values_list(RUTA_PARCELA[modelo], flat=True).first()
+
+
+@receiver(pre_save, sender=Cosecha)
+@receiver(pre_save, sender=CicloCultivo)
+@receiver(pre_save, sender=Cultivo)
+def recordar_parcela_productividad(sender, instance, **kwargs):
+    instance._parcela_anterior_id = _parcela_de(sender, instance.pk) if instance.pk else None
+
+
+@receiver(post_save, sender=Cosecha)
+@receiver(post_delete, sender=Cosecha)
+def actualizar_productividad_cosecha(sender, instance, **kwargs):
+    parcela_id = CicloCultivo.objects.filter(pk=instance.ciclo_cultivo_id).values_list(
+        'cultivo__parcela_id', flat=True
+    ).first()
+    productividad.programar_parcelas(parcela_id, getattr(instance, '_parcela_anterior_id', None))
+
+
+@receiver(post_save, sender=Cultivo)
+@receiver(post_save, sender=CicloCultivo)
+def actualizar_productividad_cultivo(sender, instance, created, **kwargs):
+    # Un cultivo o ciclo nuevo no tiene cosechas todavía
+    if created:
+        return
+    if sender is Cultivo:
+        parcela_id = instance.parcela_id
+    else:
+        parcela_id = Cultivo.objects.filter(pk=instance.cultivo_id).values_list('parcela_id', flat=True).first()
+    productividad.programar_parcelas(parcela_id, getattr(instance, '_parcela_anterior_id', None))
+
+
+@receiver(post_save, sender=Parcela)
+def actualizar_productividad_parcela(sender, instance, created, update_fields=None, **kwargs):
+    # Solo la superficie afecta al rendimiento por hectárea
+    if created or (update_fields is not None and 'superficie_hectareas' not in update_fields):
+        return
+    if instance.productividad.exists():
+        productividad.programar_parcelas(instance.pk)
+
+
+@receiver(pre_save, sender=Tratamiento)
+def recordar_mes_tratamiento(sender, instance, **kwargs):
+    instance._fecha_aplicacion_anterior = None
+    if instance.pk:
+        instance._fecha_aplicacion_anterior = Tratamiento.objects.filter(pk=instance.pk).values_list(
+            'fecha_aplicacion', flat=True
+        ).first()
+
+
+@receiver(post_save, sender=Tratamiento)
+@receiver(post_delete, sender=Tratamiento)
+def actualizar_resumen_tratamientos(sender, instance, **kwargs):
+    productividad.programar_meses(
+        instance.fecha_aplicacion, getattr(instance, '_fecha_aplicacion_anterior', None)
+    )
+
+
+# CU15: socio propietario desnormalizado en ProductoCosechado
+# -----------------------------------------------------------
+
+@receiver(post_save, sender=CampaignPartner)
+@receiver(post_delete, sender=CampaignPartner)
+def reasignar_productos_campania(sender, instance, **kwargs):
+    ProductoCosechado.reasignar_socio(ProductoCosechado.objects.filter(
+        campania_id=instance.campaign_id, parcela__isnull=True
+    ))
+
+
+@receiver(pre_save, sender=Parcela)
+def recordar_socio_parcela(sender, instance, update_fields=None, **kwargs):
+    instance._socio_anterior_id = None
+    if instance.pk and (update_fields is None or 'socio' in update_fields):
+        instance._socio_anterior_id = Parcela.objects.filter(pk=instance.pk).values_list(
+            'socio_id', flat=True
+        ).first()
+
+
+@receiver(post_save, sender=Parcela)
+def cambiar_propietario_parcela(sender, instance, created, **kwargs):
+    # Transferencia o PATCH de `socio`: cualquier cambio de propietario
+    anterior = getattr(instance, '_socio_anterior_id', None)
+    if created or anterior is None or anterior == instance.socio_id:
+        return
+    # Productos directos de la parcela o de sus cultivos sin parcela propia
+    ProductoCosechado.reasignar_socio(ProductoCosechado.objects.filter(
+        Q(parcela=instance) | Q(parcela__isnull=True, cultivo__parcela=instance)
+    ))
+    sincronizacion.registrar_transferencia(instance.pk, anterior)
+
+
+@receiver(post_save, sender=Usuario)
+def renombrar_productos_socio(sender, instance, created, update_fields=None, **kwargs):
+    if created or (update_fields is not None and not {'nombres', 'apellidos'} & set(update_fields)):
+        return
+    actualizados = ProductoCosechado.objects.filter(socio__usuario=instance).exclude(
+        socio_nombre=instance.get_full_name()
+    ).update(socio_nombre=instance.get_full_name())
+    if actualizados:
+        versiones.incrementar(ProductoCosechado)
+
+
+# CU7/CU8: catálogo unificado de insumos (catalogo_insumos.py)
+# ------------------------------------------------------------
+
+@receiver(post_save, sender=Semilla)
+@receiver(post_delete, sender=Semilla)
+@receiver(post_save, sender=Pesticida)
+@receiver(post_delete, sender=Pesticida)
+@receiver(post_save, sender=Fertilizante)
+@receiver(post_delete, sender=Fertilizante)
+def actualizar_catalogo_insumos(sender, instance, **kwargs):
+    catalogo_insumos.programar(sender, [instance.pk])
+
+
+# CU1: sincronización incremental (sincronizacion.py)
+# ---------------------------------------------------
+
+@receiver(post_delete, sender=Socio)
+@receiver(post_delete, sender=Parcela)
+@receiver(post_delete, sender=Cultivo)
+@receiver(post_delete, sender=Labor)
+@receiver(post_delete, sender=Semilla)
+@receiver(post_delete, sender=Pesticida)
+@receiver(post_delete, sender=Fertilizante)
+def registrar_eliminado(sender, instance, **kwargs):
+    sincronizacion.registrar_eliminado(sender, instance.pk)
+
+
+@receiver(post_save, sender=Usuario)
+def tocar_socio_sincronizado(sender, instance, created, update_fields=None, **kwargs):
+    # El feed de socios lleva nombres, apellidos y CI del usuario
+    if created or (update_fields is not None and not {'nombres', 'apellidos', 'ci_nit'} & set(update_fields)):
+        return
+    Socio.objects.filter(usuario=instance).update(actualizado_en=timezone.now())
+
+
+# Versiones de tabla (versiones.py): GET condicional de catálogos y caché
+# de reportes (cache_reportes.py). Las escrituras masivas con update() o
+# bulk_create no emiten señales y renuevan la versión explícitamente.
+# ----------------------------------------------------------------------
+
+MODELOS_VERSIONADOS = (
+    # Catálogos
+    PaymentMethod, PrecioTemporada, Semilla, Pesticida, Fertilizante,
+    # Reportes del dashboard
+    Usuario, Socio, Comunidad, Rol, UsuarioRol, Parcela, Cultivo,
+    AnalisisSuelo, Campaign, ProductoCosechado,
+)
+
+
+def renovar_version_tabla(sender, **kwargs):
+    versiones.incrementar(sender)
+
+
+for _modelo in MODELOS_VERSIONADOS:
+    post_save.connect(renovar_version_tabla, sender=_modelo, dispatch_uid=f'version_{_modelo._meta.label_lower}')
+    post_delete.connect(renovar_version_tabla, sender=_modelo, dispatch_uid=f'version_borrado_{_modelo._meta.label_lower}')
@@ -0,0 +1,248 @@
+"""
+CU1: Sincronización incremental para el cliente móvil
+
+En lugar de volver a descargar los listados completos, el dispositivo pide
+"todo lo que cambió desde el token T" (GET /api/sincronizacion/cambios/):
+
+- cada tabla del feed tiene `actualizado_en` indexado junto con el id; el
+  token guarda por tabla el último (actualizado_en, id) entregado y cada
+  lote sigue desde ahí (paginación por clave, sin OFFSET);
+- los borrados quedan como lápidas (RegistroEliminado) que las señales
+  crean al eliminar una fila, o al transferir una parcela para los
+  dispositivos del socio anterior;
+- las filas van como listas con los nombres de columna una sola vez por
+  tabla y lote, y el lote tiene un máximo de filas (`hay_mas` indica que
+  hay que pedir el siguiente con el token nuevo).
+
+Solo se entregan cambios hasta `ahora - SINCRONIZACION_MARGEN_SEGUNDOS`:
+actualizado_en se fija al guardar, no al confirmar, y una transacción aún
+abierta podría confirmar una fila con fecha anterior al token ya emitido.
+Las escrituras masivas (UPDATE directo) deben fijar actualizado_en a mano,
+igual que renuevan la versión de la tabla (versiones.py).
+
+Las lápidas se conservan SINCRONIZACION_RETENCION_DIAS días; un token más
+antiguo se rechaza (410) y el dispositivo hace una sincronización completa
+pidiendo sin token. El cliente aplica primero `eliminados` y luego `filas`.
+"""
+
+import base64
+import binascii
+import json
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Optional
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .identidad import filtrar_por_socio, obtener_identidad
+from .models import Socio, Parcela, Cultivo, Labor, Semilla, Pesticida, Fertilizante, RegistroEliminado
+
+
+VERSION_TOKEN = 1
+ELIMINADOS = '_eliminados'
+EPOCA = datetime(1970, 1, 1, tzinfo=dt_timezone.utc)
+
+
+class TokenInvalido(ValueError):
+    pass
+
+
+class TokenExpirado(TokenInvalido):
+    """El token es anterior a las lápidas conservadas: hace falta una sincronización completa"""
+
+
+@dataclass(frozen=True)
+class Tabla:
+    modelo: type
+    columnas: dict          # nombre en el feed -> ruta ORM
+    socio: Optional[str] = None   # ruta al socio dueño (None: visible para todos)
+
+
+TABLAS = {
+    'socios': Tabla(Socio, {
+        'id': 'id', 'usuario_id': 'usuario_id', 'codigo_interno': 'codigo_interno',
+        'nombres': 'usuario__nombres', 'apellidos': 'usuario__apellidos', 'ci_nit': 'usuario__ci_nit',
+        'comunidad_id': 'comunidad_id', 'sexo': 'sexo', 'fecha_nacimiento': 'fecha_nacimiento',
+        'direccion': 'direccion', 'estado': 'estado',
+    }, socio='usuario__socio'),
+    'parcelas': Tabla(Parcela, {
+        'id': 'id', 'socio_id': 'socio_id', 'nombre': 'nombre', 'superficie_hectareas': 'superficie_hectareas',
+        'tipo_suelo': 'tipo_suelo', 'ubicacion': 'ubicacion', 'latitud': 'latitud', 'longitud': 'longitud',
+        'estado': 'estado',
+    }, socio='socio'),
+    'cultivos': Tabla(Cultivo, {
+        'id': 'id', 'parcela_id': 'parcela_id', 'especie': 'especie', 'variedad': 'variedad',
+        'tipo_semilla': 'tipo_semilla', 'fecha_estimada_siembra': 'fecha_estimada_siembra',
+        'hectareas_sembradas': 'hectareas_sembradas', 'estado': 'estado',
+    }, socio='parcela__socio'),
+    'labores': Tabla(Labor, {
+        'id': 'id', 'fecha_labor': 'fecha_labor', 'labor': 'labor', 'estado': 'estado',
+        'campania_id': 'campania_id', 'parcela_id': 'parcela_id', 'observaciones': 'observaciones',
+    }),
+    'semillas': Tabla(Semilla, {
+        'id': 'id', 'especie': 'especie', 'variedad': 'variedad', 'cantidad': 'cantidad',
+        'unidad_medida': 'unidad_medida', 'fecha_vencimiento': 'fecha_vencimiento',
+        'porcentaje_germinacion': 'porcentaje_germinacion', 'lote': 'lote', 'proveedor': 'proveedor',
+        'precio_unitario': 'precio_unitario', 'estado': 'estado',
+    }),
+    'pesticidas': Tabla(Pesticida, {
+        'id': 'id', 'nombre_comercial': 'nombre_comercial', 'ingrediente_activo': 'ingrediente_activo',
+        'tipo_pesticida': 'tipo_pesticida', 'concentracion': 'concentracion', 'cantidad': 'cantidad',
+        'unidad_medida': 'unidad_medida', 'fecha_vencimiento': 'fecha_vencimiento', 'lote': 'lote',
+        'proveedor': 'proveedor', 'precio_unitario': 'precio_unitario', 'estado': 'estado',
+    }),
+    'fertilizantes': Tabla(Fertilizante, {
+        'id': 'id', 'nombre_comercial': 'nombre_comercial', 'tipo_fertilizante': 'tipo_fertilizante',
+        'composicion_npk': 'composicion_npk', 'cantidad': 'cantidad', 'unidad_medida': 'unidad_medida',
+        'fecha_vencimiento': 'fecha_vencimiento', 'lote': 'lote', 'proveedor': 'proveedor',
+        'precio_unitario': 'precio_unitario', 'estado': 'estado',
+    }),
+}
+TABLA_POR_MODELO = {tabla.modelo: nombre for nombre, tabla in TABLAS.items()}
+
+
+def _microsegundos(instante):
+    return (instante - EPOCA) // timedelta(microseconds=1)
+
+
+def _instante(microsegundos):
+    return EPOCA + timedelta(microseconds=microsegundos)
+
+
+def codificar_token(cursores):
+    contenido = json.dumps({'v': VERSION_TOKEN, 'c': cursores}, separators=(',', ':'), sort_keys=True)
+    return base64.urlsafe_b64encode(contenido.encode()).rstrip(b'=').decode()
+
+
+def decodificar_token(token):
+    """Cursores {tabla: [microsegundos, id]} de un token emitido por cambios()"""
+    try:
+        contenido = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+        cursores = contenido['c']
+        if contenido.get('v') != VERSION_TOKEN or not isinstance(cursores, dict):
+            raise TokenInvalido('Versión de token no soportada')
+        return {tabla: [int(cursor[0]), int(cursor[1])] for tabla, cursor in cursores.items()}
+    except (binascii.Error, UnicodeDecodeError, ValueError, KeyError, TypeError, IndexError):
+        raise TokenInvalido('Token de sincronización inválido')
+
+
+def _lote(queryset, campo_fecha, cursor, corte, limite, rutas):
+    """
+    Filas posteriores a `cursor` hasta `corte` en orden (fecha, id), como
+    máximo `limite`. Devuelve (filas, cursor nuevo, hay_mas).
+    """
+    desde = _instante(cursor[0])
+    filas = list(
+        queryset.filter(Q(**{f'{campo_fecha}__gt': desde}) | Q(**{campo_fecha: desde, 'id__gt': cursor[1]}))
+        .filter(**{f'{campo_fecha}__lte': corte})
+        .order_by(campo_fecha, 'id')
+        .values_list(campo_fecha, 'id', *rutas)[:limite + 1]
+    )
+    if len(filas) > limite:
+        filas = filas[:limite]
+        return [fila[2:] for fila in filas], [_microsegundos(filas[-1][0]), filas[-1][1]], True
+    # Agotado: todo lo anterior o igual al corte ya se entregó
+    return [fila[2:] for fila in filas], [_microsegundos(corte) + 1, 0], False
+
+
+def cambios(request, token=None, tablas=None, limite=None):
+    """
+    Lote de cambios visibles para el usuario del request desde `token`
+    (sin token: todas las filas, para la primera sincronización).
+
+    Returns:
+        dict: token, hay_mas, corte y {tabla: {columnas, filas, eliminados}}
+            solo para las tablas con cambios
+
+    Raises:
+        TokenInvalido, TokenExpirado
+    """
+    nombres = list(TABLAS) if not tablas else [nombre for nombre in TABLAS if nombre in tablas]
+    if tablas and len(nombres) != len(set(tablas)):
+        desconocidas = sorted(set(tablas) - set(TABLAS))
+        raise TokenInvalido(f'Tablas no soportadas: {", ".join(desconocidas)}. Opciones: {", ".join(TABLAS)}')
+    maximo = getattr(settings, 'SINCRONIZACION_LOTE_MAXIMO', 2000)
+    limite = min(max(int(limite or getattr(settings, 'SINCRONIZACION_LOTE', 500)), 1), maximo)
+
+    ahora = timezone.now()
+    corte = ahora - timedelta(seconds=getattr(settings, 'SINCRONIZACION_MARGEN_SEGUNDOS', 5))
+    if token:
+        cursores = decodificar_token(token)
+        retencion = ahora - timedelta(days=getattr(settings, 'SINCRONIZACION_RETENCION_DIAS', 30))
+        if ELIMINADOS not in cursores or _instante(cursores[ELIMINADOS][0]) < retencion:
+            raise TokenExpirado('Token anterior a los registros eliminados conservados: sincronice sin token')
+    else:
+        # Sin copia local no hay nada que borrar: solo las lápidas posteriores
+        cursores = {ELIMINADOS: [_microsegundos(corte) + 1, 0]}
+
+    resultado = {}
+    restante, hay_mas = limite, False
+
+    lapidas = RegistroEliminado.objects.filter(tabla__in=nombres)
+    identidad = obtener_identidad(request)
+    if identidad.es_staff or identidad.socio is None:
+        # El personal sigue viendo las parcelas transferidas
+        lapidas = lapidas.filter(socio__isnull=True)
+    else:
+        lapidas = lapidas.filter(Q(socio__isnull=True) | Q(socio=identidad.socio))
+    filas, cursores[ELIMINADOS], hay_mas = _lote(
+        lapidas, 'eliminado_en', cursores[ELIMINADOS], corte, restante, ('tabla', 'objeto_id')
+    )
+    for tabla, objeto_id in filas:
+        resultado.setdefault(tabla, {}).setdefault('eliminados', []).append(objeto_id)
+    restante -= len(filas)
+
+    for nombre in nombres:
+        if hay_mas or restante <= 0:
+            hay_mas = True
+            break
+        tabla = TABLAS[nombre]
+        queryset = tabla.modelo.objects.all()
+        if tabla.socio:
+            queryset = filtrar_por_socio(queryset, request, campo=tabla.socio)
+        filas, cursores[nombre], hay_mas = _lote(
+            queryset, 'actualizado_en', cursores.get(nombre, [0, 0]), corte, restante, tuple(tabla.columnas.values())
+        )
+        if filas:
+            resultado.setdefault(nombre, {}).update(columnas=list(tabla.columnas), filas=filas)
+        restante -= len(filas)
+
+    return {
+        'token': codificar_token(cursores),
+        'hay_mas': hay_mas,
+        'corte': corte,
+        'tablas': resultado,
+    }
+
+
+# Lápidas (desde cooperativa.signals y escrituras que cambian el dueño)
+# ---------------------------------------------------------------------
+
+def registrar_eliminado(modelo, objeto_id):
+    tabla = TABLA_POR_MODELO.get(modelo)
+    if tabla is not None:
+        RegistroEliminado.objects.create(tabla=tabla, objeto_id=objeto_id)
+
+
+def registrar_transferencia(parcela_id, socio_anterior_id):
+    """
+    La parcela y sus cultivos dejan de ser visibles para el socio anterior:
+    lápidas para sus dispositivos y actualizado_en nuevo para los del nuevo.
+    """
+    ahora = timezone.now()
+    cultivos = list(Cultivo.objects.filter(parcela_id=parcela_id).values_list('id', flat=True))
+    RegistroEliminado.objects.bulk_create(
+        [RegistroEliminado(tabla='parcelas', objeto_id=parcela_id, socio_id=socio_anterior_id, eliminado_en=ahora)]
+        + [RegistroEliminado(tabla='cultivos', objeto_id=i, socio_id=socio_anterior_id, eliminado_en=ahora)
+           for i in cultivos]
+    )
+    Cultivo.objects.filter(id__in=cultivos).update(actualizado_en=ahora)
+
+
+def purgar(dias=None):
+    """Elimina las lápidas más antiguas que la retención; devuelve cuántas"""
+    dias = dias if dias is not None else getattr(settings, 'SINCRONIZACION_RETENCION_DIAS', 30)
+    borradas, _ = RegistroEliminado.objects.filter(eliminado_en__lt=timezone.now() - timedelta(days=dias)).delete()
+    return borradas
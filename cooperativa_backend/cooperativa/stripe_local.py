@@ -0,0 +1,207 @@
+"""
+Servidor local que imita la API de Stripe (subconjunto usado por pagos_stripe)
+
+Permite probar el flujo de pagos sin red ni claves reales: se apunta el SDK
+con STRIPE_API_BASE=http://127.0.0.1:<puerto> y el servidor responde
+PaymentIntents y Refunds con el mismo formato que Stripe, respetando el
+header Idempotency-Key (misma clave -> misma respuesta, sin nuevo cobro).
+
+Comportamiento según payment_method:
+- pm_card_chargeDeclined: 402 card_error, intent en requires_payment_method
+- pm_card_processing: intent en processing; se completa con completar()
+- cualquier otro: succeeded con un Charge asociado
+
+Cada cambio de estado genera un evento payment_intent.* que se entrega a
+`al_evento` (p. ej. para enviarlo firmado al webhook, ver firmar()).
+"""
+
+import hashlib
+import hmac
+import itertools
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl
+
+
+EVENTOS_POR_ESTADO = {
+    'succeeded': 'payment_intent.succeeded',
+    'processing': 'payment_intent.processing',
+    'requires_payment_method': 'payment_intent.payment_failed',
+    'canceled': 'payment_intent.canceled',
+}
+
+
+def firmar(payload, secreto, timestamp=None):
+    """Header Stripe-Signature para `payload` (bytes) con el esquema v1 de Stripe"""
+    timestamp = int(timestamp or time.time())
+    firma = hmac.new(secreto.encode(), f'{timestamp}.'.encode() + payload, hashlib.sha256).hexdigest()
+    return f't={timestamp},v1={firma}'
+
+
+def _desanidar(pares):
+    """metadata[pago_id]=1 -> {'metadata': {'pago_id': '1'}} (codificación de formularios de Stripe)"""
+    datos = {}
+    for clave, valor in pares:
+        partes = clave.replace(']', '').split('[')
+        destino = datos
+        for parte in partes[:-1]:
+            destino = destino.setdefault(parte, {})
+        destino[partes[-1]] = valor
+    return datos
+
+
+class ServidorStripeLocal:
+
+    def __init__(self, puerto=0, al_evento=None):
+        self.al_evento = al_evento
+        self.intents = {}
+        self.idempotencia = {}
+        self.eventos = []
+        self.solicitudes = 0
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._servidor = ThreadingHTTPServer(('127.0.0.1', puerto), self._manejador())
+        self._hilo = None
+
+    @property
+    def url(self):
+        host, puerto = self._servidor.server_address[:2]
+        return f'http://{host}:{puerto}'
+
+    def iniciar(self):
+        self._hilo = threading.Thread(target=self._servidor.serve_forever, daemon=True)
+        self._hilo.start()
+        return self.url
+
+    def detener(self):
+        self._servidor.shutdown()
+        self._servidor.server_close()
+
+    def servir(self):
+        self._servidor.serve_forever()
+
+    @property
+    def cobros(self):
+        """Intents que llegaron a succeeded (cobros efectivos)"""
+        return [i for i in self.intents.values() if i['status'] == 'succeeded']
+
+    def completar(self, intent_id, exito=True):
+        """Lleva un intent en processing a su estado final (como haría el banco)"""
+        with self._lock:
+            intent = self.intents[intent_id]
+            if exito:
+                intent['status'] = 'succeeded'
+                intent['latest_charge'] = f"ch_local_{next(self._ids)}"
+            else:
+                intent['status'] = 'requires_payment_method'
+                intent['last_payment_error'] = {'code': 'card_declined', 'message': 'Your card was declined.'}
+        return self._emitir(intent)
+
+    def _nuevo_id(self, prefijo):
+        return f'{prefijo}_local_{next(self._ids)}'
+
+    def _emitir(self, intent):
+        tipo = EVENTOS_POR_ESTADO.get(intent['status'])
+        if tipo is None:
+            return None
+        evento = {
+            'id': self._nuevo_id('evt'),
+            'object': 'event',
+            'type': tipo,
+            'created': int(time.time()),
+            'data': {'object': json.loads(json.dumps(intent))},
+        }
+        self.eventos.append(evento)
+        if self.al_evento:
+            self.al_evento(evento)
+        return evento
+
+    def _crear_intent(self, datos):
+        metodo = datos.get('payment_method', '')
+        intent = {
+            'id': self._nuevo_id('pi'),
+            'object': 'payment_intent',
+            'amount': int(datos.get('amount', 0)),
+            'currency': datos.get('currency', 'bob'),
+            'description': datos.get('description'),
+            'metadata': datos.get('metadata', {}),
+            'payment_method': metodo,
+            'latest_charge': None,
+            'last_payment_error': None,
+            'created': int(time.time()),
+            'status': 'requires_confirmation',
+        }
+        if str(datos.get('confirm', '')).lower() == 'true':
+            if 'Declined' in metodo:
+                intent['status'] = 'requires_payment_method'
+                intent['last_payment_error'] = {'code': 'card_declined', 'message': 'Your card was declined.'}
+            elif metodo == 'pm_card_processing':
+                intent['status'] = 'processing'
+            else:
+                intent['status'] = 'succeeded'
+                intent['latest_charge'] = self._nuevo_id('ch')
+        self.intents[intent['id']] = intent
+        self._emitir(intent)
+
+        if intent['status'] == 'requires_payment_method':
+            return 402, {'error': {
+                'type': 'card_error', 'code': 'card_declined',
+                'message': intent['last_payment_error']['message'], 'payment_intent': intent,
+            }}
+        return 200, intent
+
+    def _atender(self, metodo, ruta, datos, clave_idempotencia):
+        with self._lock:
+            self.solicitudes += 1
+            if metodo == 'POST' and clave_idempotencia and clave_idempotencia in self.idempotencia:
+                return self.idempotencia[clave_idempotencia]
+
+            if metodo == 'POST' and ruta == '/v1/payment_intents':
+                respuesta = self._crear_intent(datos)
+            elif metodo == 'GET' and ruta.startswith('/v1/payment_intents/'):
+                intent = self.intents.get(ruta.rsplit('/', 1)[-1])
+                respuesta = (200, intent) if intent else (404, {'error': {
+                    'type': 'invalid_request_error', 'message': 'No such payment_intent'
+                }})
+            elif metodo == 'POST' and ruta == '/v1/refunds':
+                respuesta = (200, {
+                    'id': self._nuevo_id('re'), 'object': 'refund', 'status': 'succeeded',
+                    'charge': datos.get('charge'), 'payment_intent': datos.get('payment_intent'),
+                })
+            else:
+                respuesta = (404, {'error': {'type': 'invalid_request_error', 'message': f'Ruta no soportada: {ruta}'}})
+
+            if metodo == 'POST' and clave_idempotencia:
+                self.idempotencia[clave_idempotencia] = respuesta
+            return respuesta
+
+    def _manejador(self):
+        servidor = self
+
+        class Manejador(BaseHTTPRequestHandler):
+
+            def _responder(self, metodo):
+                ruta, _, consulta = self.path.partition('?')
+                cuerpo = self.rfile.read(int(self.headers.get('Content-Length') or 0)).decode()
+                datos = _desanidar(parse_qsl(cuerpo or consulta))
+                estado, contenido = servidor._atender(metodo, ruta, datos, self.headers.get('Idempotency-Key'))
+                carga = json.dumps(contenido).encode()
+                self.send_response(estado)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(carga)))
+                self.send_header('Request-Id', f'req_local_{servidor.solicitudes}')
+                self.end_headers()
+                self.wfile.write(carga)
+
+            def do_GET(self):
+                self._responder('GET')
+
+            def do_POST(self):
+                self._responder('POST')
+
+            def log_message(self, *args):
+                pass
+
+        return Manejador
@@ -0,0 +1,359 @@
+"""
+CU3: Transiciones de estado masivas
+T012: Gestión de usuarios (inhabilitar/reactivar)
+T014: CRUD de socios con validaciones
+
+Aplica un cambio de estado validado a un conjunto filtrado de registros:
+- una lectura de las filas candidatas (bloqueadas hasta el final de la transacción),
+- un único UPDATE con las mismas condiciones como guarda (compare-and-set),
+- un UPDATE para propagar el estado (socio <-> usuario),
+- un INSERT masivo en la bitácora con el estado anterior de cada fila.
+
+Control de concurrencia optimista: el cliente puede enviar `estado_esperado`
+y/o `no_modificado_desde` (valor de actualizado_en que leyó). Las filas que
+cambiaron desde entonces se reportan como conflicto; con parcial=False la
+operación completa se revierte.
+"""
+
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Callable, Optional
+
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import BooleanField, ExpressionWrapper, Q
+from django.utils import timezone
+
+from . import autenticacion, catalogo_insumos, versiones
+from .models import (
+    Usuario, Socio, Semilla, Pesticida, Fertilizante, Labor, ProductoCosechado, BitacoraAuditoria
+)
+
+
+class TransicionInvalida(ValueError):
+    """Recurso, estado o filtro no válido para una transición masiva"""
+
+
+class ConflictoConcurrencia(Exception):
+    """Alguna fila cambió desde que el cliente la leyó (solo con parcial=False)"""
+
+    def __init__(self, rechazados):
+        super().__init__('Registros modificados por otro proceso')
+        self.rechazados = rechazados
+
+
+@dataclass(frozen=True)
+class Destino:
+    """Estado destino: estados de origen permitidos y requisito sobre la fila"""
+    desde: Optional[tuple] = None
+    requisito: Optional[Callable[[], Q]] = None
+    mensaje: str = ''
+
+
+@dataclass(frozen=True)
+class Transicion:
+    modelo: type
+    tabla: str
+    destinos: dict
+    filtros: dict
+    accion: Callable[[str], str]
+    version: Optional[str] = 'actualizado_en'
+    cambios_extra: dict = field(default_factory=dict)
+    propagar: Optional[Callable] = None
+    al_confirmar: Optional[Callable] = None
+    campos_extra: tuple = ()
+
+
+def _vigente():
+    return Q(fecha_vencimiento__isnull=True) | Q(fecha_vencimiento__gte=date.today())
+
+
+def _propagar_a_usuarios(ids, estado, ahora):
+    Usuario.objects.filter(socio__id__in=ids).update(estado=estado, actualizado_en=ahora)
+    versiones.incrementar(Usuario)
+
+
+def _propagar_a_socios(ids, estado, ahora):
+    Socio.objects.filter(usuario_id__in=ids).update(estado=estado, actualizado_en=ahora)
+    versiones.incrementar(Socio)
+
+
+def _propagar_a_catalogo(modelo):
+    return lambda ids, estado, ahora: catalogo_insumos.programar(modelo, ids)
+
+
+def _limpiar_cache_login(filas, estado):
+    if estado == 'ACTIVO':
+        autenticacion.limpiar_intentos_masivo(
+            [(fila['id'], fila['date_joined'], fila['usuario']) for fila in filas]
+        )
+
+
+DESTINOS_INSUMO = {
+    'DISPONIBLE': Destino(
+        requisito=lambda: Q(cantidad__gt=0) & _vigente(),
+        mensaje='Requiere cantidad mayor a 0 y fecha de vencimiento vigente'
+    ),
+    'AGOTADO': Destino(requisito=lambda: Q(cantidad=0), mensaje='Requiere cantidad igual a 0'),
+    'VENCIDO': Destino(),
+    'EN_CUARENTENA': Destino(),
+    'RECHAZADO': Destino(),
+}
+
+FILTROS_INSUMO = {
+    'estado': 'estado',
+    'proveedor': 'proveedor__iexact',
+    'vencimiento_hasta': 'fecha_vencimiento__lte',
+}
+
+ETAPAS_LABOR = ('PLANIFICADA', 'EN_PROCESO')
+PRODUCTO_ABIERTO = ('En Almacén', 'Procesado', 'En revision')
+
+TRANSICIONES = {
+    'socios': Transicion(
+        modelo=Socio,
+        tabla='socio',
+        destinos={'ACTIVO': Destino(), 'INACTIVO': Destino()},
+        filtros={'comunidad': 'comunidad_id', 'estado': 'estado'},
+        accion=lambda estado: 'ACTIVAR_SOCIO' if estado == 'ACTIVO' else 'DESACTIVAR_SOCIO',
+        propagar=_propagar_a_usuarios,
+    ),
+    'usuarios': Transicion(
+        modelo=Usuario,
+        tabla='usuario',
+        destinos={'ACTIVO': Destino(), 'INACTIVO': Destino()},
+        filtros={'comunidad': 'socio__comunidad_id', 'estado': 'estado', 'is_staff': 'is_staff'},
+        accion=lambda estado: 'ACTIVAR_USUARIO' if estado == 'ACTIVO' else 'DESACTIVAR_USUARIO',
+        # Reactivar desbloquea la cuenta
+        cambios_extra={'ACTIVO': {'intentos_fallidos': 0}},
+        propagar=_propagar_a_socios,
+        al_confirmar=_limpiar_cache_login,
+        campos_extra=('date_joined', 'usuario'),
+    ),
+    'semillas': Transicion(
+        modelo=Semilla,
+        tabla='Semilla',
+        destinos={
+            'DISPONIBLE': DESTINOS_INSUMO['DISPONIBLE'],
+            'AGOTADA': DESTINOS_INSUMO['AGOTADO'],
+            'VENCIDA': Destino(),
+            'RESERVADA': Destino(
+                requisito=lambda: Q(cantidad__gt=0) & _vigente(),
+                mensaje='Requiere cantidad mayor a 0 y fecha de vencimiento vigente'
+            ),
+        },
+        filtros={**FILTROS_INSUMO, 'especie': 'especie__iexact'},
+        accion=lambda estado: 'CAMBIAR_ESTADO_SEMILLA',
+        propagar=_propagar_a_catalogo(Semilla),
+    ),
+    'pesticidas': Transicion(
+        modelo=Pesticida,
+        tabla='Pesticida',
+        destinos=DESTINOS_INSUMO,
+        filtros={**FILTROS_INSUMO, 'tipo': 'tipo_pesticida'},
+        accion=lambda estado: 'CAMBIAR_ESTADO_PESTICIDA',
+        propagar=_propagar_a_catalogo(Pesticida),
+    ),
+    'fertilizantes': Transicion(
+        modelo=Fertilizante,
+        tabla='Fertilizante',
+        destinos=DESTINOS_INSUMO,
+        filtros={**FILTROS_INSUMO, 'tipo': 'tipo_fertilizante'},
+        accion=lambda estado: 'CAMBIAR_ESTADO_FERTILIZANTE',
+        propagar=_propagar_a_catalogo(Fertilizante),
+    ),
+    'labores': Transicion(
+        modelo=Labor,
+        tabla='Labor',
+        destinos={
+            'PLANIFICADA': Destino(desde=('EN_PROCESO',)),
+            'EN_PROCESO': Destino(desde=('PLANIFICADA',)),
+            'COMPLETADA': Destino(desde=ETAPAS_LABOR),
+            'CANCELADA': Destino(desde=ETAPAS_LABOR),
+        },
+        filtros={
+            'estado': 'estado', 'campania': 'campania_id', 'parcela': 'parcela_id',
+            'labor': 'labor', 'fecha_hasta': 'fecha_labor__lte',
+        },
+        accion=lambda estado: 'CAMBIAR_ESTADO_LABOR',
+    ),
+    'productos-cosechados': Transicion(
+        modelo=ProductoCosechado,
+        tabla='ProductoCosechado',
+        destinos={
+            'En Almacén': Destino(desde=PRODUCTO_ABIERTO),
+            'Procesado': Destino(desde=PRODUCTO_ABIERTO),
+            'En revision': Destino(desde=PRODUCTO_ABIERTO),
+            'Vendido': Destino(desde=PRODUCTO_ABIERTO, requisito=lambda: Q(cantidad__gt=0),
+                               mensaje='Requiere cantidad mayor a 0'),
+            'Vencido': Destino(desde=PRODUCTO_ABIERTO),
+        },
+        filtros={'estado': 'estado', 'campania': 'campania_id', 'parcela': 'parcela_id', 'cultivo': 'cultivo_id'},
+        accion=lambda estado: 'CAMBIAR_ESTADO_PRODUCTO_COSECHADO',
+    ),
+}
+
+
+def obtener_transicion(recurso):
+    try:
+        return TRANSICIONES[recurso]
+    except KeyError:
+        raise TransicionInvalida(f'Recurso no soportado: {recurso}. Opciones: {", ".join(TRANSICIONES)}')
+
+
+def _conjunto(config, queryset, ids, filtros):
+    if not ids and not filtros:
+        # Sin selección el cambio alcanzaría toda la tabla (o todo el queryset base)
+        raise TransicionInvalida('Indique ids o al menos un filtro')
+
+    conjunto = queryset if queryset is not None else config.modelo.objects.all()
+    if ids:
+        # Un texto también es iterable: "12" seleccionaría los ids 1 y 2
+        if not isinstance(ids, (list, tuple)) or not all(
+            isinstance(i, int) and not isinstance(i, bool) for i in ids
+        ):
+            raise TransicionInvalida('ids debe ser una lista de enteros')
+        conjunto = conjunto.filter(id__in=ids)
+    for clave, valor in (filtros or {}).items():
+        if clave not in config.filtros:
+            raise TransicionInvalida(
+                f'Filtro no soportado: {clave}. Opciones: {", ".join(config.filtros)}'
+            )
+        try:
+            # El campo convierte el valor al armar la condición (get_prep_value)
+            conjunto = conjunto.filter(**{config.filtros[clave]: valor})
+        except (TypeError, ValueError, ValidationError):
+            raise TransicionInvalida(f'Valor no válido para el filtro {clave}: {valor!r}')
+    return conjunto
+
+
+def _guarda(config, destino, estado, estado_esperado, no_modificado_desde):
+    """Condiciones que debe cumplir cada fila; se usan igual en el UPDATE"""
+    guarda = ~Q(estado=estado)
+    if destino.desde is not None:
+        guarda &= Q(estado__in=destino.desde)
+    if destino.requisito is not None:
+        guarda &= destino.requisito()
+    if estado_esperado:
+        guarda &= Q(estado=estado_esperado)
+    if config.version and no_modificado_desde:
+        guarda &= Q(**{f'{config.version}__lte': no_modificado_desde})
+    return guarda
+
+
+def _motivo_rechazo(fila, config, destino, estado, estado_esperado, no_modificado_desde):
+    if fila['estado'] == estado:
+        return 'sin_cambio', 'El registro ya está en el estado solicitado'
+    if estado_esperado and fila['estado'] != estado_esperado:
+        return 'conflicto', f'Estado actual {fila["estado"]}, se esperaba {estado_esperado}'
+    if config.version and no_modificado_desde and fila[config.version] > no_modificado_desde:
+        return 'conflicto', 'El registro fue modificado después de la versión indicada'
+    if destino.desde is not None and fila['estado'] not in destino.desde:
+        return 'transicion_no_permitida', f'No se puede pasar de {fila["estado"]} a {estado}'
+    if not fila['cumple_requisito']:
+        return 'requisito', destino.mensaje
+    return None, None
+
+
+def aplicar_transicion(recurso, estado, ids=None, filtros=None, queryset=None,
+                       estado_esperado=None, no_modificado_desde=None, parcial=True,
+                       usuario=None, cliente=None, motivo='', origen='transicion_masiva'):
+    """
+    Cambia el estado de los registros seleccionados con un solo UPDATE.
+
+    Args:
+        recurso: clave de TRANSICIONES ('socios', 'semillas', ...)
+        ids / filtros: selección (al menos uno)
+        queryset: base a la que se aplica la selección (p. ej. sin el solicitante)
+        estado_esperado, no_modificado_desde: chequeos de concurrencia optimista
+        parcial: si es False, cualquier conflicto revierte toda la operación
+
+    Returns:
+        dict: estado, actualizados, ids, rechazados [{id, estado_actual, motivo, detalle}]
+
+    Raises:
+        TransicionInvalida, ConflictoConcurrencia
+    """
+    config = obtener_transicion(recurso)
+    if estado not in config.destinos:
+        raise TransicionInvalida(
+            f'Estado no válido para {recurso}: {estado}. Opciones: {", ".join(config.destinos)}'
+        )
+    destino = config.destinos[estado]
+    conjunto = _conjunto(config, queryset, ids, filtros)
+    cliente = cliente or {}
+    ahora = timezone.now()
+
+    campos = ['id', 'estado', *config.campos_extra]
+    if config.version:
+        campos.append(config.version)
+    requisito = destino.requisito() if destino.requisito is not None else Q(pk__isnull=False)
+
+    with transaction.atomic():
+        filas = list(
+            conjunto.select_for_update(of=('self',)).annotate(
+                cumple_requisito=ExpressionWrapper(requisito, output_field=BooleanField())
+            ).values(*campos, 'cumple_requisito').order_by('id')
+        )
+
+        elegibles, rechazados = [], []
+        for fila in filas:
+            codigo, detalle = _motivo_rechazo(fila, config, destino, estado, estado_esperado, no_modificado_desde)
+            if codigo is None:
+                elegibles.append(fila)
+            else:
+                rechazados.append({
+                    'id': fila['id'], 'estado_actual': fila['estado'], 'motivo': codigo, 'detalle': detalle
+                })
+
+        if not parcial and any(r['motivo'] == 'conflicto' for r in rechazados):
+            raise ConflictoConcurrencia(rechazados)
+
+        actualizados = 0
+        ids_actualizados = [fila['id'] for fila in elegibles]
+        if elegibles:
+            cambios = {'estado': estado, **config.cambios_extra.get(estado, {})}
+            if config.version:
+                cambios[config.version] = ahora
+            actualizados = config.modelo.objects.filter(
+                Q(id__in=ids_actualizados) & _guarda(config, destino, estado, estado_esperado, no_modificado_desde)
+            ).update(**cambios)
+            # UPDATE directo: no dispara post_save, se renueva la versión a mano
+            versiones.incrementar(config.modelo)
+
+            if config.propagar is not None:
+                config.propagar(ids_actualizados, estado, ahora)
+
+            accion = config.accion(estado)
+            BitacoraAuditoria.objects.bulk_create([
+                BitacoraAuditoria(
+                    usuario=usuario,
+                    accion=accion,
+                    tabla_afectada=config.tabla,
+                    registro_id=fila['id'],
+                    detalles={
+                        'estado_anterior': fila['estado'],
+                        'nuevo_estado': estado,
+                        'modificado_por': usuario.usuario if usuario else None,
+                        'motivo': motivo,
+                        'origen': origen,
+                    },
+                    ip_address=cliente.get('ip'),
+                    user_agent=cliente.get('user_agent') or 'Unknown',
+                    fecha=ahora,
+                )
+                for fila in elegibles
+            ], batch_size=1000)
+
+            if config.al_confirmar is not None:
+                transaction.on_commit(lambda: config.al_confirmar(elegibles, estado))
+
+    return {
+        'recurso': recurso,
+        'estado': estado,
+        'seleccionados': len(filas),
+        'actualizados': actualizados,
+        'ids': ids_actualizados,
+        'rechazados': rechazados,
+        'version': ahora,
+    }
@@ -4,7 +4,7 @@ from . import views
 from .apps.chatbot import urls as chatbot_urls
 from .views_insumos import (
     PrecioTemporadaViewSet, PedidoInsumoViewSet, PagoInsumoViewSet,
-    historial_compras_insumos
+    historial_compras_insumos, catalogo_insumos_view, cotizar_insumos_view
 )
 
 # Crear router para ViewSets
@@ -72,8 +72,10 @@ urlpatterns = [
 
     # CU3: Gestión de Socios - Endpoints adicionales
     path('api/socios/crear-completo/', views.crear_socio_completo, name='crear-socio-completo'),
+    path('api/socios/importar/', views.importar_socios, name='importar-socios'),
     path('api/socios/<int:socio_id>/activar-desactivar/', views.activar_desactivar_socio, name='activar-desactivar-socio'),
     path('api/usuarios/<int:usuario_id>/activar-desactivar/', views.activar_desactivar_usuario, name='activar-desactivar-usuario'),
+    path('api/transiciones/<str:recurso>/', views.transicion_masiva, name='transicion-masiva'),
     path('api/socios/buscar-avanzado/', views.buscar_socios_avanzado, name='buscar-socios-avanzado'),
     path('api/socios/buscar-por-cultivo/', views.buscar_socios_por_cultivo, name='buscar-socios-por-cultivo'),
     path('api/reportes/usuarios-socios/', views.reporte_usuarios_socios, name='reporte-usuarios-socios'),
@@ -124,10 +126,22 @@ urlpatterns = [
 
     # SISTEMA DE PAGOS: Endpoints específicos
     path('api/historial-ventas/', views.historial_ventas, name='historial-ventas'),
+    path('api/pagos/stripe/webhook/', views.stripe_webhook, name='stripe-webhook'),
     path('api/exportar-ventas-csv/', views.exportar_ventas_csv, name='exportar-ventas-csv'),
 
     # SISTEMA DE VENTAS DE INSUMOS: Endpoints específicos
     path('api/ventas/insumos/historial/', historial_compras_insumos, name='historial-compras-insumos'),
+    path('api/insumos/catalogo/', catalogo_insumos_view, name='catalogo-insumos'),
+    path('api/insumos/cotizar/', cotizar_insumos_view, name='cotizar-insumos'),
+
+    # Sincronización incremental de la app móvil
+    path('api/sincronizacion/cambios/', views.sincronizacion_cambios, name='sincronizacion-cambios'),
+
+    # Carga por lotes del trabajo registrado sin conexión (app móvil)
+    path('api/carga-offline/', views.carga_offline_registros, name='carga-offline'),
+
+    # Métricas de rendimiento por ruta (formato Prometheus)
+    path('api/metrics', views.metricas_prometheus, name='metricas'),
 
     # Nueva ruta para el endpoint de sesión de depuración
     path('api/auth/debug-session/', views.debug_session_status, name='debug-session'),
@@ -0,0 +1,131 @@
+"""
+CU7/CU8/CU15: Vencimiento masivo del inventario
+
+Los modelos solo pasan a VENCIDA/VENCIDO en save(), así que un insumo que
+vence sin volver a guardarse sigue figurando como disponible (listados,
+reportes, chatbot). barrer_vencidos() aplica la misma regla a todas las
+filas con un UPDATE por tabla (índice estado + fecha), deja un único
+registro en la bitácora, renueva las versiones de tabla (cachés de
+catálogo y reportes) y el catálogo unificado de insumos.
+
+Los productos cosechados no tienen fecha de vencimiento: se consideran
+vencidos tras PRODUCTOS_COSECHADOS_VIDA_UTIL_DIAS en almacén (0 = no se
+vencen automáticamente).
+
+Ejecución programada:
+- `python manage.py barrer_vencimientos` desde cron / Heroku Scheduler, o
+- `--cada <minutos>` para dejar el comando corriendo como proceso, o
+- VENCIMIENTOS_INTERVALO_MINUTOS > 0 para un hilo dentro del proceso web
+  (wsgi.py). Con varios workers cada uno barre por su cuenta; el UPDATE es
+  idempotente, el segundo no encuentra filas.
+"""
+
+import logging
+import threading
+from datetime import date, timedelta
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.utils import timezone
+
+from . import catalogo_insumos, versiones
+from .models import Semilla, Pesticida, Fertilizante, ProductoCosechado, BitacoraAuditoria
+
+
+logger = logging.getLogger('cooperativa.vencimientos')
+
+_programador = None
+
+
+def _reglas(hoy, vida_util_productos):
+    """(modelo, filas a vencer, estado vencido) con las mismas reglas que save()"""
+    reglas = [
+        # Una semilla AGOTADA sigue agotada aunque venza
+        (Semilla, Semilla.objects.filter(
+            fecha_vencimiento__lt=hoy, estado__in=['DISPONIBLE', 'RESERVADA']
+        ), 'VENCIDA'),
+        (Pesticida, Pesticida.objects.filter(fecha_vencimiento__lt=hoy).exclude(
+            estado__in=['VENCIDO', 'RECHAZADO']
+        ), 'VENCIDO'),
+        (Fertilizante, Fertilizante.objects.filter(fecha_vencimiento__lt=hoy).exclude(
+            estado__in=['VENCIDO', 'RECHAZADO']
+        ), 'VENCIDO'),
+    ]
+    if vida_util_productos:
+        reglas.append((ProductoCosechado, ProductoCosechado.objects.filter(
+            estado='En Almacén', fecha_cosecha__lt=hoy - timedelta(days=vida_util_productos)
+        ), 'Vencido'))
+    return reglas
+
+
+def barrer_vencidos(hoy=None, vida_util_productos=None, usuario=None):
+    """
+    Marca como vencidas todas las filas cuya fecha ya pasó.
+
+    Args:
+        hoy: fecha de referencia (por defecto la actual)
+        vida_util_productos: días en almacén tras los que vence un producto
+            cosechado (por defecto PRODUCTOS_COSECHADOS_VIDA_UTIL_DIAS)
+        usuario: quien ejecuta el barrido, para la bitácora
+
+    Returns:
+        dict: filas actualizadas por tabla
+    """
+    hoy = hoy or date.today()
+    if vida_util_productos is None:
+        vida_util_productos = getattr(settings, 'PRODUCTOS_COSECHADOS_VIDA_UTIL_DIAS', 0)
+
+    ahora = timezone.now()
+    resultado = {}
+    with transaction.atomic():
+        for modelo, filas, estado in _reglas(hoy, vida_util_productos):
+            # update() no aplica auto_now
+            actualizadas = filas.update(estado=estado, actualizado_en=ahora)
+            resultado[modelo._meta.db_table] = actualizadas
+            if actualizadas:
+                versiones.incrementar(modelo)
+                if modelo in catalogo_insumos.TIPO_POR_MODELO:
+                    catalogo_insumos.programar(modelo)
+
+        if any(resultado.values()):
+            BitacoraAuditoria.objects.create(
+                usuario=usuario,
+                accion='VENCIMIENTO_MASIVO',
+                tabla_afectada='inventario',
+                registro_id=0,
+                detalles={'fecha_referencia': hoy.isoformat(), 'actualizadas': resultado},
+                ip_address=None,
+                user_agent='barrer_vencimientos',
+            )
+
+    logger.info('vencimientos_barridos', extra={'fecha': hoy.isoformat(), **resultado})
+    return resultado
+
+
+def _ciclo(intervalo_segundos, detener):
+    while not detener.wait(intervalo_segundos):
+        try:
+            barrer_vencidos()
+        except Exception:
+            logger.exception('vencimientos_error')
+        finally:
+            close_old_connections()
+
+
+def iniciar_programador(intervalo_minutos=None):
+    """
+    Barrido periódico en un hilo daemon del proceso actual (una vez por
+    proceso). Devuelve el Event que lo detiene, o None si está deshabilitado.
+    """
+    global _programador
+    if intervalo_minutos is None:
+        intervalo_minutos = getattr(settings, 'VENCIMIENTOS_INTERVALO_MINUTOS', 0)
+    if not intervalo_minutos or _programador is not None:
+        return _programador
+
+    _programador = threading.Event()
+    threading.Thread(
+        target=_ciclo, args=(intervalo_minutos * 60, _programador),
+        daemon=True, name='vencimientos'
+    ).start()
+    return _programador
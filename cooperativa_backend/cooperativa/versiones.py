@@ -0,0 +1,103 @@
+"""
+Versiones de tabla y GET condicional (ETag / Last-Modified)
+
+Cada modelo versionado tiene en la caché compartida una versión (timestamp
+en nanosegundos) que las señales renuevan al confirmar la transacción que
+lo modifica. Los endpoints de catálogo decorados con @condicional arman su
+ETag con esas versiones, la query string y el formato de respuesta; si el
+cliente ya tiene esa versión (If-None-Match / If-Modified-Since) se
+responde 304 sin ejecutar la vista: ni consulta ni serialización.
+
+Con varios procesos la caché debe ser compartida (REDIS_URL), igual que
+los contadores de login: con LocMemCache cada worker versiona por su cuenta.
+
+Las vistas con @condicional leen de la primaria aunque haya réplica
+(replica.py): la versión se renueva al confirmar en la primaria y un cuerpo
+leído de la réplica atrasada quedaría asociado al ETag nuevo.
+"""
+
+import hashlib
+import math
+import time
+from functools import wraps
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from .replica import en_primaria
+
+
+PREFIJO = 'version_tabla'
+
+
+def _clave(modelo):
+    return f'{PREFIJO}:{modelo._meta.label_lower}'
+
+
+def versiones(*modelos):
+    """Versiones actuales; una tabla sin versión registrada se considera modificada ahora"""
+    claves = [_clave(modelo) for modelo in modelos]
+    actuales = cache.get_many(claves)
+    faltantes = [clave for clave in claves if clave not in actuales]
+    if faltantes:
+        ahora = time.time_ns()
+        for clave in faltantes:
+            cache.add(clave, ahora, None)
+        actuales.update(cache.get_many(faltantes))
+    return [actuales.get(clave, 0) for clave in claves]
+
+
+def incrementar(modelo):
+    """Renueva la versión de la tabla cuando confirma la transacción en curso"""
+    clave = _clave(modelo)
+    transaction.on_commit(lambda: cache.set(clave, time.time_ns(), None))
+
+
+def condicional(*modelos, datos=None, variante=None):
+    """
+    GET condicional para vistas de catálogo (funciones con @api_view o
+    acciones de ViewSet). Va debajo de @api_view/@permission_classes o
+    @action, así la autenticación y los permisos se validan antes.
+
+    Args:
+        modelos: tablas de las que depende la respuesta
+        datos: contenido estático incluido en el ETag (p. ej. choices)
+        variante: callable(request) con lo que además cambia la respuesta
+            (p. ej. la fecha para filtros "vigente")
+    """
+    def decorador(vista):
+        nombre = f'{vista.__module__}.{vista.__qualname__}'
+
+        @wraps(vista)
+        def envoltura(*args, **kwargs):
+            request = args[1] if len(args) > 1 and hasattr(args[1], 'META') else args[0]
+            version = versiones(*modelos) if modelos else []
+            renderer = getattr(request, 'accepted_renderer', None)
+            firma = repr((
+                nombre, version, datos,
+                sorted(request.GET.lists()),
+                getattr(renderer, 'format', None),
+                variante(request) if variante else None,
+            ))
+            etag = quote_etag(hashlib.sha1(firma.encode()).hexdigest()[:20])
+            # Last-Modified solo tiene resolución de segundos; If-None-Match tiene
+            # prioridad y distingue cualquier cambio. Con variante no se envía:
+            # la fecha de la tabla no refleja, p. ej., el cambio de día.
+            modificado = math.ceil(max(version) / 1e9) if version and variante is None else None
+
+            respuesta = get_conditional_response(request, etag=etag, last_modified=modificado)
+            if respuesta is None:
+                with en_primaria():
+                    respuesta = vista(*args, **kwargs)
+                if respuesta.status_code != 200:
+                    return respuesta
+            respuesta['ETag'] = etag
+            if modificado is not None:
+                respuesta['Last-Modified'] = http_date(modificado)
+            patch_cache_control(respuesta, private=True, no_cache=True)
+            return respuesta
+
+        return envoltura
+    return decorador
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.shortcuts import get_object_or_404
 from django.http import HttpResponse
 from rest_framework import viewsets, status, serializers
@@ -8,21 +9,27 @@ from rest_framework.pagination import PageNumberPagination
 from rest_framework.filters import OrderingFilter
 from django.contrib.auth import authenticate, login, logout
 from django.utils import timezone
+from django.utils.dateparse import parse_datetime
 from django.middleware.csrf import get_token
 from django.views.decorators.csrf import csrf_exempt
 from django.utils.decorators import method_decorator
-from django.db.models import Q, Count, Sum, Avg, F, Case, When, DecimalField
+from django.db import transaction
+from django.db.models import Q, Count, Sum, Avg, Max, F, Case, When, DecimalField, Prefetch
 from django.db.models.functions import TruncMonth, Coalesce
 from django.contrib.sessions.models import Session
 from django.core.exceptions import PermissionDenied
 from django_filters.rest_framework import DjangoFilterBackend
+from rest_framework.exceptions import ParseError
 from decimal import Decimal
 import csv
+import hmac
+import logging
 from datetime import datetime, timedelta
 from .models import (
     Rol, Usuario, UsuarioRol, Comunidad, Socio,
     Parcela, Cultivo, BitacoraAuditoria,
     CicloCultivo, Cosecha, Tratamiento, AnalisisSuelo, TransferenciaParcela,
+    ProductividadParcela, ResumenTratamientoMensual,
     Semilla, Pesticida, Fertilizante, Labor, ProductoCosechado,
     Pedido, DetallePedido, Pago,
     PrecioTemporada, PedidoInsumo, DetallePedidoInsumo, PagoInsumo, PaymentMethod
@@ -39,9 +46,32 @@ from .serializers import (
     ProductoCosechadoCambiarEstadoSerializer, ProductoCosechadoCreateSerializer, ProductoCosechadoUpdateSerializer, ProductoCosechadoVenderSerializer,
     PedidoSerializer, PedidoCreateSerializer, PagoSerializer, PagoCreateSerializer, PagoStripeSerializer, HistorialVentasSerializer, DetallePedidoSerializer,
     PrecioTemporadaSerializer, PedidoInsumoSerializer, PedidoInsumoCreateSerializer, DetallePedidoInsumoSerializer, PagoInsumoSerializer, HistorialComprasInsumosSerializer,
+    CampaignPartnerSerializer, CampaignPlotSerializer,
     PaymentMethodActivationSerializer, PaymentMethodBulkUpdateSerializer, PaymentMethodDropdownSerializer, PaymentMethodListSerializer, PaymentMethodSerializer, PaymentMethodStatsSerializer
 )
 from .reports import CampaignReports
+from .identidad import obtener_identidad, filtrar_por_socio
+from .busqueda import buscar, BusquedaOrderingFilter
+from .versiones import condicional
+from .cache_reportes import reporte_cacheado
+from .lectura_rapida import ListadoRapidoMixin
+from .campos_dinamicos import CamposDinamicosMixin
+from .replica import leer_de_primaria
+from . import lectura_rapida
+from . import geoespacial
+from . import productividad
+from . import importacion_socios
+from . import autenticacion
+from . import transiciones
+from . import metricas
+from . import pagos_stripe
+from . import sincronizacion
+from . import carga_offline
+from . import catalogo_insumos
+from . import versiones
+
+
+logger = logging.getLogger(__name__)
 
 
 # Función auxiliar para obtener IP del cliente
@@ -118,37 +148,19 @@ def login_view(request):
     CU1: Iniciar sesión (web/móvil)
     T011: Autenticación y gestión de sesiones
     T013: Bitácora de auditoría básica
+    T030: Bloqueo de cuenta por intentos fallidos
     """
     try:
-        print("=== LOGIN DEBUG ===")
-        print(f"Content-Type: {request.content_type}")
-        print(f"Method: {request.method}")
-        print(f"Headers: {dict(request.headers)}")
-
-        # Use DRF's request.data for consistent parsing
-        if request.content_type == 'application/json':
+        # DRF parsea JSON y form-data en request.data
+        try:
             data = request.data
-            username = data.get('username')
-            password = data.get('password')
-            print(f"Parsed JSON data: {data}")
-            print(f"Username: {username}, Password: {'*' * len(password) if password else None}")
-        elif hasattr(request, 'POST') and request.POST:
-            # Handle form data
-            username = request.POST.get('username')
-            password = request.POST.get('password')
-        else:
-            # Fallback to manual parsing if needed
-            try:
-                import json
-                raw_body = request.body.decode('utf-8')
-                data = json.loads(raw_body)
-                username = data.get('username')
-                password = data.get('password')
-            except (json.JSONDecodeError, UnicodeDecodeError, AttributeError):
-                return Response(
-                    {'error': 'Formato de datos no soportado'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
+        except ParseError:
+            return Response(
+                {'error': 'Formato de datos no soportado'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        username = data.get('username')
+        password = data.get('password')
 
         if not username or not password:
             return Response(
@@ -156,7 +168,13 @@ def login_view(request):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Test basic authentication
+        # Cuenta bloqueada: responder sin hashear la contraseña
+        if autenticacion.esta_bloqueado(username):
+            return Response(
+                {'error': 'Cuenta bloqueada. Contacte al administrador'},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
         user = authenticate(request, username=username, password=password)
 
         if user:
@@ -170,26 +188,8 @@ def login_view(request):
             # Login exitoso
             login(request, user)
 
-            # Reset failed attempts
-            user.intentos_fallidos = 0
-            user.ultimo_intento = timezone.now()
-            user.save()
-
-            # Registrar login en bitácora - T013
-            BitacoraAuditoria.objects.create(
-                usuario=user,
-                accion='LOGIN',
-                tabla_afectada='usuario',
-                registro_id=user.id,
-                detalles={
-                    'ip': request.META.get('REMOTE_ADDR'),
-                    'user_agent': request.META.get('HTTP_USER_AGENT'),
-                    'metodo_autenticacion': 'credenciales',
-                    'estado_usuario': user.estado
-                },
-                ip_address=request.META.get('REMOTE_ADDR'),
-                user_agent=request.META.get('HTTP_USER_AGENT') or 'Unknown'
-            )
+            # Reset failed attempts y registro en bitácora - T013
+            autenticacion.registrar_login_exitoso(request, user)
 
             # Simple response without serializer for now
             return Response({
@@ -207,16 +207,18 @@ def login_view(request):
                 'csrf_token': get_token(request)
             })
 
-        else:
+        if autenticacion.registrar_login_fallido(request, username):
             return Response(
-                {'error': 'Credenciales inválidas'},
-                status=status.HTTP_401_UNAUTHORIZED
+                {'error': 'Cuenta bloqueada por exceso de intentos fallidos'},
+                status=status.HTTP_403_FORBIDDEN
             )
+        return Response(
+            {'error': 'Credenciales inválidas'},
+            status=status.HTTP_401_UNAUTHORIZED
+        )
     except Exception as e:
         # Catch any unexpected errors
-        print(f"Unexpected error in login_view: {e}")
-        import traceback
-        traceback.print_exc()
+        logger.exception('login_error')
         return Response(
             {'error': f'Error interno del servidor: {str(e)}'},
             status=status.HTTP_500_INTERNAL_SERVER_ERROR
@@ -397,13 +399,19 @@ def force_logout_user(request, user_id):
         )
 
 
+def roles_precargados(ruta='usuariorol_set'):
+    """Prefetch de UsuarioRol con su rol para UsuarioSerializer.get_roles"""
+    return Prefetch(ruta, queryset=UsuarioRol.objects.select_related('rol'))
+
+
 class RolViewSet(viewsets.ModelViewSet):
     queryset = Rol.objects.all()
     serializer_class = RolSerializer
     permission_classes = [IsAuthenticated]
 
     def get_queryset(self):
-        queryset = super().get_queryset()
+        # usuarios_count anotado: una sola consulta para todo el listado
+        queryset = super().get_queryset().annotate(usuarios_count=Count('usuariorol'))
         # Solo administradores pueden ver roles del sistema
         if not self.request.user.is_staff:
             queryset = queryset.filter(es_sistema=False)
@@ -615,7 +623,8 @@ class UsuarioViewSet(viewsets.ModelViewSet):
         return UsuarioSerializer
 
     def get_queryset(self):
-        queryset = super().get_queryset()
+        # Roles y socio (edad) precargados para UsuarioSerializer
+        queryset = super().get_queryset().select_related('socio').prefetch_related(roles_precargados())
         # Filter by current user if not admin (users can only see themselves)
         user = self.request.user
         if not user.is_staff:
@@ -697,25 +706,11 @@ class UsuarioViewSet(viewsets.ModelViewSet):
     def activar(self, request, pk=None):
         """CU3: Activar usuario"""
         usuario = self.get_object()
-        usuario.estado = 'ACTIVO'
-        usuario.save()
-
-        # Si es socio, activar también
-        try:
-            socio = Socio.objects.get(usuario=usuario)
-            socio.estado = 'ACTIVO'
-            socio.save()
-        except Socio.DoesNotExist:
-            pass
-
-        # Registrar en bitácora
-        BitacoraAuditoria.objects.create(
-            usuario=request.user,
-            accion='ACTIVAR_USUARIO',
-            tabla_afectada='usuario',
-            registro_id=usuario.id,
-            detalles={'activado_por': request.user.usuario}
+        transiciones.aplicar_transicion(
+            'usuarios', 'ACTIVO', ids=[usuario.id],
+            usuario=request.user, cliente=autenticacion.datos_cliente(request)
         )
+        usuario.refresh_from_db()
 
         serializer = self.get_serializer(usuario)
         return Response(serializer.data)
@@ -724,25 +719,11 @@ class UsuarioViewSet(viewsets.ModelViewSet):
     def desactivar(self, request, pk=None):
         """CU3: Desactivar usuario"""
         usuario = self.get_object()
-        usuario.estado = 'INACTIVO'
-        usuario.save()
-
-        # Si es socio, desactivar también
-        try:
-            socio = Socio.objects.get(usuario=usuario)
-            socio.estado = 'INACTIVO'
-            socio.save()
-        except Socio.DoesNotExist:
-            pass
-
-        # Registrar en bitácora
-        BitacoraAuditoria.objects.create(
-            usuario=request.user,
-            accion='DESACTIVAR_USUARIO',
-            tabla_afectada='usuario',
-            registro_id=usuario.id,
-            detalles={'desactivado_por': request.user.usuario}
+        transiciones.aplicar_transicion(
+            'usuarios', 'INACTIVO', ids=[usuario.id],
+            usuario=request.user, cliente=autenticacion.datos_cliente(request)
         )
+        usuario.refresh_from_db()
 
         serializer = self.get_serializer(usuario)
         return Response(serializer.data)
@@ -768,8 +749,10 @@ class ComunidadViewSet(viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
 
 
-class SocioViewSet(viewsets.ModelViewSet):
-    queryset = Socio.objects.select_related('usuario', 'comunidad')
+class SocioViewSet(CamposDinamicosMixin, viewsets.ModelViewSet):
+    queryset = Socio.objects.select_related('usuario', 'comunidad').prefetch_related(
+        roles_precargados('usuario__usuariorol_set')
+    )
     serializer_class = SocioSerializer
     permission_classes = [IsAuthenticated]
 
@@ -793,14 +776,7 @@ class SocioViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         queryset = super().get_queryset()
         # Filter by current user's socio if not admin
-        user = self.request.user
-        if not user.is_staff:
-            try:
-                socio = Socio.objects.get(usuario=user)
-                queryset = queryset.filter(id=socio.id)
-            except Socio.DoesNotExist:
-                queryset = queryset.none()
-        return queryset
+        return filtrar_por_socio(queryset, self.request, campo='id')
 
     def perform_create(self, serializer):
         """T014: Registrar creación de socio en bitácora"""
@@ -839,19 +815,11 @@ class SocioViewSet(viewsets.ModelViewSet):
     def activar(self, request, pk=None):
         """CU3: Activar socio"""
         socio = self.get_object()
-        socio.estado = 'ACTIVO'
-        socio.usuario.estado = 'ACTIVO'
-        socio.save()
-        socio.usuario.save()
-
-        # Registrar en bitácora
-        BitacoraAuditoria.objects.create(
-            usuario=request.user,
-            accion='ACTIVAR_SOCIO',
-            tabla_afectada='socio',
-            registro_id=socio.id,
-            detalles={'activado_por': request.user.usuario}
+        transiciones.aplicar_transicion(
+            'socios', 'ACTIVO', ids=[socio.id],
+            usuario=request.user, cliente=autenticacion.datos_cliente(request)
         )
+        socio = self.get_queryset().get(pk=socio.pk)
 
         serializer = self.get_serializer(socio)
         return Response(serializer.data)
@@ -860,19 +828,11 @@ class SocioViewSet(viewsets.ModelViewSet):
     def desactivar(self, request, pk=None):
         """CU3: Desactivar socio"""
         socio = self.get_object()
-        socio.estado = 'INACTIVO'
-        socio.usuario.estado = 'INACTIVO'
-        socio.save()
-        socio.usuario.save()
-
-        # Registrar en bitácora
-        BitacoraAuditoria.objects.create(
-            usuario=request.user,
-            accion='DESACTIVAR_SOCIO',
-            tabla_afectada='socio',
-            registro_id=socio.id,
-            detalles={'desactivado_por': request.user.usuario}
+        transiciones.aplicar_transicion(
+            'socios', 'INACTIVO', ids=[socio.id],
+            usuario=request.user, cliente=autenticacion.datos_cliente(request)
         )
+        socio = self.get_queryset().get(pk=socio.pk)
 
         serializer = self.get_serializer(socio)
         return Response(serializer.data)
@@ -894,21 +854,27 @@ class SocioViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
 
-class ParcelaViewSet(viewsets.ModelViewSet):
+class ParcelaViewSet(CamposDinamicosMixin, viewsets.ModelViewSet):
     queryset = Parcela.objects.select_related('socio__usuario')
     serializer_class = ParcelaSerializer
     permission_classes = [IsAuthenticated]
 
+    RADIO_MAXIMO_KM = 200
+    LIMITE_CERCANAS = 100
+
     def get_queryset(self):
         queryset = super().get_queryset()
         # Filter by current user's parcels if not admin
-        user = self.request.user
-        if not user.is_staff:
+        queryset = filtrar_por_socio(queryset, self.request)
+
+        # Rectángulo visible del mapa: ?bbox=sur,oeste,norte,este
+        bbox = self.request.query_params.get('bbox')
+        if bbox and self.action == 'list':
             try:
-                socio = Socio.objects.get(usuario=user)
-                queryset = queryset.filter(socio=socio)
-            except Socio.DoesNotExist:
-                queryset = queryset.none()
+                sur, oeste, norte, este = [float(valor) for valor in bbox.split(',')]
+            except ValueError:
+                raise serializers.ValidationError({'bbox': 'Formato inválido. Use: sur,oeste,norte,este'})
+            queryset = queryset.filter(geoespacial.filtro_rectangulo(sur, oeste, norte, este))
         return queryset
 
     def perform_create(self, serializer):
@@ -918,6 +884,63 @@ class ParcelaViewSet(viewsets.ModelViewSet):
             raise serializers.ValidationError('La superficie debe ser mayor a 0')
         serializer.save()
 
+    @action(detail=False, methods=['get'])
+    def cercanas(self, request):
+        """
+        CU4: Parcelas a menos de radio_km de un punto (?lat=&lng=) o del
+        centro de las parcelas de una comunidad (?comunidad=), por distancia.
+        """
+        try:
+            radio_km = float(request.query_params.get('radio_km', 5))
+            limite = int(request.query_params.get('limite', self.LIMITE_CERCANAS))
+        except ValueError:
+            return Response({'error': 'radio_km y limite deben ser numéricos'}, status=status.HTTP_400_BAD_REQUEST)
+        if radio_km <= 0 or radio_km > self.RADIO_MAXIMO_KM:
+            return Response(
+                {'error': f'radio_km debe estar entre 0 y {self.RADIO_MAXIMO_KM}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        limite = min(max(limite, 1), self.LIMITE_CERCANAS)
+
+        comunidad_id = request.query_params.get('comunidad')
+        if comunidad_id:
+            centro = Parcela.objects.filter(
+                socio__comunidad_id=comunidad_id, latitud__isnull=False, longitud__isnull=False
+            ).aggregate(latitud=Avg('latitud'), longitud=Avg('longitud'))
+            if centro['latitud'] is None:
+                return Response(
+                    {'error': 'La comunidad no tiene parcelas con coordenadas'},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+            latitud, longitud = float(centro['latitud']), float(centro['longitud'])
+        else:
+            try:
+                latitud = float(request.query_params['lat'])
+                longitud = float(request.query_params['lng'])
+            except (KeyError, ValueError):
+                return Response(
+                    {'error': 'Debe especificar lat y lng, o comunidad'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            if not (-90 <= latitud <= 90 and -180 <= longitud <= 180):
+                return Response({'error': 'Coordenadas fuera de rango'}, status=status.HTTP_400_BAD_REQUEST)
+
+        resultados = geoespacial.parcelas_cercanas(
+            self.get_queryset(), latitud, longitud, radio_km, limite=limite
+        )
+        parcelas = []
+        for parcela, distancia in resultados:
+            datos = self.get_serializer(parcela).data
+            datos['distancia_km'] = round(distancia, 3)
+            parcelas.append(datos)
+
+        return Response({
+            'centro': {'latitud': latitud, 'longitud': longitud},
+            'radio_km': radio_km,
+            'count': len(parcelas),
+            'results': parcelas
+        })
+
 
 class CultivoViewSet(viewsets.ModelViewSet):
     queryset = Cultivo.objects.select_related('parcela__socio__usuario')
@@ -927,14 +950,7 @@ class CultivoViewSet(viewsets.ModelViewSet):
     def get_queryset(self):
         queryset = super().get_queryset()
         # Filter by current user's crops if not admin
-        user = self.request.user
-        if not user.is_staff:
-            try:
-                socio = Socio.objects.get(usuario=user)
-                queryset = queryset.filter(parcela__socio=socio)
-            except Socio.DoesNotExist:
-                queryset = queryset.none()
-        return queryset
+        return filtrar_por_socio(queryset, self.request, campo='parcela__socio')
 
 
 class BitacoraAuditoriaViewSet(viewsets.ReadOnlyModelViewSet):
@@ -993,6 +1009,52 @@ def crear_socio_completo(request):
     return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def importar_socios(request):
+    """
+    CU3: Alta masiva de socios desde CSV/JSON
+    T014: CRUD de socios con validaciones
+    T027: Validación de duplicados
+
+    Acepta un archivo multipart en 'archivo' o un JSON con la lista de socios.
+    Con ?validar_solo=true devuelve el reporte de errores sin insertar.
+    """
+    if not request.user.is_staff:
+        return Response(
+            {'error': 'Permisos insuficientes'},
+            status=status.HTTP_403_FORBIDDEN
+        )
+
+    validar_solo = request.query_params.get('validar_solo', '').lower() in ('1', 'true', 'si')
+    try:
+        archivo = request.FILES.get('archivo')
+        if archivo is not None:
+            formato = 'json' if archivo.name.lower().endswith('.json') else 'csv'
+            registros = importacion_socios.leer_archivo(archivo.read(), formato)
+        else:
+            registros = request.data if isinstance(request.data, list) else request.data.get('socios')
+            if not isinstance(registros, list) or not all(isinstance(fila, dict) for fila in registros):
+                raise importacion_socios.ArchivoInvalido(
+                    'Envíe un archivo en "archivo" o una lista de socios (objetos) en "socios"'
+                )
+    except (importacion_socios.ArchivoInvalido, UnicodeDecodeError) as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    reporte = importacion_socios.importar_socios(
+        registros,
+        creado_por=request.user,
+        validar_solo=validar_solo,
+        cliente=autenticacion.datos_cliente(request)
+    )
+
+    if validar_solo:
+        return Response(reporte, status=status.HTTP_200_OK)
+    if reporte['creados'] == 0 and reporte['errores']:
+        return Response(reporte, status=status.HTTP_400_BAD_REQUEST)
+    return Response(reporte, status=status.HTTP_201_CREATED)
+
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def activar_desactivar_socio(request, socio_id):
@@ -1024,27 +1086,12 @@ def activar_desactivar_socio(request, socio_id):
         )
 
     nuevo_estado = 'ACTIVO' if accion == 'activar' else 'INACTIVO'
-    socio.estado = nuevo_estado
-    socio.save()
-
-    # Actualizar estado del usuario también
-    socio.usuario.estado = nuevo_estado
-    socio.usuario.save()
-
-    # Registrar en bitácora
-    BitacoraAuditoria.objects.create(
-        usuario=request.user,
-        accion='ACTIVAR_SOCIO' if accion == 'activar' else 'DESACTIVAR_SOCIO',
-        tabla_afectada='socio',
-        registro_id=socio.id,
-        detalles={
-            'nuevo_estado': nuevo_estado,
-            'usuario_afectado': socio.usuario.usuario,
-            'modificado_por': request.user.usuario
-        },
-        ip_address=request.META.get('REMOTE_ADDR'),
-        user_agent=request.META.get('HTTP_USER_AGENT') or 'Unknown'
+    # Actualiza socio y usuario y registra en bitácora (ver transiciones.py)
+    transiciones.aplicar_transicion(
+        'socios', nuevo_estado, ids=[socio.id],
+        usuario=request.user, cliente=autenticacion.datos_cliente(request)
     )
+    socio = Socio.objects.select_related('usuario').get(id=socio.id)
 
     serializer = SocioSerializer(socio)
     return Response({
@@ -1083,31 +1130,12 @@ def activar_desactivar_usuario(request, usuario_id):
         )
 
     nuevo_estado = 'ACTIVO' if accion == 'activar' else 'INACTIVO'
-    usuario.estado = nuevo_estado
-    usuario.save()
-
-    # Si el usuario es socio, actualizar también el estado del socio
-    try:
-        socio = Socio.objects.get(usuario=usuario)
-        socio.estado = nuevo_estado
-        socio.save()
-    except Socio.DoesNotExist:
-        pass
-
-    # Registrar en bitácora
-    BitacoraAuditoria.objects.create(
-        usuario=request.user,
-        accion='ACTIVAR_USUARIO' if accion == 'activar' else 'DESACTIVAR_USUARIO',
-        tabla_afectada='usuario',
-        registro_id=usuario.id,
-        detalles={
-            'nuevo_estado': nuevo_estado,
-            'usuario_afectado': usuario.usuario,
-            'modificado_por': request.user.usuario
-        },
-        ip_address=request.META.get('REMOTE_ADDR'),
-        user_agent=request.META.get('HTTP_USER_AGENT') or 'Unknown'
+    # Al activar también reinicia los intentos fallidos y actualiza el socio
+    transiciones.aplicar_transicion(
+        'usuarios', nuevo_estado, ids=[usuario.id],
+        usuario=request.user, cliente=autenticacion.datos_cliente(request)
     )
+    usuario.refresh_from_db()
 
     serializer = UsuarioSerializer(usuario)
     return Response({
@@ -1116,6 +1144,71 @@ def activar_desactivar_usuario(request, usuario_id):
     })
 
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def transicion_masiva(request, recurso):
+    """
+    CU3: Cambio de estado masivo sobre un conjunto filtrado
+    T012: Gestión de usuarios (inhabilitar/reactivar)
+
+    Body: {"estado": "INACTIVO", "ids": [...] y/o "filtros": {"comunidad": 3},
+           "estado_esperado": "ACTIVO", "no_modificado_desde": "<ISO 8601>",
+           "parcial": true, "motivo": "..."}
+    Un solo UPDATE, un INSERT masivo en bitácora; 409 si hay conflictos y parcial=false.
+    """
+    if not request.user.is_staff:
+        return Response(
+            {'error': 'Permisos insuficientes'},
+            status=status.HTTP_403_FORBIDDEN
+        )
+
+    datos = request.data
+    no_modificado_desde = datos.get('no_modificado_desde')
+    if no_modificado_desde:
+        no_modificado_desde = parse_datetime(str(no_modificado_desde))
+        if no_modificado_desde is None:
+            return Response(
+                {'error': 'no_modificado_desde debe ser una fecha ISO 8601'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if timezone.is_naive(no_modificado_desde):
+            no_modificado_desde = timezone.make_aware(no_modificado_desde)
+
+    filtros = datos.get('filtros') or {}
+    if not isinstance(filtros, dict):
+        return Response({'error': 'filtros debe ser un objeto'}, status=status.HTTP_400_BAD_REQUEST)
+
+    queryset = None
+    if recurso == 'usuarios':
+        # Un administrador no puede desactivarse a sí mismo en bloque; la
+        # exclusión se aplica después de validar que haya ids o filtros
+        queryset = Usuario.objects.exclude(pk=request.user.pk)
+
+    try:
+        reporte = transiciones.aplicar_transicion(
+            recurso,
+            datos.get('estado'),
+            ids=datos.get('ids'),
+            filtros=filtros,
+            queryset=queryset,
+            estado_esperado=datos.get('estado_esperado'),
+            no_modificado_desde=no_modificado_desde,
+            parcial=str(datos.get('parcial', True)).lower() not in ('false', '0', 'no'),
+            usuario=request.user,
+            cliente=autenticacion.datos_cliente(request),
+            motivo=datos.get('motivo', ''),
+        )
+    except transiciones.TransicionInvalida as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    except transiciones.ConflictoConcurrencia as e:
+        return Response(
+            {'error': str(e), 'rechazados': e.rechazados},
+            status=status.HTTP_409_CONFLICT
+        )
+
+    return Response(reporte)
+
+
 @api_view(['GET'])
 @permission_classes([AllowAny])
 def buscar_socios_avanzado(request):
@@ -1141,6 +1234,11 @@ def buscar_socios_avanzado(request):
     estado = request.query_params.get('estado', '').strip()
     codigo_interno = request.query_params.get('codigo_interno', '').strip()
     sexo = request.query_params.get('sexo', '').strip()
+    q = request.query_params.get('q', '').strip()
+
+    # Búsqueda unificada por relevancia
+    if q:
+        queryset = buscar(queryset, q)
 
     # Aplicar filtros
     if nombre:
@@ -1194,23 +1292,23 @@ def buscar_socios_por_cultivo(request):
 
     cultivo_especie = request.query_params.get('especie', '').strip()
     cultivo_estado = request.query_params.get('estado', '').strip()
+    q = request.query_params.get('q', '').strip()
 
-    if not cultivo_especie:
+    if not cultivo_especie and not q:
         return Response(
             {'error': 'Debe especificar la especie del cultivo'},
             status=status.HTTP_400_BAD_REQUEST
         )
 
     # Buscar socios que tienen parcelas con cultivos de la especie especificada
-    socios_ids = Cultivo.objects.filter(
-        especie__icontains=cultivo_especie
-    ).select_related('parcela__socio').values_list('parcela__socio', flat=True).distinct()
-
+    cultivos = Cultivo.objects.all()
+    if q:
+        cultivos = buscar(cultivos, q)
+    if cultivo_especie:
+        cultivos = cultivos.filter(especie__icontains=cultivo_especie)
     if cultivo_estado:
-        socios_ids = Cultivo.objects.filter(
-            especie__icontains=cultivo_especie,
-            estado=cultivo_estado
-        ).select_related('parcela__socio').values_list('parcela__socio', flat=True).distinct()
+        cultivos = cultivos.filter(estado=cultivo_estado)
+    socios_ids = cultivos.order_by().values_list('parcela__socio', flat=True).distinct()
 
     queryset = Socio.objects.filter(id__in=socios_ids).select_related('usuario', 'comunidad')
 
@@ -1232,7 +1330,8 @@ def buscar_socios_por_cultivo(request):
         'total_pages': (total_count + page_size - 1) // page_size,
         'filtros': {
             'especie_cultivo': cultivo_especie,
-            'estado_cultivo': cultivo_estado
+            'estado_cultivo': cultivo_estado,
+            'q': q
         },
         'results': serializer.data
     })
@@ -1240,6 +1339,7 @@ def buscar_socios_por_cultivo(request):
 
 @api_view(['GET'])
 @permission_classes([AllowAny])
+@reporte_cacheado(Usuario, Socio, Comunidad, Rol, UsuarioRol, solo_staff=True)
 def reporte_usuarios_socios(request):
     """
     CU3: Reporte inicial de usuarios activos/inactivos y socios registrados
@@ -1361,7 +1461,7 @@ class CicloCultivoViewSet(viewsets.ModelViewSet):
     CU4: Gestión de Ciclos de Cultivo
     T041: Gestión de ciclos de cultivo
     """
-    queryset = CicloCultivo.objects.all().select_related('cultivo__parcela')
+    queryset = CicloCultivo.objects.all().select_related('cultivo__parcela__socio__usuario')
     serializer_class = CicloCultivoSerializer
     permission_classes = [IsAuthenticated]
 
@@ -1475,7 +1575,7 @@ class TratamientoViewSet(viewsets.ModelViewSet):
     CU4: Gestión de Tratamientos
     T043: Gestión de tratamientos
     """
-    queryset = Tratamiento.objects.all().select_related('ciclo_cultivo__cultivo__parcela', 'ciclo_cultivo__cultivo')
+    queryset = Tratamiento.objects.all().select_related('ciclo_cultivo__cultivo__parcela__socio__usuario')
     serializer_class = TratamientoSerializer
     permission_classes = [IsAuthenticated]
 
@@ -1532,7 +1632,7 @@ class AnalisisSueloViewSet(viewsets.ModelViewSet):
     CU4: Gestión de Análisis de Suelo
     T044: Gestión de análisis de suelo
     """
-    queryset = AnalisisSuelo.objects.all().select_related('parcela')
+    queryset = AnalisisSuelo.objects.all().select_related('parcela__socio__usuario')
     serializer_class = AnalisisSueloSerializer
     permission_classes = [IsAuthenticated]
 
@@ -1660,7 +1760,7 @@ def buscar_ciclos_cultivo_avanzado(request):
     fecha_inicio_hasta = request.query_params.get('fecha_inicio_hasta')
 
     queryset = CicloCultivo.objects.select_related(
-        'cultivo__parcela__socio__comunidad', 'cultivo'
+        'cultivo__parcela__socio__comunidad', 'cultivo__parcela__socio__usuario'
     ).filter(cultivo__parcela__socio__estado='ACTIVO')
 
     if especie:
@@ -1703,6 +1803,7 @@ def buscar_ciclos_cultivo_avanzado(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@reporte_cacheado(ProductividadParcela, ResumenTratamientoMensual, AnalisisSuelo, Parcela, solo_staff=True)
 def reporte_productividad_parcelas(request):
     """
     CU4: Reporte de productividad de parcelas
@@ -1714,37 +1815,64 @@ def reporte_productividad_parcelas(request):
             status=status.HTTP_403_FORBIDDEN
         )
 
+    productividad.asegurar_inicializado()
+
+    # Lectura desde la tabla de hechos precalculada (ver cooperativa/productividad.py)
+    hechos = ProductividadParcela.objects.all()
+    temporada = request.query_params.get('temporada', '').strip()
+    if temporada:
+        hechos = hechos.filter(temporada=temporada)
+
     # Estadísticas generales de cosechas
-    cosechas_total = Cosecha.objects.count()
-    cosechas_completadas = Cosecha.objects.filter(estado='COMPLETADA').count()
-    cosechas_pendientes = Cosecha.objects.filter(estado='PENDIENTE').count()
+    totales = hechos.aggregate(
+        total=Sum('num_cosechas'),
+        completadas=Sum('num_cosechas_completadas'),
+        pendientes=Sum('num_cosechas_pendientes')
+    )
+    cosechas_total = totales['total'] or 0
+    cosechas_completadas = totales['completadas'] or 0
+    cosechas_pendientes = totales['pendientes'] or 0
 
     # Productividad por especie
-    productividad_por_especie = Cultivo.objects.annotate(
-        total_cosechado=Sum('ciclocultivo__cosecha__cantidad_cosechada'),
-        num_ciclos=Count('ciclocultivo', distinct=True),
-        num_cosechas=Count('ciclocultivo__cosecha', distinct=True)
-    ).values('especie', 'total_cosechado', 'num_ciclos', 'num_cosechas').order_by('-total_cosechado')
+    productividad_por_especie = hechos.values('especie').annotate(
+        total=Sum('total_cosechado'),
+        ciclos=Sum('num_ciclos'),
+        cosechas=Sum('num_cosechas')
+    ).order_by('-total')
+    productividad_por_especie = [
+        {
+            'especie': fila['especie'],
+            'total_cosechado': fila['total'],
+            'num_ciclos': fila['ciclos'],
+            'num_cosechas': fila['cosechas']
+        }
+        for fila in productividad_por_especie
+    ]
 
     # Rendimiento promedio por parcela
-    rendimiento_parcelas = Parcela.objects.annotate(
-        total_cosechado=Sum('cultivo__ciclocultivo__cosecha__cantidad_cosechada'),
-        superficie_total=F('superficie_hectareas')
-    ).filter(total_cosechado__isnull=False).values(
-        'nombre', 'superficie_total', 'total_cosechado'
+    rendimiento_parcelas = hechos.values('parcela_id', 'parcela__nombre').annotate(
+        superficie=Max('superficie_hectareas'),
+        total=Sum('total_cosechado')
     ).annotate(
-        rendimiento_promedio=Case(
-            When(superficie_total__gt=0, then=F('total_cosechado') / F('superficie_total')),
+        rendimiento=Case(
+            When(superficie__gt=0, then=F('total') / F('superficie')),
             default=0,
-            output_field=DecimalField(max_digits=10, decimal_places=2)
-        )
-    ).order_by('-rendimiento_promedio')[:20]
+            output_field=DecimalField(max_digits=14, decimal_places=2)
+        )
+    ).order_by('-rendimiento')[:20]
+    rendimiento_parcelas = [
+        {
+            'nombre': fila['parcela__nombre'],
+            'superficie_total': fila['superficie'],
+            'total_cosechado': fila['total'],
+            'rendimiento_promedio': fila['rendimiento']
+        }
+        for fila in rendimiento_parcelas
+    ]
 
     # Tratamientos aplicados por mes
-    tratamientos_por_mes = Tratamiento.objects.annotate(
-        mes=TruncMonth('fecha_aplicacion')
-    ).values('mes', 'tipo_tratamiento').annotate(
-        count=Count('id')
+    tratamientos_por_mes = ResumenTratamientoMensual.objects.values(
+        'mes', 'tipo_tratamiento', count=F('cantidad')
     ).order_by('mes', 'tipo_tratamiento')[:24]
 
     # Análisis de suelo por tipo
@@ -1764,34 +1892,39 @@ def reporte_productividad_parcelas(request):
         'productividad_por_especie': list(productividad_por_especie),
         'rendimiento_parcelas_top20': list(rendimiento_parcelas),
         'tratamientos_por_mes': list(tratamientos_por_mes),
-        'analisis_suelo_por_tipo': list(analisis_por_tipo)
+        'analisis_suelo_por_tipo': list(analisis_por_tipo),
+        'temporada': temporada or None,
+        'as_of': productividad.fecha_actualizacion()
     })
 
 
+# CU4: tipos de suelo (catálogo estático)
+TIPOS_SUELO = [
+    'ARCILLOSO',
+    'ARENAL',
+    'LIMOSO',
+    'FRANCO',
+    'FRANCO-ARCILLOSO',
+    'FRANCO-ARENAL',
+    'FRANCO-LIMOSO',
+    'ARCILLO-LIMOSO',
+    'ARENAL-LIMOSO',
+    'TURBA',
+    'CALCAREO',
+    'SALINO',
+    'PEDREGOSO'
+]
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@condicional(datos=TIPOS_SUELO)
 def get_tipos_suelo(request):
     """
     CU4: Obtener tipos de suelo disponibles
     """
-    tipos_suelo = [
-        'ARCILLOSO',
-        'ARENAL',
-        'LIMOSO',
-        'FRANCO',
-        'FRANCO-ARCILLOSO',
-        'FRANCO-ARENAL',
-        'FRANCO-LIMOSO',
-        'ARCILLO-LIMOSO',
-        'ARENAL-LIMOSO',
-        'TURBA',
-        'CALCAREO',
-        'SALINO',
-        'PEDREGOSO'
-    ]
-
     return Response({
-        'tipos_suelo': tipos_suelo
+        'tipos_suelo': TIPOS_SUELO
     })
 
 
@@ -2304,6 +2437,7 @@ def validar_permiso_usuario(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@reporte_cacheado(Rol, UsuarioRol, Usuario, solo_staff=True)
 def reporte_roles_permisos(request):
     """
     CU6: Reporte de roles y permisos
@@ -2465,7 +2599,7 @@ def buscar_roles_avanzado(request):
     end = start + page_size
 
     total_count = queryset.count()
-    roles = queryset[start:end]
+    roles = queryset.annotate(usuarios_count=Count('usuariorol'))[start:end]
 
     serializer = RolSerializer(roles, many=True)
 
@@ -2663,6 +2797,11 @@ def buscar_parcelas_avanzado(request):
     superficie_max = request.query_params.get('superficie_max', '').strip()
     fecha_desde = request.query_params.get('fecha_desde', '').strip()
     fecha_hasta = request.query_params.get('fecha_hasta', '').strip()
+    q = request.query_params.get('q', '').strip()
+
+    # Búsqueda unificada por relevancia
+    if q:
+        queryset = buscar(queryset, q)
 
     # Aplicar filtros
     if nombre:
@@ -2726,7 +2865,7 @@ class SemillaPagination(PageNumberPagination):
     max_page_size = 100
 
 
-class SemillaViewSet(viewsets.ModelViewSet):
+class SemillaViewSet(ListadoRapidoMixin, viewsets.ModelViewSet):
     """
     CU7: ViewSet para gestión completa de semillas del inventario
     T-40: Implementar el catálogo de inventario de Semillas
@@ -2735,10 +2874,11 @@ class SemillaViewSet(viewsets.ModelViewSet):
     queryset = Semilla.objects.all()
     serializer_class = SemillaSerializer
     permission_classes = [IsAuthenticated]
-    filter_backends = [OrderingFilter]
+    filter_backends = [BusquedaOrderingFilter]
     ordering_fields = ['especie', 'variedad', 'cantidad', 'fecha_vencimiento', 'porcentaje_germinacion', 'creado_en']
     ordering = ['-creado_en']  # Orden por defecto
     pagination_class = SemillaPagination
+    plan_rapido = lectura_rapida.SEMILLAS  # ?rapido=1
 
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -2755,6 +2895,9 @@ class SemillaViewSet(viewsets.ModelViewSet):
         porcentaje_germinacion_min = self.request.query_params.get('pg_min')
         porcentaje_germinacion_max = self.request.query_params.get('pg_max')
 
+        q = self.request.query_params.get('q', '').strip()
+        if q:
+            queryset = buscar(queryset, q)
         if especie:
             queryset = queryset.filter(especie__icontains=especie)
         if variedad:
@@ -2892,7 +3035,10 @@ class SemillaViewSet(viewsets.ModelViewSet):
 
         semilla.estado = 'VENCIDA'
         # Usar update para evitar que save() sobrescriba el estado
-        Semilla.objects.filter(pk=semilla.pk).update(estado='VENCIDA')
+        Semilla.objects.filter(pk=semilla.pk).update(estado='VENCIDA', actualizado_en=timezone.now())
+        # update() no dispara señales: catálogo de insumos, ETags y reportes
+        catalogo_insumos.programar(Semilla, [semilla.pk])
+        versiones.incrementar(Semilla)
 
         # Registrar en bitácora
         BitacoraAuditoria.objects.create(
@@ -2939,32 +3085,21 @@ class SemillaViewSet(viewsets.ModelViewSet):
         CU7: Obtener semillas próximas a vencer
         """
         dias = int(request.query_params.get('dias', 30))
+        hoy = timezone.localdate()
 
         # Si dias=0, incluir semillas vencidas y las que vencen hoy
         if dias == 0:
-            semillas = self.get_queryset().filter(
-                estado__in=['DISPONIBLE', 'VENCIDA']
+            proximas_vencer = self.get_queryset().filter(
+                estado__in=['DISPONIBLE', 'VENCIDA'], fecha_vencimiento__lte=hoy
             )
         else:
-            semillas = self.get_queryset().filter(
-                estado='DISPONIBLE'
+            proximas_vencer = self.get_queryset().filter(
+                estado='DISPONIBLE', fecha_vencimiento__range=(hoy, hoy + timedelta(days=dias))
             )
 
-        # Filtrar las que están próximas a vencer o vencidas
-        proximas_vencer = []
-        for semilla in semillas:
-            if dias == 0:
-                # Para dias=0, incluir vencidas y las que vencen hoy
-                if semilla.esta_vencida() or semilla.esta_proxima_vencer(0):
-                    proximas_vencer.append(semilla)
-            else:
-                # Para otros días, usar la lógica normal
-                if semilla.esta_proxima_vencer(dias):
-                    proximas_vencer.append(semilla)
-
         serializer = self.get_serializer(proximas_vencer, many=True)
         return Response({
-            'count': len(proximas_vencer),
+            'count': len(serializer.data),
             'dias': dias,
             'results': serializer.data
         })
@@ -2985,6 +3120,7 @@ class SemillaViewSet(viewsets.ModelViewSet):
         })
 
     @action(detail=False, methods=['get'])
+    @reporte_cacheado(Semilla)
     def reporte_inventario(self, request):
         """
         CU7: Reporte general del inventario de semillas
@@ -3046,7 +3182,7 @@ class PesticidaPagination(PageNumberPagination):
     max_page_size = 100
 
 
-class PesticidaViewSet(viewsets.ModelViewSet):
+class PesticidaViewSet(ListadoRapidoMixin, viewsets.ModelViewSet):
     """
     CU8: ViewSet para gestión completa de pesticidas del inventario
     T-42: Gestión de Inventario de Pesticidas
@@ -3054,10 +3190,11 @@ class PesticidaViewSet(viewsets.ModelViewSet):
     queryset = Pesticida.objects.all()
     serializer_class = PesticidaSerializer
     permission_classes = [IsAuthenticated]
-    filter_backends = [OrderingFilter]
+    filter_backends = [BusquedaOrderingFilter]
     ordering_fields = ['nombre_comercial', 'tipo_pesticida', 'cantidad', 'fecha_vencimiento', 'creado_en']
     ordering = ['-creado_en']
     pagination_class = PesticidaPagination
+    plan_rapido = lectura_rapida.PESTICIDAS  # ?rapido=1
 
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -3072,6 +3209,9 @@ class PesticidaViewSet(viewsets.ModelViewSet):
         fecha_vencimiento_desde = self.request.query_params.get('fecha_vencimiento_desde')
         fecha_vencimiento_hasta = self.request.query_params.get('fecha_vencimiento_hasta')
 
+        q = self.request.query_params.get('q', '').strip()
+        if q:
+            queryset = buscar(queryset, q)
         if nombre:
             queryset = queryset.filter(nombre_comercial__icontains=nombre)
         if tipo:
@@ -3195,7 +3335,10 @@ class PesticidaViewSet(viewsets.ModelViewSet):
             )
 
         pesticida.estado = 'VENCIDO'
-        Pesticida.objects.filter(pk=pesticida.pk).update(estado='VENCIDO')
+        Pesticida.objects.filter(pk=pesticida.pk).update(estado='VENCIDO', actualizado_en=timezone.now())
+        # update() no dispara señales: catálogo de insumos, ETags y reportes
+        catalogo_insumos.programar(Pesticida, [pesticida.pk])
+        versiones.incrementar(Pesticida)
 
         BitacoraAuditoria.objects.create(
             usuario=request.user,
@@ -3219,14 +3362,14 @@ class PesticidaViewSet(viewsets.ModelViewSet):
         """Obtener pesticidas próximos a vencer"""
         dias = int(request.query_params.get('dias', 30))
 
-        proximos_vencer = []
-        for pesticida in self.get_queryset().filter(estado='DISPONIBLE'):
-            if pesticida.esta_proximo_vencer(dias):
-                proximos_vencer.append(pesticida)
+        hoy = timezone.localdate()
+        proximos_vencer = self.get_queryset().filter(
+            estado='DISPONIBLE', fecha_vencimiento__range=(hoy, hoy + timedelta(days=dias))
+        )
 
         serializer = self.get_serializer(proximos_vencer, many=True)
         return Response({
-            'count': len(proximos_vencer),
+            'count': len(serializer.data),
             'dias': dias,
             'results': serializer.data
         })
@@ -3242,6 +3385,7 @@ class PesticidaViewSet(viewsets.ModelViewSet):
         })
 
     @action(detail=False, methods=['get'])
+    @reporte_cacheado(Pesticida)
     def reporte_inventario(self, request):
         """Reporte general del inventario de pesticidas"""
         from django.db.models import Sum, Count, Avg
@@ -3284,7 +3428,7 @@ class FertilizantePagination(PageNumberPagination):
     max_page_size = 100
 
 
-class FertilizanteViewSet(viewsets.ModelViewSet):
+class FertilizanteViewSet(ListadoRapidoMixin, viewsets.ModelViewSet):
     """
     CU8: ViewSet para gestión completa de fertilizantes del inventario
     T-45: Gestión de Inventario de Fertilizantes
@@ -3292,10 +3436,11 @@ class FertilizanteViewSet(viewsets.ModelViewSet):
     queryset = Fertilizante.objects.all()
     serializer_class = FertilizanteSerializer
     permission_classes = [IsAuthenticated]
-    filter_backends = [OrderingFilter]
+    filter_backends = [BusquedaOrderingFilter]
     ordering_fields = ['nombre_comercial', 'tipo_fertilizante', 'cantidad', 'fecha_vencimiento', 'creado_en']
     ordering = ['-creado_en']
     pagination_class = FertilizantePagination
+    plan_rapido = lectura_rapida.FERTILIZANTES  # ?rapido=1
 
     def get_queryset(self):
         queryset = super().get_queryset()
@@ -3310,6 +3455,9 @@ class FertilizanteViewSet(viewsets.ModelViewSet):
         fecha_vencimiento_desde = self.request.query_params.get('fecha_vencimiento_desde')
         fecha_vencimiento_hasta = self.request.query_params.get('fecha_vencimiento_hasta')
 
+        q = self.request.query_params.get('q', '').strip()
+        if q:
+            queryset = buscar(queryset, q)
         if nombre:
             queryset = queryset.filter(nombre_comercial__icontains=nombre)
         if tipo:
@@ -3433,7 +3581,10 @@ class FertilizanteViewSet(viewsets.ModelViewSet):
             )
 
         fertilizante.estado = 'VENCIDO'
-        Fertilizante.objects.filter(pk=fertilizante.pk).update(estado='VENCIDO')
+        Fertilizante.objects.filter(pk=fertilizante.pk).update(estado='VENCIDO', actualizado_en=timezone.now())
+        # update() no dispara señales: catálogo de insumos, ETags y reportes
+        catalogo_insumos.programar(Fertilizante, [fertilizante.pk])
+        versiones.incrementar(Fertilizante)
 
         BitacoraAuditoria.objects.create(
             usuario=request.user,
@@ -3457,14 +3608,14 @@ class FertilizanteViewSet(viewsets.ModelViewSet):
         """Obtener fertilizantes próximos a vencer"""
         dias = int(request.query_params.get('dias', 30))
 
-        proximos_vencer = []
-        for fertilizante in self.get_queryset().filter(estado='DISPONIBLE'):
-            if fertilizante.esta_proximo_vencer(dias):
-                proximos_vencer.append(fertilizante)
+        hoy = timezone.localdate()
+        proximos_vencer = self.get_queryset().filter(
+            estado='DISPONIBLE', fecha_vencimiento__range=(hoy, hoy + timedelta(days=dias))
+        )
 
         serializer = self.get_serializer(proximos_vencer, many=True)
         return Response({
-            'count': len(proximos_vencer),
+            'count': len(serializer.data),
             'dias': dias,
             'results': serializer.data
         })
@@ -3480,6 +3631,7 @@ class FertilizanteViewSet(viewsets.ModelViewSet):
         })
 
     @action(detail=False, methods=['get'])
+    @reporte_cacheado(Fertilizante)
     def reporte_inventario(self, request):
         """Reporte general del inventario de fertilizantes"""
         from django.db.models import Sum, Count, Avg
@@ -3523,7 +3675,7 @@ class FertilizanteViewSet(viewsets.ModelViewSet):
 # T037: Relación entre campania y socios/parcelas
 # ============================================================================
 
-class CampaignViewSet(viewsets.ModelViewSet):
+class CampaignViewSet(CamposDinamicosMixin, viewsets.ModelViewSet):
     """
     CU9: ViewSet para gestión completa de campanias agrícolas
     T036: CRUD completo (list, create, retrieve, update, destroy)
@@ -4024,7 +4176,7 @@ class LaborPagination(PageNumberPagination):
     max_page_size = 100
 
 
-class LaborViewSet(viewsets.ModelViewSet):
+class LaborViewSet(ListadoRapidoMixin, viewsets.ModelViewSet):
     """
     CU10: ViewSet para gestión de labores agrícolas
     CRUD completo con filtros básicos (sin insumos ni responsable)
@@ -4035,6 +4187,7 @@ class LaborViewSet(viewsets.ModelViewSet):
     ordering_fields = ['fecha_labor', 'labor', 'estado', 'creado_en']
     ordering = ['-fecha_labor', '-creado_en']
     pagination_class = LaborPagination
+    plan_rapido = lectura_rapida.LABORES  # ?rapido=1
 
     def get_serializer_class(self):
         if self.action == 'create':
@@ -4157,11 +4310,13 @@ class LaborViewSet(viewsets.ModelViewSet):
         return Response({'mensaje': 'Estado actualizado', 'labor': LaborSerializer(labor).data})
 
     @action(detail=False, methods=['get'])
+    @condicional(datos=Labor.TIPOS_LABOR)
     def tipos_labor(self, request):
         tipos = [{'valor': t[0], 'etiqueta': t[1]} for t in Labor.TIPOS_LABOR]
         return Response(tipos)
 
     @action(detail=False, methods=['get'])
+    @condicional(datos=Labor.ESTADOS)
     def estados_labor(self, request):
         estados = [{'valor': e[0], 'etiqueta': e[1]} for e in Labor.ESTADOS]
         return Response(estados)
@@ -4353,25 +4508,37 @@ def buscar_labores_avanzado(request):
 # Registrar productos cosechados por campania y parcela
 # ============================================================================
 
+def _filtro_productos_de_socio(socio_id):
+    """
+    Productos de las parcelas del socio o de las campanias donde participa.
+    En los de parcela el socio desnormalizado es el de la parcela (usa el
+    índice socio + fecha_cosecha); los de campania se buscan entre todos sus
+    socios asignados, no solo el propietario.
+    """
+    campanias = CampaignPartner.objects.filter(socio_id=socio_id).values('campaign_id')
+    return Q(parcela__isnull=False, socio_id=socio_id) | Q(campania_id__in=campanias)
+
+
 class ProductoCosechadoPagination(PageNumberPagination):
     page_size = 25
     page_size_query_param = 'page_size'
     max_page_size = 100
 
 
-class ProductoCosechadoViewSet(viewsets.ModelViewSet):
+class ProductoCosechadoViewSet(ListadoRapidoMixin, viewsets.ModelViewSet):
     """
     CU15: ViewSet para gestión completa de productos cosechados
     CRUD completo (list, create, retrieve, update, destroy)
     """
     queryset = ProductoCosechado.objects.all().select_related(
-        'cultivo', 'labor', 'campania', 'parcela__socio__usuario'
+        'cultivo', 'labor', 'campania', 'parcela'
     )
     permission_classes = [IsAuthenticated]
     filter_backends = [OrderingFilter]
     ordering_fields = ['fecha_cosecha', 'cantidad', 'estado', 'lote', 'creado_en']
     ordering = ['-fecha_cosecha', '-creado_en']
     pagination_class = ProductoCosechadoPagination
+    plan_rapido = lectura_rapida.PRODUCTOS_COSECHADOS  # ?rapido=1
 
     def get_serializer_class(self):
         """Usar serializer específico según la acción"""
@@ -4418,11 +4585,7 @@ class ProductoCosechadoViewSet(viewsets.ModelViewSet):
         if labor_id:
             queryset = queryset.filter(labor_id=labor_id)
         if socio_id:
-            # Filtrar por socio a través de parcela o campania
-            queryset = queryset.filter(
-                Q(parcela__socio_id=socio_id) | 
-                Q(campania__socios_asignados__socio_id=socio_id)
-            ).distinct()
+            queryset = queryset.filter(_filtro_productos_de_socio(socio_id))
 
         return queryset
 
@@ -4571,6 +4734,7 @@ class ProductoCosechadoViewSet(viewsets.ModelViewSet):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     @action(detail=False, methods=['get'])
+    @condicional(datos=ProductoCosechado.ESTADO_OPCIONES)
     def estados_disponibles(self, request):
         """
         CU15: Obtener lista de estados disponibles
@@ -4590,15 +4754,15 @@ class ProductoCosechadoViewSet(viewsets.ModelViewSet):
         """
         dias_umbral = int(request.query_params.get('dias_umbral', 30))
         
-        productos = self.get_queryset().filter(estado='En Almacén')
-        productos_por_vencer = [
-            producto for producto in productos 
-            if producto.esta_proximo_vencer(dias_umbral)
-        ]
+        # Equivale a esta_proximo_vencer(): dias_en_almacen >= dias_umbral
+        productos_por_vencer = self.get_queryset().filter(
+            estado='En Almacén',
+            fecha_cosecha__lte=timezone.localdate() - timedelta(days=dias_umbral)
+        )
         
         serializer = ProductoCosechadoListSerializer(productos_por_vencer, many=True)
         return Response({
-            'count': len(productos_por_vencer),
+            'count': len(serializer.data),
             'dias_umbral': dias_umbral,
             'results': serializer.data
         })
@@ -4621,6 +4785,7 @@ class ProductoCosechadoViewSet(viewsets.ModelViewSet):
         })
 
     @action(detail=False, methods=['get'])
+    @reporte_cacheado(ProductoCosechado, Cultivo, Campaign, Parcela)
     def reporte_inventario(self, request):
         """
         CU15: Reporte general del inventario de productos cosechados
@@ -4667,11 +4832,13 @@ class ProductoCosechadoViewSet(viewsets.ModelViewSet):
         ).order_by('-total_cantidad')[:10]
 
         # Promedio de días en almacén
-        promedio_dias_almacen = ProductoCosechado.objects.filter(
+        # (dias_en_almacen es un método del modelo: se agrupa por fecha de cosecha)
+        por_fecha = ProductoCosechado.objects.filter(
             estado='En Almacén'
-        ).aggregate(
-            avg_dias=Avg(F('dias_en_almacen'))
-        )['avg_dias'] or 0
+        ).values('fecha_cosecha').annotate(num=Count('id')).order_by()
+        hoy = timezone.localdate()
+        dias_productos = sum((hoy - fila['fecha_cosecha']).days * fila['num'] for fila in por_fecha)
+        promedio_dias_almacen = dias_productos / productos_almacen if productos_almacen else 0
 
         return Response({
             'resumen': {
@@ -4766,7 +4933,7 @@ def buscar_productos_cosechados_avanzado(request):
     GET /api/productos-cosechados/buscar_avanzado/?param1=valor1&param2=valor2...
     """
     queryset = ProductoCosechado.objects.select_related(
-        'cultivo', 'labor', 'campania', 'parcela__socio__usuario'
+        'cultivo', 'labor', 'campania', 'parcela'
     )
 
     # Filtros de búsqueda
@@ -4804,10 +4971,7 @@ def buscar_productos_cosechados_avanzado(request):
     if labor_id:
         queryset = queryset.filter(labor_id=labor_id)
     if socio_id:
-        queryset = queryset.filter(
-            Q(parcela__socio_id=socio_id) | 
-            Q(campania__socios_asignados__socio_id=socio_id)
-        ).distinct()
+        queryset = queryset.filter(_filtro_productos_de_socio(socio_id))
     if especie:
         queryset = queryset.filter(cultivo__especie__icontains=especie)
     if unidad_medida:
@@ -4945,7 +5109,7 @@ def reporte_productos_cosechados_por_periodo(request):
 # SISTEMA DE PAGOS - ViewSets y Endpoints
 # ============================================================================
 
-class PedidoViewSet(viewsets.ModelViewSet):
+class PedidoViewSet(CamposDinamicosMixin, viewsets.ModelViewSet):
     """
     ViewSet para gestión de pedidos/órdenes
     Permite crear, listar, actualizar y consultar pedidos
@@ -4960,16 +5124,8 @@ class PedidoViewSet(viewsets.ModelViewSet):
         return PedidoSerializer
     
     def get_queryset(self):
-        queryset = super().get_queryset()
-        user = self.request.user
-        
         # Si no es admin, solo ver sus propios pedidos
-        if not user.is_staff:
-            try:
-                socio = Socio.objects.get(usuario=user)
-                queryset = queryset.filter(socio=socio)
-            except Socio.DoesNotExist:
-                queryset = queryset.none()
+        queryset = filtrar_por_socio(super().get_queryset(), self.request)
         
         # Filtros
         socio_id = self.request.query_params.get('socio_id')
@@ -5084,7 +5240,7 @@ class PagoViewSet(viewsets.ModelViewSet):
     ViewSet para gestión de pagos
     Permite registrar pagos y consultar historial
     """
-    queryset = Pago.objects.select_related('pedido__socio__usuario', 'registrado_por')
+    queryset = Pago.objects.select_related('pedido__socio__usuario', 'procesado_por')
     serializer_class = PagoSerializer
     permission_classes = [IsAuthenticated]
     
@@ -5096,16 +5252,8 @@ class PagoViewSet(viewsets.ModelViewSet):
         return PagoSerializer
     
     def get_queryset(self):
-        queryset = super().get_queryset()
-        user = self.request.user
-        
         # Si no es admin, solo ver pagos de sus propios pedidos
-        if not user.is_staff:
-            try:
-                socio = Socio.objects.get(usuario=user)
-                queryset = queryset.filter(pedido__socio=socio)
-            except Socio.DoesNotExist:
-                queryset = queryset.none()
+        queryset = filtrar_por_socio(super().get_queryset(), self.request, campo='pedido__socio')
         
         # Filtros
         pedido_id = self.request.query_params.get('pedido_id')
@@ -5129,7 +5277,7 @@ class PagoViewSet(viewsets.ModelViewSet):
     
     def perform_create(self, serializer):
         """Crear pago y registrar en bitácora"""
-        pago = serializer.save(registrado_por=self.request.user)
+        pago = serializer.save(procesado_por=self.request.user)
         
         BitacoraAuditoria.objects.create(
             usuario=self.request.user,
@@ -5164,7 +5312,7 @@ class PagoViewSet(viewsets.ModelViewSet):
         pedido_id = serializer.validated_data['pedido_id']
         monto = serializer.validated_data['monto']
         payment_method_id = serializer.validated_data['payment_method_id']
-        comprobante = serializer.validated_data.get('comprobante', '')
+        observaciones = serializer.validated_data.get('observaciones', '')
         
         try:
             pedido = Pedido.objects.get(id=pedido_id)
@@ -5175,61 +5323,51 @@ class PagoViewSet(viewsets.ModelViewSet):
             )
         
         # Verificar permisos
-        if not request.user.is_staff:
-            try:
-                socio = Socio.objects.get(usuario=request.user)
-                if pedido.socio != socio:
-                    return Response(
-                        {'error': 'No tiene permisos para pagar este pedido'},
-                        status=status.HTTP_403_FORBIDDEN
-                    )
-            except Socio.DoesNotExist:
+        identidad = obtener_identidad(request)
+        if not identidad.es_staff:
+            if identidad.socio is None:
                 return Response(
                     {'error': 'Usuario no asociado a un socio'},
                     status=status.HTTP_403_FORBIDDEN
                 )
+            if pedido.socio_id != identidad.socio.id:
+                return Response(
+                    {'error': 'No tiene permisos para pagar este pedido'},
+                    status=status.HTTP_403_FORBIDDEN
+                )
         
-        # Crear pago pendiente
-        pago = Pago.objects.create(
-            pedido=pedido,
-            monto=monto,
-            metodo_pago='STRIPE',
-            comprobante=comprobante,
-            estado='PROCESANDO',
-            registrado_por=request.user
-        )
-        
-        # Procesar con Stripe
-        exito, mensaje = pago.procesar_pago_stripe(payment_method_id)
-        
-        # Registrar en bitácora
-        BitacoraAuditoria.objects.create(
-            usuario=request.user,
-            accion='PAGO_STRIPE_' + ('EXITOSO' if exito else 'FALLIDO'),
-            tabla_afectada='Pago',
-            registro_id=pago.id,
-            detalles={
-                'pedido': pedido.numero_pedido,
-                'monto': str(monto),
-                'exito': exito,
-                'mensaje': mensaje,
-                'payment_method_id': payment_method_id
-            },
-            ip_address=get_client_ip(request),
-            user_agent=request.META.get('HTTP_USER_AGENT', '')
-        )
-        
-        if exito:
-            serializer = PagoSerializer(pago)
-            return Response({
-                'mensaje': 'Pago procesado exitosamente',
-                'pago': serializer.data
-            }, status=status.HTTP_201_CREATED)
-        else:
-            return Response(
-                {'error': mensaje},
-                status=status.HTTP_400_BAD_REQUEST
+        # Crear pago en PROCESANDO; el cobro se hace fuera del request y el
+        # estado final llega por el worker o por el webhook de Stripe
+        with transaction.atomic():
+            pago = Pago.objects.create(
+                pedido=pedido,
+                monto=monto,
+                metodo_pago='STRIPE',
+                observaciones=observaciones or None,
+                estado='PROCESANDO',
+                procesado_por=request.user
+            )
+            pago.procesar_pago_stripe(payment_method_id)
+
+            BitacoraAuditoria.objects.create(
+                usuario=request.user,
+                accion='PAGO_STRIPE_ENCOLADO',
+                tabla_afectada='Pago',
+                registro_id=pago.id,
+                detalles={
+                    'pedido': pedido.numero_pedido,
+                    'monto': str(monto),
+                    'payment_method_id': payment_method_id
+                },
+                ip_address=get_client_ip(request),
+                user_agent=request.META.get('HTTP_USER_AGENT', '')
             )
+
+        pago.refresh_from_db()
+        return Response({
+            'mensaje': 'Pago en proceso',
+            'pago': PagoSerializer(pago).data
+        }, status=status.HTTP_202_ACCEPTED)
     
     @action(detail=True, methods=['post'])
     def reembolsar(self, request, pk=None):
@@ -5286,6 +5424,31 @@ class PagoViewSet(viewsets.ModelViewSet):
             )
 
 
+@api_view(['POST'])
+@permission_classes([AllowAny])
+@csrf_exempt
+def stripe_webhook(request):
+    """
+    Webhook de Stripe: reconcilia el estado final de los pagos
+    POST /api/pagos/stripe/webhook/
+    Se verifica la firma (header Stripe-Signature) con STRIPE_WEBHOOK_SECRET.
+    """
+    secreto = settings.STRIPE_WEBHOOK_SECRET
+    if not secreto:
+        return Response({'error': 'Webhook de Stripe no configurado'}, status=status.HTTP_503_SERVICE_UNAVAILABLE)
+
+    stripe = pagos_stripe.cliente_stripe()
+    try:
+        evento = stripe.Webhook.construct_event(
+            request.body, request.META.get('HTTP_STRIPE_SIGNATURE', ''), secreto
+        )
+    except (ValueError, stripe.error.SignatureVerificationError):
+        return Response({'error': 'Firma inválida'}, status=status.HTTP_400_BAD_REQUEST)
+
+    procesado = pagos_stripe.procesar_evento(evento)
+    return Response({'recibido': True, 'procesado': procesado})
+
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def historial_ventas(request):
@@ -5322,12 +5485,7 @@ def historial_ventas(request):
         queryset = queryset.filter(pagos__metodo_pago=metodo_pago).distinct()
     
     # Restricción de permisos: socios solo ven sus ventas
-    if not request.user.is_staff:
-        try:
-            socio = Socio.objects.get(usuario=request.user)
-            queryset = queryset.filter(socio=socio)
-        except Socio.DoesNotExist:
-            queryset = queryset.none()
+    queryset = filtrar_por_socio(queryset, request)
     
     queryset = queryset.order_by('-fecha_pedido')
     
@@ -5407,15 +5565,13 @@ def exportar_ventas_csv(request):
         queryset = queryset.filter(pagos__metodo_pago=metodo_pago).distinct()
     
     # Restricción de permisos
-    if not request.user.is_staff:
-        try:
-            socio = Socio.objects.get(usuario=request.user)
-            queryset = queryset.filter(socio=socio)
-        except Socio.DoesNotExist:
-            return Response(
-                {'error': 'Usuario no asociado a un socio'},
-                status=status.HTTP_403_FORBIDDEN
-            )
+    identidad = obtener_identidad(request)
+    if not identidad.es_staff and identidad.socio is None:
+        return Response(
+            {'error': 'Usuario no asociado a un socio'},
+            status=status.HTTP_403_FORBIDDEN
+        )
+    queryset = filtrar_por_socio(queryset, request)
     
     queryset = queryset.order_by('-fecha_pedido')
     
@@ -5468,7 +5624,7 @@ def exportar_ventas_csv(request):
         usuario=request.user,
         accion='EXPORTAR_VENTAS_CSV',
         tabla_afectada='Pedido',
-        registro_id=None,
+        registro_id=0,
         detalles={
             'total_registros': queryset.count(),
             'filtros': {
@@ -5519,13 +5675,7 @@ class PedidoInsumoViewSet(viewsets.ModelViewSet):
         return PedidoInsumoSerializer
 
     def get_queryset(self):
-        queryset = super().get_queryset()
-        if not self.request.user.is_staff:
-            try:
-                socio = Socio.objects.get(usuario=self.request.user)
-                queryset = queryset.filter(socio=socio)
-            except Socio.DoesNotExist:
-                queryset = queryset.none()
+        queryset = filtrar_por_socio(super().get_queryset(), self.request)
         return queryset.select_related('socio__usuario').prefetch_related('items', 'pagos_insumo')
 
     def perform_create(self, serializer):
@@ -5564,13 +5714,7 @@ class PedidoInsumoViewSet(viewsets.ModelViewSet):
         ordering = ['-fecha_pago']
 
         def get_queryset(self):
-            queryset = super().get_queryset()
-            if not self.request.user.is_staff:
-                try:
-                    socio = Socio.objects.get(usuario=self.request.user)
-                    queryset = queryset.filter(pedido_insumo__socio=socio)
-                except Socio.DoesNotExist:
-                    queryset = queryset.none()
+            queryset = filtrar_por_socio(super().get_queryset(), self.request, campo='pedido_insumo__socio')
             return queryset.select_related('pedido_insumo__socio__usuario', 'registrado_por')
 
         def perform_create(self, serializer):
@@ -5592,12 +5736,7 @@ def historial_compras_insumos(request):
     
     queryset = PedidoInsumo.objects.select_related('socio__usuario').prefetch_related('items', 'pagos_insumo')
     
-    if not request.user.is_staff:
-        try:
-            socio = Socio.objects.get(usuario=request.user)
-            queryset = queryset.filter(socio=socio)
-        except Socio.DoesNotExist:
-            queryset = queryset.none()
+    queryset = filtrar_por_socio(queryset, request)
     
     total_pedidos = queryset.count()
     total_gastado = queryset.aggregate(total=Sum('total'))['total'] or Decimal('0')
@@ -5634,12 +5773,15 @@ class TienePermisoMetodoPago(BasePermission):
             'validar_eliminacion'
         ]
         
+        # Las vistas de función (@api_view) no tienen `action`
+        accion = getattr(view, 'action', None)
+
         # Para acciones de solo lectura (list, retrieve), permitir más flexibilidad
-        if view.action in ['list', 'retrieve']:
+        if accion in ['list', 'retrieve']:
             return True
             
         # Para acciones de modificación, verificar permiso específico
-        if view.action in acciones_protegidas:
+        if accion in acciones_protegidas:
             return self._tiene_permiso_metodo_pago(request.user)
             
         # Por defecto, requerir el permiso
@@ -5847,6 +5989,7 @@ class PaymentMethodViewSet(viewsets.ModelViewSet):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     @action(detail=False, methods=['get'])
+    @condicional(PaymentMethod)
     def activos(self, request):
         """
         CU16: Obtener solo métodos de pago activos
@@ -5862,6 +6005,7 @@ class PaymentMethodViewSet(viewsets.ModelViewSet):
         return Response(serializer.data)
 
     @action(detail=False, methods=['get'])
+    @condicional(PaymentMethod)
     def dropdown(self, request):
         """
         CU16: Obtener métodos de pago para dropdown/select
@@ -5885,7 +6029,7 @@ class PaymentMethodViewSet(viewsets.ModelViewSet):
                 usuario=request.user,
                 accion='REORDENAR_METODOS_PAGO',
                 tabla_afectada='PaymentMethod',
-                registro_id=None,
+                registro_id=0,
                 detalles={
                     'metodos_actualizados': resultado['actualizados'],
                     'nuevo_orden': request.data.get('metodos', [])
@@ -5956,6 +6100,7 @@ class PaymentMethodViewSet(viewsets.ModelViewSet):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated, TienePermisoMetodoPago])
+@condicional(PaymentMethod)
 def metodos_pago_activos(request):
     """Vista para obtener solo métodos de pago activos"""
     metodos = PaymentMethod.obtener_metodos_activos()
@@ -5965,6 +6110,7 @@ def metodos_pago_activos(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
+@condicional(PaymentMethod)
 def metodos_pago_dropdown(request):
     """Vista para obtener métodos de pago para dropdown (pública para autenticados)"""
     metodos = PaymentMethod.obtener_metodos_activos()
@@ -6032,7 +6178,7 @@ def reordenar_metodos_pago(request):
             usuario=request.user,
             accion='REORDENAR_METODOS_PAGO',
             tabla_afectada='PaymentMethod',
-            registro_id=None,
+            registro_id=0,
             detalles={
                 'metodos_actualizados': resultado['actualizados'],
                 'nuevo_orden': request.data.get('metodos', [])
@@ -6051,6 +6197,7 @@ def reordenar_metodos_pago(request):
 
 @api_view(['GET'])
 @permission_classes([IsAuthenticated, TienePermisoMetodoPago])
+@reporte_cacheado(PaymentMethod, Usuario)
 def estadisticas_metodos_pago(request):
     """Vista para obtener estadísticas de métodos de pago"""
     total_metodos = PaymentMethod.objects.count()
@@ -6152,6 +6299,82 @@ def validar_eliminacion_metodo_pago(request, pk):
     })
 
 
+# =============================================================================
+# MÉTRICAS DE RENDIMIENTO
+# =============================================================================
+
+@api_view(['GET'])
+@permission_classes([AllowAny])
+def metricas_prometheus(request):
+    """
+    Métricas por ruta en formato de texto de Prometheus.
+    Acceso: usuario staff o header 'Authorization: Bearer <METRICAS_TOKEN>'.
+    """
+    token = settings.METRICAS_TOKEN
+    encabezado = request.META.get('HTTP_AUTHORIZATION', '')
+    autorizado_token = bool(token) and hmac.compare_digest(encabezado, f'Bearer {token}')
+    if not autorizado_token and not request.user.is_staff:
+        return Response({'error': 'Permisos insuficientes'}, status=status.HTTP_403_FORBIDDEN)
+
+    return HttpResponse(metricas.registro.exponer(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+
+# =============================================================================
+# SINCRONIZACIÓN INCREMENTAL (app móvil)
+# =============================================================================
+
+@leer_de_primaria  # el token depende del reloj: sin el retraso de la réplica
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def sincronizacion_cambios(request):
+    """
+    Cambios desde el token de la última sincronización (sincronizacion.py).
+    Parámetros: token (vacío: sincronización completa), tablas (socios,parcelas,...)
+    y limite (filas por lote). Con hay_mas=true se pide de nuevo con el token devuelto.
+    """
+    tablas = [t.strip() for t in request.query_params.get('tablas', '').split(',') if t.strip()]
+    limite = request.query_params.get('limite')
+    if limite is not None and not limite.isdigit():
+        return Response({'error': 'limite debe ser un entero positivo'}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        datos = sincronizacion.cambios(request, request.query_params.get('token'), tablas, limite)
+    except sincronizacion.TokenExpirado as error:
+        return Response({'error': str(error), 'reiniciar': True}, status=status.HTTP_410_GONE)
+    except sincronizacion.TokenInvalido as error:
+        return Response({'error': str(error)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(datos)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def carga_offline_registros(request):
+    """
+    CU10/CU15/CU4: Envío por lotes de labores, cosechas y productos cosechados
+    registrados sin conexión (carga_offline.py).
+
+    Cuerpo: {"registros": [{"id_cliente", "tipo", "datos"}, ...]}. Reenviar el
+    mismo envío no duplica: los ya creados vuelven con estado "duplicado".
+    """
+    try:
+        registros = carga_offline.leer_registros(request.data)
+    except carga_offline.CargaInvalida as e:
+        return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    maximo = getattr(settings, 'CARGA_OFFLINE_MAXIMO', 1000)
+    if len(registros) > maximo:
+        return Response(
+            {'error': f'Máximo {maximo} registros por envío; divida la carga'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    reporte = carga_offline.cargar(registros, request.user, cliente=autenticacion.datos_cliente(request))
+
+    if reporte['creados']:
+        return Response(reporte, status=status.HTTP_201_CREATED)
+    if reporte['errores'] and not reporte['duplicados']:
+        return Response(reporte, status=status.HTTP_400_BAD_REQUEST)
+    return Response(reporte, status=status.HTTP_200_OK)
+
+
 # =============================================================================
 # FUNCIONES AUXILIARES
 # =============================================================================
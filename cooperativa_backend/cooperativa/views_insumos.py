@@ -4,19 +4,26 @@
 
 from rest_framework import viewsets, status
 from rest_framework.decorators import api_view, permission_classes, action
+from rest_framework.pagination import PageNumberPagination
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from django.db.models import Sum
+from django.utils import timezone
+from django.utils.dateparse import parse_date
 from decimal import Decimal
 
 from .models import (
     PrecioTemporada, PedidoInsumo, DetallePedidoInsumo, PagoInsumo,
-    Socio, BitacoraAuditoria
+    BitacoraAuditoria, Semilla, Pesticida, Fertilizante, InsumoCatalogo
 )
+from . import catalogo_insumos
+from .busqueda import normalizar
+from .identidad import filtrar_por_socio
+from .versiones import condicional
 from .serializers import (
     PrecioTemporadaSerializer, PedidoInsumoSerializer,
     PedidoInsumoCreateSerializer, PagoInsumoSerializer,
-    HistorialComprasInsumosSerializer
+    HistorialComprasInsumosSerializer, InsumoCatalogoSerializer, CotizacionInsumosSerializer
 )
 
 
@@ -57,6 +64,11 @@ class PrecioTemporadaViewSet(viewsets.ModelViewSet):
         
         return queryset.select_related('semilla', 'pesticida', 'fertilizante')
 
+    # El listado incluye datos de los insumos y `esta_vigente`, que cambia con la fecha
+    @condicional(PrecioTemporada, Semilla, Pesticida, Fertilizante, variante=lambda request: timezone.now().date())
+    def list(self, request, *args, **kwargs):
+        return super().list(request, *args, **kwargs)
+
 
 class PedidoInsumoViewSet(viewsets.ModelViewSet):
     """
@@ -75,15 +87,8 @@ class PedidoInsumoViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         """Filtrar pedidos según permisos del usuario"""
-        queryset = super().get_queryset()
-        
         # Restricción: socios solo ven sus pedidos
-        if not self.request.user.is_staff:
-            try:
-                socio = Socio.objects.get(usuario=self.request.user)
-                queryset = queryset.filter(socio=socio)
-            except Socio.DoesNotExist:
-                queryset = queryset.none()
+        queryset = filtrar_por_socio(super().get_queryset(), self.request)
         
         return queryset.select_related(
             'socio__usuario',
@@ -206,15 +211,8 @@ class PagoInsumoViewSet(viewsets.ModelViewSet):
 
     def get_queryset(self):
         """Filtrar pagos según permisos"""
-        queryset = super().get_queryset()
-        
         # Restricción: socios solo ven sus pagos
-        if not self.request.user.is_staff:
-            try:
-                socio = Socio.objects.get(usuario=self.request.user)
-                queryset = queryset.filter(pedido_insumo__socio=socio)
-            except Socio.DoesNotExist:
-                queryset = queryset.none()
+        queryset = filtrar_por_socio(super().get_queryset(), self.request, campo='pedido_insumo__socio')
         
         return queryset.select_related(
             'pedido_insumo__socio__usuario',
@@ -258,12 +256,7 @@ def historial_compras_insumos(request):
     queryset = PedidoInsumo.objects.select_related('socio__usuario').prefetch_related('items', 'pagos_insumo')
     
     # Restricción: socios solo ven sus compras
-    if not request.user.is_staff:
-        try:
-            socio = Socio.objects.get(usuario=request.user)
-            queryset = queryset.filter(socio=socio)
-        except Socio.DoesNotExist:
-            queryset = queryset.none()
+    queryset = filtrar_por_socio(queryset, request)
     
     queryset = queryset.order_by('-fecha_pedido')
     
@@ -291,3 +284,80 @@ def historial_compras_insumos(request):
         },
         'results': pedidos_data
     })
+
+
+class CatalogoInsumosPagination(PageNumberPagination):
+    page_size = 25
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+
+ORDEN_CATALOGO = {'nombre', 'precio_unitario', 'fecha_vencimiento', 'cantidad', 'tipo_insumo'}
+
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+@condicional(InsumoCatalogo)
+def catalogo_insumos_view(request):
+    """
+    CU7/CU8: Búsqueda unificada de semillas, pesticidas y fertilizantes
+    GET /api/insumos/catalogo/?q=maiz&tipo=SEMILLA&estado=DISPONIBLE&disponible=true
+        &vence_antes=2025-12-31&ordering=-precio_unitario&page=1&page_size=25
+    """
+    catalogo_insumos.asegurar_inicializado()
+    queryset = InsumoCatalogo.objects.all()
+
+    # Cada palabra debe aparecer en el texto normalizado (sin acentos ni mayúsculas)
+    for palabra in normalizar(request.query_params.get('q', '')).split():
+        queryset = queryset.filter(texto_busqueda__contains=palabra)
+
+    tipo = request.query_params.get('tipo')
+    if tipo:
+        queryset = queryset.filter(tipo_insumo=tipo.upper())
+    estado = request.query_params.get('estado')
+    if estado:
+        queryset = queryset.filter(estado=estado.upper())
+    if request.query_params.get('disponible', '').lower() == 'true':
+        queryset = queryset.filter(estado='DISPONIBLE', cantidad__gt=0)
+    vence_antes = request.query_params.get('vence_antes')
+    if vence_antes:
+        try:
+            fecha = parse_date(vence_antes)
+        except ValueError:
+            fecha = None
+        if fecha is None:
+            return Response(
+                {'error': 'vence_antes debe ser una fecha YYYY-MM-DD'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        queryset = queryset.filter(fecha_vencimiento__lte=fecha)
+
+    orden = request.query_params.get('ordering', '')
+    if orden.lstrip('-') in ORDEN_CATALOGO:
+        queryset = queryset.order_by(orden, 'tipo_insumo', 'insumo_id')
+
+    paginador = CatalogoInsumosPagination()
+    pagina = paginador.paginate_queryset(queryset, request)
+    return paginador.get_paginated_response(InsumoCatalogoSerializer(pagina, many=True).data)
+
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def cotizar_insumos_view(request):
+    """
+    CU8: Cotización de un carrito de insumos con los precios por temporada
+    POST /api/insumos/cotizar/
+    {"fecha": "2025-10-01", "items": [{"tipo_insumo": "SEMILLA", "insumo_id": 1, "cantidad": "60"}]}
+
+    Los mismos precios que se aplican al crear el pedido.
+    """
+    serializer = CotizacionInsumosSerializer(data=request.data)
+    if not serializer.is_valid():
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+    lineas = serializer.validated_data['lineas']
+    return Response({
+        'fecha': serializer.validated_data.get('fecha', timezone.localdate()),
+        'items': [linea.como_dict() for linea in lineas],
+        'total': sum((linea.subtotal for linea in lineas), Decimal('0')),
+    })
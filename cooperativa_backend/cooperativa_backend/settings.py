@@ -53,11 +53,16 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'corsheaders.middleware.CorsMiddleware',  # CORS middleware (must be first)
+    'cooperativa.middleware.MetricasMiddleware',  # Latencia y consultas SQL por ruta (/api/metrics)
+    'cooperativa.middleware.ConsultasN1Middleware',  # Detector de N+1 (desarrollo y tests)
+    'cooperativa.middleware.CompresionMiddleware',  # gzip/brotli de respuestas JSON grandes de la API
+    'cooperativa.replica.ReplicaMiddleware',  # Lecturas GET en la réplica (si está configurada)
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'cooperativa.middleware.IdentidadMiddleware',  # Socio/roles del usuario por request
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
@@ -108,7 +113,102 @@ REST_FRAMEWORK = {
         'rest_framework.permissions.IsAuthenticated',
     ],
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
-    'PAGE_SIZE': 25
+    'PAGE_SIZE': 25,
+    # JSON con orjson (cooperativa/renderizado.py); mismo formato que el renderer estándar
+    'DEFAULT_RENDERER_CLASSES': [
+        'cooperativa.renderizado.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'cooperativa.renderizado.ORJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
+}
+
+# Caché compartida (contadores de login, etc.). Sin REDIS_URL se usa memoria local.
+if os.getenv('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.getenv('REDIS_URL'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Login: bloqueo de cuenta por intentos fallidos - T030
+LOGIN_MAX_INTENTOS_FALLIDOS = int(os.getenv('LOGIN_MAX_INTENTOS_FALLIDOS', '5'))
+LOGIN_VENTANA_INTENTOS_SEGUNDOS = int(os.getenv('LOGIN_VENTANA_INTENTOS_SEGUNDOS', '900'))
+LOGIN_BITACORA_ASINCRONA = os.getenv('LOGIN_BITACORA_ASINCRONA', 'False').lower() == 'true'
+
+# Caché de reportes del dashboard (cache_reportes.py): recálculo de datos
+# obsoletos en segundo plano (False lo hace en el mismo request, p. ej. tests)
+REPORTES_REFRESCO_ASINCRONO = os.getenv('REPORTES_REFRESCO_ASINCRONO', 'True').lower() == 'true'
+
+# Vencimiento masivo de inventario (vencimientos.py). Intervalo 0: sin hilo
+# en el proceso web, solo el comando barrer_vencimientos
+VENCIMIENTOS_INTERVALO_MINUTOS = int(os.getenv('VENCIMIENTOS_INTERVALO_MINUTOS', '0'))
+PRODUCTOS_COSECHADOS_VIDA_UTIL_DIAS = int(os.getenv('PRODUCTOS_COSECHADOS_VIDA_UTIL_DIAS', '0'))
+
+# Métricas por request: fracción muestreada (0-1), umbral de consulta lenta y
+# token Bearer para que Prometheus lea /api/metrics sin sesión
+METRICAS_MUESTREO = float(os.getenv('METRICAS_MUESTREO', '1.0'))
+METRICAS_CONSULTA_LENTA_MS = int(os.getenv('METRICAS_CONSULTA_LENTA_MS', '200'))
+METRICAS_TOKEN = os.getenv('METRICAS_TOKEN', '')
+
+# Detector de consultas N+1 (consultas_n1.py): off | log | estricto | registrar.
+# Los tests corren en modo estricto (TEST_RUNNER); los N+1 ya conocidos se
+# listan en benchmarks/n1_conocidos.json
+CONSULTAS_N1_MODO = os.getenv('CONSULTAS_N1_MODO', 'log' if DEBUG else 'off')
+CONSULTAS_N1_UMBRAL = int(os.getenv('CONSULTAS_N1_UMBRAL', '2'))
+CONSULTAS_N1_CONOCIDOS = BASE_DIR / 'benchmarks' / 'n1_conocidos.json'
+TEST_RUNNER = 'cooperativa.consultas_n1.EjecutorPruebasN1'
+
+# Compresión de respuestas JSON de la API (CompresionMiddleware): brotli si
+# el paquete está instalado, si no gzip. Por debajo del mínimo de bytes no se
+# comprime. Las páginas HTML no se comprimen (BREACH)
+COMPRESION_MIN_BYTES = int(os.getenv('COMPRESION_MIN_BYTES', '1024'))
+COMPRESION_GZIP_NIVEL = int(os.getenv('COMPRESION_GZIP_NIVEL', '6'))
+COMPRESION_BROTLI_CALIDAD = int(os.getenv('COMPRESION_BROTLI_CALIDAD', '5'))
+
+# Sincronización incremental de la app móvil (sincronizacion.py): filas por
+# lote, margen frente a transacciones abiertas y días que se conservan los
+# registros eliminados (tokens más antiguos piden sincronización completa)
+SINCRONIZACION_LOTE = int(os.getenv('SINCRONIZACION_LOTE', '500'))
+SINCRONIZACION_LOTE_MAXIMO = int(os.getenv('SINCRONIZACION_LOTE_MAXIMO', '2000'))
+SINCRONIZACION_MARGEN_SEGUNDOS = int(os.getenv('SINCRONIZACION_MARGEN_SEGUNDOS', '5'))
+SINCRONIZACION_RETENCION_DIAS = int(os.getenv('SINCRONIZACION_RETENCION_DIAS', '30'))
+
+# Carga por lotes de la app móvil (carga_offline.py): registros por envío
+CARGA_OFFLINE_MAXIMO = int(os.getenv('CARGA_OFFLINE_MAXIMO', '1000'))
+
+# Logging estructurado (clave=valor) para los módulos de la cooperativa
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'estructurado': {
+            '()': 'cooperativa.logs.FormatoClaveValor',
+            'format': 'nivel=%(levelname)s logger=%(name)s evento=%(message)s',
+        },
+    },
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'estructurado',
+        },
+    },
+    'loggers': {
+        'cooperativa': {
+            'handlers': ['console'],
+            'level': os.getenv('COOPERATIVA_LOG_LEVEL', 'WARNING'),
+        },
+    },
 }
 
 # Custom user model
@@ -150,6 +250,16 @@ DATABASES = {
     'default': dj_database_url.config(default=os.getenv('DATABASE_URL'))
 }
 
+# Réplica de solo lectura opcional (replica.py): los GET leen de ella (salvo
+# las vistas con ETag o caché por versión de tabla);
+# tras escribir, el cliente vuelve a la primaria durante REPLICA_FIJAR_SEGUNDOS
+if os.getenv('DATABASE_REPLICA_URL'):
+    DATABASES['replica'] = dj_database_url.parse(os.getenv('DATABASE_REPLICA_URL'))
+    DATABASES['replica']['TEST'] = {'MIRROR': 'default'}
+REPLICA_ALIAS = 'replica' if 'replica' in DATABASES else None
+DATABASE_ROUTERS = ['cooperativa.replica.RouterReplica']
+REPLICA_FIJAR_SEGUNDOS = int(os.getenv('REPLICA_FIJAR_SEGUNDOS', '10'))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/5.0/ref/settings/#auth-password-validators
@@ -213,3 +323,8 @@ STRIPE_PUBLIC_KEY = os.getenv('STRIPE_PUBLIC_KEY', '')
 STRIPE_SECRET_KEY = os.getenv('STRIPE_SECRET_KEY', '')
 STRIPE_WEBHOOK_SECRET = os.getenv('STRIPE_WEBHOOK_SECRET', '')
 
+# Cobros fuera del request (pool de hilos) y servidor alternativo para la API
+# (p. ej. cooperativa.stripe_local en desarrollo: manage.py stripe_local)
+STRIPE_PAGOS_ASINCRONOS = os.getenv('STRIPE_PAGOS_ASINCRONOS', 'True').lower() == 'true'
+STRIPE_HILOS = int(os.getenv('STRIPE_HILOS', '4'))
+STRIPE_API_BASE = os.getenv('STRIPE_API_BASE', '')
@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'cooperativa_backend.settings')
 
 application = get_wsgi_application()
+
+# Barrido periódico de vencimientos (solo si VENCIMIENTOS_INTERVALO_MINUTOS > 0)
+from cooperativa.vencimientos import iniciar_programador  # noqa: E402
+
+iniciar_programador()
@@ -0,0 +1,121 @@
+"""
+Tests para el contexto de identidad por request
+Ejecutar con: python manage.py test test.CU1.test_identidad
+"""
+
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase, RequestFactory
+from rest_framework.test import APITestCase
+from rest_framework import status
+
+from cooperativa.identidad import obtener_identidad, filtrar_por_socio
+from cooperativa.models import Rol, UsuarioRol, Socio, Parcela, BitacoraAuditoria
+
+User = get_user_model()
+
+
+class ContextoIdentidadTests(TestCase):
+    """Tests del contexto de identidad memorizado en el request"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            ci_nit='12345678',
+            nombres='Juan',
+            apellidos='Perez',
+            email='juan@test.com',
+            usuario='juanp',
+            password='testpass123'
+        )
+        self.socio = Socio.objects.create(usuario=self.user)
+        self.rol = Rol.crear_rol_socio()
+        UsuarioRol.objects.create(usuario=self.user, rol=self.rol)
+        self.factory = RequestFactory()
+
+    def _request(self, user):
+        request = self.factory.get('/api/pedidos/')
+        request.user = user
+        return request
+
+    def test_socio_se_resuelve_una_vez(self):
+        """El socio se consulta una sola vez por request"""
+        request = self._request(self.user)
+        with self.assertNumQueries(1):
+            self.assertEqual(obtener_identidad(request).socio, self.socio)
+            self.assertEqual(obtener_identidad(request).socio, self.socio)
+
+    def test_permisos_consolidados(self):
+        """Los permisos se calculan a partir de los roles cargados una vez"""
+        identidad = obtener_identidad(self._request(self.user))
+        with self.assertNumQueries(1):
+            self.assertTrue(identidad.tiene_permiso('parcelas', 'crear'))
+            self.assertFalse(identidad.tiene_permiso('usuarios', 'ver'))
+            self.assertEqual([rol.nombre for rol in identidad.roles], ['Socio'])
+
+    def test_filtrar_por_socio(self):
+        """Un socio solo ve sus registros; sin socio no ve nada"""
+        otro = User.objects.create_user(
+            ci_nit='87654321', nombres='Ana', apellidos='Lopez',
+            email='ana@test.com', usuario='anal', password='testpass123'
+        )
+        otro_socio = Socio.objects.create(usuario=otro)
+        Parcela.objects.create(socio=self.socio, nombre='Propia', superficie_hectareas=Decimal('1.00'))
+        Parcela.objects.create(socio=otro_socio, nombre='Ajena', superficie_hectareas=Decimal('1.00'))
+
+        visibles = filtrar_por_socio(Parcela.objects.all(), self._request(self.user))
+        self.assertEqual([p.nombre for p in visibles], ['Propia'])
+
+        sin_socio = User.objects.create_user(
+            ci_nit='11223344', nombres='Sin', apellidos='Socio',
+            email='sin@test.com', usuario='sinsocio', password='testpass123'
+        )
+        self.assertFalse(filtrar_por_socio(Parcela.objects.all(), self._request(sin_socio)).exists())
+
+    def test_staff_ve_todo(self):
+        """Los administradores no se filtran"""
+        self.user.is_staff = True
+        self.user.save()
+        Parcela.objects.create(socio=self.socio, nombre='Propia', superficie_hectareas=Decimal('1.00'))
+        queryset = Parcela.objects.all()
+        self.assertIs(filtrar_por_socio(queryset, self._request(self.user)), queryset)
+
+
+class IdentidadMiddlewareTests(APITestCase):
+    """Tests de integración del middleware con las vistas"""
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            ci_nit='12345678',
+            nombres='Juan',
+            apellidos='Perez',
+            email='juan@test.com',
+            usuario='juanp',
+            password='testpass123'
+        )
+        self.socio = Socio.objects.create(usuario=self.user)
+
+    def test_pedidos_filtrados_por_socio(self):
+        """Las vistas usan el socio del contexto de identidad"""
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get('/api/pedidos/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_exportar_csv_sin_socio(self):
+        """Un usuario sin socio no puede exportar ventas"""
+        sin_socio = User.objects.create_user(
+            ci_nit='11223344', nombres='Sin', apellidos='Socio',
+            email='sin@test.com', usuario='sinsocio', password='testpass123'
+        )
+        self.client.force_authenticate(user=sin_socio)
+        response = self.client.get('/api/exportar-ventas-csv/')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_exportar_csv_del_socio(self):
+        self.client.force_authenticate(user=self.user)
+        response = self.client.get('/api/exportar-ventas-csv/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(response['Content-Type'].startswith('text/csv'))
+        # La exportación no es de un registro: registro_id 0
+        bitacora = BitacoraAuditoria.objects.get(accion='EXPORTAR_VENTAS_CSV')
+        self.assertEqual((bitacora.usuario, bitacora.registro_id), (self.user, 0))
@@ -155,6 +155,17 @@ class LaborsByCampaignReportTest(TestCase):
             10.00
         )
 
+    def test_reporte_labores_por_mes(self):
+        """Test agrupación mensual de labores"""
+        report = CampaignReports.get_labors_by_campaign(
+            campaign_id=self.campaign.id
+        )
+
+        self.assertEqual(
+            [(fila['mes'], fila['count']) for fila in report['labors_by_month']],
+            [(date(2024, 2, 1), 1), (date(2024, 3, 1), 1)]
+        )
+
     def test_reporte_labores_campaign_no_existe(self):
         """Test reporte con campaña inexistente"""
         report = CampaignReports.get_labors_by_campaign(
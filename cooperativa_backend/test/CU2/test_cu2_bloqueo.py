@@ -0,0 +1,78 @@
+"""
+Tests para T030: Bloqueo de cuenta por intentos fallidos
+Ejecutar con: python manage.py test test.CU2.test_cu2_bloqueo
+"""
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APITestCase
+from rest_framework import status
+from cooperativa.models import BitacoraAuditoria
+
+User = get_user_model()
+
+
+@override_settings(LOGIN_BITACORA_ASINCRONA=False)
+class CU2BloqueoCuentaTests(APITestCase):
+    """Tests para el contador de intentos fallidos en caché"""
+
+    def setUp(self):
+        """Configurar datos de prueba"""
+        self.user = User.objects.create_user(
+            ci_nit='123456789',
+            nombres='Test',
+            apellidos='User',
+            email='test@example.com',
+            usuario='testbloqueo',
+            password='testpass123'
+        )
+
+    def _login(self, password):
+        data = {'username': 'testbloqueo', 'password': password}
+        return self.client.post('/api/auth/login/', data, format='json')
+
+    def test_intentos_fallidos_persisten(self):
+        """Cada intento fallido actualiza el contador del usuario"""
+        self._login('incorrecta')
+        self._login('incorrecta')
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.intentos_fallidos, 2)
+
+    def test_bloqueo_tras_maximo_intentos(self):
+        """Al llegar al máximo la cuenta se bloquea y se audita"""
+        for _ in range(4):
+            response = self._login('incorrecta')
+            self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+        response = self._login('incorrecta')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.estado, 'BLOQUEADO')
+        self.assertIsNotNone(self.user.fecha_bloqueo)
+        self.assertTrue(BitacoraAuditoria.objects.filter(usuario=self.user, accion='BLOQUEO_CUENTA').exists())
+
+        # Con la contraseña correcta sigue bloqueada
+        response = self._login('testpass123')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_login_exitoso_reinicia_contador(self):
+        """Un login exitoso reinicia los intentos fallidos"""
+        self._login('incorrecta')
+        response = self._login('testpass123')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.intentos_fallidos, 0)
+        self.assertIsNotNone(self.user.ultimo_intento)
+
+    def test_login_exitoso_sin_validaciones_de_unicidad(self):
+        """El login no ejecuta full_clean (consultas de unicidad) al guardar el usuario"""
+        with CaptureQueriesContext(connection) as contexto:
+            response = self._login('testpass123')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        consultas = [q['sql'] for q in contexto.captured_queries]
+        self.assertFalse([sql for sql in consultas if '"ci_nit" =' in sql or '"email" =' in sql])
+        actualizaciones = [sql for sql in consultas if sql.startswith('UPDATE "usuario"')]
+        self.assertTrue(all('"ci_nit"' not in sql for sql in actualizaciones))
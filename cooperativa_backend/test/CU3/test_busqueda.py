@@ -0,0 +1,121 @@
+"""
+Tests para la búsqueda unificada ?q= (índices FTS5 en SQLite, icontains de respaldo)
+Ejecutar con: python manage.py test test.CU3.test_busqueda
+"""
+
+from datetime import date, timedelta
+from decimal import Decimal
+from unittest import skipUnless
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import TestCase
+from rest_framework.test import APITestCase
+from rest_framework import status
+
+from cooperativa.busqueda import buscar, normalizar, instalar_indices, desinstalar_indices
+from cooperativa.models import Socio, Parcela, Semilla
+
+User = get_user_model()
+
+
+def crear_socio(ci_nit, nombres, apellidos, usuario, codigo=None):
+    user = User.objects.create_user(
+        ci_nit=ci_nit, nombres=nombres, apellidos=apellidos,
+        email=f'{usuario}@test.com', usuario=usuario, password='testpass123'
+    )
+    return Socio.objects.create(usuario=user, codigo_interno=codigo)
+
+
+class NormalizarTests(TestCase):
+
+    def test_minusculas_sin_acentos(self):
+        self.assertEqual(normalizar('  Maíz Ñandú '), 'maiz nandu')
+
+
+class BusquedaRespaldoTests(TestCase):
+    """Sin índices instalados se usa icontains sobre todos los campos"""
+
+    def setUp(self):
+        self.juan = crear_socio('12345678', 'Juan', 'Perez', 'juanp', 'SOC-001')
+        self.ana = crear_socio('87654321', 'Ana', 'Quispe', 'anaq', 'SOC-002')
+
+    def test_busca_en_varios_campos(self):
+        self.assertEqual(list(buscar(Socio.objects.all(), 'quispe')), [self.ana])
+        self.assertEqual(list(buscar(Socio.objects.all(), 'SOC-001')), [self.juan])
+        self.assertEqual(list(buscar(Socio.objects.all(), '8765')), [self.ana])
+
+    def test_termino_vacio_no_filtra(self):
+        self.assertEqual(buscar(Socio.objects.all(), '  ').count(), 2)
+
+
+@skipUnless(connection.vendor == 'sqlite', 'Índices FTS5 solo en SQLite')
+class BusquedaFTS5Tests(TestCase):
+    """Índices FTS5 mantenidos por triggers"""
+
+    def setUp(self):
+        instalar_indices(connection)
+        self.addCleanup(desinstalar_indices, connection)
+        self.juan = crear_socio('12345678', 'José', 'Pérez', 'josep')
+        self.ana = crear_socio('87654321', 'Ana', 'Quispe', 'anaq')
+
+    def test_sin_acentos_y_por_prefijo(self):
+        self.assertEqual(list(buscar(Socio.objects.all(), 'jose perez')), [self.juan])
+        self.assertEqual(list(buscar(Socio.objects.all(), 'QUIS')), [self.ana])
+
+    def test_triggers_actualizan_indice(self):
+        self.ana.usuario.apellidos = 'Mamani'
+        self.ana.usuario.save()
+        self.assertFalse(buscar(Socio.objects.all(), 'quispe').exists())
+        self.assertEqual(list(buscar(Socio.objects.all(), 'mamani')), [self.ana])
+
+        parcela = Parcela.objects.create(
+            socio=self.ana, nombre='Lote Río Grande', superficie_hectareas=Decimal('2.00')
+        )
+        self.assertEqual(list(buscar(Parcela.objects.all(), 'rio mamani')), [parcela])
+        parcela.delete()
+        self.assertFalse(buscar(Parcela.objects.all(), 'rio').exists())
+
+    def test_ordenado_por_relevancia(self):
+        crear_socio('11223344', 'Perez', 'Perez', 'perezp')
+        resultados = list(buscar(Socio.objects.all(), 'perez'))
+        self.assertEqual(len(resultados), 2)
+        self.assertEqual(resultados[0].usuario.usuario, 'perezp')
+        self.assertGreater(resultados[0].rango_busqueda, resultados[1].rango_busqueda)
+
+
+class BusquedaEndpointsTests(APITestCase):
+    """El parámetro ?q= en los endpoints de búsqueda"""
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            ci_nit='99999999', nombres='Admin', apellidos='Sistema',
+            email='admin@test.com', usuario='admin', password='testpass123'
+        )
+        self.admin.is_staff = True
+        self.admin.save()
+        self.client.force_authenticate(user=self.admin)
+        self.socio = crear_socio('12345678', 'Juan', 'Perez', 'juanp', 'SOC-001')
+
+    def test_buscar_socios_avanzado_q(self):
+        response = self.client.get('/api/socios/buscar-avanzado/', {'q': 'perez'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 1)
+
+    def test_buscar_parcelas_avanzado_q(self):
+        Parcela.objects.create(socio=self.socio, nombre='Norte', superficie_hectareas=Decimal('1.00'))
+        Parcela.objects.create(socio=self.socio, nombre='Sur', superficie_hectareas=Decimal('1.00'))
+        response = self.client.get('/api/parcelas/buscar-avanzado/', {'q': 'norte'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([p['nombre'] for p in response.data['results']], ['Norte'])
+
+    def test_semillas_q(self):
+        for especie, lote in (('Maíz', 'MZ1'), ('Trigo', 'TR1')):
+            Semilla.objects.create(
+                especie=especie, variedad='Criollo', cantidad=Decimal('10'), unidad_medida='kg',
+                fecha_vencimiento=date.today() + timedelta(days=365),
+                porcentaje_germinacion=Decimal('90'), lote=lote, proveedor='Agro'
+            )
+        response = self.client.get('/api/semillas/', {'q': 'tr1'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([s['especie'] for s in response.data['results']], ['Trigo'])
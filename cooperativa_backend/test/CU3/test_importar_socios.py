@@ -0,0 +1,163 @@
+"""
+Tests para el alta masiva de socios (CSV/JSON)
+Ejecutar con: python manage.py test test.CU3.test_importar_socios
+"""
+
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase
+from rest_framework.test import APITestCase
+from rest_framework import status
+
+from cooperativa.importacion_socios import leer_archivo, importar_socios
+from cooperativa.models import Comunidad, Socio, Parcela, BitacoraAuditoria
+
+User = get_user_model()
+
+CSV = """ci_nit,nombres,apellidos,usuario,email,password,comunidad,parcela_nombre,parcela_superficie,parcela_latitud,parcela_longitud
+1000001,ana,quispe,anaq,ana@test.com,clave12345,Comunidad Norte,Lote Uno,2.50,-17.78,-63.18
+1000002,Luis,Mamani,luism,,clave12345,Comunidad Norte,,,,
+1000003,Rosa,Flores,rosaf,,,,,,,
+"""
+
+
+def socio_json(i, **extra):
+    return {
+        'ci_nit': f'{2000000 + i}', 'nombres': 'Socio', 'apellidos': 'Prueba',
+        'usuario': f'socio{i}', 'password': 'clave12345', **extra
+    }
+
+
+class ImportacionSociosTests(TestCase):
+
+    def setUp(self):
+        self.comunidad = Comunidad.objects.create(nombre='Comunidad Norte')
+        self.existente = User.objects.create_user(
+            ci_nit='9999999', nombres='Ya', apellidos='Existe',
+            email='existe@test.com', usuario='existe', password='testpass123'
+        )
+
+    def test_importa_csv_con_parcela(self):
+        reporte = importar_socios(leer_archivo(CSV))
+        self.assertEqual(reporte['creados'], 3, reporte['errores'])
+        self.assertEqual(reporte['errores'], [])
+
+        ana = Socio.objects.select_related('usuario').get(usuario__usuario='anaq')
+        self.assertEqual(ana.usuario.nombres, 'Ana')
+        self.assertEqual(ana.codigo_interno, 'SOC-1000001')
+        self.assertEqual(ana.comunidad, self.comunidad)
+        self.assertTrue(ana.usuario.check_password('clave12345'))
+
+        parcela = Parcela.objects.get(socio=ana)
+        self.assertIsNotNone(parcela.geohash)
+
+        rosa = User.objects.get(usuario='rosaf')
+        self.assertFalse(rosa.has_usable_password())
+        self.assertEqual(BitacoraAuditoria.objects.filter(tabla_afectada='socio', accion='CREAR').count(), 3)
+
+    def test_comunidad_sin_distinguir_mayusculas(self):
+        Comunidad.objects.create(nombre='San José de Chiquitos')
+        reporte = importar_socios([
+            socio_json(1, comunidad='comunidad norte'),
+            socio_json(2, comunidad='SAN JOSÉ DE CHIQUITOS'),
+            socio_json(3, comunidad=str(self.comunidad.pk)),
+        ])
+        self.assertEqual(reporte['creados'], 3, reporte['errores'])
+        self.assertEqual(
+            Socio.objects.filter(comunidad__nombre='San José de Chiquitos').count(), 1
+        )
+        self.assertEqual(Socio.objects.filter(comunidad=self.comunidad).count(), 2)
+
+    def test_reporte_de_errores_por_fila(self):
+        registros = [
+            socio_json(1),
+            socio_json(2, ci_nit='9999999'),           # ya existe en la BD
+            socio_json(3, usuario='socio1'),           # duplicado en el archivo
+            socio_json(4, nombres='N0mbre'),           # formato inválido
+            socio_json(5, comunidad='No Existe'),
+            socio_json(6, password='corta'),
+        ]
+        reporte = importar_socios(registros)
+        self.assertEqual(reporte['creados'], 1)
+        errores = {e['fila']: e['errores'] for e in reporte['errores']}
+        self.assertEqual(sorted(errores), [3, 4, 5, 6, 7])
+        self.assertIn('ci_nit', errores[3])
+        self.assertIn('usuario', errores[4])
+        self.assertIn('nombres', errores[5])
+        self.assertIn('comunidad', errores[6])
+        self.assertIn('password', errores[7])
+
+    def test_valores_crudos_no_rompen_el_archivo(self):
+        """Los clean() de los modelos no se ejecutan sobre campos que ya fallaron"""
+        registros = [
+            socio_json(1),
+            socio_json(2, ci_nit=''),                              # Socio.clean usa el CI
+            socio_json(3, fecha_nacimiento='31/02/1990'),
+            socio_json(4, parcela_nombre='Lote', parcela_superficie='diez'),
+        ]
+        reporte = importar_socios(registros)
+        self.assertEqual(reporte['creados'], 1)
+        errores = {e['fila']: e['errores'] for e in reporte['errores']}
+        self.assertEqual(sorted(errores), [3, 4, 5])
+        self.assertEqual(list(errores[3]), ['ci_nit'])
+        self.assertEqual(list(errores[4]), ['fecha_nacimiento'])
+        self.assertEqual(list(errores[5]), ['parcela_superficie_hectareas'])
+
+    def test_validacion_con_consultas_constantes(self):
+        """La validación usa una consulta IN por clave sin importar el número de filas"""
+        registros = [socio_json(i, comunidad='Comunidad Norte', email=f'socio{i}@test.com') for i in range(50)]
+        with self.assertNumQueries(5):
+            reporte = importar_socios(registros, validar_solo=True)
+        self.assertEqual(reporte['validos'], 50)
+        self.assertEqual(reporte['creados'], 0)
+        self.assertFalse(Socio.objects.exists())
+
+    def test_insercion_por_lotes(self):
+        registros = [socio_json(i) for i in range(25)]
+        reporte = importar_socios(registros, tamano_lote=10, hilos=2)
+        self.assertEqual(reporte['creados'], 25)
+        self.assertEqual(Socio.objects.count(), 25)
+
+
+class ImportacionSociosAPITests(APITestCase):
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            ci_nit='8888888', nombres='Admin', apellidos='Sistema',
+            email='admin@test.com', usuario='admin', password='testpass123'
+        )
+        self.admin.is_staff = True
+        self.admin.save()
+        Comunidad.objects.create(nombre='Comunidad Norte')
+
+    def test_requiere_staff(self):
+        usuario = User.objects.create_user(
+            ci_nit='7777777', nombres='Sin', apellidos='Permiso',
+            email='sin@test.com', usuario='sinpermiso', password='testpass123'
+        )
+        self.client.force_authenticate(user=usuario)
+        response = self.client.post('/api/socios/importar/', [socio_json(1)], format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_importar_archivo_csv(self):
+        self.client.force_authenticate(user=self.admin)
+        archivo = SimpleUploadedFile('socios.csv', CSV.encode('utf-8'), content_type='text/csv')
+        response = self.client.post('/api/socios/importar/', {'archivo': archivo}, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertEqual(response.data['creados'], 3)
+
+    def test_validar_solo_json(self):
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.post(
+            '/api/socios/importar/?validar_solo=true', {'socios': [socio_json(1), socio_json(1)]}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['validos'], 1)
+        self.assertFalse(Socio.objects.exists())
+
+    def test_lista_que_no_es_de_socios_devuelve_400(self):
+        self.client.force_authenticate(user=self.admin)
+        for datos in ([1, 2], {'socios': [socio_json(1), 'texto']}):
+            response = self.client.post('/api/socios/importar/', datos, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, datos)
+        self.assertFalse(Socio.objects.exists())
@@ -0,0 +1,101 @@
+"""
+Tests para consultas geoespaciales de parcelas (geohash indexado)
+Ejecutar con: python manage.py test test.CU3.test_parcelas_cercanas
+"""
+
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import SimpleTestCase
+from rest_framework.test import APITestCase
+from rest_framework import status
+
+from cooperativa.geoespacial import codificar_geohash, distancia_km, filtro_celdas, precision_para_radio
+from cooperativa.models import Comunidad, Socio, Parcela
+
+User = get_user_model()
+
+
+class GeohashTests(SimpleTestCase):
+
+    def test_codificacion_estandar(self):
+        self.assertEqual(codificar_geohash(57.64911, 10.40744, 11), 'u4pruydqqvj')
+        self.assertIsNone(codificar_geohash(None, 10))
+
+    def test_distancia_haversine(self):
+        # Santa Cruz - Cochabamba, ~ 300 km en línea recta
+        self.assertAlmostEqual(distancia_km(-17.7833, -63.1821, -17.3895, -66.1568), 315, delta=10)
+
+    def test_precision_cubre_radio(self):
+        self.assertGreater(precision_para_radio(-17.78, 0.5), precision_para_radio(-17.78, 50))
+
+    def test_filtro_por_prefijo_de_celda(self):
+        # Un rango celda..celda+'~' depende de la collation; el prefijo no
+        condicion = filtro_celdas(-17.7833, -63.1821, 1)
+        celdas = {valor for _, valor in condicion.children}
+        self.assertIn(codificar_geohash(-17.7833, -63.1821, precision_para_radio(-17.7833, 1)), celdas)
+        self.assertEqual({clave for clave, _ in condicion.children}, {'geohash__startswith'})
+
+
+class ParcelasCercanasAPITests(APITestCase):
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            ci_nit='99999999', nombres='Admin', apellidos='Sistema',
+            email='admin@test.com', usuario='admin', password='testpass123'
+        )
+        self.admin.is_staff = True
+        self.admin.save()
+        self.client.force_authenticate(user=self.admin)
+
+        self.comunidad = Comunidad.objects.create(nombre='Comunidad Norte')
+        user = User.objects.create_user(
+            ci_nit='12345678', nombres='Juan', apellidos='Perez',
+            email='juan@test.com', usuario='juanp', password='testpass123'
+        )
+        self.socio = Socio.objects.create(usuario=user, comunidad=self.comunidad)
+
+        self.centro = self._parcela('Centro', '-17.78330000', '-63.18210000')
+        self.cerca = self._parcela('Cerca', '-17.79000000', '-63.18000000')   # ~0.8 km
+        self.media = self._parcela('Media', '-17.83000000', '-63.18210000')   # ~5.2 km
+        self.lejos = self._parcela('Lejos', '-17.38950000', '-66.15680000')   # ~315 km
+        self._parcela('Sin coordenadas', None, None)
+
+    def _parcela(self, nombre, lat, lng):
+        return Parcela.objects.create(
+            socio=self.socio, nombre=nombre, superficie_hectareas=Decimal('1.00'),
+            latitud=Decimal(lat) if lat else None, longitud=Decimal(lng) if lng else None
+        )
+
+    def test_geohash_se_calcula_al_guardar(self):
+        self.assertEqual(self.centro.geohash, codificar_geohash(-17.7833, -63.1821))
+        self.centro.latitud = Decimal('-17.00000000')
+        self.centro.save(update_fields=['latitud'])
+        self.centro.refresh_from_db()
+        self.assertEqual(self.centro.geohash, codificar_geohash(-17.0, -63.1821))
+
+    def test_cercanas_por_punto_ordenadas(self):
+        response = self.client.get('/api/parcelas/cercanas/', {'lat': -17.7833, 'lng': -63.1821, 'radio_km': 2})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([p['nombre'] for p in response.data['results']], ['Centro', 'Cerca'])
+        self.assertEqual(response.data['results'][0]['distancia_km'], 0)
+
+        response = self.client.get('/api/parcelas/cercanas/', {'lat': -17.7833, 'lng': -63.1821, 'radio_km': 10})
+        self.assertEqual([p['nombre'] for p in response.data['results']], ['Centro', 'Cerca', 'Media'])
+
+    def test_cercanas_por_comunidad(self):
+        response = self.client.get('/api/parcelas/cercanas/', {'comunidad': self.comunidad.id, 'radio_km': 200})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 3)
+
+    def test_parametros_invalidos(self):
+        response = self.client.get('/api/parcelas/cercanas/', {'lat': 'x', 'lng': 1})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.get('/api/parcelas/cercanas/', {'lat': 0, 'lng': 0, 'radio_km': 5000})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bbox_en_listado(self):
+        response = self.client.get('/api/parcelas/', {'bbox': '-17.80,-63.20,-17.77,-63.17'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        resultados = response.data['results'] if isinstance(response.data, dict) else response.data
+        self.assertEqual(sorted(p['nombre'] for p in resultados), ['Centro', 'Cerca'])
@@ -0,0 +1,193 @@
+"""
+Tests para las transiciones de estado masivas
+Ejecutar con: python manage.py test test.CU3.test_transiciones_masivas
+"""
+
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.test import APITestCase
+from rest_framework import status
+
+from cooperativa import transiciones
+from cooperativa.models import Comunidad, Socio, Pesticida, BitacoraAuditoria
+
+User = get_user_model()
+
+
+def crear_socio(i, comunidad, estado='ACTIVO'):
+    usuario = User.objects.create_user(
+        ci_nit=f'{3000000 + i}', nombres='Socio', apellidos='Prueba',
+        email=f'socio{i}@test.com', usuario=f'socio{i}', password='testpass123'
+    )
+    return Socio.objects.create(usuario=usuario, comunidad=comunidad, estado=estado)
+
+
+def crear_pesticida(lote, cantidad, **extra):
+    datos = {
+        'nombre_comercial': f'Pesticida {lote}', 'ingrediente_activo': 'Glifosato',
+        'tipo_pesticida': 'HERBICIDA', 'concentracion': '48% EC', 'registro_sanitario': f'RS-{lote}',
+        'cantidad': Decimal(cantidad), 'unidad_medida': 'Litros',
+        'fecha_vencimiento': date.today() + timedelta(days=365), 'dosis_recomendada': '2 L/ha',
+        'lote': lote, 'proveedor': 'AgroQuímica', 'precio_unitario': Decimal('10.00'),
+        'ubicacion_almacen': 'Bodega A',
+    }
+    datos.update(extra)
+    return Pesticida.objects.create(**datos)
+
+
+class TransicionesMasivasTests(TestCase):
+
+    def setUp(self):
+        self.norte = Comunidad.objects.create(nombre='Comunidad Norte')
+        self.sur = Comunidad.objects.create(nombre='Comunidad Sur')
+        self.socios_norte = [crear_socio(i, self.norte) for i in range(6)]
+        self.socio_sur = crear_socio(99, self.sur)
+
+    def test_desactivar_comunidad_con_consultas_constantes(self):
+        # SELECT + UPDATE socio + UPDATE usuario + INSERT bitácora (+ savepoint del test)
+        with self.assertNumQueries(6):
+            reporte = transiciones.aplicar_transicion('socios', 'INACTIVO', filtros={'comunidad': self.norte.id})
+
+        self.assertEqual(reporte['actualizados'], 6)
+        self.assertEqual(Socio.objects.filter(estado='INACTIVO').count(), 6)
+        self.assertEqual(User.objects.filter(estado='INACTIVO').count(), 6)
+        self.assertEqual(Socio.objects.get(pk=self.socio_sur.pk).estado, 'ACTIVO')
+        bitacora = BitacoraAuditoria.objects.filter(accion='DESACTIVAR_SOCIO')
+        self.assertEqual(bitacora.count(), 6)
+        self.assertEqual(bitacora.first().detalles['estado_anterior'], 'ACTIVO')
+
+    def test_sin_seleccion_es_invalido(self):
+        with self.assertRaises(transiciones.TransicionInvalida):
+            transiciones.aplicar_transicion('socios', 'INACTIVO')
+        with self.assertRaises(transiciones.TransicionInvalida):
+            transiciones.aplicar_transicion('socios', 'BLOQUEADO', ids=[1])
+        with self.assertRaises(transiciones.TransicionInvalida):
+            transiciones.aplicar_transicion('socios', 'INACTIVO', filtros={'nombre': 'x'})
+
+    def test_ids_y_filtros_invalidos(self):
+        for ids in ('12', [True], ['1'], {'id': 1}):
+            with self.assertRaises(transiciones.TransicionInvalida, msg=ids):
+                transiciones.aplicar_transicion('socios', 'INACTIVO', ids=ids)
+        for recurso, estado, filtros in (
+            ('socios', 'INACTIVO', {'comunidad': 'abc'}),
+            ('usuarios', 'INACTIVO', {'is_staff': 'quizás'}),
+            ('pesticidas', 'AGOTADO', {'vencimiento_hasta': '31/12/2030'}),
+        ):
+            with self.assertRaisesMessage(transiciones.TransicionInvalida, 'Valor no válido'):
+                transiciones.aplicar_transicion(recurso, estado, filtros=filtros)
+        self.assertFalse(Socio.objects.filter(estado='INACTIVO').exists())
+
+    def test_version_de_usuarios(self):
+        usuario = self.socios_norte[0].usuario
+        leido = timezone.now()
+        # Un guardado normal cambia la versión que compara el control optimista
+        usuario.nombres = 'Editado'
+        usuario.save()
+        with self.assertRaises(transiciones.ConflictoConcurrencia):
+            transiciones.aplicar_transicion(
+                'usuarios', 'INACTIVO', ids=[usuario.id], no_modificado_desde=leido, parcial=False
+            )
+
+    def test_estado_esperado_reporta_conflicto(self):
+        Socio.objects.filter(pk=self.socios_norte[0].pk).update(estado='INACTIVO')
+        reporte = transiciones.aplicar_transicion(
+            'socios', 'ACTIVO', filtros={'comunidad': self.norte.id}, estado_esperado='INACTIVO'
+        )
+        self.assertEqual(reporte['ids'], [self.socios_norte[0].pk])
+        self.assertEqual({r['motivo'] for r in reporte['rechazados']}, {'sin_cambio'})
+
+    def test_requisitos_y_version(self):
+        lleno = crear_pesticida('L1', '10.00')
+        vacio = crear_pesticida('L2', '0.00')
+        Pesticida.objects.filter(pk=vacio.pk).update(estado='EN_CUARENTENA')
+        leido = timezone.now()
+
+        reporte = transiciones.aplicar_transicion('pesticidas', 'AGOTADO', ids=[lleno.id, vacio.id])
+        self.assertEqual(reporte['ids'], [vacio.id])
+        self.assertEqual(reporte['rechazados'][0]['motivo'], 'requisito')
+
+        # La fila cambió después de la versión leída por el cliente
+        with self.assertRaises(transiciones.ConflictoConcurrencia):
+            transiciones.aplicar_transicion(
+                'pesticidas', 'EN_CUARENTENA', ids=[lleno.id, vacio.id],
+                no_modificado_desde=leido, parcial=False
+            )
+        self.assertFalse(Pesticida.objects.filter(estado='EN_CUARENTENA').exists())
+
+        reporte = transiciones.aplicar_transicion(
+            'pesticidas', 'EN_CUARENTENA', ids=[lleno.id, vacio.id], no_modificado_desde=leido
+        )
+        self.assertEqual(reporte['ids'], [lleno.id])
+        self.assertEqual(reporte['rechazados'][0]['motivo'], 'conflicto')
+
+
+class TransicionesMasivasAPITests(APITestCase):
+
+    def setUp(self):
+        self.admin = User.objects.create_user(
+            ci_nit='8888888', nombres='Admin', apellidos='Sistema',
+            email='admin@test.com', usuario='admin', password='testpass123'
+        )
+        self.admin.is_staff = True
+        self.admin.save()
+        self.comunidad = Comunidad.objects.create(nombre='Comunidad Norte')
+        self.socios = [crear_socio(i, self.comunidad) for i in range(3)]
+
+    def test_requiere_staff(self):
+        self.client.force_authenticate(user=self.socios[0].usuario)
+        response = self.client.post('/api/transiciones/socios/', {'estado': 'INACTIVO', 'ids': [1]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_desactivar_comunidad(self):
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.post('/api/transiciones/socios/', {
+            'estado': 'INACTIVO', 'filtros': {'comunidad': self.comunidad.id}, 'motivo': 'Fin de gestión'
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['actualizados'], 3)
+
+    def test_reactivar_usuarios_excluye_al_solicitante(self):
+        User.objects.update(estado='INACTIVO', intentos_fallidos=3)
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.post('/api/transiciones/usuarios/', {
+            'estado': 'ACTIVO', 'filtros': {'comunidad': self.comunidad.id}
+        }, format='json')
+        self.assertEqual(response.data['actualizados'], 3)
+        self.assertEqual(User.objects.filter(estado='ACTIVO', intentos_fallidos=0).count(), 3)
+        self.assertEqual(Socio.objects.filter(estado='ACTIVO').count(), 3)
+
+    def test_usuarios_sin_seleccion_devuelve_400(self):
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.post('/api/transiciones/usuarios/', {'estado': 'INACTIVO'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(User.objects.filter(estado='INACTIVO').exists())
+
+    def test_ids_como_texto_devuelve_400(self):
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.post('/api/transiciones/socios/', {
+            'estado': 'INACTIVO', 'ids': '12'
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        response = self.client.post('/api/transiciones/socios/', {
+            'estado': 'INACTIVO', 'filtros': {'comunidad': 'abc'}
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertFalse(Socio.objects.filter(estado='INACTIVO').exists())
+
+    def test_conflicto_devuelve_409(self):
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.post('/api/transiciones/usuarios/', {
+            'estado': 'INACTIVO', 'ids': [s.usuario_id for s in self.socios],
+            'no_modificado_desde': '2000-01-01T00:00:00Z', 'parcial': False
+        }, format='json')
+        self.assertEqual(response.status_code, status.HTTP_409_CONFLICT)
+        self.assertEqual(len(response.data['rechazados']), 3)
+
+    def test_recurso_invalido(self):
+        self.client.force_authenticate(user=self.admin)
+        response = self.client.post('/api/transiciones/parcelas/', {'estado': 'X', 'ids': [1]}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
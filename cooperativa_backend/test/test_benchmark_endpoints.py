@@ -0,0 +1,81 @@
+"""
+Tests del benchmark de endpoints y la comparación contra el baseline
+Ejecutar con: python manage.py test test.test_benchmark_endpoints
+"""
+import tempfile
+from dataclasses import replace
+from datetime import date
+from pathlib import Path
+
+from django.test import TestCase
+
+from cooperativa.benchmark_endpoints import (
+    descubrir_endpoints, ejecutar, guardar_baseline, cargar_baseline, comparar
+)
+from cooperativa.datos_sinteticos import GeneradorDatos, ParametrosGeneracion
+from cooperativa.models import Usuario
+
+
+class BenchmarkEndpointsTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        GeneradorDatos(ParametrosGeneracion(
+            socios=5, anios=1, insumos=3, hasta=date(2025, 6, 30), prefijo='bench'
+        )).generar()
+        cls.admin = Usuario.objects.create_superuser(
+            ci_nit='99999999', nombres='Admin', apellidos='Bench',
+            email='bench@example.com', usuario='adminbench', password='Admin123'
+        )
+
+    def test_descubre_rutas_get_con_parametros(self):
+        endpoints = {e.nombre: e for e in descubrir_endpoints()}
+
+        self.assertIn('pedido-list', endpoints)
+        self.assertRegex(endpoints['pedido-detail'].url, r'^/api/pedidos/\d+/$')
+        self.assertIn('campaign_id', endpoints['report-labors-by-campaign'].consulta)
+        # Sin transferencias no hay pk para la ruta
+        self.assertTrue(endpoints['transferenciaparcela-detail'].omitido)
+        # Rutas que solo aceptan POST no se incluyen
+        self.assertNotIn('importar-socios', endpoints)
+
+    def test_mide_y_detecta_regresion_de_consultas(self):
+        endpoints = descubrir_endpoints(filtro='^(pedido|campaign)-(list|detail)$')
+        resultados = ejecutar(self.admin, endpoints, repeticiones=2)
+
+        self.assertEqual({r.nombre for r in resultados}, {'pedido-list', 'pedido-detail', 'campaign-list', 'campaign-detail'})
+        self.assertTrue(all(r.estado == 200 and r.consultas > 0 for r in resultados))
+
+        with tempfile.TemporaryDirectory() as directorio:
+            ruta = guardar_baseline(resultados, Path(directorio) / 'baseline.json')
+            baseline = cargar_baseline(ruta)
+
+        self.assertEqual(comparar(resultados, baseline)['regresiones'], [])
+
+        # Una consulta extra (p. ej. un N+1 nuevo) es regresión aunque el tiempo no cambie
+        peor = [replace(r, consultas=r.consultas + 1) if r.nombre == 'pedido-list' else r for r in resultados]
+        reporte = comparar(peor, baseline, umbral_tiempo=None)
+        self.assertEqual([r['nombre'] for r in reporte['regresiones']], ['pedido-list'])
+        self.assertEqual(comparar(peor, baseline, umbral_consultas=1, umbral_tiempo=None)['regresiones'], [])
+
+        lento = [replace(r, p50_ms=r.p50_ms * 3 + 50) for r in resultados]
+        self.assertEqual(len(comparar(lento, baseline)['regresiones']), 4)
+        self.assertEqual(comparar(lento, baseline, umbral_tiempo=None)['regresiones'], [])
+
+    def test_respuestas_5xx(self):
+        resultados = ejecutar(self.admin, descubrir_endpoints(filtro='^pedido-(list|detail)$'), repeticiones=1)
+        con_error = [replace(r, estado=500) if r.nombre == 'pedido-detail' else r for r in resultados]
+
+        with tempfile.TemporaryDirectory() as directorio:
+            with self.assertRaisesMessage(ValueError, 'pedido-detail'):
+                guardar_baseline(con_error, Path(directorio) / 'baseline.json')
+            baseline = cargar_baseline(guardar_baseline(resultados, Path(directorio) / 'baseline.json'))
+
+        # Un 5xx es regresión aunque el baseline ya lo tuviera o el endpoint sea nuevo
+        reporte = comparar(con_error, {'endpoints': {**baseline['endpoints'], 'pedido-detail': {
+            **baseline['endpoints']['pedido-detail'], 'estado': 500
+        }}}, umbral_tiempo=None)
+        self.assertEqual([r['nombre'] for r in reporte['regresiones']], ['pedido-detail'])
+        reporte = comparar(con_error, {'endpoints': {}}, umbral_tiempo=None)
+        self.assertEqual([r['nombre'] for r in reporte['regresiones']], ['pedido-detail'])
+        self.assertEqual(len(reporte['nuevos']), 2)
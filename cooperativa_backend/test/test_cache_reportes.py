@@ -0,0 +1,90 @@
+"""
+Tests de la caché de reportes del dashboard (cache_reportes.py)
+Ejecutar con: python manage.py test test.test_cache_reportes
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+
+from cooperativa.models import Usuario, Semilla
+
+
+@override_settings(REPORTES_REFRESCO_ASINCRONO=False)
+class CacheReportesTests(TransactionTestCase):
+
+    URL = '/api/semillas/reporte_inventario/'
+
+    def setUp(self):
+        cache.clear()
+        self.admin = Usuario.objects.create_superuser(
+            ci_nit='11111111', nombres='Admin', apellidos='Reportes',
+            email='reportes@example.com', usuario='adminreportes', password='Admin123'
+        )
+        self.operador = Usuario.objects.create_user(
+            ci_nit='22222222', nombres='Operador', apellidos='Reportes',
+            email='operador@example.com', usuario='operador', password='Operador123'
+        )
+        self.client.force_login(self.admin)
+
+    def _crear_semilla(self, lote):
+        return Semilla.objects.create(
+            especie='Maíz', variedad='Cubano', cantidad=100, unidad_medida='kg',
+            fecha_vencimiento=date.today() + timedelta(days=365), porcentaje_germinacion=90,
+            lote=lote, proveedor='Proveedor', precio_unitario=Decimal('10.00')
+        )
+
+    def test_segunda_lectura_desde_cache(self):
+        self._crear_semilla('L-1')
+
+        with CaptureQueriesContext(connection) as primera:
+            respuesta = self.client.get(self.URL)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta['X-Reporte-Cache'], 'MISS')
+
+        with CaptureQueriesContext(connection) as segunda:
+            cacheada = self.client.get(self.URL)
+        self.assertEqual(cacheada['X-Reporte-Cache'], 'HIT')
+        self.assertEqual(cacheada.json(), respuesta.json())
+        self.assertLess(len(segunda), len(primera))
+
+    def test_escritura_invalida_y_recalcula(self):
+        self._crear_semilla('L-1')
+        antes = self.client.get(self.URL).json()
+
+        self._crear_semilla('L-2')
+        obsoleta = self.client.get(self.URL)
+        # Se sirve el dato anterior mientras se recalcula
+        self.assertEqual(obsoleta['X-Reporte-Cache'], 'STALE')
+        self.assertEqual(obsoleta.json(), antes)
+
+        nueva = self.client.get(self.URL)
+        self.assertEqual(nueva['X-Reporte-Cache'], 'HIT')
+        self.assertNotEqual(nueva.json(), antes)
+
+    def test_marcar_vencida_invalida_el_reporte(self):
+        semilla = self._crear_semilla('L-1')
+        self.assertEqual(self.client.get(self.URL).json()['resumen']['semillas_vencidas'], 0)
+
+        # marcar_vencida usa update(): debe renovar la versión igual que save()
+        self.client.post(f'/api/semillas/{semilla.pk}/marcar_vencida/')
+        self.assertEqual(self.client.get(self.URL)['X-Reporte-Cache'], 'STALE')
+        nueva = self.client.get(self.URL)
+        self.assertEqual(nueva['X-Reporte-Cache'], 'HIT')
+        self.assertEqual(nueva.json()['resumen']['semillas_vencidas'], 1)
+
+    def test_parametros_distintos_no_comparten_cache(self):
+        self.client.get('/api/reportes/usuarios-socios/')
+        respuesta = self.client.get('/api/reportes/usuarios-socios/', {'estado': 'ACTIVO'})
+        self.assertEqual(respuesta['X-Reporte-Cache'], 'MISS')
+
+    def test_usuario_sin_permisos_no_usa_cache(self):
+        self.client.get('/api/reportes/usuarios-socios/')
+
+        self.client.force_login(self.operador)
+        respuesta = self.client.get('/api/reportes/usuarios-socios/')
+        self.assertEqual(respuesta.status_code, 403)
+        self.assertNotIn('X-Reporte-Cache', respuesta)
@@ -0,0 +1,105 @@
+"""
+Tests de ?fields= / ?expand= (campos_dinamicos.py)
+Ejecutar con: python manage.py test test.test_campos_dinamicos
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from cooperativa.models import (
+    Usuario, Comunidad, Socio, Parcela, Campaign, CampaignPartner, Pedido, Pago, Rol, UsuarioRol
+)
+
+
+class CamposDinamicosTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = Usuario.objects.create_superuser(
+            ci_nit='11111111', nombres='Admin', apellidos='Campos',
+            email='campos@example.com', usuario='admincampos', password='Admin123'
+        )
+        comunidad = Comunidad.objects.create(nombre='Comunidad', municipio='Municipio', departamento='Depto')
+        rol = Rol.objects.create(nombre='Productor', permisos={})
+        campania = Campaign.objects.create(
+            nombre='Campaña 2025', fecha_inicio=date.today() - timedelta(days=10),
+            fecha_fin=date.today() + timedelta(days=80), meta_produccion=Decimal('1000'),
+        )
+        for i in range(4):
+            usuario = Usuario.objects.create_user(
+                ci_nit=f'2000000{i}', nombres=f'Socio {"ABCD"[i]}', apellidos='Campos',
+                email=f'socio{i}@example.com', usuario=f'socio{i}', password='Socio123'
+            )
+            UsuarioRol.objects.create(usuario=usuario, rol=rol)
+            socio = Socio.objects.create(
+                usuario=usuario, comunidad=comunidad, fecha_nacimiento=date(1980 + i, 1, 1), estado='ACTIVO'
+            )
+            Parcela.objects.create(
+                socio=socio, nombre=f'Parcela {i}', superficie_hectareas=5,
+                latitud=-16.5, longitud=-68.0, estado='ACTIVA'
+            )
+            CampaignPartner.objects.create(campaign=campania, socio=socio)
+            pedido = Pedido.objects.create(
+                socio=socio, cliente_nombre=f'Cliente {i}', numero_pedido=f'PED-CAMPOS-{i}',
+                subtotal=Decimal('100'), total=Decimal('100')
+            )
+            Pago.objects.create(
+                pedido=pedido, numero_recibo=f'REC-CAMPOS-{i}', monto=Decimal('40'),
+                metodo_pago='EFECTIVO', estado='COMPLETADO'
+            )
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def _get(self, url, **params):
+        with CaptureQueriesContext(connection) as consultas:
+            respuesta = self.client.get(url, params)
+        self.assertEqual(respuesta.status_code, 200)
+        return respuesta.json(), consultas
+
+    def test_fields_recorta_respuesta_y_consulta(self):
+        completo, consultas_completo = self._get('/api/socios/')
+        parcial, consultas_parcial = self._get('/api/socios/', fields='id,codigo_interno,edad')
+
+        self.assertEqual(parcial['count'], completo['count'])
+        self.assertEqual(set(parcial['results'][0]), {'id', 'codigo_interno', 'edad'})
+        for fila, original in zip(parcial['results'], completo['results']):
+            self.assertEqual(fila, {campo: original[campo] for campo in fila})
+
+        # Sin usuario ni comunidad: sin JOIN ni prefetch de roles, y solo las columnas leídas
+        self.assertLess(len(consultas_parcial), len(consultas_completo))
+        listado = next(c['sql'] for c in consultas_parcial.captured_queries if 'FROM "socio"' in c['sql']
+                       and 'LIMIT' in c['sql'])
+        self.assertNotIn('JOIN', listado)
+        self.assertNotIn('"socio"."direccion"', listado)
+
+    def test_campos_anidados_siguen_precargados(self):
+        # usuario (roles, edad) sin el resto: sin consultas extra por fila (modo estricto)
+        datos, _ = self._get('/api/socios/', fields='id,usuario')
+        edades = {fila['usuario']['usuario']: fila['usuario']['edad'] for fila in datos['results']}
+        self.assertIsNotNone(edades['socio0'])
+        self.assertEqual(datos['results'][0]['usuario']['roles'], ['Productor'])
+
+        datos, _ = self._get('/api/campaigns/', fields='id,total_socios')
+        self.assertEqual(datos['results'][0], {'id': datos['results'][0]['id'], 'total_socios': 4})
+
+    def test_expand(self):
+        datos, _ = self._get('/api/parcelas/', fields='id,nombre', expand='socio')
+        socio = datos['results'][0]['socio']
+        self.assertEqual(set(datos['results'][0]), {'id', 'nombre', 'socio'})
+        self.assertEqual(socio['comunidad']['nombre'], 'Comunidad')
+        self.assertEqual(socio['usuario']['roles'], ['Productor'])
+
+        datos, _ = self._get('/api/pedidos/', fields='id', expand='pagos')
+        pago = datos['results'][0]['pagos'][0]
+        self.assertEqual(pago['monto'], '40.00')
+        self.assertTrue(pago['cliente_nombre'].startswith('Cliente'))
+
+        datos, _ = self._get('/api/campaigns/', fields='id,nombre', expand='socios_asignados')
+        self.assertEqual(len(datos['results'][0]['socios_asignados']), 4)
+
+        # Sin parámetros la respuesta no cambia
+        self.assertIsInstance(self._get('/api/parcelas/')[0]['results'][0]['socio'], int)
@@ -0,0 +1,140 @@
+"""
+Tests de la carga por lotes de la app móvil (carga_offline.py)
+Ejecutar con: python manage.py test test.test_carga_offline
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from cooperativa.models import (
+    Usuario, Comunidad, Socio, Parcela, Cultivo, CicloCultivo, Campaign, Labor, Cosecha,
+    ProductoCosechado, BitacoraAuditoria, CargaOffline
+)
+
+
+class CargaOfflineTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.tecnico = Usuario.objects.create_user(
+            ci_nit='40000001', nombres='Tecnico', apellidos='Campo',
+            email='tecnico@example.com', usuario='tecnico', password='Tecnico123'
+        )
+        usuario = Usuario.objects.create_user(
+            ci_nit='40000002', nombres='Juan', apellidos='Pérez',
+            email='juan@example.com', usuario='juan', password='Socio123'
+        )
+        comunidad = Comunidad.objects.create(nombre='Comunidad', municipio='Municipio', departamento='Depto')
+        socio = Socio.objects.create(usuario=usuario, comunidad=comunidad, estado='ACTIVO')
+        cls.parcela = Parcela.objects.create(
+            socio=socio, nombre='Parcela Norte', superficie_hectareas=5,
+            latitud=-16.5, longitud=-68.0, estado='ACTIVA'
+        )
+        cls.cultivo = Cultivo.objects.create(parcela=cls.parcela, especie='Maíz', hectareas_sembradas=2)
+        cls.ciclo = CicloCultivo.objects.create(
+            cultivo=cls.cultivo, fecha_inicio=date.today() - timedelta(days=90),
+            fecha_estimada_fin=date.today() + timedelta(days=10)
+        )
+        cls.campania = Campaign.objects.create(
+            nombre='Campaña 2025', fecha_inicio=date.today() - timedelta(days=30),
+            fecha_fin=date.today() + timedelta(days=60), meta_produccion=Decimal('1000'),
+        )
+        cls.hoy = date.today().isoformat()
+
+    def setUp(self):
+        self.client.force_login(self.tecnico)
+
+    def _enviar(self, registros):
+        return self.client.post('/api/carga-offline/', {'registros': registros}, content_type='application/json')
+
+    def _labor(self, id_cliente, **datos):
+        return {'id_cliente': id_cliente, 'tipo': 'labor',
+                'datos': {'fecha_labor': self.hoy, 'labor': 'COSECHA', 'parcela': self.parcela.id, **datos}}
+
+    def _envio(self):
+        return [
+            self._labor('lab-1'),
+            {'id_cliente': 'prod-1', 'tipo': 'producto_cosechado', 'datos': {
+                'fecha_cosecha': self.hoy, 'cantidad': '120.5', 'unidad_medida': 'kg', 'calidad': 'Premium',
+                'cultivo': self.cultivo.id, 'labor_cliente': 'lab-1', 'lote': 3, 'ubicacion_almacen': 'A-1',
+                'parcela': self.parcela.id,
+            }},
+            {'id_cliente': 'cos-1', 'tipo': 'cosecha', 'datos': {
+                'ciclo_cultivo': self.ciclo.id, 'fecha_cosecha': self.hoy, 'cantidad_cosechada': '80',
+            }},
+            # Fuera del rango de la campaña
+            self._labor('lab-2', campania=self.campania.id, parcela=None,
+                        fecha_labor=(date.today() - timedelta(days=40)).isoformat()),
+        ]
+
+    def test_envio_y_reenvio_idempotente(self):
+        respuesta = self._enviar(self._envio())
+        self.assertEqual(respuesta.status_code, 201)
+        reporte = respuesta.json()
+        self.assertEqual((reporte['creados'], reporte['errores']), (3, 1))
+        estados = [resultado['estado'] for resultado in reporte['resultados']]
+        self.assertEqual(estados, ['creado', 'creado', 'creado', 'error'])
+        self.assertIn('fecha_labor', reporte['resultados'][3]['errores'])
+
+        producto = ProductoCosechado.objects.get(id=reporte['resultados'][1]['id'])
+        self.assertEqual(producto.labor_id, reporte['resultados'][0]['id'])
+        self.assertEqual(producto.socio_nombre, 'Juan Pérez')
+        self.assertEqual(Cosecha.objects.get().cantidad_cosechada, Decimal('80'))
+        self.assertEqual(BitacoraAuditoria.objects.filter(usuario=self.tecnico).count(), 3)
+
+        # El dispositivo no recibió la respuesta y reenvía todo
+        reenvio = self._enviar(self._envio()).json()
+        self.assertEqual((reenvio['creados'], reenvio['duplicados'], reenvio['errores']), (0, 3, 1))
+        self.assertEqual([r.get('id') for r in reenvio['resultados'][:3]],
+                         [r['id'] for r in reporte['resultados'][:3]])
+        self.assertEqual(Labor.objects.count(), 1)
+        self.assertEqual(CargaOffline.objects.count(), 3)
+
+        # Un envío posterior puede referirse a la labor por su id de cliente
+        otro = self._enviar([{'id_cliente': 'prod-2', 'tipo': 'producto_cosechado', 'datos': {
+            'fecha_cosecha': self.hoy, 'cantidad': '5', 'unidad_medida': 'kg', 'calidad': 'Premium',
+            'cultivo': self.cultivo.id, 'labor_cliente': 'lab-1', 'lote': 4, 'ubicacion_almacen': 'A-1',
+            'parcela': self.parcela.id,
+        }}]).json()
+        self.assertEqual(otro['resultados'][0]['errores'], {'labor': ['La labor ya tiene un producto cosechado registrado']})
+
+    def test_errores_por_registro(self):
+        reporte = self._enviar([
+            self._labor('a'),
+            self._labor('a'),
+            {'id_cliente': 'b', 'tipo': 'riego', 'datos': {}},
+            {'id_cliente': 'c', 'tipo': 'producto_cosechado', 'datos': {
+                'fecha_cosecha': self.hoy, 'cantidad': '1', 'unidad_medida': 'kg', 'calidad': 'Premium',
+                'cultivo': self.cultivo.id, 'labor_cliente': 'desconocida', 'lote': 1,
+                'ubicacion_almacen': 'A-1', 'parcela': self.parcela.id,
+            }},
+            self._labor('d', fecha_labor='no-es-fecha'),
+            self._labor('e', fecha_labor=20250101),
+            {'id_cliente': 'f', 'tipo': 'cosecha', 'datos': {
+                'ciclo_cultivo': self.ciclo.id, 'fecha_cosecha': ['2025-01-01'], 'cantidad_cosechada': '1',
+            }},
+        ]).json()
+        errores = [resultado.get('errores', {}) for resultado in reporte['resultados']]
+        self.assertEqual(reporte['resultados'][0]['estado'], 'creado')
+        self.assertIn('id_cliente', errores[1])
+        self.assertIn('tipo', errores[2])
+        self.assertIn('labor_cliente', errores[3])
+        self.assertIn('fecha_labor', errores[4])
+        # Tipos que clean_fields no convierte: error del registro, no del envío
+        self.assertEqual(errores[5], {'fecha_labor': ['Tipo de dato inválido']})
+        self.assertEqual(errores[6], {'fecha_cosecha': ['Tipo de dato inválido']})
+        self.assertEqual(reporte['creados'], 1)
+
+        self.assertEqual(self._enviar({'registros': 'x'}).status_code, 400)
+
+    def test_consultas_no_crecen_con_el_envio(self):
+        def consultas(cantidad, prefijo):
+            with CaptureQueriesContext(connection) as capturadas:
+                respuesta = self._enviar([self._labor(f'{prefijo}-{i}') for i in range(cantidad)])
+            self.assertEqual(respuesta.json()['creados'], cantidad)
+            return len(capturadas)
+
+        self.assertEqual(consultas(3, 'pocas'), consultas(60, 'muchas'))
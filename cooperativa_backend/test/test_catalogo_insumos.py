@@ -0,0 +1,109 @@
+"""
+Tests del catálogo unificado de insumos (catalogo_insumos.py)
+Ejecutar con: python manage.py test test.test_catalogo_insumos
+"""
+from datetime import date, timedelta
+from importlib import import_module
+from decimal import Decimal
+
+from django.test import TestCase
+
+from cooperativa import catalogo_insumos, transiciones
+from cooperativa.models import Usuario, Semilla, Pesticida, Fertilizante, InsumoCatalogo
+
+
+class CatalogoInsumosTests(TestCase):
+
+    URL = '/api/insumos/catalogo/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = Usuario.objects.create_superuser(
+            ci_nit='11111111', nombres='Admin', apellidos='Catalogo',
+            email='catalogo@example.com', usuario='admincatalogo', password='Admin123'
+        )
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+        futuro = date.today() + timedelta(days=200)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.semilla = Semilla.objects.create(
+                especie='Maíz', variedad='Cubano', cantidad=100, unidad_medida='kg',
+                fecha_vencimiento=futuro, porcentaje_germinacion=90,
+                lote='L-1', proveedor='Semillas del Oriente', precio_unitario=Decimal('10.00')
+            )
+            self.pesticida = Pesticida.objects.create(
+                nombre_comercial='Karate', ingrediente_activo='Lambda', tipo_pesticida='INSECTICIDA',
+                concentracion='5%', cantidad=10, unidad_medida='L', fecha_vencimiento=futuro,
+                lote='P-1', proveedor='AgroQuímica', precio_unitario=Decimal('50.00'), ubicacion_almacen='A-1'
+            )
+            self.fertilizante = Fertilizante.objects.create(
+                nombre_comercial='Urea', tipo_fertilizante='QUIMICO', composicion_npk='46-0-0',
+                cantidad=10, unidad_medida='kg', fecha_vencimiento=futuro,
+                lote='F-1', proveedor='Fertisur', precio_unitario=Decimal('5.00'), ubicacion_almacen='A-1'
+            )
+
+    def test_senales_mantienen_el_catalogo(self):
+        self.assertEqual(InsumoCatalogo.objects.count(), 3)
+        fila = InsumoCatalogo.objects.get(tipo_insumo='SEMILLA', insumo_id=self.semilla.pk)
+        self.assertEqual(fila.nombre, 'Maíz - Cubano')
+        self.assertIn('maiz', fila.texto_busqueda)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.semilla.cantidad = 40
+            self.semilla.save()
+            self.pesticida.delete()
+        self.assertEqual(InsumoCatalogo.objects.get(insumo_id=self.semilla.pk, tipo_insumo='SEMILLA').cantidad, 40)
+        self.assertFalse(InsumoCatalogo.objects.filter(tipo_insumo='PESTICIDA').exists())
+
+    def test_busqueda_unificada_paginada(self):
+        respuesta = self.client.get(self.URL, {'q': 'MAIZ cubano'})
+        self.assertEqual(respuesta.status_code, 200)
+        datos = respuesta.json()
+        self.assertEqual(datos['count'], 1)
+        self.assertEqual(datos['results'][0]['insumo_id'], self.semilla.pk)
+
+        datos = self.client.get(self.URL, {'ordering': '-precio_unitario', 'page_size': 2}).json()
+        self.assertEqual(datos['count'], 3)
+        self.assertEqual([r['tipo_insumo'] for r in datos['results']], ['PESTICIDA', 'SEMILLA'])
+        self.assertIsNotNone(datos['next'])
+
+        datos = self.client.get(self.URL, {'tipo': 'fertilizante'}).json()
+        self.assertEqual(datos['results'][0]['nombre'], 'Urea - 46-0-0')
+
+        self.assertEqual(self.client.get(self.URL, {'vence_antes': 'abc'}).status_code, 400)
+
+    def test_transicion_masiva_actualiza_el_catalogo(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            transiciones.aplicar_transicion(
+                'pesticidas', 'EN_CUARENTENA', ids=[self.pesticida.pk], usuario=self.admin
+            )
+        self.assertEqual(
+            InsumoCatalogo.objects.get(tipo_insumo='PESTICIDA', insumo_id=self.pesticida.pk).estado,
+            'EN_CUARENTENA'
+        )
+        self.assertEqual(catalogo_insumos.conteo_disponibles()['PESTICIDA'], 0)
+
+    def test_marcar_vencido_actualiza_el_catalogo(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            respuesta = self.client.post(f'/api/semillas/{self.semilla.pk}/marcar_vencida/')
+            self.client.post(f'/api/fertilizantes/{self.fertilizante.pk}/marcar_vencido/')
+        self.assertEqual(respuesta.status_code, 200)
+        estados = dict(InsumoCatalogo.objects.values_list('tipo_insumo', 'estado'))
+        self.assertEqual(estados, {'SEMILLA': 'VENCIDA', 'PESTICIDA': 'DISPONIBLE', 'FERTILIZANTE': 'VENCIDO'})
+
+    def test_recalcular_reescribe_sin_duplicar(self):
+        primera = InsumoCatalogo.objects.get(tipo_insumo='SEMILLA').pk
+        Semilla.objects.filter(pk=self.semilla.pk).update(cantidad=7)
+        catalogo_insumos.recalcular(Semilla, [self.semilla.pk])
+        catalogo_insumos.recalcular(Semilla, [self.semilla.pk, 999])
+        fila = InsumoCatalogo.objects.get(tipo_insumo='SEMILLA')
+        self.assertEqual((fila.pk, fila.cantidad), (primera, 7))
+        self.assertEqual(InsumoCatalogo.objects.count(), 3)
+
+    def test_migracion_completa_un_catalogo_parcial(self):
+        # Catálogo desplegado vacío en el que solo se guardó un insumo
+        InsumoCatalogo.objects.exclude(tipo_insumo='SEMILLA').delete()
+        migracion = import_module('cooperativa.migrations.0014_reconstruir_catalogo_insumos')
+        migracion.reconstruir_catalogo(None, None)
+        self.assertEqual(InsumoCatalogo.objects.count(), 3)
@@ -0,0 +1,63 @@
+"""
+Tests del detector de consultas N+1 (consultas_n1.py)
+Ejecutar con: python manage.py test test.test_consultas_n1
+"""
+from django.test import TestCase, override_settings
+from rest_framework import serializers
+
+from cooperativa.consultas_n1 import ConsultasN1Error, detectar_n1, normalizar_sql
+from cooperativa.models import Usuario, UsuarioRol, Rol
+
+
+class UsuarioConRolesSerializer(serializers.ModelSerializer):
+    # Una consulta por usuario a propósito
+    cantidad_roles = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Usuario
+        fields = ['id', 'cantidad_roles']
+
+    def get_cantidad_roles(self, obj):
+        return UsuarioRol.objects.filter(usuario=obj).count()
+
+
+class ConsultasN1Tests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = Usuario.objects.create_superuser(
+            ci_nit='11111111', nombres='Admin', apellidos='Detector',
+            email='n1@example.com', usuario='adminn1', password='Admin123'
+        )
+        rol = Rol.objects.create(nombre='Técnico', permisos={'usuarios': {'ver': True}})
+        for i in range(5):
+            usuario = Usuario.objects.create_user(
+                ci_nit=f'2000000{i}', nombres=f'Usuario {"ABCDE"[i]}', apellidos='Detector',
+                email=f'usuario{i}@example.com', usuario=f'usuario{i}', password='Usuario123'
+            )
+            UsuarioRol.objects.create(usuario=usuario, rol=rol)
+
+    def test_normalizacion(self):
+        self.assertEqual(
+            normalizar_sql("SELECT * FROM t WHERE id = 1 AND nombre = 'a' AND x IN (1, 2, 3)"),
+            normalizar_sql("SELECT  *  FROM t WHERE id = 27 AND nombre = 'b''c' AND x IN (4)"),
+        )
+
+    def test_campo_de_serializer_en_el_error(self):
+        with self.assertRaises(ConsultasN1Error) as error:
+            with detectar_n1('serializer'):
+                UsuarioConRolesSerializer(Usuario.objects.all(), many=True).data
+        self.assertIn('UsuarioConRolesSerializer.cantidad_roles', str(error.exception))
+        self.assertIn('6x', str(error.exception))
+
+        # Bajo el umbral no se informa
+        with detectar_n1('serializer', umbral=10) as detector:
+            UsuarioConRolesSerializer(Usuario.objects.all(), many=True).data
+        self.assertEqual(detector.repetidas(), [])
+
+    @override_settings(CONSULTAS_N1_MODO='estricto')
+    def test_listado_precargado_pasa_en_modo_estricto(self):
+        self.client.force_login(self.admin)
+        respuesta = self.client.get('/api/usuarios/')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.json()['count'], 6)
@@ -0,0 +1,69 @@
+"""
+Tests de cantidad de consultas de los listados de usuarios, socios y roles
+(UsuarioSerializer / RolSerializer con datos precargados)
+Ejecutar con: python manage.py test test.test_consultas_usuarios_roles
+"""
+from datetime import date
+from unittest.mock import patch
+
+from django.test import TestCase
+from rest_framework.pagination import PageNumberPagination
+
+from cooperativa.models import Usuario, Rol, UsuarioRol, Socio
+
+
+# PAGE_SIZE se lee al importar DRF; páginas de 100 filas para el test
+@patch.object(PageNumberPagination, 'page_size', 100)
+class ConsultasUsuariosRolesTests(TestCase):
+
+    FILAS = 100
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = Usuario.objects.create_superuser(
+            ci_nit='10000000', nombres='Admin', apellidos='Consultas',
+            email='consultas@example.com', usuario='adminconsultas', password='Admin123'
+        )
+        roles = Rol.objects.bulk_create([
+            Rol(nombre=f'Rol {i}', descripcion='Rol de prueba', permisos={}) for i in range(cls.FILAS)
+        ])
+        usuarios = Usuario.objects.bulk_create([
+            Usuario(
+                ci_nit=f'{20000000 + i}', nombres='Usuario', apellidos=f'Prueba {i}',
+                email=f'usuario{i}@example.com', usuario=f'usuario{i}', password='!'
+            )
+            for i in range(cls.FILAS)
+        ])
+        UsuarioRol.objects.bulk_create([
+            UsuarioRol(usuario=usuario, rol=roles[i % 10]) for i, usuario in enumerate(usuarios)
+        ])
+        Socio.objects.bulk_create([
+            Socio(usuario=usuario, codigo_interno=f'SOC-{i}', fecha_nacimiento=date(1990, 1, 1))
+            for i, usuario in enumerate(usuarios[:50])
+        ])
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def test_listado_usuarios(self):
+        # sesión + usuario + count + página + roles precargados
+        with self.assertNumQueries(5):
+            respuesta = self.client.get('/api/usuarios/')
+        datos = respuesta.json()
+        self.assertEqual(len(datos['results']), self.FILAS)
+        fila = next(r for r in datos['results'] if r['usuario'] == 'usuario0')
+        self.assertEqual(fila['roles'], ['Rol 0'])
+        self.assertIsNotNone(fila['edad'])
+
+    def test_listado_roles(self):
+        # sesión + usuario + count + página con usuarios_count anotado
+        with self.assertNumQueries(4):
+            respuesta = self.client.get('/api/roles/')
+        datos = respuesta.json()
+        self.assertEqual(len(datos['results']), self.FILAS)
+        self.assertEqual(next(r for r in datos['results'] if r['nombre'] == 'Rol 0')['usuarios_count'], 10)
+
+    def test_listado_socios(self):
+        with self.assertNumQueries(5):
+            respuesta = self.client.get('/api/socios/')
+        self.assertEqual(len(respuesta.json()['results']), 50)
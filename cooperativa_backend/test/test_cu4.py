@@ -82,8 +82,9 @@ class CicloCultivoTests(APITestCase):
 
         data = {
             'cultivo': self.cultivo.id,
-            'fecha_inicio': '2024-01-15',
-            'fecha_estimada_fin': '2024-05-15',
+            # validate_fecha_inicio no acepta fechas pasadas
+            'fecha_inicio': (date.today() + timedelta(days=15)).isoformat(),
+            'fecha_estimada_fin': (date.today() + timedelta(days=135)).isoformat(),
             'estado': 'PLANIFICADO',
             'costo_estimado': 5000.00,
             'rendimiento_esperado': 8000.00,
@@ -118,6 +119,9 @@ class CicloCultivoTests(APITestCase):
 
         response = self.client.get('/api/ciclo-cultivos/')
         self.assertEqual(response.status_code, status.HTTP_200_OK)
+        ciclo = response.data['results'][0] if 'results' in response.data else response.data[0]
+        self.assertEqual(ciclo['fecha_estimada_fin'], '2024-05-15')
+        self.assertEqual(ciclo['socio_nombre'], self.socio.usuario.get_full_name())
         self.assertEqual(len(response.data['results']), 1)
 
 
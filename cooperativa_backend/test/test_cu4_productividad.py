@@ -0,0 +1,127 @@
+"""
+Tests para CU4/T046: tablas de hechos del reporte de productividad
+Ejecutar con: python manage.py test test.test_cu4_productividad
+"""
+from datetime import date
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from rest_framework.test import APITestCase
+from rest_framework import status
+
+from cooperativa import productividad
+from cooperativa.models import (
+    Comunidad, Socio, Parcela, Cultivo, CicloCultivo, Cosecha, Tratamiento,
+    ProductividadParcela, ResumenTratamientoMensual
+)
+
+Usuario = get_user_model()
+
+
+class ProductividadRollupTests(APITestCase):
+    """Tests de la tabla de productividad y su mantenimiento incremental"""
+
+    def setUp(self):
+        self.admin_user = Usuario.objects.create_user(
+            ci_nit='123456789', nombres='Admin', apellidos='Sistema',
+            email='admin@test.com', usuario='admin', password='admin123'
+        )
+        self.admin_user.is_staff = True
+        self.admin_user.save()
+
+        socio_user = Usuario.objects.create_user(
+            ci_nit='987654321', nombres='Juan', apellidos='Pérez',
+            email='juan@test.com', usuario='jperez', password='password123'
+        )
+        self.socio = Socio.objects.create(usuario=socio_user, comunidad=Comunidad.objects.create(nombre='Comunidad Test'))
+        self.parcela = Parcela.objects.create(socio=self.socio, nombre='Parcela Test', superficie_hectareas=Decimal('10.00'))
+        self.cultivo = Cultivo.objects.create(parcela=self.parcela, especie='Maíz', hectareas_sembradas=8.0)
+        self.ciclo = CicloCultivo.objects.create(
+            cultivo=self.cultivo, fecha_inicio=date(2024, 1, 15), fecha_estimada_fin=date(2024, 12, 15)
+        )
+
+    def _cosecha(self, fecha, cantidad, estado='COMPLETADA'):
+        return Cosecha.objects.create(
+            ciclo_cultivo=self.ciclo, fecha_cosecha=fecha,
+            cantidad_cosechada=Decimal(cantidad), estado=estado
+        )
+
+    def test_temporada(self):
+        self.assertEqual(productividad.temporada_de(date(2024, 6, 30)), '2024-I')
+        self.assertEqual(productividad.temporada_de(date(2024, 7, 1)), '2024-II')
+
+    def test_recalculo_por_temporada(self):
+        self._cosecha(date(2024, 5, 10), '6400.00')
+        self._cosecha(date(2024, 6, 1), '600.00', estado='PENDIENTE')
+        self._cosecha(date(2024, 9, 1), '1000.00')
+        productividad.recalcular_parcelas()
+
+        filas = {f.temporada: f for f in ProductividadParcela.objects.all()}
+        self.assertEqual(set(filas), {'2024-I', '2024-II'})
+        self.assertEqual(filas['2024-I'].total_cosechado, Decimal('7000.00'))
+        self.assertEqual(filas['2024-I'].num_cosechas, 2)
+        self.assertEqual(filas['2024-I'].num_cosechas_pendientes, 1)
+        self.assertEqual(filas['2024-I'].rendimiento_por_hectarea, Decimal('700.00'))
+
+    def test_actualizacion_incremental(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            cosecha = self._cosecha(date(2024, 5, 10), '500.00')
+        self.assertEqual(ProductividadParcela.objects.get().total_cosechado, Decimal('500.00'))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            cosecha.delete()
+        self.assertFalse(ProductividadParcela.objects.exists())
+
+        with self.captureOnCommitCallbacks(execute=True):
+            tratamiento = Tratamiento.objects.create(
+                ciclo_cultivo=self.ciclo, tipo_tratamiento='RIEGO', nombre_producto='Agua',
+                dosis=Decimal('1.00'), fecha_aplicacion=date(2024, 2, 15)
+            )
+        self.assertEqual(ResumenTratamientoMensual.objects.get(mes=date(2024, 2, 1)).cantidad, 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            tratamiento.fecha_aplicacion = date(2024, 3, 2)
+            tratamiento.save()
+        self.assertEqual(list(ResumenTratamientoMensual.objects.values_list('mes', flat=True)), [date(2024, 3, 1)])
+
+    def test_cosecha_movida_a_otra_parcela(self):
+        otra = Parcela.objects.create(socio=self.socio, nombre='Parcela Sur', superficie_hectareas=Decimal('5.00'))
+        otro_ciclo = CicloCultivo.objects.create(
+            cultivo=Cultivo.objects.create(parcela=otra, especie='Maíz', hectareas_sembradas=4.0),
+            fecha_inicio=date(2024, 1, 15), fecha_estimada_fin=date(2024, 12, 15)
+        )
+        with self.captureOnCommitCallbacks(execute=True):
+            cosecha = self._cosecha(date(2024, 5, 10), '500.00')
+
+        # La parcela anterior pierde la fila y la nueva la recibe
+        with self.captureOnCommitCallbacks(execute=True):
+            cosecha.ciclo_cultivo = otro_ciclo
+            cosecha.save()
+        self.assertEqual(list(ProductividadParcela.objects.values_list('parcela', 'total_cosechado')),
+                         [(otra.pk, Decimal('500.00'))])
+
+        # Mover el cultivo devuelve la cosecha; el recálculo reescribe sin duplicar
+        with self.captureOnCommitCallbacks(execute=True):
+            otro_ciclo.cultivo.parcela = self.parcela
+            otro_ciclo.cultivo.save()
+        fila = ProductividadParcela.objects.get()
+        self.assertEqual(fila.parcela_id, self.parcela.pk)
+        self.assertEqual(productividad.recalcular_parcelas(), 1)
+        self.assertEqual(ProductividadParcela.objects.get().pk, fila.pk)
+
+    def test_reporte_lee_de_la_tabla(self):
+        self._cosecha(date(2024, 5, 10), '6400.00')
+        self._cosecha(date(2024, 9, 1), '1000.00')
+        productividad.refrescar_todo()
+
+        self.client.force_authenticate(user=self.admin_user)
+        with self.assertNumQueries(10):
+            response = self.client.get('/api/reportes/productividad-parcelas/')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIsNotNone(response.data['as_of'])
+        self.assertEqual(response.data['estadisticas_generales']['cosechas_total'], 2)
+        self.assertEqual(response.data['productividad_por_especie'][0]['total_cosechado'], Decimal('7400.00'))
+        self.assertEqual(response.data['rendimiento_parcelas_top20'][0]['nombre'], 'Parcela Test')
+
+        response = self.client.get('/api/reportes/productividad-parcelas/', {'temporada': '2024-II'})
+        self.assertEqual(response.data['productividad_por_especie'][0]['total_cosechado'], Decimal('1000.00'))
@@ -0,0 +1,71 @@
+"""
+Tests del generador de datos sintéticos
+Ejecutar con: python manage.py test test.test_datos_sinteticos
+"""
+from datetime import date
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from cooperativa.datos_sinteticos import GeneradorDatos, ParametrosGeneracion, limpiar
+from cooperativa.models import (
+    Usuario, Socio, Parcela, Cultivo, CicloCultivo, Cosecha, Campaign, Labor, ProductoCosechado,
+    Pedido, PedidoInsumo, PrecioTemporada, ProductividadParcela
+)
+
+
+def parametros(**extra):
+    return ParametrosGeneracion(**{'socios': 12, 'anios': 2, 'insumos': 5, 'hasta': date(2025, 10, 1), 'lote': 5, **extra})
+
+
+class DatosSinteticosTests(TestCase):
+
+    def _huella(self):
+        return list(Parcela.objects.order_by('socio__codigo_interno', 'nombre').values_list(
+            'socio__codigo_interno', 'superficie_hectareas', 'geohash'
+        ))
+
+    def test_genera_datos_consistentes(self):
+        conteos = GeneradorDatos(parametros()).generar()
+
+        self.assertEqual(conteos['Socio'], 12)
+        self.assertEqual(Socio.objects.filter(usuario__usuario__startswith='sint_').count(), 12)
+        self.assertGreaterEqual(Parcela.objects.count(), 12)
+        self.assertFalse(Parcela.objects.filter(geohash__isnull=True).exists())
+        self.assertEqual(Cultivo.objects.count(), conteos['Cultivo'])
+        # Las cosechas solo existen en ciclos finalizados y dentro del rango generado
+        self.assertFalse(Cosecha.objects.exclude(ciclo_cultivo__estado='FINALIZADO').exists())
+        self.assertFalse(CicloCultivo.objects.filter(fecha_inicio__gt=date(2025, 10, 1)).exists())
+        self.assertEqual(Campaign.objects.count(), 4)
+        self.assertFalse(ProductoCosechado.objects.exclude(labor__labor='COSECHA').exists())
+        self.assertFalse(Labor.objects.filter(estado='COMPLETADA', fecha_labor__gt=date(2025, 10, 1)).exists())
+        self.assertEqual(PrecioTemporada.objects.filter(activo=True).count(), 15)
+        for pedido in Pedido.objects.all()[:5]:
+            self.assertEqual(pedido.total, pedido.subtotal + pedido.impuestos)
+        for pedido in PedidoInsumo.objects.prefetch_related('items')[:5]:
+            self.assertEqual(pedido.total, sum(item.subtotal for item in pedido.items.all()))
+
+    def test_determinista_e_independiente_del_lote(self):
+        GeneradorDatos(parametros()).generar()
+        primera = self._huella()
+
+        eliminados = limpiar('sint')
+        self.assertEqual(eliminados['Socio'], 12)
+        self.assertFalse(Usuario.objects.exists())
+        self.assertFalse(Pedido.objects.exists())
+
+        GeneradorDatos(parametros(lote=12)).generar()
+        self.assertEqual(self._huella(), primera)
+
+    def test_comando(self):
+        salida = StringIO()
+        call_command(
+            'generar_datos_sinteticos', '--socios', '6', '--years', '1', '--insumos', '3',
+            '--hasta', '2025-10-01', '--prefijo', 'carga', stdout=salida
+        )
+        self.assertIn('filas generadas', salida.getvalue())
+        self.assertEqual(Usuario.objects.filter(usuario__startswith='carga_').count(), 6)
+        self.assertEqual(
+            ProductividadParcela.objects.count() > 0, Cosecha.objects.exists()
+        )
@@ -0,0 +1,91 @@
+"""
+Tests de la lectura rápida de listados (lectura_rapida.py, ?rapido=1)
+Ejecutar con: python manage.py test test.test_lectura_rapida
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.test import TestCase
+
+from cooperativa.models import (
+    Usuario, Comunidad, Socio, Parcela, Cultivo, Campaign, Labor, ProductoCosechado,
+    Semilla, Pesticida, Fertilizante
+)
+
+
+class LecturaRapidaTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = Usuario.objects.create_superuser(
+            ci_nit='11111111', nombres='Admin', apellidos='Listados',
+            email='listados@example.com', usuario='adminlistados', password='Admin123'
+        )
+        hoy = date.today()
+        for i, (dias, precio) in enumerate([(10, Decimal('12.50')), (400, None), (45, Decimal('3.10'))]):
+            Semilla.objects.create(
+                especie='Maíz', variedad='Cubano', cantidad=Decimal('100.25'), unidad_medida='kg',
+                fecha_vencimiento=hoy + timedelta(days=dias), porcentaje_germinacion=Decimal('90.50'),
+                lote=f'L-{i}', proveedor='Proveedor', precio_unitario=precio
+            )
+        Pesticida.objects.create(
+            nombre_comercial='Karate', ingrediente_activo='Lambda', tipo_pesticida='INSECTICIDA',
+            concentracion='5%', cantidad=10, unidad_medida='L', fecha_vencimiento=hoy + timedelta(days=20),
+            lote='P-1', proveedor='Proveedor', precio_unitario=Decimal('50.00'), ubicacion_almacen='A-1'
+        )
+        Fertilizante.objects.create(
+            nombre_comercial='Urea', tipo_fertilizante='QUIMICO', composicion_npk='46-0-0',
+            cantidad=10, unidad_medida='kg', fecha_vencimiento=hoy + timedelta(days=90),
+            lote='F-1', proveedor='Proveedor', precio_unitario=Decimal('5.00'), ubicacion_almacen='A-1'
+        )
+        Fertilizante.objects.create(
+            nombre_comercial='Compost', tipo_fertilizante='ORGANICO', composicion_npk='2-1-1+5',
+            cantidad=50, unidad_medida='kg', materia_orgánica=Decimal('40.00'),
+            lote='F-2', proveedor='Proveedor', precio_unitario=Decimal('1.50'), ubicacion_almacen='A-2'
+        )
+
+        comunidad = Comunidad.objects.create(nombre='Comunidad', municipio='Municipio', departamento='Depto')
+        usuario = Usuario.objects.create_user(
+            ci_nit='22222222', nombres='Juan', apellidos='Pérez',
+            email='juan@example.com', usuario='juanp', password='Socio123'
+        )
+        socio = Socio.objects.create(usuario=usuario, comunidad=comunidad)
+        parcela = Parcela.objects.create(
+            socio=socio, nombre='Parcela Norte', superficie_hectareas=5,
+            latitud=-16.5, longitud=-68.0, estado='ACTIVA'
+        )
+        cultivo = Cultivo.objects.create(parcela=parcela, especie='Maíz', variedad='Cubano', hectareas_sembradas=4)
+        campania = Campaign.objects.create(
+            nombre='Campaña 2025', fecha_inicio=hoy - timedelta(days=60),
+            fecha_fin=hoy + timedelta(days=60), meta_produccion=Decimal('1000'),
+        )
+        # Una labor de campaña (sin parcela) y una de parcela
+        for lote, origen in ((1, {'campania': campania}), (2, {'parcela': parcela})):
+            labor = Labor.objects.create(fecha_labor=hoy, labor='COSECHA', estado='COMPLETADA', **origen)
+            ProductoCosechado.objects.create(
+                fecha_cosecha=hoy, cantidad=Decimal('100'), unidad_medida='kg', calidad='Premium',
+                cultivo=cultivo, labor=labor, lote=lote, ubicacion_almacen='Silo 1', **origen
+            )
+
+    def test_misma_salida_que_el_serializer(self):
+        self.client.force_login(self.admin)
+        for url in ('/api/semillas/', '/api/pesticidas/', '/api/fertilizantes/',
+                    '/api/labores/', '/api/productos-cosechados/'):
+            with self.subTest(url=url):
+                normal = self.client.get(url, {'ordering': 'creado_en'})
+                rapida = self.client.get(url, {'ordering': 'creado_en', 'rapido': '1'})
+                self.assertEqual(rapida.status_code, 200)
+                self.assertGreater(rapida.json()['count'], 0)
+                self.assertEqual(rapida.json(), normal.json())
+
+    def test_filtros_y_paginacion(self):
+        self.client.force_login(self.admin)
+        respuesta = self.client.get(
+            '/api/semillas/', {'rapido': '1', 'fecha_vencimiento_hasta': date.today() + timedelta(days=60),
+                               'page_size': 1, 'ordering': 'fecha_vencimiento'}
+        ).json()
+        self.assertEqual(respuesta['count'], 2)
+        self.assertEqual(len(respuesta['results']), 1)
+        self.assertEqual(respuesta['results'][0]['dias_para_vencer'], 10)
+        self.assertTrue(respuesta['results'][0]['esta_proxima_vencer'])
+        self.assertEqual(respuesta['results'][0]['valor_total'], 1253.125)
@@ -0,0 +1,47 @@
+"""
+Tests de los permisos de métodos de pago (TienePermisoMetodoPago)
+Ejecutar con: python manage.py test test.test_metodos_pago
+"""
+from django.test import TestCase
+
+from cooperativa.models import Usuario, PaymentMethod, BitacoraAuditoria
+
+
+class PermisoMetodosPagoTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = Usuario.objects.create_superuser(
+            ci_nit='60000001', nombres='Admin', apellidos='Pagos',
+            email='pagos@example.com', usuario='adminpagos', password='Admin123'
+        )
+        cls.usuario = Usuario.objects.create_user(
+            ci_nit='60000002', nombres='Sin', apellidos='Permiso',
+            email='sinpermiso@example.com', usuario='sinpermiso', password='Socio123'
+        )
+        cls.efectivo = PaymentMethod.objects.create(nombre='Efectivo', tipo='EFECTIVO', activo=True)
+
+    def test_vistas_de_funcion(self):
+        # Vistas @api_view: DRF no les asigna `action`
+        rutas = (
+            '/api/payment-methods/activos/', '/api/payment-methods/estadisticas/',
+            '/api/payment-methods/buscar-avanzado/',
+        )
+        self.client.force_login(self.admin)
+        for ruta in rutas:
+            self.assertEqual(self.client.get(ruta).status_code, 200, ruta)
+
+        self.client.force_login(self.usuario)
+        for ruta in rutas:
+            self.assertEqual(self.client.get(ruta).status_code, 403, ruta)
+
+    def test_reordenar_registra_bitacora(self):
+        self.client.force_login(self.admin)
+        response = self.client.post('/api/payment-methods/reordenar/', {
+            'metodos': [{'id': self.efectivo.pk, 'orden': 3}]
+        }, content_type='application/json')
+        self.assertEqual(response.status_code, 200, response.content)
+        self.efectivo.refresh_from_db()
+        self.assertEqual(self.efectivo.orden, 3)
+        bitacora = BitacoraAuditoria.objects.get(accion='REORDENAR_METODOS_PAGO')
+        self.assertEqual(bitacora.registro_id, 0)
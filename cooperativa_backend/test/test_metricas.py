@@ -0,0 +1,86 @@
+"""
+Tests del middleware de métricas y el endpoint /api/metrics
+Ejecutar con: python manage.py test test.test_metricas
+"""
+import re
+
+from django.test import TestCase, override_settings
+
+from cooperativa.metricas import registro
+from cooperativa.models import Usuario
+
+
+def _valor(texto, serie):
+    coincidencia = re.search(r'^' + re.escape(serie) + r' (\S+)$', texto, re.M)
+    return float(coincidencia.group(1)) if coincidencia else None
+
+
+@override_settings(METRICAS_TOKEN='secreto-prometheus')
+class MetricasTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = Usuario.objects.create_superuser(
+            ci_nit='11111111', nombres='Admin', apellidos='Metricas',
+            email='metricas@example.com', usuario='adminmetricas', password='Admin123'
+        )
+        cls.usuario = Usuario.objects.create_user(
+            ci_nit='22222222', nombres='Comun', apellidos='Metricas',
+            email='comun@example.com', usuario='comunmetricas', password='Comun123'
+        )
+
+    def setUp(self):
+        registro.reiniciar()
+
+    def _metricas(self):
+        respuesta = self.client.get('/api/metrics', HTTP_AUTHORIZATION='Bearer secreto-prometheus')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertTrue(respuesta['Content-Type'].startswith('text/plain; version=0.0.4'))
+        return respuesta.content.decode()
+
+    def test_registra_histogramas_por_ruta(self):
+        self.client.force_login(self.admin)
+        self.client.get('/api/socios/')
+        self.client.get('/api/socios/')
+        self.client.get('/api/no-existe/')
+        self.client.logout()
+
+        texto = self._metricas()
+        etiquetas = 'ruta="socio-list",metodo="GET"'
+        self.assertEqual(_valor(texto, f'cooperativa_http_requests_total{{{etiquetas},estado="200"}}'), 2)
+        self.assertEqual(_valor(texto, f'cooperativa_http_latencia_segundos_count{{{etiquetas}}}'), 2)
+        self.assertEqual(_valor(texto, f'cooperativa_http_latencia_segundos_bucket{{{etiquetas},le="+Inf"}}'), 2)
+        self.assertGreater(_valor(texto, f'cooperativa_sql_consultas_sum{{{etiquetas}}}'), 0)
+        self.assertIsNotNone(_valor(texto, f'cooperativa_sql_tiempo_segundos_sum{{{etiquetas}}}'))
+        self.assertGreater(_valor(texto, f'cooperativa_http_respuesta_bytes_sum{{{etiquetas}}}'), 0)
+        # Sin ruta resuelta se agrupa en una sola serie
+        self.assertIn('ruta="sin_ruta"', texto)
+        # El endpoint de métricas no se mide a sí mismo
+        self.assertNotIn('ruta="metricas"', texto)
+
+    @override_settings(METRICAS_MUESTREO=0.0)
+    def test_sin_muestreo_solo_cuenta_requests(self):
+        self.client.force_login(self.admin)
+        self.client.get('/api/socios/')
+        self.client.logout()
+
+        texto = self._metricas()
+        self.assertEqual(_valor(texto, 'cooperativa_http_requests_total{ruta="socio-list",metodo="GET",estado="200"}'), 1)
+        self.assertNotIn('cooperativa_http_latencia_segundos_count{ruta="socio-list"', texto)
+
+    @override_settings(METRICAS_CONSULTA_LENTA_MS=0)
+    def test_registra_consultas_lentas_con_la_vista(self):
+        self.client.force_login(self.admin)
+        with self.assertLogs('cooperativa.metricas', level='WARNING') as logs:
+            self.client.get('/api/socios/')
+        registros = [r for r in logs.records if r.getMessage() == 'consulta_lenta']
+        self.assertTrue(registros)
+        self.assertIn('socio-list', {r.vista for r in registros})
+
+    def test_acceso(self):
+        self.assertEqual(self.client.get('/api/metrics').status_code, 403)
+        self.assertEqual(self.client.get('/api/metrics', HTTP_AUTHORIZATION='Bearer otro').status_code, 403)
+        self.client.force_login(self.usuario)
+        self.assertEqual(self.client.get('/api/metrics').status_code, 403)
+        self.client.force_login(self.admin)
+        self.assertEqual(self.client.get('/api/metrics').status_code, 200)
@@ -0,0 +1,134 @@
+"""
+Tests del flujo asíncrono de pagos con Stripe contra el servidor local
+(cooperativa.stripe_local), sin red ni claves reales.
+Ejecutar con: python manage.py test test.test_pagos_stripe
+"""
+import json
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from cooperativa import pagos_stripe
+from cooperativa.models import Usuario, Pedido, Pago, BitacoraAuditoria
+from cooperativa.stripe_local import ServidorStripeLocal, firmar
+
+
+SECRETO_WEBHOOK = 'whsec_prueba_local'
+
+
+class PagosStripeTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.servidor = ServidorStripeLocal()
+        cls.servidor.iniciar()
+        cls.ajustes = override_settings(
+            STRIPE_API_BASE=cls.servidor.url,
+            STRIPE_SECRET_KEY='sk_test_local',
+            STRIPE_WEBHOOK_SECRET=SECRETO_WEBHOOK,
+            STRIPE_PAGOS_ASINCRONOS=False,
+        )
+        cls.ajustes.enable()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.ajustes.disable()
+        cls.servidor.detener()
+        super().tearDownClass()
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = Usuario.objects.create_superuser(
+            ci_nit='11111111', nombres='Admin', apellidos='Pagos',
+            email='pagos@example.com', usuario='adminpagos', password='Admin123'
+        )
+
+    def setUp(self):
+        self.pedido = Pedido.objects.create(
+            cliente_nombre='Cliente Stripe', numero_pedido='PED-STRIPE-1',
+            subtotal=Decimal('100.00'), impuestos=Decimal('0'), descuento=Decimal('0')
+        )
+        self.client.force_login(self.admin)
+
+    def _pagar(self, payment_method_id, monto='100.00'):
+        with self.captureOnCommitCallbacks(execute=True):
+            respuesta = self.client.post('/api/pagos/pagar_con_stripe/', {
+                'pedido_id': self.pedido.id, 'monto': monto, 'payment_method_id': payment_method_id,
+            }, content_type='application/json')
+        self.assertEqual(respuesta.status_code, 202, respuesta.content)
+        # La respuesta no espera a Stripe
+        self.assertEqual(respuesta.json()['pago']['estado'], 'PROCESANDO')
+        return Pago.objects.get(pk=respuesta.json()['pago']['id'])
+
+    def _webhook(self, evento, secreto=SECRETO_WEBHOOK):
+        payload = json.dumps(evento).encode()
+        return self.client.post(
+            '/api/pagos/stripe/webhook/', payload, content_type='application/json',
+            HTTP_STRIPE_SIGNATURE=firmar(payload, secreto)
+        )
+
+    def test_pago_exitoso_completa_el_pedido(self):
+        pago = self._pagar('pm_card_visa')
+
+        self.assertEqual(pago.estado, 'COMPLETADO')
+        self.assertTrue(pago.stripe_payment_intent_id.startswith('pi_local_'))
+        self.assertTrue(pago.stripe_charge_id.startswith('ch_local_'))
+        self.pedido.refresh_from_db()
+        self.assertEqual(self.pedido.estado, 'COMPLETADO')
+        self.assertTrue(BitacoraAuditoria.objects.filter(accion='PAGO_STRIPE_ENCOLADO', registro_id=pago.id).exists())
+        self.assertTrue(BitacoraAuditoria.objects.filter(accion='PAGO_STRIPE_COMPLETADO', registro_id=pago.id).exists())
+
+    def test_tarjeta_rechazada(self):
+        pago = self._pagar('pm_card_chargeDeclined')
+
+        self.assertEqual(pago.estado, 'FALLIDO')
+        self.assertIn('Tarjeta rechazada', pago.observaciones)
+        self.pedido.refresh_from_db()
+        self.assertEqual(self.pedido.estado, 'PENDIENTE')
+
+    def test_webhook_reconcilia_pago_en_proceso(self):
+        pago = self._pagar('pm_card_processing')
+        self.assertEqual(pago.estado, 'PROCESANDO')
+
+        evento = self.servidor.completar(pago.stripe_payment_intent_id, exito=True)
+        self.assertEqual(self._webhook(evento, secreto='whsec_otro').status_code, 400)
+        pago.refresh_from_db()
+        self.assertEqual(pago.estado, 'PROCESANDO')
+
+        respuesta = self._webhook(evento)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertTrue(respuesta.json()['procesado'])
+        pago.refresh_from_db()
+        self.assertEqual(pago.estado, 'COMPLETADO')
+
+        # Reentrega del mismo evento: sin efecto
+        self.assertEqual(self._webhook(evento).status_code, 200)
+        self.assertEqual(BitacoraAuditoria.objects.filter(accion='PAGO_STRIPE_COMPLETADO', registro_id=pago.id).count(), 1)
+
+    def test_reintento_no_cobra_dos_veces(self):
+        pago = self._pagar('pm_card_visa')
+        cobros = len(self.servidor.cobros)
+
+        # El worker murió antes de guardar la respuesta de Stripe
+        Pago.objects.filter(pk=pago.pk).update(estado='PROCESANDO', stripe_payment_intent_id=None)
+        self.assertEqual(pagos_stripe.procesar_pago(pago.pk), 'COMPLETADO')
+
+        self.assertEqual(len(self.servidor.cobros), cobros)
+        pago.refresh_from_db()
+        self.assertEqual(pago.estado, 'COMPLETADO')
+
+    def test_comando_reconcilia_sin_webhook(self):
+        pago = self._pagar('pm_card_processing')
+        self.servidor.completar(pago.stripe_payment_intent_id, exito=False)
+        Pago.objects.filter(pk=pago.pk).update(actualizado_en=timezone.now() - timezone.timedelta(hours=1))
+
+        salida = StringIO()
+        call_command('reconciliar_pagos_stripe', stdout=salida)
+
+        self.assertIn('1 pagos revisados', salida.getvalue())
+        pago.refresh_from_db()
+        self.assertEqual(pago.estado, 'FALLIDO')
@@ -0,0 +1,159 @@
+"""
+Tests de los precios por temporada (precios_temporada.py)
+Ejecutar con: python manage.py test test.test_precios_temporada
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from cooperativa import precios_temporada
+from cooperativa.models import (
+    Usuario, Comunidad, Socio, Semilla, Fertilizante, PrecioTemporada, PedidoInsumo
+)
+
+
+class PreciosTemporadaTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = Usuario.objects.create_superuser(
+            ci_nit='50000001', nombres='Admin', apellidos='Precios',
+            email='precios@example.com', usuario='adminprecios', password='Admin123'
+        )
+        usuario = Usuario.objects.create_user(
+            ci_nit='50000002', nombres='Ana', apellidos='Quispe',
+            email='ana@example.com', usuario='ana', password='Socio123'
+        )
+        comunidad = Comunidad.objects.create(nombre='Comunidad', municipio='Municipio', departamento='Depto')
+        cls.socio = Socio.objects.create(usuario=usuario, comunidad=comunidad, estado='ACTIVO')
+
+        futuro = date.today() + timedelta(days=400)
+        cls.semilla = Semilla.objects.create(
+            especie='Maíz', variedad='Cubano', cantidad=500, unidad_medida='kg',
+            fecha_vencimiento=futuro, porcentaje_germinacion=90,
+            lote='L-1', proveedor='Semillas del Oriente', precio_unitario=Decimal('10.00')
+        )
+        cls.fertilizante = Fertilizante.objects.create(
+            nombre_comercial='Urea', tipo_fertilizante='QUIMICO', composicion_npk='46-0-0',
+            cantidad=100, unidad_medida='kg', fecha_vencimiento=futuro,
+            lote='F-1', proveedor='Fertisur', precio_unitario=Decimal('5.00'), ubicacion_almacen='A-1'
+        )
+
+        cls.hoy = date.today()
+        # Temporada larga y otra más corta que empieza después y la solapa hoy
+        cls.larga = cls._precio(-60, 60, 'INVIERNO', '12.00')
+        cls.corta = cls._precio(-5, 5, 'PRIMAVERA', '11.00', mayoreo='9.50', minimo='50')
+        cls._precio(-200, -100, 'VERANO', '8.00')
+        cls._precio(-1, 1, 'OTOÑO', '1.00', activo=False)
+
+    @classmethod
+    def _precio(cls, desde, hasta, temporada, venta, mayoreo=None, minimo=None, activo=True):
+        return PrecioTemporada.objects.create(
+            tipo_insumo='SEMILLA', semilla=cls.semilla, temporada=temporada,
+            fecha_inicio=cls.hoy + timedelta(days=desde), fecha_fin=cls.hoy + timedelta(days=hasta),
+            precio_venta=Decimal(venta), precio_mayoreo=mayoreo and Decimal(mayoreo),
+            cantidad_minima_mayoreo=minimo and Decimal(minimo), activo=activo,
+        )
+
+    def setUp(self):
+        # Los datos de setUpTestData no renuevan la versión (on_commit)
+        cache.clear()
+        self.client.force_login(self.admin)
+
+    def _dia(self, dias):
+        return self.hoy + timedelta(days=dias)
+
+    def test_busqueda_en_el_indice(self):
+        indice = precios_temporada.indice()
+        semilla = ('SEMILLA', self.semilla.pk)
+        self.assertEqual(indice.buscar(*semilla, self.hoy), self.corta)
+        self.assertEqual(indice.buscar(*semilla, self._dia(10)), self.larga)
+        self.assertEqual(indice.buscar(*semilla, self._dia(-150)).temporada, 'VERANO')
+        self.assertIsNone(indice.buscar(*semilla, self._dia(-80)))
+        self.assertIsNone(indice.buscar(*semilla, self._dia(90)))
+        self.assertIsNone(indice.buscar('FERTILIZANTE', self.fertilizante.pk, self.hoy))
+
+        # Sin cambios en la tabla se reutiliza; un cambio confirmado lo reconstruye
+        self.assertIs(precios_temporada.indice(), indice)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.corta.activo = False
+            self.corta.save()
+        self.assertEqual(precios_temporada.indice().buscar(*semilla, self.hoy), self.larga)
+
+    def test_cotizar_carrito(self):
+        items = [
+            {'tipo_insumo': 'SEMILLA', 'insumo_id': self.semilla.pk, 'cantidad': '10'},
+            {'tipo_insumo': 'SEMILLA', 'insumo_id': self.semilla.pk, 'cantidad': '60'},
+            {'tipo_insumo': 'FERTILIZANTE', 'insumo_id': self.fertilizante.pk, 'cantidad': '2'},
+        ]
+        respuesta = self.client.post('/api/insumos/cotizar/', {'items': items}, content_type='application/json')
+        self.assertEqual(respuesta.status_code, 200)
+        cotizacion = respuesta.json()
+        precios = [(Decimal(str(i['precio_unitario'])), i['temporada_aplicada'], i['mayoreo']) for i in cotizacion['items']]
+        self.assertEqual(precios, [
+            (Decimal('11'), 'PRIMAVERA', False), (Decimal('9.5'), 'PRIMAVERA', True), (Decimal('5'), None, False)
+        ])
+        self.assertEqual(Decimal(str(cotizacion['total'])), Decimal('110') + Decimal('570') + Decimal('10'))
+        self.assertEqual(cotizacion['items'][0]['insumo_nombre'], 'Maíz - Cubano')
+
+        # Otra fecha
+        cotizacion = self.client.post('/api/insumos/cotizar/', {
+            'fecha': self._dia(30).isoformat(), 'items': items[:1]
+        }, content_type='application/json').json()
+        self.assertEqual(cotizacion['items'][0]['temporada_aplicada'], 'INVIERNO')
+
+        errores = self.client.post('/api/insumos/cotizar/', {'items': [
+            items[0], {'tipo_insumo': 'PESTICIDA', 'insumo_id': 999, 'cantidad': '1'},
+        ]}, content_type='application/json')
+        self.assertEqual(errores.status_code, 400)
+        self.assertEqual(errores.json()['items'][0], {})
+        self.assertIn('insumo_id', errores.json()['items'][1])
+
+    def test_consultas_no_crecen_con_el_carrito(self):
+        precios_temporada.indice()
+
+        def consultas(cantidad):
+            items = [
+                {'tipo_insumo': tipo, 'insumo_id': insumo.pk, 'cantidad': str(i + 1)}
+                for i in range(cantidad)
+                for tipo, insumo in (('SEMILLA', self.semilla), ('FERTILIZANTE', self.fertilizante))
+            ]
+            with CaptureQueriesContext(connection) as capturadas:
+                respuesta = self.client.post('/api/insumos/cotizar/', {'items': items}, content_type='application/json')
+            self.assertEqual(len(respuesta.json()['items']), cantidad * 2)
+            return len(capturadas)
+
+        self.assertEqual(consultas(2), consultas(40))
+
+    def test_pedido_con_precio_del_servidor(self):
+        respuesta = self.client.post('/api/ventas/insumos/pedidos/', {
+            'socio': self.socio.pk,
+            'motivo_solicitud': 'Siembra de invierno',
+            'items': [
+                # El precio enviado por el cliente se ignora
+                {'tipo_insumo': 'SEMILLA', 'semilla': self.semilla.pk, 'cantidad': '60', 'precio_unitario': '0.01'},
+                {'tipo_insumo': 'FERTILIZANTE', 'fertilizante': self.fertilizante.pk, 'cantidad': '4'},
+                {'tipo_insumo': 'SEMILLA', 'semilla': self.semilla.pk, 'cantidad': '5'},
+            ],
+        }, content_type='application/json')
+        self.assertEqual(respuesta.status_code, 201, respuesta.content)
+
+        pedido = PedidoInsumo.objects.get()
+        detalles = list(pedido.items.values_list('precio_unitario', 'temporada_aplicada', 'subtotal', 'unidad_medida'))
+        self.assertEqual(detalles, [
+            (Decimal('9.50'), 'PRIMAVERA', Decimal('570.00'), 'kg'),
+            (Decimal('5.00'), None, Decimal('20.00'), 'kg'),
+            (Decimal('11.00'), 'PRIMAVERA', Decimal('55.00'), 'kg'),
+        ])
+        self.assertEqual(pedido.total, Decimal('645.00'))
+        self.assertEqual(pedido.items.first().insumo_nombre, 'Maíz - Cubano')
+
+        invalido = self.client.post('/api/ventas/insumos/pedidos/', {
+            'socio': self.socio.pk,
+            'items': [{'tipo_insumo': 'SEMILLA', 'fertilizante': self.fertilizante.pk, 'cantidad': '1'}],
+        }, content_type='application/json')
+        self.assertEqual(invalido.status_code, 400)
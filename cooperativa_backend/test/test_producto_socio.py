@@ -0,0 +1,151 @@
+"""
+Tests del socio propietario desnormalizado en ProductoCosechado (CU15)
+Ejecutar con: python manage.py test test.test_producto_socio
+"""
+import importlib
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.apps import apps
+from django.test import TestCase
+
+from cooperativa.models import (
+    Usuario, Comunidad, Socio, Parcela, Cultivo, Campaign, CampaignPartner,
+    Labor, ProductoCosechado, TransferenciaParcela, RegistroEliminado
+)
+
+
+class ProductoSocioTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = Usuario.objects.create_superuser(
+            ci_nit='11111111', nombres='Admin', apellidos='Productos',
+            email='productos@example.com', usuario='adminproductos', password='Admin123'
+        )
+        comunidad = Comunidad.objects.create(
+            nombre='Comunidad Test', municipio='Municipio Test', departamento='Departamento Test'
+        )
+        cls.socios = []
+        for i, (nombres, apellidos) in enumerate([('Juan', 'Pérez'), ('María', 'López')]):
+            usuario = Usuario.objects.create_user(
+                ci_nit=f'2222222{i}', nombres=nombres, apellidos=apellidos,
+                email=f'socio{i}@example.com', usuario=f'socio{i}', password='Socio123'
+            )
+            cls.socios.append(Socio.objects.create(usuario=usuario, comunidad=comunidad))
+        cls.parcela = Parcela.objects.create(
+            socio=cls.socios[0], nombre='Parcela Norte', superficie_hectareas=5,
+            latitud=-16.5, longitud=-68.0, estado='ACTIVA'
+        )
+        cls.cultivo = Cultivo.objects.create(
+            parcela=cls.parcela, especie='Maíz', variedad='Cubano', hectareas_sembradas=4
+        )
+        cls.campania = Campaign.objects.create(
+            nombre='Campaña 2025', fecha_inicio=date.today() - timedelta(days=60),
+            fecha_fin=date.today() + timedelta(days=60), meta_produccion=Decimal('1000'),
+        )
+
+    def _producto(self, lote, **origen):
+        labor = Labor.objects.create(fecha_labor=date.today(), labor='COSECHA', estado='COMPLETADA', **origen)
+        return ProductoCosechado.objects.create(
+            fecha_cosecha=date.today(), cantidad=Decimal('100'), unidad_medida='kg', calidad='Premium',
+            cultivo=self.cultivo, labor=labor, lote=lote, ubicacion_almacen='Silo 1', **origen
+        )
+
+    def test_socio_al_crear_y_transferir(self):
+        producto = self._producto(1, parcela=self.parcela)
+        self.assertEqual(producto.socio, self.socios[0])
+        self.assertEqual(producto.socio_nombre, 'Juan Pérez')
+
+        TransferenciaParcela.objects.create(
+            parcela=self.parcela, socio_anterior=self.socios[0], socio_nuevo=self.socios[1],
+            fecha_transferencia=date.today(), motivo='Venta'
+        )
+        producto.refresh_from_db()
+        self.assertEqual(producto.socio, self.socios[1])
+        self.assertEqual(producto.socio_nombre, 'María López')
+
+    def test_cambio_de_propietario_por_patch(self):
+        directo = self._producto(5, parcela=self.parcela)
+        # Sin parcela propia ni socios en la campania: el del cultivo
+        por_cultivo = self._producto(6, campania=self.campania)
+
+        self.client.force_login(self.admin)
+        respuesta = self.client.patch(
+            f'/api/parcelas/{self.parcela.pk}/', {'socio': self.socios[1].pk}, content_type='application/json'
+        )
+        self.assertEqual(respuesta.status_code, 200, respuesta.content)
+        for producto in (directo, por_cultivo):
+            producto.refresh_from_db()
+            self.assertEqual(producto.socio, self.socios[1])
+        # Lápida para los dispositivos del propietario anterior
+        self.assertTrue(RegistroEliminado.objects.filter(
+            tabla='parcelas', objeto_id=self.parcela.pk, socio=self.socios[0]
+        ).exists())
+
+    def test_socio_de_campania_y_cambio_de_nombre(self):
+        # Sin socios asignados: el del cultivo
+        producto = self._producto(2, campania=self.campania)
+        self.assertEqual(producto.socio, self.socios[0])
+
+        CampaignPartner.objects.create(
+            campaign=self.campania, socio=self.socios[1], fecha_asignacion=date.today()
+        )
+        producto.refresh_from_db()
+        self.assertEqual(producto.socio, self.socios[1])
+
+        usuario = self.socios[1].usuario
+        usuario.apellidos = 'Quispe'
+        usuario.save()
+        producto.refresh_from_db()
+        self.assertEqual(producto.socio_nombre, 'María Quispe')
+
+    def test_filtro_por_socio_y_migracion(self):
+        propio = self._producto(3, parcela=self.parcela)
+        self._producto(4, campania=self.campania)
+        CampaignPartner.objects.create(
+            campaign=self.campania, socio=self.socios[1], fecha_asignacion=date.today()
+        )
+
+        self.client.force_login(self.admin)
+        respuesta = self.client.get('/api/productos-cosechados/', {'socio_id': self.socios[0].pk}).json()
+        self.assertEqual([p['id'] for p in respuesta['results']], [propio.pk])
+        self.assertEqual(respuesta['results'][0]['socio_nombre'], 'Juan Pérez')
+
+        # El backfill de la migración deja los mismos valores
+        esperado = dict(ProductoCosechado.objects.values_list('pk', 'socio_id'))
+        ProductoCosechado.objects.update(socio=None, socio_nombre='')
+        migracion = importlib.import_module('cooperativa.migrations.0011_productocosechado_socio')
+        migracion.completar_socio(apps, None)
+        self.assertEqual(dict(ProductoCosechado.objects.values_list('pk', 'socio_id')), esperado)
+        self.assertFalse(ProductoCosechado.objects.filter(socio_nombre='').exists())
+
+    def test_filtro_por_socio_incluye_campanias_compartidas(self):
+        propio = self._producto(7, parcela=self.parcela)
+        de_campania = self._producto(8, campania=self.campania)
+        for dias, socio in enumerate(reversed(self.socios)):
+            CampaignPartner.objects.create(
+                campaign=self.campania, socio=socio, fecha_asignacion=date.today() - timedelta(days=dias)
+            )
+        de_campania.refresh_from_db()
+        self.assertEqual(de_campania.socio, self.socios[1])
+
+        # El socio asignado que no es el propietario también ve el producto
+        self.client.force_login(self.admin)
+        for ruta in ('/api/productos-cosechados/', '/api/productos-cosechados/buscar-avanzado/'):
+            for socio, esperados in ((self.socios[0], {propio.pk, de_campania.pk}),
+                                     (self.socios[1], {de_campania.pk})):
+                respuesta = self.client.get(ruta, {'socio_id': socio.pk}).json()
+                self.assertEqual(respuesta['count'], len(esperados), ruta)
+                self.assertEqual({p['id'] for p in respuesta['results']}, esperados, ruta)
+
+    def test_reporte_inventario_promedio_dias(self):
+        self._producto(20, parcela=self.parcela)
+        antiguo = self._producto(21, parcela=self.parcela)
+        ProductoCosechado.objects.filter(pk=antiguo.pk).update(fecha_cosecha=date.today() - timedelta(days=10))
+
+        self.client.force_login(self.admin)
+        respuesta = self.client.get('/api/productos-cosechados/reporte_inventario/')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.json()['resumen']['productos_almacen'], 2)
+        self.assertEqual(respuesta.json()['resumen']['promedio_dias_almacen'], 5.0)
@@ -0,0 +1,90 @@
+"""
+Tests del renderer/parser orjson (renderizado.py) y de CompresionMiddleware
+Ejecutar con: python manage.py test test.test_renderizado
+"""
+import gzip
+import io
+import uuid
+from datetime import date, datetime, time, timedelta, timezone
+from decimal import Decimal
+
+from django.test import TestCase, override_settings
+from rest_framework.exceptions import ParseError
+from rest_framework.renderers import JSONRenderer
+
+from cooperativa.models import Usuario, Semilla
+from cooperativa.renderizado import ORJSONParser, ORJSONRenderer
+
+
+class RenderizadoTests(TestCase):
+
+    def test_misma_salida_que_json_renderer(self):
+        datos = {
+            'decimal': Decimal('12.50'),
+            'fecha_hora': datetime(2025, 6, 30, 14, 5, 7, 123456, tzinfo=timezone.utc),
+            'fecha_hora_local': datetime(2025, 6, 30, 10, 5, 7, tzinfo=timezone(timedelta(hours=-4))),
+            'fecha': date(2025, 6, 30),
+            'hora': time(8, 30),
+            'duracion': timedelta(days=1, seconds=30),
+            'uuid': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+            'texto': 'Maíz Cubano',
+            'conjunto': {3},
+            1: [None, True, 1.5],
+        }
+        self.assertEqual(ORJSONRenderer().render(datos), JSONRenderer().render(datos))
+        self.assertEqual(ORJSONRenderer().render(None), b'')
+        # Enteros fuera de 64 bits: se recurre al renderer estándar
+        self.assertEqual(ORJSONRenderer().render({'n': 2 ** 70}), b'{"n":1180591620717411303424}')
+
+    def test_parser(self):
+        parser = ORJSONParser()
+        self.assertEqual(parser.parse(io.BytesIO('{"especie": "Maíz", "cantidad": 2}'.encode())),
+                         {'especie': 'Maíz', 'cantidad': 2})
+        with self.assertRaises(ParseError):
+            parser.parse(io.BytesIO(b'{"especie": '))
+
+
+@override_settings(COMPRESION_MIN_BYTES=1024)
+class CompresionTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = Usuario.objects.create_superuser(
+            ci_nit='11111111', nombres='Admin', apellidos='Compresion',
+            email='compresion@example.com', usuario='admincompresion', password='Admin123'
+        )
+        for i in range(20):
+            Semilla.objects.create(
+                especie='Maíz', variedad='Cubano', cantidad=Decimal('100'), unidad_medida='kg',
+                fecha_vencimiento=date(2030, 1, 1), porcentaje_germinacion=Decimal('90'),
+                lote=f'L-{i}', proveedor='Proveedor', precio_unitario=Decimal('12.50')
+            )
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def test_gzip_sobre_el_umbral(self):
+        normal = self.client.get('/api/semillas/')
+        comprimida = self.client.get('/api/semillas/', HTTP_ACCEPT_ENCODING='gzip, deflate')
+        self.assertNotIn('Content-Encoding', normal)
+        self.assertEqual(comprimida['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', comprimida['Vary'])
+        self.assertEqual(gzip.decompress(comprimida.content), normal.content)
+        self.assertEqual(int(comprimida['Content-Length']), len(comprimida.content))
+
+        # q=0 rechaza la codificación
+        rechazada = self.client.get('/api/semillas/', HTTP_ACCEPT_ENCODING='gzip;q=0')
+        self.assertNotIn('Content-Encoding', rechazada)
+
+    def test_html_no_se_comprime(self):
+        # Las páginas del admin llevan el token CSRF (BREACH)
+        respuesta = self.client.get('/admin/', HTTP_ACCEPT_ENCODING='gzip')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertGreater(len(respuesta.content), 1024)
+        self.assertNotIn('Content-Encoding', respuesta)
+
+    def test_bajo_el_umbral_no_se_comprime(self):
+        respuesta = self.client.get('/api/semillas/', {'page_size': 1}, HTTP_ACCEPT_ENCODING='gzip')
+        self.assertLess(len(respuesta.content), 1024)
+        self.assertNotIn('Content-Encoding', respuesta)
+        self.assertIn('Accept-Encoding', respuesta['Vary'])
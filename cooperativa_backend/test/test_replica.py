@@ -0,0 +1,90 @@
+"""
+Tests del router de réplica de lectura (replica.py)
+Ejecutar con: python manage.py test test.test_replica
+"""
+from django.db import router, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, override_settings
+
+from cooperativa import cache_reportes
+from cooperativa.models import Socio
+from cooperativa.replica import (
+    REPLICA_COOKIE, ReplicaMiddleware, RouterReplica, en_replica, leer_de_primaria
+)
+from cooperativa.versiones import condicional
+
+
+@override_settings(REPLICA_ALIAS='replica')
+class RouterReplicaTests(TestCase):
+
+    def setUp(self):
+        self.router = RouterReplica()
+
+    def _lee(self):
+        return self.router.db_for_read(Socio)
+
+    def test_contextos(self):
+        self.assertEqual(self._lee(), 'default')
+        with en_replica():
+            self.assertEqual(self._lee(), 'replica')
+            with transaction.atomic():
+                self.assertEqual(self._lee(), 'default')
+            with en_replica():
+                self.assertEqual(self.router.db_for_write(Socio), 'default')
+                self.assertEqual(self._lee(), 'default')
+            # La escritura del bloque interior fija también el exterior
+            self.assertEqual(self._lee(), 'default')
+
+        self.assertFalse(self.router.allow_migrate('replica', 'cooperativa'))
+        self.assertIsNone(self.router.allow_migrate('default', 'cooperativa'))
+
+    @override_settings(REPLICA_ALIAS=None)
+    def test_sin_replica_no_interviene(self):
+        with en_replica():
+            self.assertIsNone(self._lee())
+        # Router instalado en settings: las lecturas siguen en la primaria
+        self.assertEqual(router.db_for_read(Socio), 'default')
+
+    def test_middleware(self):
+        decisiones = []
+
+        def vista(request):
+            decisiones.append(self._lee())
+            if request.GET.get('escribir'):
+                self.router.db_for_write(Socio)
+                decisiones.append(self._lee())
+            return HttpResponse('ok')
+
+        middleware = ReplicaMiddleware(vista)
+        fabrica = RequestFactory()
+
+        respuesta = middleware(fabrica.get('/api/socios/'))
+        self.assertEqual(decisiones, ['replica'])
+        self.assertNotIn(REPLICA_COOKIE, respuesta.cookies)
+
+        # Un GET que escribe lee de la primaria desde entonces y fija al cliente
+        decisiones.clear()
+        respuesta = middleware(fabrica.get('/api/socios/', {'escribir': 1}))
+        self.assertEqual(decisiones, ['replica', 'default'])
+        self.assertIn(REPLICA_COOKIE, respuesta.cookies)
+
+        decisiones.clear()
+        fijado = fabrica.get('/api/socios/')
+        fijado.COOKIES[REPLICA_COOKIE] = '1'
+        middleware(fijado)
+        middleware(fabrica.post('/api/socios/'))
+        ReplicaMiddleware(leer_de_primaria(vista))(fabrica.get('/api/sincronizacion/cambios/'))
+        self.assertEqual(decisiones, ['default', 'default', 'default'])
+
+    def test_resultados_por_version_leen_de_la_primaria(self):
+        decisiones = []
+
+        def vista(request=None):
+            decisiones.append(self._lee())
+            return HttpResponse('ok')
+
+        # El ETag y la caché de reportes usan la versión confirmada en la primaria
+        ReplicaMiddleware(condicional(Socio)(vista))(RequestFactory().get('/api/catalogo/'))
+        with en_replica():
+            cache_reportes._calcular(vista, (), {}, 'reporte:prueba', [1], 60, 60)
+        self.assertEqual(decisiones, ['default', 'default'])
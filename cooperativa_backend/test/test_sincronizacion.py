@@ -0,0 +1,149 @@
+"""
+Tests de la sincronización incremental para la app móvil (sincronizacion.py)
+Ejecutar con: python manage.py test test.test_sincronizacion
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+
+from cooperativa.models import (
+    Usuario, Comunidad, Socio, Parcela, Cultivo, Semilla, TransferenciaParcela, RegistroEliminado
+)
+from cooperativa.sincronizacion import ELIMINADOS, codificar_token, purgar
+
+
+@override_settings(SINCRONIZACION_MARGEN_SEGUNDOS=0)
+class SincronizacionTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = Usuario.objects.create_superuser(
+            ci_nit='11111111', nombres='Admin', apellidos='Sync',
+            email='sync@example.com', usuario='adminsync', password='Admin123'
+        )
+        comunidad = Comunidad.objects.create(nombre='Comunidad', municipio='Municipio', departamento='Depto')
+        cls.usuarios, cls.socios, cls.parcelas = [], [], []
+        for i in range(2):
+            usuario = Usuario.objects.create_user(
+                ci_nit=f'3000000{i}', nombres=f'Socio {"AB"[i]}', apellidos='Sync',
+                email=f'sync{i}@example.com', usuario=f'sync{i}', password='Socio123'
+            )
+            socio = Socio.objects.create(usuario=usuario, comunidad=comunidad, estado='ACTIVO')
+            parcela = Parcela.objects.create(
+                socio=socio, nombre=f'Parcela {i}', superficie_hectareas=5,
+                latitud=-16.5, longitud=-68.0, estado='ACTIVA'
+            )
+            Cultivo.objects.create(parcela=parcela, especie='Maíz', hectareas_sembradas=2)
+            cls.usuarios.append(usuario)
+            cls.socios.append(socio)
+            cls.parcelas.append(parcela)
+        cls.semilla = Semilla.objects.create(
+            especie='Maíz', variedad='Cubano', cantidad=Decimal('100'), unidad_medida='kg',
+            fecha_vencimiento=date(2030, 1, 1), porcentaje_germinacion=Decimal('90'),
+            lote='L-1', proveedor='Proveedor', precio_unitario=Decimal('12.50')
+        )
+
+    def _sincronizar(self, usuario=None, **params):
+        self.client.force_login(usuario or self.admin)
+        respuesta = self.client.get('/api/sincronizacion/cambios/', {k: v for k, v in params.items() if v})
+        self.assertEqual(respuesta.status_code, 200, respuesta.content)
+        return respuesta.json()
+
+    @staticmethod
+    def _ids(datos, tabla):
+        contenido = datos['tablas'].get(tabla, {})
+        if 'filas' not in contenido:
+            return set()
+        posicion = contenido['columnas'].index('id')
+        return {fila[posicion] for fila in contenido['filas']}
+
+    def test_completa_y_luego_solo_cambios(self):
+        inicial = self._sincronizar()
+        self.assertFalse(inicial['hay_mas'])
+        self.assertEqual(self._ids(inicial, 'parcelas'), {p.id for p in self.parcelas})
+        self.assertEqual(self._ids(inicial, 'semillas'), {self.semilla.id})
+        socios = inicial['tablas']['socios']
+        fila = dict(zip(socios['columnas'], socios['filas'][0]))
+        self.assertEqual(fila['apellidos'], 'Sync')
+
+        sin_cambios = self._sincronizar(token=inicial['token'])
+        self.assertEqual(sin_cambios['tablas'], {})
+
+        parcela = self.parcelas[0]
+        parcela.nombre = 'Parcela renombrada'
+        parcela.save()
+        self.usuarios[1].nombres = 'Beatriz'
+        self.usuarios[1].save()
+        cultivo_id = Cultivo.objects.get(parcela=self.parcelas[1]).id
+        Cultivo.objects.filter(id=cultivo_id).delete()
+
+        delta = self._sincronizar(token=sin_cambios['token'])
+        self.assertEqual(set(delta['tablas']), {'parcelas', 'socios', 'cultivos'})
+        self.assertEqual(self._ids(delta, 'parcelas'), {parcela.id})
+        self.assertEqual(self._ids(delta, 'socios'), {self.socios[1].id})
+        self.assertEqual(delta['tablas']['cultivos'], {'eliminados': [cultivo_id]})
+
+    def test_lotes_con_limite(self):
+        for i in range(5):
+            Semilla.objects.create(
+                especie='Trigo', cantidad=Decimal('10'), unidad_medida='kg',
+                fecha_vencimiento=date(2030, 1, 1), porcentaje_germinacion=Decimal('80'),
+                lote=f'T-{i}', proveedor='Proveedor', precio_unitario=Decimal('5')
+            )
+        vistos, token, lotes = set(), None, 0
+        while True:
+            datos = self._sincronizar(token=token, tablas='semillas', limite=2)
+            filas = self._ids(datos, 'semillas')
+            self.assertLessEqual(len(filas), 2)
+            self.assertFalse(filas & vistos)
+            vistos |= filas
+            token, lotes = datos['token'], lotes + 1
+            if not datos['hay_mas']:
+                break
+        self.assertEqual(vistos, set(Semilla.objects.values_list('id', flat=True)))
+        self.assertEqual(lotes, 3)
+
+    def test_socio_ve_solo_lo_suyo_y_transferencias(self):
+        anterior, nuevo = self.usuarios
+        inicial = self._sincronizar(anterior)
+        self.assertEqual(self._ids(inicial, 'socios'), {self.socios[0].id})
+        self.assertEqual(self._ids(inicial, 'parcelas'), {self.parcelas[0].id})
+        token_nuevo = self._sincronizar(nuevo)['token']
+
+        TransferenciaParcela.objects.create(
+            parcela=self.parcelas[0], socio_anterior=self.socios[0], socio_nuevo=self.socios[1],
+            fecha_transferencia=date.today(), motivo='Venta'
+        )
+        cultivo = Cultivo.objects.get(parcela=self.parcelas[0])
+
+        datos = self._sincronizar(anterior, token=inicial['token'])
+        self.assertEqual(datos['tablas']['parcelas'], {'eliminados': [self.parcelas[0].id]})
+        self.assertEqual(datos['tablas']['cultivos'], {'eliminados': [cultivo.id]})
+
+        datos = self._sincronizar(nuevo, token=token_nuevo)
+        self.assertEqual(self._ids(datos, 'parcelas'), {self.parcelas[0].id})
+        self.assertEqual(self._ids(datos, 'cultivos'), {cultivo.id})
+        self.assertNotIn('eliminados', datos['tablas']['parcelas'])
+
+        # El personal sigue viendo la parcela: cambia de dueño, sin lápida
+        datos = self._sincronizar(self.admin, token=inicial['token'])
+        self.assertEqual(set(datos['tablas']['parcelas']), {'columnas', 'filas'})
+
+    def test_token_invalido_o_vencido(self):
+        self.client.force_login(self.admin)
+        respuesta = self.client.get('/api/sincronizacion/cambios/', {'token': 'no-es-un-token'})
+        self.assertEqual(respuesta.status_code, 400)
+        respuesta = self.client.get('/api/sincronizacion/cambios/', {'tablas': 'socios,pagos'})
+        self.assertEqual(respuesta.status_code, 400)
+
+        antiguo = timezone.now() - timedelta(days=31)
+        microsegundos = int(antiguo.timestamp() * 1_000_000)
+        token = codificar_token({ELIMINADOS: [microsegundos, 0], 'socios': [microsegundos, 0]})
+        respuesta = self.client.get('/api/sincronizacion/cambios/', {'token': token})
+        self.assertEqual(respuesta.status_code, 410)
+        self.assertTrue(respuesta.json()['reiniciar'])
+
+        RegistroEliminado.objects.create(tabla='socios', objeto_id=1, eliminado_en=antiguo)
+        self.assertEqual(purgar(), 1)
@@ -0,0 +1,84 @@
+"""
+Tests del vencimiento masivo de inventario (vencimientos.py)
+Ejecutar con: python manage.py test test.test_vencimientos
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from cooperativa import vencimientos
+from cooperativa.models import Usuario, Semilla, Pesticida, Fertilizante, BitacoraAuditoria
+
+
+class VencimientosTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = Usuario.objects.create_superuser(
+            ci_nit='11111111', nombres='Admin', apellidos='Vencimientos',
+            email='vencimientos@example.com', usuario='adminvenc', password='Admin123'
+        )
+        futuro = date.today() + timedelta(days=10)
+        cls.semillas = [
+            Semilla.objects.create(
+                especie='Maíz', variedad='Cubano', cantidad=100, unidad_medida='kg',
+                fecha_vencimiento=futuro, porcentaje_germinacion=90,
+                lote=f'L-{i}', proveedor='Proveedor', precio_unitario=Decimal('10.00')
+            )
+            for i in range(3)
+        ]
+        cls.pesticida = Pesticida.objects.create(
+            nombre_comercial='Karate', ingrediente_activo='Lambda', tipo_pesticida='INSECTICIDA',
+            concentracion='5%', cantidad=10, unidad_medida='L', fecha_vencimiento=futuro,
+            lote='P-1', proveedor='Proveedor', precio_unitario=Decimal('50.00'), ubicacion_almacen='A-1'
+        )
+        cls.fertilizante = Fertilizante.objects.create(
+            nombre_comercial='Urea', tipo_fertilizante='QUIMICO', composicion_npk='46-0-0',
+            cantidad=10, unidad_medida='kg', fecha_vencimiento=futuro,
+            lote='F-1', proveedor='Proveedor', precio_unitario=Decimal('5.00'), ubicacion_almacen='A-1'
+        )
+
+    def _vencer(self, modelo, *pks):
+        # Sin save(): así quedan las filas que vencen sin volver a guardarse
+        modelo.objects.filter(pk__in=pks).update(fecha_vencimiento=date.today() - timedelta(days=1))
+
+    def test_barrido_un_update_por_tabla(self):
+        self._vencer(Semilla, self.semillas[0].pk, self.semillas[1].pk)
+        self._vencer(Pesticida, self.pesticida.pk)
+        self._vencer(Fertilizante, self.fertilizante.pk)
+
+        with CaptureQueriesContext(connection) as consultas:
+            resultado = vencimientos.barrer_vencidos(vida_util_productos=0)
+
+        self.assertEqual(resultado, {'semilla': 2, 'pesticida': 1, 'fertilizante': 1})
+        updates = [q for q in consultas.captured_queries if q['sql'].startswith('UPDATE')]
+        self.assertEqual(len(updates), 3)
+        self.assertEqual(Semilla.objects.filter(estado='VENCIDA').count(), 2)
+        self.assertEqual(Semilla.objects.get(pk=self.semillas[2].pk).estado, 'DISPONIBLE')
+        self.assertEqual(Pesticida.objects.get(pk=self.pesticida.pk).estado, 'VENCIDO')
+        self.assertEqual(Fertilizante.objects.get(pk=self.fertilizante.pk).estado, 'VENCIDO')
+
+        registro = BitacoraAuditoria.objects.get(accion='VENCIMIENTO_MASIVO')
+        self.assertEqual(registro.detalles['actualizadas']['semilla'], 2)
+
+        # Idempotente: un segundo barrido no cambia nada ni registra
+        self.assertFalse(any(vencimientos.barrer_vencidos(vida_util_productos=0).values()))
+        self.assertEqual(BitacoraAuditoria.objects.filter(accion='VENCIMIENTO_MASIVO').count(), 1)
+
+    def test_comando_y_listados(self):
+        self._vencer(Semilla, self.semillas[0].pk)
+
+        salida = StringIO()
+        call_command('barrer_vencimientos', stdout=salida)
+        self.assertIn('semilla: 1', salida.getvalue())
+
+        self.client.force_login(self.admin)
+        vencidas = self.client.get('/api/semillas/vencidas/').json()
+        self.assertEqual(vencidas['count'], 1)
+        proximas = self.client.get('/api/semillas/proximas_vencer/', {'dias': 30}).json()
+        self.assertEqual(proximas['count'], 2)
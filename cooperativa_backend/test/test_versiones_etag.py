@@ -0,0 +1,109 @@
+"""
+Tests del GET condicional (ETag / Last-Modified) de los catálogos
+Ejecutar con: python manage.py test test.test_versiones_etag
+"""
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from cooperativa.models import Usuario, Semilla, PrecioTemporada, PaymentMethod
+
+
+class VersionesEtagTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = Usuario.objects.create_superuser(
+            ci_nit='11111111', nombres='Admin', apellidos='Etag',
+            email='etag@example.com', usuario='adminetag', password='Admin123'
+        )
+        cls.semilla = Semilla.objects.create(
+            especie='Maíz', variedad='Cubano', cantidad=100, unidad_medida='kg',
+            fecha_vencimiento=date.today() + timedelta(days=365), porcentaje_germinacion=90,
+            lote='L-ETAG', proveedor='Proveedor', precio_unitario=Decimal('10.00')
+        )
+        hoy = date.today()
+        cls.precio = PrecioTemporada.objects.create(
+            tipo_insumo='SEMILLA', semilla=cls.semilla, temporada='VERANO',
+            fecha_inicio=hoy - timedelta(days=10), fecha_fin=hoy + timedelta(days=10),
+            precio_venta=Decimal('12.00'), activo=True
+        )
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def test_catalogo_estatico(self):
+        respuesta = self.client.get('/api/labores/tipos_labor/')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertIn('no-cache', respuesta['Cache-Control'])
+        etag = respuesta['ETag']
+
+        respuesta = self.client.get('/api/labores/tipos_labor/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 304)
+        self.assertEqual(respuesta['ETag'], etag)
+        # Otro catálogo, otro ETag
+        self.assertNotEqual(self.client.get('/api/labores/estados_labor/')['ETag'], etag)
+
+    def test_precios_vigentes_304_sin_consultar_ni_serializar(self):
+        url = '/api/ventas/insumos/precios-temporada/?vigente=true'
+        respuesta = self.client.get(url)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.json()['count'], 1)
+        etag = respuesta['ETag']
+        self.assertNotEqual(self.client.get('/api/ventas/insumos/precios-temporada/')['ETag'], etag)
+
+        with CaptureQueriesContext(connection) as consultas:
+            respuesta = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 304)
+        self.assertFalse(any('precio_temporada' in c['sql'] for c in consultas.captured_queries))
+
+        # Cambia un insumo relacionado: nueva versión al confirmar
+        with self.captureOnCommitCallbacks(execute=True):
+            self.semilla.variedad = 'Cubano Amarillo'
+            self.semilla.save()
+        respuesta = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertNotEqual(respuesta['ETag'], etag)
+        self.assertEqual(respuesta.json()['results'][0]['semilla_detalle']['variedad'], 'Cubano Amarillo')
+
+    def test_metodos_pago_last_modified(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            PaymentMethod.objects.create(nombre='Efectivo', tipo='EFECTIVO', activo=True)
+        respuesta = self.client.get('/api/payment-methods/dropdown/')
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(len(respuesta.json()), 1)
+
+        respuesta = self.client.get(
+            '/api/payment-methods/dropdown/', HTTP_IF_MODIFIED_SINCE=respuesta['Last-Modified']
+        )
+        self.assertEqual(respuesta.status_code, 304)
+
+        # Una escritura sin confirmar aún no cambia la versión; al confirmar, sí
+        etag = self.client.get('/api/payment-methods/dropdown/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            PaymentMethod.objects.create(nombre='Pago QR', tipo='DIGITAL', activo=True)
+            self.assertEqual(self.client.get('/api/payment-methods/dropdown/')['ETag'], etag)
+        respuesta = self.client.get('/api/payment-methods/dropdown/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(len(respuesta.json()), 2)
+
+    def test_actualizaciones_masivas_renuevan_la_version(self):
+        url = '/api/ventas/insumos/precios-temporada/?vigente=true'
+        etag = self.client.get(url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'/api/semillas/{self.semilla.pk}/marcar_vencida/')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            metodo = PaymentMethod.objects.create(nombre='Efectivo', tipo='EFECTIVO', activo=True)
+        etag = self.client.get('/api/payment-methods/dropdown/')['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post('/admin/cooperativa/paymentmethod/', {
+                'action': 'desactivar_metodos', '_selected_action': [metodo.pk]
+            })
+        respuesta = self.client.get('/api/payment-methods/dropdown/', HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(respuesta.status_code, 200)
+        self.assertEqual(respuesta.json(), [])